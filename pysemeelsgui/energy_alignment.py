@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.energy_alignment
+   :synopsis: Energy alignment of a series of spectra by FFT cross-correlation.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Energy alignment of a series of spectra by FFT cross-correlation.
+
+The shift of every spectrum relative to a reference spectrum is the position of the maximum of their
+cross-correlation, computed for the whole stack with one FFT and refined to a fraction of channel with a parabola.
+The shifts are then applied to the whole stack at once by linear interpolation or in Fourier space.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import csv
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+METHOD_LINEAR = "linear"
+METHOD_FOURIER = "fourier"
+
+SHIFT_TABLE_DTYPE = np.dtype([("index", np.int64),
+                              ("shift_channels", np.float64),
+                              ("shift_eV", np.float64)])
+
+
+def estimate_shifts(counts, reference, max_shift_channels=None):
+    """
+    Estimate the shift in channel of every spectrum of the stack relative to the reference spectrum.
+
+    A positive shift means the spectrum is at higher channels than the reference.
+
+    :param counts: 2D array, one spectrum per row.
+    :param reference: 1D reference spectrum with the same number of channels.
+    :param max_shift_channels: limit the search of the correlation maximum to this shift.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    reference = np.asarray(reference, dtype=np.float64)
+    number_channels = counts.shape[1]
+
+    # Zero padding to twice the length avoids the circular wrap-around of the correlation. The minimum is removed
+    # rather than the mean, the negative tails left by the mean bias the correlation maximum of a narrow window.
+    fft_size = 2 * number_channels
+    counts_fft = np.fft.rfft(counts - counts.min(axis=1, keepdims=True), n=fft_size, axis=1)
+    reference_fft = np.fft.rfft(reference - reference.min(), n=fft_size)
+    correlation = np.fft.irfft(counts_fft * np.conj(reference_fft)[np.newaxis, :], n=fft_size, axis=1)
+
+    # Reorder the lags from -number_channels to number_channels - 1.
+    correlation = np.fft.fftshift(correlation, axes=1)
+    lags = np.arange(fft_size) - number_channels
+
+    if max_shift_channels is not None:
+        correlation[:, np.abs(lags) > max_shift_channels] = -np.inf
+
+    rows = np.arange(counts.shape[0])
+    maximum_index = np.argmax(correlation, axis=1)
+    center_index = np.clip(maximum_index, 1, fft_size - 2)
+    correlation_left = correlation[rows, center_index - 1]
+    correlation_center = correlation[rows, center_index]
+    correlation_right = correlation[rows, center_index + 1]
+
+    denominator = correlation_left - 2.0 * correlation_center + correlation_right
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(np.isfinite(denominator) & (denominator != 0.0),
+                          0.5 * (correlation_left - correlation_right) / denominator, 0.0)
+    offset = np.clip(offset, -0.5, 0.5)
+
+    return lags[maximum_index] + offset
+
+
+def apply_shifts(counts, shifts_channels, method=METHOD_LINEAR, fill_value=0.0):
+    """
+    Shift every spectrum of the stack by minus its shift, in a single batched operation.
+
+    :param method: :py:data:`METHOD_LINEAR` for a linear interpolation or :py:data:`METHOD_FOURIER` for a Fourier
+        shift (band limited interpolation).
+    :param fill_value: counts of the channels moved from outside the spectrum with the linear interpolation.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    shifts_channels = np.asarray(shifts_channels, dtype=np.float64).reshape(-1, 1)
+    number_channels = counts.shape[1]
+
+    if method == METHOD_LINEAR:
+        positions = np.arange(number_channels)[np.newaxis, :] + shifts_channels
+        valid = (positions >= 0.0) & (positions <= number_channels - 1)
+        index_low = np.clip(np.floor(positions).astype(np.int64), 0, number_channels - 2)
+        fraction = positions - index_low
+
+        counts_low = np.take_along_axis(counts, index_low, axis=1)
+        counts_high = np.take_along_axis(counts, index_low + 1, axis=1)
+        aligned_counts = counts_low + fraction * (counts_high - counts_low)
+        aligned_counts[~valid] = fill_value
+        return aligned_counts
+    elif method == METHOD_FOURIER:
+        # Pad with a ramp from the last to the first channel, so the periodic signal has no step causing ringing.
+        fft_size = 2 * number_channels
+        ramp = (np.arange(number_channels) + 1.0) / (number_channels + 1.0)
+        padding = counts[:, -1:] + (counts[:, :1] - counts[:, -1:]) * ramp[np.newaxis, :]
+        counts_fft = np.fft.rfft(np.concatenate((counts, padding), axis=1), axis=1)
+        frequencies = np.fft.rfftfreq(fft_size)[np.newaxis, :]
+        counts_fft *= np.exp(2.0j * np.pi * frequencies * shifts_channels)
+        return np.fft.irfft(counts_fft, n=fft_size, axis=1)[:, :number_channels]
+    else:
+        raise ValueError("Unknown alignment method: {}".format(method))
+
+
+class EnergyAlignment(object):
+    """
+    Align a stack of spectra on a reference spectrum.
+
+    :param energies_eV: energy axis with a constant channel width shared by all the spectra.
+    :param counts: 2D array, one spectrum per row.
+    :param reference: index of the reference spectrum in the stack or 1D reference spectrum.
+    :param energy_window_eV: optional (minimum, maximum) energy range used for the cross-correlation, for example
+        around the zero loss peak.
+    """
+
+    def __init__(self, energies_eV, counts, reference=0, energy_window_eV=None):
+        self.energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        self.counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+        if self.energies_eV.shape != self.counts.shape[1:]:
+            raise ValueError("Energy axis has {:d} channels, counts have {:d}".format(len(self.energies_eV),
+                                                                                    self.counts.shape[1]))
+
+        if np.ndim(reference) == 0:
+            self.reference = self.counts[int(reference)]
+        else:
+            self.reference = np.asarray(reference, dtype=np.float64)
+
+        self.energy_window_eV = energy_window_eV
+        self.max_shift_channels = None
+
+        self.shifts_channels = None
+        self.aligned_counts = None
+
+    @classmethod
+    def from_spectra(cls, spectra, **kwargs):
+        """
+        Create the alignment of all the spectra opened in a :py:class:`pysemeelsgui.spectra.Spectra`.
+        """
+        _file_paths, energies_eV, counts = spectra.get_stack()
+        return cls(energies_eV, counts, **kwargs)
+
+    @classmethod
+    def from_elv_files(cls, elv_files, **kwargs):
+        """
+        Create the alignment of a list of :py:class:`ElvFile`, without the last channel as in the zero loss peak
+        analysis.
+        """
+        energies_eV = elv_files[0].energies_eV[:-1]
+        counts = [elv_file.counts[:-1] for elv_file in elv_files]
+        return cls(energies_eV, counts, **kwargs)
+
+    @property
+    def channel_width_eV(self):
+        return float(np.mean(np.diff(self.energies_eV)))
+
+    @property
+    def shifts_eV(self):
+        if self.shifts_channels is None:
+            return None
+        return self.shifts_channels * self.channel_width_eV
+
+    def compute_shifts(self):
+        if self.energy_window_eV is not None:
+            minimum_eV, maximum_eV = self.energy_window_eV
+            mask = (self.energies_eV >= minimum_eV) & (self.energies_eV <= maximum_eV)
+            counts = self.counts[:, mask]
+            reference = self.reference[mask]
+        else:
+            counts = self.counts
+            reference = self.reference
+
+        self.shifts_channels = estimate_shifts(counts, reference, self.max_shift_channels)
+        return self.shifts_channels
+
+    def align(self, method=METHOD_LINEAR):
+        """
+        Compute the shifts if needed and align the whole stack.
+
+        :return: the aligned stack.
+        """
+        if self.shifts_channels is None:
+            self.compute_shifts()
+
+        self.aligned_counts = apply_shifts(self.counts, self.shifts_channels, method)
+        return self.aligned_counts
+
+    def get_shift_table(self):
+        shift_table = np.zeros(len(self.shifts_channels), dtype=SHIFT_TABLE_DTYPE)
+        shift_table["index"] = np.arange(len(self.shifts_channels))
+        shift_table["shift_channels"] = self.shifts_channels
+        shift_table["shift_eV"] = self.shifts_eV
+        return shift_table
+
+    def export_shift_table_csv(self, file_path, labels=None):
+        shift_table = self.get_shift_table()
+        if labels is None:
+            labels = [""] * len(shift_table)
+
+        with open(file_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(SHIFT_TABLE_DTYPE.names + ("spectrum",))
+            for row, label in zip(shift_table, labels):
+                writer.writerow([int(row["index"]), repr(float(row["shift_channels"])), repr(float(row["shift_eV"])),
+                                 label])
@@ -47,8 +47,10 @@ matplotlib.use('Qt5Agg')
 # Project modules.
 from pysemeelsgui.spectrum_widget import SpectrumWidget
 from pysemeelsgui.zero_loss_peak_widget import ZeroLossPeakWidget
+from pysemeelsgui.zero_loss_peak_drift_widget import ZeroLossPeakDriftWidget
 from pysemeelsgui.projects_widget import ProjectWidget
 from pysemeelsgui.spectra import Spectra
+from pysemeelsgui.spectrum_accumulator import SpectrumAccumulator
 
 # Globals and constants variables.
 
@@ -60,9 +62,15 @@ class MainWindow(QMainWindow):
         self.main_widget = None
         self.graphic_settings_dock = None
         self.zero_loss_peak_dock = None
+        self.zero_loss_peak_drift_dock = None
         self.projects_dock = None
 
         self.spectra = Spectra()
+        self.spectrum_accumulator = SpectrumAccumulator(align=True)
+        self.spectra.add_listener(self.accumulate_spectrum)
+
+        self.accumulate_action = None
+        self.align_accumulation_action = None
 
         self.init_ui()
 
@@ -91,6 +99,22 @@ class MainWindow(QMainWindow):
         exit_action.setStatusTip('Exit application')
         exit_action.triggered.connect(self.close)
 
+        # Accumulation actions
+        self.accumulate_action = QAction('Accumulate spectra', self)
+        self.accumulate_action.setCheckable(True)
+        self.accumulate_action.setStatusTip('Display the running sum of the opened spectra')
+        self.accumulate_action.toggled.connect(self.toggle_accumulation)
+
+        self.align_accumulation_action = QAction('Align accumulated spectra', self)
+        self.align_accumulation_action.setCheckable(True)
+        self.align_accumulation_action.setChecked(self.spectrum_accumulator.align)
+        self.align_accumulation_action.setStatusTip('Align each spectrum on the first one before adding it')
+        self.align_accumulation_action.toggled.connect(self.toggle_accumulation_alignment)
+
+        reset_accumulation_action = QAction('Reset accumulation', self)
+        reset_accumulation_action.setStatusTip('Restart the running sum')
+        reset_accumulation_action.triggered.connect(self.reset_accumulation)
+
         # Status bar.
         self.statusBar()
 
@@ -103,6 +127,10 @@ class MainWindow(QMainWindow):
         view_menu = menubar.addMenu('&View')
 
         analysis_menu = menubar.addMenu('&Analysis')
+        analysis_menu.addAction(self.accumulate_action)
+        analysis_menu.addAction(self.align_accumulation_action)
+        analysis_menu.addAction(reset_accumulation_action)
+        analysis_menu.addSeparator()
 
         # Toolbar
         file_toolbar = self.addToolBar('File')
@@ -129,6 +157,11 @@ class MainWindow(QMainWindow):
         analysis_menu.addAction(self.zero_loss_peak_dock.toggleViewAction())
         self.addDockWidget(Qt.AllDockWidgetAreas, self.zero_loss_peak_dock)
 
+        self.zero_loss_peak_drift_dock = ZeroLossPeakDriftWidget(self, self.spectra)
+        analysis_menu.addAction(self.zero_loss_peak_drift_dock.toggleViewAction())
+        self.addDockWidget(Qt.AllDockWidgetAreas, self.zero_loss_peak_drift_dock)
+        self.tabifyDockWidget(self.zero_loss_peak_dock, self.zero_loss_peak_drift_dock)
+
         self.projects_dock = ProjectWidget(self)
         view_menu.addAction(self.projects_dock.toggleViewAction())
         self.addDockWidget(Qt.AllDockWidgetAreas, self.projects_dock)
@@ -158,6 +191,10 @@ class MainWindow(QMainWindow):
         settings.setValue("visible", self.zero_loss_peak_dock.isVisible())
         settings.endGroup()
 
+        settings.beginGroup("zero_loss_peak_drift_dock")
+        settings.setValue("visible", self.zero_loss_peak_drift_dock.isVisible())
+        settings.endGroup()
+
         settings.beginGroup("projects_dock")
         settings.setValue("visible", self.projects_dock.isVisible())
         settings.endGroup()
@@ -196,6 +233,15 @@ class MainWindow(QMainWindow):
                 self.zero_loss_peak_dock.setVisible(False)
         settings.endGroup()
 
+        settings.beginGroup("zero_loss_peak_drift_dock")
+        visible_value = settings.value("visible")
+        if visible_value is not None:
+            if visible_value == "true":
+                self.zero_loss_peak_drift_dock.setVisible(True)
+            elif visible_value == "false":
+                self.zero_loss_peak_drift_dock.setVisible(False)
+        settings.endGroup()
+
     def parse_arguments(self, argv):
         option_parser = optparse.OptionParser()
         option_parser.add_option("-s", "--spectrum", action="store", type="string", dest="spectrum_file", help="Open a eels spectrum")
@@ -225,6 +271,38 @@ class MainWindow(QMainWindow):
         spectrum_data = elv_file.get_spectrum_data()
         self.main_widget.update_figure(spectrum_data)
 
+    def accumulate_spectrum(self, elv_file, file_path=None):
+        if not self.accumulate_action.isChecked():
+            return
+
+        try:
+            self.spectrum_accumulator.add(elv_file.energies_eV[:-1], elv_file.counts[:-1])
+        except ValueError as message:
+            logging.warning("Spectrum {} not accumulated: {}".format(file_path, message))
+            self.statusBar().showMessage("Spectrum not accumulated: {}".format(message), 5000)
+            return
+
+        self.statusBar().showMessage("{:d} spectra accumulated".format(self.spectrum_accumulator.number_spectra), 2000)
+
+    def toggle_accumulation(self, checked):
+        if checked:
+            self.main_widget.spectrum_canvas.accumulator = self.spectrum_accumulator
+        else:
+            self.main_widget.spectrum_canvas.accumulator = None
+        self.redraw_spectrum()
+
+    def toggle_accumulation_alignment(self, checked):
+        self.spectrum_accumulator.align = checked
+
+    def reset_accumulation(self):
+        self.spectrum_accumulator.reset()
+        self.redraw_spectrum()
+
+    def redraw_spectrum(self):
+        elv_file = self.spectra.get_current_elv_file()
+        if elv_file is not None:
+            self.main_widget.update_figure(elv_file.get_spectrum_data())
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.INFO)
@@ -36,6 +36,7 @@ import six
 from pysemeels.hitachi.eels_su.elv_file import ElvFile
 
 # Project modules.
+from pysemeelsgui.zero_loss_peak_batch_fit import stack_spectra
 
 # Globals and constants variables.
 
@@ -43,6 +44,9 @@ class Spectra(object):
     def __init__(self):
         self.spectra = {}
         self.current_elv_file = None
+        self.current_file_path = None
+
+        self.listeners = []
 
     def open_spectrum(self, file_names):
         if six.PY3:
@@ -58,11 +62,33 @@ class Spectra(object):
                     elv_file = ElvFile()
                     elv_file.read(elv_text_file)
 
-                    self.set_current_elv_file(elv_file)
+                    self.spectra[file_name] = elv_file
+                    self.set_current_elv_file(elv_file, file_name)
+
+    def add_listener(self, listener):
+        """
+        Register a callable ``listener(elv_file, file_path)`` called each time a new current spectrum is set.
+        """
+        self.listeners.append(listener)
 
-    def set_current_elv_file(self, elv_file):
+    def set_current_elv_file(self, elv_file, file_path=None):
         self.current_elv_file = elv_file
+        self.current_file_path = file_path
+
+        for listener in self.listeners:
+            listener(elv_file, file_path)
 
     def get_current_elv_file(self):
         return self.current_elv_file
 
+    def get_stack(self):
+        """
+        Stack of all the opened spectra, without the last channel as in the zero loss peak analysis.
+
+        :return: file paths, energy axis of the spectra and 2D array of counts with one spectrum per row.
+        :raise ValueError: if the spectra do not have the same energy axis.
+        """
+        file_paths = sorted(self.spectra.keys())
+        energies_eV, counts = stack_spectra([self.spectra[file_path] for file_path in file_paths], file_paths)
+
+        return file_paths, energies_eV, counts
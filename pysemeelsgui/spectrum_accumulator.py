@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.spectrum_accumulator
+   :synopsis: Streaming sum of spectra.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Streaming sum of spectra.
+
+The spectra are added one at a time, as they are loaded or acquired, and only the running sum, mean and sum of squared
+deviations (Welford's method) are kept, so the memory used does not depend on the number of spectra.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.energy_alignment import estimate_shifts, apply_shifts, METHOD_LINEAR
+
+# Globals and constants variables.
+
+
+class SpectrumAccumulator(object):
+    """
+    Running sum, mean and variance of spectra.
+
+    :param align: align each spectrum on the first one by cross-correlation before adding it.
+    :param energy_window_eV: optional (minimum, maximum) energy range used for the alignment.
+    :param max_shift_channels: optional limit of the alignment shift.
+    """
+
+    def __init__(self, align=False, energy_window_eV=None, max_shift_channels=None):
+        self.align = align
+        self.energy_window_eV = energy_window_eV
+        self.max_shift_channels = max_shift_channels
+        self.alignment_method = METHOD_LINEAR
+
+        self.reset()
+
+    def reset(self):
+        self.number_spectra = 0
+        self.energies_eV = None
+        self.reference = None
+        self.shifts_channels = []
+
+        self._sum = None
+        self._mean = None
+        self._m2 = None
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def variance(self):
+        """
+        Unbiased variance per channel, None with less than two spectra.
+        """
+        if self.number_spectra < 2:
+            return None
+        return self._m2 / (self.number_spectra - 1)
+
+    @property
+    def standard_deviation(self):
+        variance = self.variance
+        if variance is None:
+            return None
+        return np.sqrt(variance)
+
+    def add(self, energies_eV, counts):
+        """
+        Add one spectrum, aligned on the first spectrum if needed.
+
+        :return: the shift in channel applied to the spectrum.
+        """
+        counts = np.asarray(counts, dtype=np.float64)
+
+        if self.number_spectra == 0:
+            self.energies_eV = np.array(energies_eV, dtype=np.float64)
+            self.reference = counts.copy()
+            self._sum = np.zeros_like(counts)
+            self._mean = np.zeros_like(counts)
+            self._m2 = np.zeros_like(counts)
+        elif counts.shape != self._sum.shape:
+            raise ValueError("Spectrum has {:d} channels instead of {:d}".format(len(counts), len(self._sum)))
+
+        shift_channels = 0.0
+        if self.align and self.number_spectra > 0:
+            shift_channels = self._compute_shift(counts)
+            counts = apply_shifts(counts, [shift_channels], self.alignment_method)[0]
+        self.shifts_channels.append(shift_channels)
+
+        self.number_spectra += 1
+        self._sum += counts
+        delta = counts - self._mean
+        self._mean += delta / self.number_spectra
+        self._m2 += delta * (counts - self._mean)
+
+        return shift_channels
+
+    def _compute_shift(self, counts):
+        if self.energy_window_eV is not None:
+            minimum_eV, maximum_eV = self.energy_window_eV
+            mask = (self.energies_eV >= minimum_eV) & (self.energies_eV <= maximum_eV)
+            counts = counts[mask]
+            reference = self.reference[mask]
+        else:
+            reference = self.reference
+
+        return float(estimate_shifts(counts[np.newaxis, :], reference, self.max_shift_channels)[0])
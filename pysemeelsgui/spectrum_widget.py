@@ -33,6 +33,7 @@ import os.path
 
 # Third party modules.
 import six
+import numpy as np
 from qtpy.QtWidgets import QSizePolicy, QWidget, QVBoxLayout
 from qtpy.QtCore import Qt
 
@@ -64,6 +65,7 @@ class SpectrumCanvas(FigureCanvas):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
 
         self.spectra = spectra
+        self.accumulator = None
 
         self.axes = self.fig.add_subplot(111)
 
@@ -88,7 +90,10 @@ class SpectrumCanvas(FigureCanvas):
 
     def update_figure(self, spectrum_data):
         self.axes.cla()
-        self.axes.plot(spectrum_data.energies_eV, spectrum_data.counts)
+        if self.accumulator is not None and self.accumulator.number_spectra > 0:
+            self.plot_accumulated_spectrum()
+        else:
+            self.axes.plot(spectrum_data.energies_eV, spectrum_data.counts)
 
         self.axes.set_xlabel(r"Energy loss (eV)")
         self.axes.set_ylabel(r"Electron intensity")
@@ -96,6 +101,20 @@ class SpectrumCanvas(FigureCanvas):
         self.figure.tight_layout()
         self.draw()
 
+    def plot_accumulated_spectrum(self):
+        accumulator = self.accumulator
+        label = "Sum of {:d} spectra".format(accumulator.number_spectra)
+        self.axes.plot(accumulator.energies_eV, accumulator.sum, label=label)
+
+        standard_deviation = accumulator.standard_deviation
+        if standard_deviation is not None:
+            # Standard deviation of the sum estimated from the spread of the added spectra.
+            sum_error = standard_deviation * np.sqrt(accumulator.number_spectra)
+            self.axes.fill_between(accumulator.energies_eV, accumulator.sum - sum_error, accumulator.sum + sum_error,
+                                   alpha=0.3, linewidth=0)
+
+        self.axes.legend(loc='best')
+
     def resize_canvas(self):
         self.figure.tight_layout()
         self.draw()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tests.test_energy_alignment
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.energy_alignment`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.energy_alignment`.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import unittest
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.energy_alignment import EnergyAlignment, estimate_shifts, apply_shifts, METHOD_FOURIER
+from pysemeelsgui.zero_loss_peak_stack import create_gaussian_stack
+
+
+# Globals and constants variables.
+
+class TestEnergyAlignment(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.energy_alignment`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.energies_eV, self.counts, self.positions_eV = create_gaussian_stack(10, channel_width_eV=0.05,
+                                                                                 noise=False)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testEstimateShiftsInteger(self):
+        """
+        Test the sign and value of integer shifts.
+        """
+        reference = np.zeros(64)
+        reference[20:23] = [1.0, 3.0, 1.0]
+        counts = np.array([np.roll(reference, shift) for shift in [-5, 0, 7]])
+
+        shifts_channels = estimate_shifts(counts, reference)
+
+        np.testing.assert_allclose([-5.0, 0.0, 7.0], shifts_channels, atol=1.0e-2)
+
+    def testEstimateShiftsMaximum(self):
+        """
+        Test the limit of the correlation search.
+        """
+        reference = np.zeros(64)
+        reference[20:23] = [1.0, 3.0, 1.0]
+        counts = np.roll(reference, 7)[np.newaxis, :]
+
+        shifts_channels = estimate_shifts(counts, reference, max_shift_channels=3)
+
+        self.assertLessEqual(abs(shifts_channels[0]), 3.5)
+
+    def testAlignSubChannel(self):
+        """
+        Test the sub-channel shifts and the alignment of gaussian peaks.
+        """
+        alignment = EnergyAlignment(self.energies_eV, self.counts, reference=0)
+        aligned_counts = alignment.align()
+
+        np.testing.assert_allclose(self.positions_eV - self.positions_eV[0], alignment.shifts_eV, atol=1.0e-3)
+        self.assertEqual(self.counts.shape, aligned_counts.shape)
+        np.testing.assert_allclose(self.counts[0], aligned_counts[0])
+        self.assertLess(np.max(np.abs(aligned_counts - self.counts[0])), 0.01 * np.max(self.counts))
+
+        shift_table = alignment.get_shift_table()
+        np.testing.assert_array_equal(np.arange(10), shift_table["index"])
+        np.testing.assert_allclose(alignment.shifts_channels * 0.05, shift_table["shift_eV"])
+
+    def testApplyShiftsFourier(self):
+        """
+        Test the Fourier shift.
+        """
+        alignment = EnergyAlignment(self.energies_eV, self.counts, reference=0)
+        alignment.compute_shifts()
+        aligned_counts = apply_shifts(self.counts, alignment.shifts_channels, METHOD_FOURIER)
+
+        self.assertLess(np.max(np.abs(aligned_counts - self.counts[0])), 0.001 * np.max(self.counts))
+
+    def testApplyShiftsLinearFill(self):
+        """
+        Test the channels moved from outside the spectrum.
+        """
+        counts = np.arange(5, dtype=np.float64)[np.newaxis, :]
+
+        aligned_counts = apply_shifts(counts, [1.5], fill_value=-1.0)
+
+        np.testing.assert_allclose([[1.5, 2.5, 3.5, -1.0, -1.0]], aligned_counts)
+
+    def testUnknownMethod(self):
+        """
+        Test that an unknown method is rejected.
+        """
+        self.assertRaises(ValueError, apply_shifts, self.counts, np.zeros(10), "spline")
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
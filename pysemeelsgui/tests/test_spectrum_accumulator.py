@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tests.test_spectrum_accumulator
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.spectrum_accumulator`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.spectrum_accumulator`.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import unittest
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.spectrum_accumulator import SpectrumAccumulator
+from pysemeelsgui.zero_loss_peak_stack import create_gaussian_stack
+
+
+# Globals and constants variables.
+
+class TestSpectrumAccumulator(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.spectrum_accumulator`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testWelford(self):
+        """
+        Test the running sum, mean and variance against numpy.
+        """
+        energies_eV, counts, _positions_eV = create_gaussian_stack(25, number_channels=128)
+
+        accumulator = SpectrumAccumulator()
+        self.assertIsNone(accumulator.sum)
+        for spectrum_counts in counts:
+            accumulator.add(energies_eV, spectrum_counts)
+
+        self.assertEqual(25, accumulator.number_spectra)
+        np.testing.assert_allclose(counts.sum(axis=0), accumulator.sum)
+        np.testing.assert_allclose(counts.mean(axis=0), accumulator.mean)
+        np.testing.assert_allclose(counts.var(axis=0, ddof=1), accumulator.variance)
+        np.testing.assert_allclose(counts.std(axis=0, ddof=1), accumulator.standard_deviation)
+
+        accumulator.reset()
+        self.assertEqual(0, accumulator.number_spectra)
+        self.assertIsNone(accumulator.variance)
+
+    def testAlign(self):
+        """
+        Test that the aligned sum has the peak at the position of the first spectrum.
+        """
+        energies_eV, counts, positions_eV = create_gaussian_stack(10, channel_width_eV=0.05, noise=False)
+
+        accumulator = SpectrumAccumulator(align=True, energy_window_eV=(-5.0, 5.0))
+        for spectrum_counts in counts:
+            accumulator.add(energies_eV, spectrum_counts)
+
+        shifts_eV = np.array(accumulator.shifts_channels) * 0.05
+        np.testing.assert_allclose(positions_eV - positions_eV[0], shifts_eV, atol=1.0e-3)
+        np.testing.assert_allclose(10.0 * counts[0], accumulator.sum, atol=0.01 * 10.0 * counts.max())
+
+    def testChannelMismatch(self):
+        """
+        Test that a spectrum with a different number of channels is rejected.
+        """
+        accumulator = SpectrumAccumulator()
+        accumulator.add(np.arange(4), np.ones(4))
+
+        self.assertRaises(ValueError, accumulator.add, np.arange(5), np.ones(5))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tests.test_zero_loss_peak_batch_fit
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.zero_loss_peak_batch_fit`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.zero_loss_peak_batch_fit`.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+import csv
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.zero_loss_peak_batch_fit import ZeroLossPeakBatchFit, ZeroLossPeakFitResult, stack_spectra
+from pysemeelsgui.zero_loss_peak_stack import create_gaussian_stack
+
+
+# Globals and constants variables.
+
+
+def fit_maximum(energies_eV, counts):
+    """
+    Picklable fit function for the tests, the position is the energy of the maximum.
+    """
+    if np.max(counts) <= 0.0:
+        raise ValueError("No peak")
+
+    result = ZeroLossPeakFitResult()
+    result.position_eV = energies_eV[np.argmax(counts)]
+    result.height = np.max(counts)
+    result.parameters["center"] = (result.position_eV, 0.01)
+    return result
+
+
+class SimpleSpectrum(object):
+    """
+    Spectrum with the energy axis and counts of an .elv file.
+    """
+
+    def __init__(self, energies_eV, counts):
+        self.energies_eV = energies_eV
+        self.counts = counts
+
+
+class TestZeroLossPeakBatchFit(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.zero_loss_peak_batch_fit`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.energies_eV, self.counts, self.positions_eV = create_gaussian_stack(40, channel_width_eV=0.1,
+                                                                                 noise=False)
+        self.temporary_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.temporary_dir)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testStackSpectra(self):
+        """
+        Test that the spectra are stacked only when they have the same energy axis.
+        """
+        spectra = [SimpleSpectrum(self.energies_eV, self.counts[index]) for index in range(3)]
+        energies_eV, counts = stack_spectra(spectra, ["a.elv", "b.elv", "c.elv"])
+
+        np.testing.assert_array_equal(self.energies_eV[:-1], energies_eV)
+        self.assertEqual((3, len(self.energies_eV) - 1), counts.shape)
+
+        spectra[2] = SimpleSpectrum(self.energies_eV + 0.5, self.counts[2])
+        with self.assertRaises(ValueError) as context:
+            stack_spectra(spectra, ["a.elv", "b.elv", "c.elv"])
+        self.assertIn("c.elv", str(context.exception))
+
+        spectra[2] = SimpleSpectrum(self.energies_eV[:-2], self.counts[2][:-2])
+        self.assertRaises(ValueError, stack_spectra, spectra, ["a.elv", "b.elv", "c.elv"])
+
+        energies_eV, counts = stack_spectra([], [])
+        self.assertEqual(0, len(energies_eV))
+
+    def testFitOrder(self):
+        """
+        Test that the pool results are in the input order and equal to the serial results.
+        """
+        batch_fit = ZeroLossPeakBatchFit(self.energies_eV, self.counts, number_workers=3, fit_function=fit_maximum)
+        results = batch_fit.fit()
+
+        serial_batch_fit = ZeroLossPeakBatchFit(self.energies_eV, self.counts, number_workers=1,
+                                                fit_function=fit_maximum)
+        serial_results = serial_batch_fit.fit()
+
+        self.assertEqual(40, len(results))
+        positions_eV = np.array([result.position_eV for result in results])
+        serial_positions_eV = np.array([result.position_eV for result in serial_results])
+        np.testing.assert_array_equal(serial_positions_eV, positions_eV)
+        np.testing.assert_allclose(self.positions_eV, positions_eV, atol=0.05)
+        self.assertGreater(batch_fit.throughput_spectra_per_s, 0.0)
+
+    def testFitError(self):
+        """
+        Test that a failed fit is reported without stopping the batch.
+        """
+        self.counts[1] = 0.0
+        batch_fit = ZeroLossPeakBatchFit(self.energies_eV, self.counts[:3], number_workers=2,
+                                         fit_function=fit_maximum)
+        results = batch_fit.fit()
+
+        self.assertTrue(results[0].success)
+        self.assertFalse(results[1].success)
+        self.assertEqual("No peak", results[1].error_message)
+        self.assertTrue(results[2].success)
+
+    def testExportCsv(self):
+        """
+        Test the export of the fit results with their uncertainties.
+        """
+        batch_fit = ZeroLossPeakBatchFit(self.energies_eV, self.counts[:2], number_workers=1,
+                                         fit_function=fit_maximum)
+        batch_fit.fit()
+
+        file_path = os.path.join(self.temporary_dir, "fit.csv")
+        batch_fit.export_csv(file_path, labels=["a.elv", "b.elv"])
+
+        with open(file_path, newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+
+        self.assertEqual(3, len(rows))
+        self.assertEqual(["center", "center_stderr", "error"], rows[0][-3:])
+        self.assertEqual("a.elv", rows[1][0])
+        self.assertEqual("0.01", rows[1][-2])
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
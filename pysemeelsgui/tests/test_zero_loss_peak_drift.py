@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tests.test_zero_loss_peak_drift
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.zero_loss_peak_drift`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.zero_loss_peak_drift`.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+import csv
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.zero_loss_peak_drift import ZeroLossPeakDriftHistory, DRIFT_COLUMNS
+from pysemeelsgui.zero_loss_peak_stack import create_gaussian_stack
+
+
+# Globals and constants variables.
+
+class TestZeroLossPeakDrift(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.zero_loss_peak_drift`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.temporary_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.temporary_dir)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testAppendGrowCapacity(self):
+        """
+        Test that appending past the initial capacity keeps the earlier results.
+        """
+        history = ZeroLossPeakDriftHistory(initial_capacity=2)
+        for index in range(5):
+            history.append(10.0 * index, 0.1 * index, 1.0, 1.0, "file_{:d}.elv".format(index))
+
+        self.assertEqual(5, len(history))
+        np.testing.assert_array_equal(np.arange(5), history.index)
+        np.testing.assert_allclose(0.1 * np.arange(5), history.position_eV)
+        self.assertEqual("file_4.elv", history.file_paths[-1])
+
+        history.clear()
+        self.assertEqual(0, len(history))
+        self.assertEqual(0, len(history.fwhm_eV))
+
+    def testAppendSpectrum(self):
+        """
+        Test that only the new spectrum is analyzed.
+        """
+        energies_eV, counts, positions_eV = create_gaussian_stack(3, channel_width_eV=0.1, fwhm_eV=1.0, noise=False)
+
+        history = ZeroLossPeakDriftHistory()
+        for time_s, spectrum_counts in enumerate(counts):
+            history.append_spectrum(energies_eV, spectrum_counts, float(time_s))
+
+        np.testing.assert_allclose(positions_eV, history.position_eV, atol=0.01)
+        np.testing.assert_allclose(1.0, history.fwhm_eV, atol=0.02)
+
+    def testExportCsv(self):
+        """
+        Test the drift table export.
+        """
+        history = ZeroLossPeakDriftHistory()
+        history.append(1.5, 0.25, 0.75, 1.0, "test_1.elv")
+        history.append(2.5, 0.5, 0.8, 1.1)
+
+        file_path = os.path.join(self.temporary_dir, "drift.csv")
+        history.export_csv(file_path)
+
+        with open(file_path, newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+
+        self.assertEqual(list(DRIFT_COLUMNS), rows[0])
+        self.assertEqual(["0", "1.5", "0.25", "0.75", "1.0", "test_1.elv"], rows[1])
+        self.assertEqual(["1", "2.5", "0.5", "0.8", "1.1", ""], rows[2])
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tests.test_zero_loss_peak_stack
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.zero_loss_peak_stack`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.zero_loss_peak_stack`.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import unittest
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.zero_loss_peak_stack import ZeroLossPeakStack, create_gaussian_stack
+
+
+# Globals and constants variables.
+
+class TestZeroLossPeakStack(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.zero_loss_peak_stack`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testComputeFwhmGaussian(self):
+        """
+        Test the position and FWHM of noiseless gaussian peaks with sub-channel positions.
+        """
+        energies_eV, counts, positions_eV = create_gaussian_stack(20, channel_width_eV=0.1, fwhm_eV=1.0, noise=False)
+
+        zlp_stack = ZeroLossPeakStack(energies_eV, counts)
+        zlp_stack.compute_fwhm()
+
+        self.assertEqual((20,), zlp_stack.fwhm_eV.shape)
+        np.testing.assert_allclose(zlp_stack.position_eV, positions_eV, atol=0.01)
+        np.testing.assert_allclose(zlp_stack.fwhm_eV, 1.0, atol=0.02)
+        np.testing.assert_allclose(zlp_stack.asymmetry, 1.0, atol=0.05)
+
+    def testComputeFwhmTriangle(self):
+        """
+        Test the linear interpolation of the half maximum crossings and the asymmetry.
+        """
+        energies_eV = np.arange(11, dtype=np.float64)
+        counts = np.array([0.0, 0.0, 0.0, 5.0, 10.0, 7.5, 5.0, 2.5, 0.0, 0.0, 0.0])
+
+        zlp_stack = ZeroLossPeakStack(energies_eV, counts)
+        zlp_stack.compute_fwhm()
+
+        self.assertEqual(1, zlp_stack.number_spectra)
+        self.assertAlmostEqual(3.0, zlp_stack.left_eV[0])
+        self.assertAlmostEqual(6.0, zlp_stack.right_eV[0])
+        self.assertAlmostEqual(3.0, zlp_stack.fwhm_eV[0])
+        self.assertGreater(zlp_stack.asymmetry[0], 1.0)
+
+    def testComputeFwhmEdge(self):
+        """
+        Test a peak without half maximum crossing on the left side.
+        """
+        energies_eV = np.arange(5, dtype=np.float64)
+        counts = np.array([[10.0, 8.0, 4.0, 1.0, 0.0],
+                           [0.0, 4.0, 10.0, 4.0, 0.0]])
+
+        zlp_stack = ZeroLossPeakStack(energies_eV, counts)
+        zlp_stack.compute_fwhm()
+
+        self.assertTrue(np.isnan(zlp_stack.fwhm_eV[0]))
+        self.assertAlmostEqual(0.0, zlp_stack.position_eV[0])
+        self.assertAlmostEqual(2.0, zlp_stack.position_eV[1])
+        self.assertAlmostEqual(10.0 / 6.0, zlp_stack.fwhm_eV[1])
+
+    def testEnergyAxisMismatch(self):
+        """
+        Test that an energy axis with the wrong number of channels is rejected.
+        """
+        self.assertRaises(ValueError, ZeroLossPeakStack, np.arange(4), np.zeros((2, 5)))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_driver
+   :synopsis: Interface of the drivers controlling the EELS acquisition program.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Interface of the drivers controlling the EELS acquisition program.
+
+The acquisition loop only uses the steps of :py:class:`AcquisitionDriver`. The ElementsView backend drives the program
+with pywinauto and runs only on the instrument PC, the simulated backend reproduces the dialog latencies and writes
+synthetic .elv files on any computer.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+BACKEND_ELEMENTS_VIEW = "ElementsView"
+BACKEND_SIMULATED = "Simulated"
+BACKENDS = (BACKEND_ELEMENTS_VIEW, BACKEND_SIMULATED)
+
+ELEMENT_TOP_WINDOW = "top_window"
+ELEMENT_MANUAL_ACQUISITION = "manual_acquisition"
+ELEMENT_SAVE_AS = "save_as"
+ELEMENTS = (ELEMENT_TOP_WINDOW, ELEMENT_MANUAL_ACQUISITION, ELEMENT_SAVE_AS)
+
+
+class AcquisitionError(Exception):
+    """
+    The acquisition program is not found or does not respond as expected.
+    """
+
+
+class AcquisitionDriver(object):
+    """
+    Steps of the acquisition of a spectrum, implemented by each backend.
+
+    A spectrum is acquired with :py:meth:`start_acquisition` in manual mode, or continuously in live mode, then saved
+    with :py:meth:`open_save_dialog`, :py:meth:`save_as` and, when the file exists, :py:meth:`confirm_overwrite`.
+    """
+    backend = ""
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    def get_options(self):
+        """
+        :return: dict of the options changing the latencies, recorded with the step timings.
+        """
+        return {"backend": self.backend}
+
+    def connect(self):
+        raise NotImplementedError
+
+    def disconnect(self):
+        pass
+
+    def find_elements(self):
+        """
+        Check the windows and dialogs used by the acquisition, the save dialog is opened and cancelled.
+
+        :return: dict of the ``ELEMENT_`` constants to True if the element was found.
+        """
+        raise NotImplementedError
+
+    def wait_ready(self):
+        """
+        Wait until the main window accepts a command.
+        """
+        raise NotImplementedError
+
+    def start_acquisition(self):
+        """
+        Start the acquisition of a spectrum in manual mode.
+        """
+        raise NotImplementedError
+
+    def open_save_dialog(self, comment=""):
+        """
+        Select the save menu and accept the comment dialog.
+        """
+        raise NotImplementedError
+
+    def save_as(self, file_name):
+        """
+        Enter the file name in the save as dialog and save, a full path selects the folder.
+        """
+        raise NotImplementedError
+
+    def confirm_overwrite(self):
+        """
+        Accept the overwrite confirmation dialog shown when the file exists.
+
+        :return: True if the dialog was shown and accepted.
+        """
+        raise NotImplementedError
+
+
+def create_driver(backend, **options):
+    """
+    Create the driver of the backend, the ElementsView backend needs pywinauto, imported only when it is used.
+
+    :param options: keyword arguments of the driver class.
+    """
+    if backend == BACKEND_ELEMENTS_VIEW:
+        from pysemeelsgui.tools.elements_view_driver import ElementsViewDriver
+        return ElementsViewDriver(**options)
+    elif backend == BACKEND_SIMULATED:
+        from pysemeelsgui.tools.simulated_driver import SimulatedDriver
+        return SimulatedDriver(**options)
+
+    raise ValueError("Unknown acquisition backend: {}".format(backend))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_loop
+   :synopsis: Acquire and save a series of EELS spectra with an acquisition driver.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Acquire and save a series of EELS spectra with an acquisition driver.
+
+The loop does not depend on the acquisition program, it only calls the steps of
+:py:class:`pysemeelsgui.tools.acquisition_driver.AcquisitionDriver`. When the save folder is known, the spectra are
+saved with their full path and the loop continues as soon as the saved file is complete, without a fixed delay. Each
+step is timed by :py:class:`pysemeelsgui.tools.acquisition_timing.AcquisitionTimer`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os.path
+import time
+import logging
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.folder_scanner import ELV_EXTENSION
+from pysemeelsgui.tools.acquisition_driver import AcquisitionError
+from pysemeelsgui.tools.polling import wait_for_saved_file, get_file_signature, WaitTimeoutError, \
+    DEFAULT_STABLE_TIME_s
+from pysemeelsgui.tools.acquisition_timing import AcquisitionTimer, format_summary, OUTCOME_NOT_SHOWN, \
+    STEP_WAIT_READY, STEP_START_ACQUISITION, STEP_ACQUISITION_DELAY, STEP_WAIT_ACQUIRED, STEP_SAVE_DIALOG, \
+    STEP_SAVE_AS, STEP_CONFIRM_OVERWRITE, STEP_WAIT_SAVED, STEP_VERIFY_SAVED, STEP_SUBMIT_PROCESSING, STEP_SPECTRUM
+
+# Globals and constants variables.
+ACQUISITION_MODE_LIVE = "Live"
+ACQUISITION_MODE_MANUAL = "Manual"
+ACQUISITION_MODES = (ACQUISITION_MODE_LIVE, ACQUISITION_MODE_MANUAL)
+
+DEFAULT_COMMENT = "auto script"
+
+PAUSE_POLL_INTERVAL_s = 0.1
+ADDITIONAL_WAIT_TIME_s = 1.0
+
+
+def get_spectrum_file_name(basename, spectrum_id):
+    return "{}_{:d}{}".format(basename, spectrum_id, ELV_EXTENSION)
+
+
+class AcquisitionLoop(object):
+    """
+    Acquire *number_spectra* spectra and save them as ``basename_N.elv``, N from 1.
+
+    In manual mode, each acquisition is started and the loop waits *delay_spectrum_s*, the acquisition time, before
+    saving. In live mode, the spectrum being acquired is saved. With *overwrite*, the confirmation dialog of an existing
+    file is accepted.
+
+    With *save_folder*, the next spectrum is started when the saved file is complete, its size unchanged for
+    *stable_time_s*, and the overwrite confirmation is answered only for a file that exists. Without *overwrite*,
+    :py:meth:`run` raises :py:class:`AcquisitionError` before the first spectrum if a file of the series exists, its
+    confirmation dialog would never be answered. Without *save_folder*, the end of the saving cannot be detected and
+    *additional_wait_time_s* is added to the acquisition time in manual mode.
+
+    :ivar progress_callback: optional ``progress_callback(number_done, number_total, elapsed_time_s)`` called after
+        each saved spectrum.
+    :ivar saved_file_callback: optional ``saved_file_callback(file_path)`` called with each complete saved file when
+        *save_folder* is set, like :py:meth:`BackgroundProcessor.submit`. It must return without waiting, its time is
+        the ``submit_processing`` step.
+    :ivar manifest: optional :py:class:`pysemeelsgui.tools.acquisition_manifest.AcquisitionManifest` of the series
+        when *save_folder* is set. Each saved file is recorded and checked, its time is the ``verify_saved`` step, a
+        file not saved before *save_timeout_s* is recorded as missing and the loop continues.
+    :ivar cancel_event: :py:class:`threading.Event` set by :py:meth:`cancel` from another thread, the loop stops
+        between spectra.
+    :ivar pause_event: :py:class:`threading.Event` set by :py:meth:`pause` and cleared by :py:meth:`resume` from
+        another thread, the loop waits between spectra while it is set. The pauses are not counted in the elapsed
+        time.
+    :ivar timer: :py:class:`AcquisitionTimer` of the steps of the last run, set its ``record_file`` to write the
+        records.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+
+        self.basename = "test"
+        self.number_spectra = 100
+        self.acquisition_mode = ACQUISITION_MODE_MANUAL
+        self.delay_spectrum_s = 1.0
+        self.overwrite = False
+        self.comment = DEFAULT_COMMENT
+        self.save_folder = ""
+        self.stable_time_s = DEFAULT_STABLE_TIME_s
+        self.save_timeout_s = 30.0
+        self.additional_wait_time_s = ADDITIONAL_WAIT_TIME_s
+
+        self.progress_callback = None
+        self.saved_file_callback = None
+        self.manifest = None
+        self.cancel_event = threading.Event()
+        self.pause_event = threading.Event()
+        self.timer = AcquisitionTimer()
+
+        self.saved_file_names = []
+        self.elapsed_time_s = 0.0
+
+    @property
+    def spectra_per_s(self):
+        if self.elapsed_time_s > 0.0:
+            return len(self.saved_file_names) / self.elapsed_time_s
+        return 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def pause(self):
+        self.pause_event.set()
+
+    def resume(self):
+        self.pause_event.clear()
+
+    def is_paused(self):
+        return self.pause_event.is_set()
+
+    def wait_while_paused(self):
+        """
+        :return: time paused in second.
+        """
+        if not self.is_paused():
+            return 0.0
+
+        logging.info("Acquisition paused")
+        start_time = time.perf_counter()
+        while self.is_paused() and not self.is_cancelled():
+            self.cancel_event.wait(PAUSE_POLL_INTERVAL_s)
+        logging.info("Acquisition resumed")
+        return time.perf_counter() - start_time
+
+    def run(self):
+        """
+        Acquire the spectra with the connected driver.
+        """
+        start_time = time.perf_counter()
+        self.saved_file_names = []
+
+        if len(self.save_folder) == 0:
+            logging.warning("No save folder, the saved files are not checked and {:.1f} s is added to the acquisition "
+                            "time".format(self.additional_wait_time_s))
+        elif not self.overwrite:
+            existing_file_paths = self.find_existing_file_paths()
+            if len(existing_file_paths) > 0:
+                raise AcquisitionError("{:d} files of the series already exist, without overwrite: {}".format(
+                    len(existing_file_paths), ", ".join(existing_file_paths)))
+
+        self.timer.start_session(basename=self.basename, number_spectra=self.number_spectra,
+                                 acquisition_mode=self.acquisition_mode, delay_spectrum_s=self.delay_spectrum_s,
+                                 overwrite=self.overwrite, save_folder=self.save_folder,
+                                 stable_time_s=self.stable_time_s, driver=self.driver.get_options())
+        if self.manifest is not None:
+            file_names = dict((spectrum_id, get_spectrum_file_name(self.basename, spectrum_id))
+                              for spectrum_id in range(1, self.number_spectra + 1))
+            self.manifest.start(file_names, basename=self.basename, acquisition_mode=self.acquisition_mode,
+                                delay_spectrum_s=self.delay_spectrum_s, overwrite=self.overwrite,
+                                backend=self.driver.backend)
+        try:
+            with self.timer.measure(0, STEP_WAIT_READY):
+                self.driver.wait_ready()
+
+            for spectrum_id in range(1, self.number_spectra + 1):
+                start_time += self.wait_while_paused()
+                if self.is_cancelled():
+                    logging.info("Acquisition cancelled")
+                    break
+
+                logging.info("Spectrum id: {:d}".format(spectrum_id))
+                with self.timer.measure(spectrum_id, STEP_SPECTRUM):
+                    self.acquire_spectrum(spectrum_id)
+
+                self.elapsed_time_s = time.perf_counter() - start_time
+                if self.progress_callback is not None:
+                    self.progress_callback(spectrum_id, self.number_spectra, self.elapsed_time_s)
+        finally:
+            self.elapsed_time_s = time.perf_counter() - start_time
+            summary = self.timer.end_session()
+            if self.manifest is not None:
+                self.manifest.verify()
+
+        logging.info("Saved {:d} spectra in {:.1f} s".format(len(self.saved_file_names), self.elapsed_time_s))
+        logging.info("Acquisition steps:\n{}".format(format_summary(summary)))
+
+    def find_existing_file_paths(self):
+        """
+        Files of the series already in the save folder.
+        """
+        file_paths = []
+        for spectrum_id in range(1, self.number_spectra + 1):
+            file_path = os.path.join(self.save_folder, get_spectrum_file_name(self.basename, spectrum_id))
+            if os.path.exists(file_path):
+                file_paths.append(file_path)
+
+        return file_paths
+
+    def acquire_spectrum(self, spectrum_id):
+        timer = self.timer
+
+        with timer.measure(spectrum_id, STEP_WAIT_READY):
+            self.driver.wait_ready()
+
+        if self.acquisition_mode == ACQUISITION_MODE_MANUAL:
+            with timer.measure(spectrum_id, STEP_START_ACQUISITION):
+                self.driver.start_acquisition()
+            delay_spectrum_s = self.delay_spectrum_s
+            if len(self.save_folder) == 0:
+                delay_spectrum_s += self.additional_wait_time_s
+            with timer.measure(spectrum_id, STEP_ACQUISITION_DELAY):
+                time.sleep(delay_spectrum_s)
+            with timer.measure(spectrum_id, STEP_WAIT_ACQUIRED):
+                self.driver.wait_ready()
+
+        with timer.measure(spectrum_id, STEP_SAVE_DIALOG):
+            self.driver.open_save_dialog(self.comment)
+
+        file_name = get_spectrum_file_name(self.basename, spectrum_id)
+        if len(self.save_folder) == 0:
+            with timer.measure(spectrum_id, STEP_SAVE_AS):
+                self.driver.save_as(file_name)
+            if self.overwrite:
+                self._confirm_overwrite(spectrum_id)
+        else:
+            file_path = os.path.join(self.save_folder, file_name)
+            previous_signature = get_file_signature(file_path)
+            with timer.measure(spectrum_id, STEP_SAVE_AS):
+                self.driver.save_as(file_path)
+            if self.overwrite and previous_signature is not None:
+                self._confirm_overwrite(spectrum_id)
+            try:
+                with timer.measure(spectrum_id, STEP_WAIT_SAVED):
+                    wait_for_saved_file(file_path, previous_signature, self.stable_time_s, self.save_timeout_s)
+            except WaitTimeoutError as message:
+                if self.manifest is None:
+                    raise
+                self.manifest.record_missing(spectrum_id, str(message))
+                return
+            if self.manifest is not None:
+                with timer.measure(spectrum_id, STEP_VERIFY_SAVED):
+                    self.manifest.record_saved(spectrum_id, file_path)
+            if self.saved_file_callback is not None:
+                with timer.measure(spectrum_id, STEP_SUBMIT_PROCESSING):
+                    self.saved_file_callback(file_path)
+
+        self.saved_file_names.append(file_name)
+
+    def _confirm_overwrite(self, spectrum_id):
+        with self.timer.measure(spectrum_id, STEP_CONFIRM_OVERWRITE) as record:
+            if not self.driver.confirm_overwrite():
+                record["outcome"] = OUTCOME_NOT_SHOWN
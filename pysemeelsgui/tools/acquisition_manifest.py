@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_manifest
+   :synopsis: Manifest of the files of an acquisition series, verified as each file is saved.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Manifest of the files of an acquisition series, verified as each file is saved.
+
+The manifest lists the expected file of each spectrum and, when it is saved, its time, size, modification time and
+checksum. The issues are reported as soon as they are found: a file not saved, a gap before a saved file, a file with
+the same content as another file of the series, or a file changed after it was saved. The manifest is written as JSON
+in the save folder after each file, so the batch tools can read the list of files instead of scanning the folder.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import json
+import time
+import logging
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_manifest import compute_file_hash
+
+# Globals and constants variables.
+ACQUISITION_MANIFEST_SUFFIX = "_acquisition_manifest.json"
+ACQUISITION_MANIFEST_VERSION = 1
+
+STATUS_EXPECTED = "expected"
+STATUS_SAVED = "saved"
+STATUS_MISSING = "missing"
+
+ISSUE_MISSING = "missing"
+ISSUE_GAP = "gap"
+ISSUE_DUPLICATE = "duplicate"
+ISSUE_CHANGED = "changed"
+
+
+def get_acquisition_manifest_file_path(save_folder, basename):
+    return os.path.join(save_folder, basename + ACQUISITION_MANIFEST_SUFFIX)
+
+
+class AcquisitionManifest(object):
+    """
+    Expected and saved files of an acquisition series.
+
+    :ivar entries: dict of the spectrum id to its entry, with the ``file_name``, the ``status`` and, when saved, the
+        ``time``, ``size``, ``mtime_ns`` and ``sha1`` of the file.
+    :ivar issues: list of dict with the ``spectrum_id``, the ``issue`` and a ``message``.
+    :ivar issue_callback: optional ``issue_callback(issue)`` called when an issue is found.
+    """
+
+    def __init__(self, manifest_file_path):
+        self.manifest_file_path = manifest_file_path
+        self.folder = os.path.dirname(manifest_file_path)
+
+        self.options = {}
+        self.entries = {}
+        self.issues = []
+        self.issue_callback = None
+
+        self._checksums = {}
+
+    def start(self, file_names, **options):
+        """
+        Start a series.
+
+        :param file_names: dict of the spectrum id to the expected file name.
+        :param options: acquisition options written in the manifest.
+        """
+        self.options = dict(options, start_time=time.time())
+        self.entries = dict((spectrum_id, {"file_name": file_name, "status": STATUS_EXPECTED})
+                            for spectrum_id, file_name in file_names.items())
+        self.issues = []
+        self._checksums = {}
+        self.save()
+
+    def get_file_path(self, spectrum_id):
+        return os.path.join(self.folder, self.entries[spectrum_id]["file_name"])
+
+    def record_saved(self, spectrum_id, file_path=None):
+        """
+        Record the saved file of the spectrum and check it against the other files of the series.
+
+        :return: the entry of the spectrum.
+        """
+        if file_path is None:
+            file_path = self.get_file_path(spectrum_id)
+
+        entry = self.entries.setdefault(spectrum_id, {"file_name": os.path.basename(file_path),
+                                                      "status": STATUS_EXPECTED})
+        if entry["status"] == STATUS_SAVED:
+            self._add_issue(spectrum_id, ISSUE_DUPLICATE, "{} saved again".format(entry["file_name"]))
+
+        stat_result = os.stat(file_path)
+        entry.update({"status": STATUS_SAVED, "time": time.time(), "size": stat_result.st_size,
+                      "mtime_ns": stat_result.st_mtime_ns, "sha1": compute_file_hash(file_path)})
+
+        for previous_spectrum_id in sorted(self.entries):
+            if previous_spectrum_id >= spectrum_id:
+                break
+            previous_entry = self.entries[previous_spectrum_id]
+            if previous_entry["status"] == STATUS_EXPECTED:
+                previous_entry["status"] = STATUS_MISSING
+                self._add_issue(previous_spectrum_id, ISSUE_GAP, "{} not saved before {}".format(
+                    previous_entry["file_name"], entry["file_name"]))
+
+        other_spectrum_id = self._checksums.get(entry["sha1"])
+        if other_spectrum_id is not None and other_spectrum_id != spectrum_id:
+            self._add_issue(spectrum_id, ISSUE_DUPLICATE, "{} has the same content as {}".format(
+                entry["file_name"], self.entries[other_spectrum_id]["file_name"]))
+        self._checksums[entry["sha1"]] = spectrum_id
+
+        self.save()
+        return entry
+
+    def record_missing(self, spectrum_id, message=""):
+        entry = self.entries.setdefault(spectrum_id, {"file_name": "", "status": STATUS_EXPECTED})
+        entry["status"] = STATUS_MISSING
+        self._add_issue(spectrum_id, ISSUE_MISSING, "{} not saved: {}".format(entry["file_name"], message))
+        self.save()
+
+    def verify(self):
+        """
+        Check that each saved file still exists, unchanged.
+
+        :return: list of the issues found.
+        """
+        issues = []
+        for spectrum_id in sorted(self.entries):
+            entry = self.entries[spectrum_id]
+            if entry["status"] != STATUS_SAVED:
+                continue
+
+            file_path = self.get_file_path(spectrum_id)
+            if not os.path.isfile(file_path):
+                entry["status"] = STATUS_MISSING
+                issues.append(self._add_issue(spectrum_id, ISSUE_MISSING, "{} removed".format(entry["file_name"])))
+                continue
+
+            stat_result = os.stat(file_path)
+            if stat_result.st_size != entry["size"] or stat_result.st_mtime_ns != entry["mtime_ns"]:
+                issues.append(self._add_issue(spectrum_id, ISSUE_CHANGED, "{} changed after it was saved".format(
+                    entry["file_name"])))
+
+        self.save()
+        return issues
+
+    def get_saved_file_paths(self):
+        return [self.get_file_path(spectrum_id) for spectrum_id in sorted(self.entries)
+                if self.entries[spectrum_id]["status"] == STATUS_SAVED]
+
+    def save(self):
+        files = [dict(self.entries[spectrum_id], spectrum_id=spectrum_id) for spectrum_id in sorted(self.entries)]
+        data = {"version": ACQUISITION_MANIFEST_VERSION, "options": self.options, "files": files,
+                "issues": self.issues}
+
+        temporary_file_path = self.manifest_file_path + ".tmp"
+        with open(temporary_file_path, 'w') as manifest_file:
+            json.dump(data, manifest_file, indent=1, sort_keys=True)
+        os.replace(temporary_file_path, self.manifest_file_path)
+
+    def load(self):
+        with open(self.manifest_file_path, 'r') as manifest_file:
+            data = json.load(manifest_file)
+        if data.get("version") != ACQUISITION_MANIFEST_VERSION:
+            raise ValueError("Unknown acquisition manifest version: {}".format(data.get("version")))
+
+        self.options = data.get("options", {})
+        self.entries = {}
+        for entry in data.get("files", []):
+            entry = dict(entry)
+            self.entries[entry.pop("spectrum_id")] = entry
+        self.issues = data.get("issues", [])
+        self._checksums = dict((entry["sha1"], spectrum_id) for spectrum_id, entry in self.entries.items()
+                               if "sha1" in entry)
+
+    def _add_issue(self, spectrum_id, issue, message):
+        logging.warning("Acquisition manifest, spectrum {:d}: {}".format(spectrum_id, message))
+        issue = {"spectrum_id": spectrum_id, "issue": issue, "message": message}
+        self.issues.append(issue)
+        if self.issue_callback is not None:
+            self.issue_callback(issue)
+        return issue
+
+
+def find_manifest_elv_files(data_folder):
+    """
+    Saved files of the acquisition manifests of the data folder, without scanning the folder.
+
+    :return: sorted list of the file paths, None if the folder has no acquisition manifest.
+    """
+    try:
+        file_names = os.listdir(data_folder)
+    except OSError:
+        return None
+
+    manifest_file_names = sorted(file_name for file_name in file_names
+                                 if file_name.endswith(ACQUISITION_MANIFEST_SUFFIX))
+    if len(manifest_file_names) == 0:
+        return None
+
+    elv_file_paths = set()
+    for manifest_file_name in manifest_file_names:
+        manifest = AcquisitionManifest(os.path.join(data_folder, manifest_file_name))
+        try:
+            manifest.load()
+        except (IOError, ValueError) as message:
+            logging.warning("Cannot read acquisition manifest {}: {}".format(manifest_file_name, message))
+            return None
+        elv_file_paths.update(manifest.get_saved_file_paths())
+
+    return sorted(elv_file_paths)
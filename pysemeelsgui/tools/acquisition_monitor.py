@@ -0,0 +1,606 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_monitor
+   :synopsis: Monitor the spectra saved in the acquisition folder with rolling plots and threshold alarms.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Monitor the spectra saved in the acquisition folder with rolling plots and threshold alarms.
+
+The monitor polls the save folder for new .elv files and computes the total counts, the zero-loss peak height and the
+zero-loss peak position of each new spectrum, all the new spectra of a poll at once. The last values of each metric
+are kept in a fixed-size ring buffer, the memory does not grow with the acquisition. An alarm is reported when a
+metric goes out of its limits, for example a zero-loss peak moving with the beam drift or a height near the detector
+saturation.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import re
+import sys
+import time
+import logging
+import optparse
+import threading
+
+# Third party modules.
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.folder_scanner import scan_folder_entries
+from pysemeelsgui.tools.parallel_batch_convert import read_elv_file
+from pysemeelsgui.tools.polling import get_file_signature
+from pysemeelsgui.tools.batch_checkpoint import atomic_output_file
+
+# Globals and constants variables.
+METRIC_TOTAL_COUNTS = "total_counts"
+METRIC_ZERO_LOSS_PEAK_HEIGHT = "zero_loss_peak_height"
+METRIC_ZERO_LOSS_PEAK_POSITION = "zero_loss_peak_position_eV"
+METRICS = (METRIC_TOTAL_COUNTS, METRIC_ZERO_LOSS_PEAK_HEIGHT, METRIC_ZERO_LOSS_PEAK_POSITION)
+METRIC_LABELS = {METRIC_TOTAL_COUNTS: "Total counts", METRIC_ZERO_LOSS_PEAK_HEIGHT: "ZLP height",
+                 METRIC_ZERO_LOSS_PEAK_POSITION: "ZLP position (eV)"}
+
+DEFAULT_CAPACITY = 500
+DEFAULT_POLL_INTERVAL_s = 0.5
+DEFAULT_ZERO_LOSS_WINDOW_eV = (-5.0, 5.0)
+
+ALARM_LOW = "low"
+ALARM_HIGH = "high"
+
+EXIT_SUCCESS = 0
+EXIT_ALARM = 1
+EXIT_USAGE_ERROR = 2
+EXIT_INTERRUPTED = 130
+
+
+class RingBuffer(object):
+    """
+    Last *capacity* values in a preallocated array.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, dtype=np.float64):
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1: {}".format(capacity))
+
+        self.capacity = capacity
+        self._values = np.zeros(capacity, dtype=dtype)
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def is_full(self):
+        return self._count == self.capacity
+
+    def clear(self):
+        self._index = 0
+        self._count = 0
+
+    def append(self, value):
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._values.dtype).ravel()
+        if len(values) >= self.capacity:
+            self._values[:] = values[-self.capacity:]
+            self._index = 0
+            self._count = self.capacity
+            return
+
+        end_index = self._index + len(values)
+        if end_index <= self.capacity:
+            self._values[self._index:end_index] = values
+        else:
+            number_end = self.capacity - self._index
+            self._values[self._index:] = values[:number_end]
+            self._values[:end_index - self.capacity] = values[number_end:]
+        self._index = end_index % self.capacity
+        self._count = min(self._count + len(values), self.capacity)
+
+    def get_values(self):
+        """
+        :return: copy of the values, from the oldest to the newest.
+        """
+        if self._count < self.capacity:
+            return self._values[:self._count].copy()
+        return np.roll(self._values, -self._index)
+
+    def get_last(self):
+        if self._count == 0:
+            return None
+        return self._values[self._index - 1].item()
+
+
+def get_natural_sort_key(file_path):
+    """
+    Sort key of the file name with its numbers compared by value, ``basename_2.elv`` is before ``basename_10.elv``.
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", os.path.basename(file_path))]
+
+
+def compute_spectrum_metrics(energies_eV, counts, zero_loss_window_eV=DEFAULT_ZERO_LOSS_WINDOW_eV):
+    """
+    Metrics of one spectrum or of several spectra with the same energies.
+
+    The zero-loss peak is the channel with the maximum counts in the energy window, its position is interpolated with
+    the parabola through this channel and its two neighbours.
+
+    :param counts: array of the counts of one spectrum or 2D array with one spectrum per row.
+    :return: dict of the ``METRIC_`` constants to an array with one value per spectrum.
+    """
+    energies_eV = np.asarray(energies_eV, dtype=np.float64)
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+
+    window_indices = np.flatnonzero((energies_eV >= zero_loss_window_eV[0]) & (energies_eV <= zero_loss_window_eV[1]))
+    if len(window_indices) == 0:
+        raise ValueError("No channel in the zero-loss window {} eV".format(zero_loss_window_eV))
+
+    peak_indices = window_indices[np.argmax(counts[:, window_indices], axis=1)]
+    rows = np.arange(counts.shape[0])
+    heights = counts[rows, peak_indices]
+
+    # The neighbours of the first and last channels are the channels themselves, without interpolation.
+    previous_counts = counts[rows, np.maximum(peak_indices - 1, 0)]
+    next_counts = counts[rows, np.minimum(peak_indices + 1, counts.shape[1] - 1)]
+    curvatures = previous_counts - 2.0 * heights + next_counts
+    offsets = np.zeros_like(heights)
+    np.divide(0.5 * (previous_counts - next_counts), curvatures, out=offsets, where=curvatures < 0.0)
+    energy_step_eV = np.gradient(energies_eV)[peak_indices]
+    positions_eV = energies_eV[peak_indices] + np.clip(offsets, -0.5, 0.5) * energy_step_eV
+
+    return {METRIC_TOTAL_COUNTS: counts.sum(axis=1), METRIC_ZERO_LOSS_PEAK_HEIGHT: heights,
+            METRIC_ZERO_LOSS_PEAK_POSITION: positions_eV}
+
+
+class Threshold(object):
+    """
+    Limits of a metric, None for no limit.
+    """
+
+    def __init__(self, metric, minimum=None, maximum=None):
+        if metric not in METRICS:
+            raise ValueError("Unknown metric: {}".format(metric))
+
+        self.metric = metric
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def check(self, value):
+        """
+        :return: ``ALARM_LOW`` or ``ALARM_HIGH`` if the value is out of the limits, else None.
+        """
+        if self.minimum is not None and value < self.minimum:
+            return ALARM_LOW
+        if self.maximum is not None and value > self.maximum:
+            return ALARM_HIGH
+        return None
+
+
+class AcquisitionMonitor(object):
+    """
+    Metrics of the spectra saved in the data folder.
+
+    :param capacity: number of values kept for each metric.
+    :param include_existing: if False, the files already in the folder when the monitor starts are ignored.
+    :ivar thresholds: list of :py:class:`Threshold`.
+    :ivar alarm_callback: optional ``alarm_callback(alarm)`` called when a metric goes out of its limits, from the
+        polling thread.
+    :ivar alarms: list of dict with the ``spectrum_number``, ``file_path``, ``metric``, ``value``, ``alarm`` and
+        ``message`` of the last alarms.
+    """
+
+    def __init__(self, data_folder, capacity=DEFAULT_CAPACITY, zero_loss_window_eV=DEFAULT_ZERO_LOSS_WINDOW_eV,
+                 include_existing=False):
+        self.data_folder = data_folder
+        self.capacity = capacity
+        self.zero_loss_window_eV = tuple(zero_loss_window_eV)
+        self.include_existing = include_existing
+
+        self.thresholds = []
+        self.alarm_callback = None
+        self.alarms = []
+        self.number_spectra = 0
+        self.number_errors = 0
+
+        self.spectrum_numbers = RingBuffer(capacity, dtype=np.int64)
+        self.buffers = dict((metric, RingBuffer(capacity)) for metric in METRICS)
+
+        self._lock = threading.Lock()
+        self._processed_file_names = set()
+        self._pending_signatures = {}
+        self._alarm_states = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def reset(self):
+        """
+        Clear the metrics and ignore the files already in the folder, or monitor them if *include_existing*.
+        """
+        with self._lock:
+            self.spectrum_numbers.clear()
+            for buffer in self.buffers.values():
+                buffer.clear()
+            self.alarms = []
+            self.number_spectra = 0
+            self.number_errors = 0
+            self._alarm_states = {}
+            self._pending_signatures = {}
+            self._processed_file_names = set()
+
+        if not self.include_existing:
+            self._processed_file_names = set(os.path.basename(file_path) for file_path in self.get_file_paths())
+
+    def start(self, poll_interval_s=DEFAULT_POLL_INTERVAL_s):
+        self.reset()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, args=(poll_interval_s,), name="AcquisitionMonitor")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll_loop(self, poll_interval_s):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as message:
+                logging.error("Acquisition monitor: {}".format(message))
+            self._stop_event.wait(poll_interval_s)
+
+    def get_file_paths(self):
+        try:
+            file_paths, _sub_folders = scan_folder_entries(self.data_folder)
+        except OSError as message:
+            logging.warning("Cannot read folder {}: {}".format(self.data_folder, message))
+            return []
+        return file_paths
+
+    def poll(self):
+        """
+        Add the metrics of the new files of the folder. A file is read when its size and modification time did not
+        change since the previous poll, the acquisition program has finished writing it.
+
+        :return: number of spectra added.
+        """
+        file_paths = []
+        pending_signatures = {}
+        for file_path in sorted(self.get_file_paths(), key=get_natural_sort_key):
+            file_name = os.path.basename(file_path)
+            if file_name in self._processed_file_names:
+                continue
+
+            signature = get_file_signature(file_path)
+            if signature is not None and self._pending_signatures.get(file_name) == signature:
+                file_paths.append(file_path)
+            else:
+                pending_signatures[file_name] = signature
+        self._pending_signatures = pending_signatures
+
+        return self.add_files(file_paths)
+
+    def add_files(self, file_paths):
+        """
+        Add the metrics of the files, the spectra with the same energies are computed together.
+
+        :return: number of spectra added.
+        """
+        spectra = []
+        for file_path in file_paths:
+            self._processed_file_names.add(os.path.basename(file_path))
+            try:
+                elv_file = read_elv_file(file_path)
+                # The last channel of the .elv files is not a measurement.
+                energies_eV = np.asarray(elv_file.energies_eV, dtype=np.float64)[:-1]
+                counts = np.asarray(elv_file.counts, dtype=np.float64)[:-1]
+            except Exception as message:
+                logging.warning("Cannot read {}: {}".format(file_path, message))
+                self.number_errors += 1
+                continue
+            spectra.append((file_path, energies_eV, counts))
+
+        start_index = 0
+        while start_index < len(spectra):
+            energies_eV = spectra[start_index][1]
+            end_index = start_index + 1
+            while end_index < len(spectra) and np.array_equal(spectra[end_index][1], energies_eV):
+                end_index += 1
+
+            group = spectra[start_index:end_index]
+            self.add_spectra(energies_eV, np.vstack([counts for _file_path, _energies_eV, counts in group]),
+                             [file_path for file_path, _energies_eV, _counts in group])
+            start_index = end_index
+
+        return len(spectra)
+
+    def add_spectra(self, energies_eV, counts, file_paths=None):
+        """
+        Add the metrics of the spectra, one spectrum per row of *counts*, and check the thresholds.
+
+        :return: dict of the metrics of the spectra.
+        """
+        try:
+            metrics = compute_spectrum_metrics(energies_eV, counts, self.zero_loss_window_eV)
+        except ValueError as message:
+            logging.warning("Acquisition monitor: {}".format(message))
+            self.number_errors += 1
+            return {}
+
+        number_spectra = len(metrics[METRIC_TOTAL_COUNTS])
+        if file_paths is None:
+            file_paths = [None] * number_spectra
+
+        with self._lock:
+            spectrum_numbers = self.number_spectra + 1 + np.arange(number_spectra)
+            self.number_spectra += number_spectra
+            self.spectrum_numbers.extend(spectrum_numbers)
+            for metric in METRICS:
+                self.buffers[metric].extend(metrics[metric])
+
+        for threshold in self.thresholds:
+            for spectrum_number, file_path, value in zip(spectrum_numbers, file_paths, metrics[threshold.metric]):
+                self._check_threshold(threshold, int(spectrum_number), file_path, float(value))
+
+        return metrics
+
+    def _check_threshold(self, threshold, spectrum_number, file_path, value):
+        # Only the change of state is reported, not each spectrum out of the limits.
+        state = threshold.check(value)
+        key = id(threshold)
+        if state == self._alarm_states.get(key):
+            return
+        self._alarm_states[key] = state
+        if state is None:
+            logging.info("Spectrum {:d}: {} back within the limits".format(spectrum_number, threshold.metric))
+            return
+
+        limit = threshold.minimum if state == ALARM_LOW else threshold.maximum
+        message = "{} {:g} {} than {:g}".format(METRIC_LABELS[threshold.metric], value,
+                                                "lower" if state == ALARM_LOW else "higher", limit)
+        logging.warning("Acquisition monitor, spectrum {:d}: {}".format(spectrum_number, message))
+        alarm = {"spectrum_number": spectrum_number, "file_path": file_path, "metric": threshold.metric,
+                 "value": value, "alarm": state, "message": message}
+        with self._lock:
+            self.alarms.append(alarm)
+            del self.alarms[:-self.capacity]
+        if self.alarm_callback is not None:
+            self.alarm_callback(alarm)
+
+    def get_values(self, metric):
+        """
+        :return: tuple (spectrum numbers, values) of the last spectra of the metric.
+        """
+        with self._lock:
+            return self.spectrum_numbers.get_values(), self.buffers[metric].get_values()
+
+    def summarize(self):
+        """
+        :return: dict with the number of spectra, errors and alarms and the last, mean, standard deviation, minimum
+            and maximum of each metric over the last spectra.
+        """
+        summary = {"number_spectra": self.number_spectra, "number_errors": self.number_errors,
+                   "number_alarms": len(self.alarms), "metrics": {}}
+        for metric in METRICS:
+            _spectrum_numbers, values = self.get_values(metric)
+            statistics = {"count": len(values)}
+            if len(values) > 0:
+                statistics.update({"last": float(values[-1]), "mean": float(np.mean(values)),
+                                   "std": float(np.std(values)), "min": float(np.min(values)),
+                                   "max": float(np.max(values))})
+            summary["metrics"][metric] = statistics
+
+        return summary
+
+
+def format_monitor_summary(summary):
+    lines = ["{:d} spectra, {:d} read errors, {:d} alarms".format(summary["number_spectra"], summary["number_errors"],
+                                                                  summary["number_alarms"])]
+    columns = ["metric", "count", "last", "mean", "std", "min", "max"]
+    lines.append("  ".join("{:>18}".format(column) for column in columns))
+    for metric in METRICS:
+        statistics = summary["metrics"][metric]
+        values = [METRIC_LABELS[metric], "{:d}".format(statistics["count"])]
+        values.extend("{:.4g}".format(statistics[name]) if name in statistics else "-"
+                      for name in ["last", "mean", "std", "min", "max"])
+        lines.append("  ".join("{:>18}".format(value) for value in values))
+
+    return "\n".join(lines)
+
+
+class MonitorFigure(object):
+    """
+    Figure with the rolling plot of each metric and its limits, created once and updated with the new values.
+
+    :param figure: optional :py:class:`matplotlib.figure.Figure`, for example the figure of a Tk canvas.
+    """
+
+    def __init__(self, figure=None, figure_size=(6, 6), dpi=100):
+        if figure is None:
+            figure = Figure(figsize=figure_size, dpi=dpi)
+            FigureCanvasAgg(figure)
+        self.figure = figure
+
+        self.axes = {}
+        self.lines = {}
+        self.limit_lines = {}
+        for metric_id, metric in enumerate(METRICS):
+            axes = self.figure.add_subplot(len(METRICS), 1, metric_id + 1)
+            line, = axes.plot([], [], '.-')
+            axes.set_ylabel(METRIC_LABELS[metric])
+            self.axes[metric] = axes
+            self.lines[metric] = line
+            self.limit_lines[metric] = []
+        self.axes[METRICS[-1]].set_xlabel(r"Spectrum")
+
+        self._is_layout_done = False
+
+    def set_thresholds(self, thresholds):
+        for metric in METRICS:
+            for limit_line in self.limit_lines[metric]:
+                limit_line.remove()
+            self.limit_lines[metric] = []
+
+        for threshold in thresholds:
+            for limit in [threshold.minimum, threshold.maximum]:
+                if limit is not None:
+                    limit_line = self.axes[threshold.metric].axhline(limit, color='r', linestyle='--')
+                    self.limit_lines[threshold.metric].append(limit_line)
+
+    def update(self, monitor):
+        for metric in METRICS:
+            spectrum_numbers, values = monitor.get_values(metric)
+            self.lines[metric].set_data(spectrum_numbers, values)
+            axes = self.axes[metric]
+            axes.relim()
+            axes.autoscale_view()
+
+        if not self._is_layout_done:
+            self.figure.tight_layout()
+            self._is_layout_done = True
+
+    def save(self, figure_file_path):
+        with atomic_output_file(figure_file_path) as partial_file_path:
+            self.figure.savefig(partial_file_path)
+
+
+def parse_limit(text):
+    """
+    :param text: ``METRIC=VALUE`` option.
+    :return: tuple (metric, value).
+    """
+    metric, separator, value = text.partition("=")
+    if separator != "=" or metric not in METRICS:
+        raise ValueError("Invalid limit {}, expected one of {} followed by =VALUE".format(text, ", ".join(METRICS)))
+    return metric, float(value)
+
+
+def create_thresholds(minimums, maximums):
+    """
+    :param minimums: list of ``METRIC=VALUE`` options.
+    :return: list of :py:class:`Threshold`, one per metric with limits.
+    """
+    limits = {}
+    for index, texts in enumerate([minimums, maximums]):
+        for text in texts:
+            metric, value = parse_limit(text)
+            limits.setdefault(metric, [None, None])[index] = value
+
+    return [Threshold(metric, *limits[metric]) for metric in METRICS if metric in limits]
+
+
+def create_option_parser():
+    option_parser = optparse.OptionParser(usage="%prog [options] SAVE_FOLDER",
+                                          description="Monitor the spectra saved in the acquisition folder.")
+    option_parser.add_option("--capacity", action="store", type="int", dest="capacity", default=DEFAULT_CAPACITY,
+                             help="Number of spectra kept for each metric (default: {:d})".format(DEFAULT_CAPACITY))
+    option_parser.add_option("--interval", action="store", type="float", dest="poll_interval_s",
+                             default=DEFAULT_POLL_INTERVAL_s,
+                             help="Time between the polls of the folder in second (default: {:g})".format(
+                                 DEFAULT_POLL_INTERVAL_s))
+    option_parser.add_option("--minimum", action="append", type="string", dest="minimums", default=[],
+                             metavar="METRIC=VALUE", help="Lower limit of a metric: {}".format(", ".join(METRICS)))
+    option_parser.add_option("--maximum", action="append", type="string", dest="maximums", default=[],
+                             metavar="METRIC=VALUE", help="Upper limit of a metric")
+    option_parser.add_option("--existing", action="store_true", dest="include_existing", default=False,
+                             help="Also monitor the files already in the folder")
+    option_parser.add_option("--once", action="store_true", dest="once", default=False,
+                             help="Read the files of the folder once and exit")
+    option_parser.add_option("--figure", action="store", type="string", dest="figure_file", default="",
+                             help="Save the rolling plots in this file at the end")
+    option_parser.add_option("-v", "--verbose", action="store_true", dest="verbose", default=False,
+                             help="Log messages on stderr")
+
+    return option_parser
+
+
+def main(argv=None, output_file=None):
+    if output_file is None:
+        output_file = sys.stdout
+
+    option_parser = create_option_parser()
+    try:
+        options, arguments = option_parser.parse_args(argv)
+    except SystemExit as exit_status:
+        return exit_status.code if exit_status.code else EXIT_SUCCESS
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if options.verbose else logging.WARNING)
+
+    if len(arguments) != 1 or not os.path.isdir(arguments[0]):
+        output_file.write("One existing save folder is needed\n")
+        return EXIT_USAGE_ERROR
+    try:
+        thresholds = create_thresholds(options.minimums, options.maximums)
+        monitor = AcquisitionMonitor(arguments[0], options.capacity,
+                                     include_existing=options.include_existing or options.once)
+    except ValueError as message:
+        output_file.write("{}\n".format(message))
+        return EXIT_USAGE_ERROR
+    monitor.thresholds = thresholds
+    monitor.alarm_callback = lambda alarm: output_file.write("Alarm, spectrum {:d}: {}\n".format(
+        alarm["spectrum_number"], alarm["message"]))
+
+    exit_code = EXIT_SUCCESS
+    if options.once:
+        monitor.reset()
+        monitor.add_files(sorted(monitor.get_file_paths(), key=get_natural_sort_key))
+    else:
+        monitor.start(options.poll_interval_s)
+        output_file.write("Monitoring {}, Ctrl-C to stop\n".format(monitor.data_folder))
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            exit_code = EXIT_INTERRUPTED
+        finally:
+            monitor.stop()
+
+    output_file.write(format_monitor_summary(monitor.summarize()) + "\n")
+    if len(options.figure_file) > 0:
+        monitor_figure = MonitorFigure()
+        monitor_figure.set_thresholds(thresholds)
+        monitor_figure.update(monitor)
+        monitor_figure.save(options.figure_file)
+
+    if exit_code == EXIT_SUCCESS and len(monitor.alarms) > 0:
+        exit_code = EXIT_ALARM
+    return exit_code
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
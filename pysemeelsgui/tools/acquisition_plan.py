@@ -0,0 +1,439 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_plan
+   :synopsis: Acquire several series of spectra back to back from a plan file.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Acquire several series of spectra back to back from a plan file.
+
+The plan is a JSON file with a list of series and optional defaults for the series::
+
+    {"version": 1,
+     "defaults": {"delay_spectrum_s": 2.0, "acquisition_mode": "Manual"},
+     "series": [{"basename": "sample_a", "number_spectra": 100},
+                {"basename": "sample_b", "number_spectra": 50, "delay_spectrum_s": 10.0}]}
+
+Each series is acquired by an :py:class:`pysemeelsgui.tools.acquisition_loop.AcquisitionLoop` with the same connected
+driver, and its step timings are kept in the summary of the plan.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import sys
+import json
+import time
+import logging
+import optparse
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_driver import create_driver, AcquisitionError, BACKENDS, BACKEND_ELEMENTS_VIEW, \
+    BACKEND_SIMULATED
+from pysemeelsgui.tools.acquisition_loop import AcquisitionLoop, ACQUISITION_MODES, ACQUISITION_MODE_MANUAL, \
+    DEFAULT_COMMENT
+from pysemeelsgui.tools.acquisition_manifest import AcquisitionManifest, get_acquisition_manifest_file_path
+from pysemeelsgui.tools.acquisition_timing import PERCENTILES
+from pysemeelsgui.tools.polling import DEFAULT_STABLE_TIME_s
+
+# Globals and constants variables.
+PLAN_VERSION = 1
+
+SERIES_OPTIONS = ("basename", "number_spectra", "delay_spectrum_s", "acquisition_mode", "overwrite", "comment")
+
+EXIT_SUCCESS = 0
+EXIT_SERIES_FAILED = 1
+EXIT_USAGE_ERROR = 2
+EXIT_INTERRUPTED = 130
+
+
+class AcquisitionSeries(object):
+    """
+    Options of one series of the plan, the attributes of :py:class:`AcquisitionLoop` with the same names.
+    """
+
+    def __init__(self, basename, number_spectra, delay_spectrum_s=1.0, acquisition_mode=ACQUISITION_MODE_MANUAL,
+                 overwrite=False, comment=DEFAULT_COMMENT):
+        self.basename = basename
+        self.number_spectra = number_spectra
+        self.delay_spectrum_s = delay_spectrum_s
+        self.acquisition_mode = acquisition_mode
+        self.overwrite = overwrite
+        self.comment = comment
+
+    def to_dict(self):
+        return dict((option, getattr(self, option)) for option in SERIES_OPTIONS)
+
+
+def parse_acquisition_plan(data):
+    """
+    :param data: dict read from a plan file.
+    :return: list of :py:class:`AcquisitionSeries`.
+    :raise ValueError: if the plan is not valid, the message gives the series and the option.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("The plan must be a JSON object")
+    if data.get("version", PLAN_VERSION) != PLAN_VERSION:
+        raise ValueError("Unknown plan version: {}".format(data.get("version")))
+
+    defaults = data.get("defaults", {})
+    if not isinstance(defaults, dict):
+        raise ValueError("The defaults must be a JSON object")
+    series_data = data.get("series")
+    if not isinstance(series_data, list) or len(series_data) == 0:
+        raise ValueError("The plan has no series")
+
+    series_list = []
+    basenames = set()
+    for index, options in enumerate(series_data, 1):
+        if not isinstance(options, dict):
+            raise ValueError("Series {:d}: must be a JSON object".format(index))
+        options = dict(defaults, **options)
+        unknown_options = sorted(set(options) - set(SERIES_OPTIONS))
+        if len(unknown_options) > 0:
+            raise ValueError("Series {:d}: unknown options {}".format(index, ", ".join(unknown_options)))
+
+        basename = options.get("basename")
+        if not isinstance(basename, str) or len(basename) == 0:
+            raise ValueError("Series {:d}: no basename".format(index))
+        if basename in basenames:
+            raise ValueError("Series {:d}: basename {} already used".format(index, basename))
+        basenames.add(basename)
+
+        number_spectra = options.get("number_spectra")
+        # JSON true and false are read as bool, a subclass of int.
+        if isinstance(number_spectra, bool) or not isinstance(number_spectra, int) or number_spectra < 1:
+            raise ValueError("Series {:d}: the number of spectra must be at least 1".format(index))
+        delay_spectrum_s = options.get("delay_spectrum_s", 1.0)
+        if isinstance(delay_spectrum_s, bool) or not isinstance(delay_spectrum_s, (int, float)) or \
+                delay_spectrum_s < 0.0:
+            raise ValueError("Series {:d}: invalid delay {}".format(index, delay_spectrum_s))
+        acquisition_mode = options.get("acquisition_mode", ACQUISITION_MODE_MANUAL)
+        if acquisition_mode not in ACQUISITION_MODES:
+            raise ValueError("Series {:d}: unknown acquisition mode {}".format(index, acquisition_mode))
+        overwrite = options.get("overwrite", False)
+        if not isinstance(overwrite, bool):
+            raise ValueError("Series {:d}: overwrite must be true or false".format(index))
+        comment = options.get("comment", DEFAULT_COMMENT)
+        if not isinstance(comment, str):
+            raise ValueError("Series {:d}: the comment must be a text".format(index))
+
+        series_list.append(AcquisitionSeries(basename, number_spectra, float(delay_spectrum_s), acquisition_mode,
+                                             overwrite, comment))
+
+    return series_list
+
+
+def read_acquisition_plan(plan_file_path):
+    with open(plan_file_path, 'r') as plan_file:
+        try:
+            data = json.load(plan_file)
+        except ValueError as message:
+            raise ValueError("Cannot read plan {}: {}".format(plan_file_path, message))
+
+    return parse_acquisition_plan(data)
+
+
+class SeriesResult(object):
+    """
+    Result of one series.
+
+    :ivar summary: summary of the step timings, see :py:meth:`AcquisitionTimer.summarize`.
+    :ivar error_message: None if the series ended without error.
+    """
+
+    def __init__(self, series):
+        self.series = series
+        self.number_saved = 0
+        self.number_issues = 0
+        self.summary = {}
+        self.is_cancelled = False
+        self.error_message = None
+
+    def to_dict(self):
+        return {"series": self.series.to_dict(), "number_saved": self.number_saved,
+                "number_issues": self.number_issues, "cancelled": self.is_cancelled, "error": self.error_message,
+                "timing": self.summary}
+
+
+class AcquisitionPlanRunner(object):
+    """
+    Acquire the series of a plan with a connected driver.
+
+    :ivar save_folder: folder of the saved files, the loops wait for each saved file and write the acquisition
+        manifest of each series.
+    :ivar stable_time_s: time without change of a saved file before it is complete.
+    :ivar stop_on_error: stop the plan when a series fails, else continue with the next series.
+    :ivar series_callback: optional ``series_callback(series_index, number_series, series)`` called when a series
+        starts, *series_index* from 1.
+    :ivar progress_callback: optional ``progress_callback(number_done, number_total, elapsed_time_s)`` of the current
+        series.
+    :ivar saved_file_callback: optional callback of each saved file, see :py:class:`AcquisitionLoop`.
+    :ivar record_file: optional text file of the step timing records of all the series.
+    :ivar cancel_event: :py:class:`threading.Event` stopping the plan between spectra.
+    :ivar pause_event: :py:class:`threading.Event` pausing the plan between spectra.
+    """
+
+    def __init__(self, driver, series_list):
+        self.driver = driver
+        self.series_list = list(series_list)
+
+        self.save_folder = ""
+        self.stable_time_s = DEFAULT_STABLE_TIME_s
+        self.stop_on_error = True
+        self.series_callback = None
+        self.progress_callback = None
+        self.saved_file_callback = None
+        self.issue_callback = None
+        self.record_file = None
+        self.cancel_event = threading.Event()
+        self.pause_event = threading.Event()
+
+        self.results = []
+        self.elapsed_time_s = 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def pause(self):
+        self.pause_event.set()
+
+    def resume(self):
+        self.pause_event.clear()
+
+    def is_paused(self):
+        return self.pause_event.is_set()
+
+    def create_loop(self, series):
+        acquisition_loop = AcquisitionLoop(self.driver)
+        acquisition_loop.basename = series.basename
+        acquisition_loop.number_spectra = series.number_spectra
+        acquisition_loop.delay_spectrum_s = series.delay_spectrum_s
+        acquisition_loop.acquisition_mode = series.acquisition_mode
+        acquisition_loop.overwrite = series.overwrite
+        acquisition_loop.comment = series.comment
+        acquisition_loop.save_folder = self.save_folder
+        acquisition_loop.stable_time_s = self.stable_time_s
+
+        acquisition_loop.progress_callback = self.progress_callback
+        acquisition_loop.saved_file_callback = self.saved_file_callback
+        acquisition_loop.cancel_event = self.cancel_event
+        acquisition_loop.pause_event = self.pause_event
+        acquisition_loop.timer.record_file = self.record_file
+        if len(self.save_folder) > 0:
+            manifest_file_path = get_acquisition_manifest_file_path(self.save_folder, series.basename)
+            acquisition_loop.manifest = AcquisitionManifest(manifest_file_path)
+            acquisition_loop.manifest.issue_callback = self.issue_callback
+
+        return acquisition_loop
+
+    def run(self):
+        start_time = time.perf_counter()
+        self.results = []
+
+        for series_index, series in enumerate(self.series_list, 1):
+            if self.is_cancelled():
+                break
+
+            logging.info("Series {:d}/{:d}: {}".format(series_index, len(self.series_list), series.basename))
+            if self.series_callback is not None:
+                self.series_callback(series_index, len(self.series_list), series)
+
+            result = SeriesResult(series)
+            self.results.append(result)
+            acquisition_loop = self.create_loop(series)
+            try:
+                acquisition_loop.run()
+            except AcquisitionError as message:
+                logging.error("Series {} failed: {}".format(series.basename, message))
+                result.error_message = str(message)
+            finally:
+                result.number_saved = len(acquisition_loop.saved_file_names)
+                result.summary = acquisition_loop.timer.summarize()
+                if acquisition_loop.manifest is not None:
+                    result.number_issues = len(acquisition_loop.manifest.issues)
+                result.is_cancelled = self.is_cancelled() and result.number_saved < series.number_spectra
+
+            if result.error_message is not None and self.stop_on_error:
+                break
+
+        self.elapsed_time_s = time.perf_counter() - start_time
+
+    @property
+    def number_failed(self):
+        return len([result for result in self.results if result.error_message is not None])
+
+    def summarize(self):
+        """
+        :return: dict with the totals of the plan and the result of each series.
+        """
+        number_saved = sum(result.number_saved for result in self.results)
+        spectra_per_minute = 0.0
+        if self.elapsed_time_s > 0.0:
+            spectra_per_minute = 60.0 * number_saved / self.elapsed_time_s
+
+        return {"number_series": len(self.series_list), "number_run": len(self.results),
+                "number_failed": self.number_failed, "number_saved": number_saved, "elapsed_s": self.elapsed_time_s,
+                "spectra_per_minute": spectra_per_minute,
+                "series": [result.to_dict() for result in self.results]}
+
+
+def format_plan_summary(summary):
+    """
+    Text table of the plan summary, one line per series.
+    """
+    lines = ["{:d}/{:d} series, {:d} spectra in {:.1f} s, {:.1f} spectra per minute".format(
+        summary["number_run"], summary["number_series"], summary["number_saved"], summary["elapsed_s"],
+        summary["spectra_per_minute"])]
+
+    percentile = PERCENTILES[0]
+    columns = ["series", "mode", "saved", "spectra/min", "p{:d} spectrum (s)".format(percentile), "issues", "status"]
+    lines.append("  ".join("{:>18}".format(column) for column in columns))
+    for series_result in summary["series"]:
+        series = series_result["series"]
+        timing = series_result["timing"]
+        spectrum_statistics = timing.get("steps", {}).get("spectrum", {})
+        spectrum_time = spectrum_statistics.get("p{:d}_s".format(percentile))
+
+        status = "ok"
+        if series_result["error"] is not None:
+            status = "error"
+        elif series_result["cancelled"]:
+            status = "cancelled"
+
+        values = [series["basename"], series["acquisition_mode"],
+                  "{:d}/{:d}".format(series_result["number_saved"], series["number_spectra"]),
+                  "{:.1f}".format(timing.get("spectra_per_minute", 0.0)),
+                  "{:.3f}".format(spectrum_time) if spectrum_time is not None else "-",
+                  "{:d}".format(series_result["number_issues"]), status]
+        lines.append("  ".join("{:>18}".format(value) for value in values))
+
+    return "\n".join(lines)
+
+
+def create_option_parser():
+    option_parser = optparse.OptionParser(usage="%prog [options] PLAN_FILE",
+                                          description="Acquire the series of spectra of a JSON plan file.")
+    option_parser.add_option("--backend", action="store", type="choice", choices=list(BACKENDS),
+                             dest="backend", default=BACKEND_ELEMENTS_VIEW,
+                             help="Acquisition backend: {} (default: {})".format(", ".join(BACKENDS),
+                                                                                BACKEND_ELEMENTS_VIEW))
+    option_parser.add_option("--save-folder", action="store", type="string", dest="save_folder", default="",
+                             help="Save the spectra in this folder, wait for each saved file and write the manifests")
+    option_parser.add_option("--auto-tune", action="store_true", dest="auto_tune", default=False,
+                             help="Tune the timeout of each ElementsView window from its measured response times")
+    option_parser.add_option("--time-scale", action="store", type="float", dest="time_scale", default=1.0,
+                             help="Factor of the latencies of the simulated backend (default: 1.0)")
+    option_parser.add_option("--continue-on-error", action="store_true", dest="continue_on_error", default=False,
+                             help="Continue with the next series when a series fails")
+    option_parser.add_option("--timing-file", action="store", type="string", dest="timing_file", default="",
+                             help="Write the duration of each step in this JSON lines file")
+    option_parser.add_option("--report", action="store", type="string", dest="report_file", default="",
+                             help="Write the JSON summary of the plan in this file")
+    option_parser.add_option("-n", "--dry-run", action="store_true", dest="dry_run", default=False,
+                             help="Check the plan file and print the series without acquiring")
+    option_parser.add_option("-v", "--verbose", action="store_true", dest="verbose", default=False,
+                             help="Log messages on stderr")
+
+    return option_parser
+
+
+def create_plan_driver(options):
+    if options.backend == BACKEND_SIMULATED:
+        # The delay of each series is its acquisition time.
+        return create_driver(BACKEND_SIMULATED, save_folder=options.save_folder or ".", acquisition_time_s=0.0,
+                             time_scale=options.time_scale)
+
+    return create_driver(options.backend, auto_tune=options.auto_tune)
+
+
+def main(argv=None, output_file=None):
+    if output_file is None:
+        output_file = sys.stdout
+
+    option_parser = create_option_parser()
+    try:
+        options, arguments = option_parser.parse_args(argv)
+    except SystemExit as exit_status:
+        return exit_status.code if exit_status.code else EXIT_SUCCESS
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if options.verbose else logging.WARNING)
+
+    if len(arguments) != 1:
+        output_file.write("One plan file is needed\n")
+        return EXIT_USAGE_ERROR
+    if len(options.save_folder) > 0 and not os.path.isdir(options.save_folder):
+        output_file.write("Save folder not found: {}\n".format(options.save_folder))
+        return EXIT_USAGE_ERROR
+
+    try:
+        series_list = read_acquisition_plan(arguments[0])
+    except (IOError, ValueError) as message:
+        output_file.write("{}\n".format(message))
+        return EXIT_USAGE_ERROR
+
+    if options.dry_run:
+        for series_index, series in enumerate(series_list, 1):
+            output_file.write("{:d}: {}\n".format(series_index, json.dumps(series.to_dict(), sort_keys=True)))
+        return EXIT_SUCCESS
+
+    timing_file = open(options.timing_file, 'w') if len(options.timing_file) > 0 else None
+    runner = None
+    try:
+        with create_plan_driver(options) as driver:
+            runner = AcquisitionPlanRunner(driver, series_list)
+            runner.save_folder = options.save_folder
+            runner.stop_on_error = not options.continue_on_error
+            runner.record_file = timing_file
+            runner.series_callback = lambda series_index, number_series, series: output_file.write(
+                "Series {:d}/{:d}: {}\n".format(series_index, number_series, series.basename))
+            runner.run()
+    except KeyboardInterrupt:
+        output_file.write("Interrupted\n")
+        return EXIT_INTERRUPTED
+    except (AcquisitionError, ImportError) as message:
+        output_file.write("{}\n".format(message))
+        return EXIT_SERIES_FAILED
+    finally:
+        if timing_file is not None:
+            timing_file.close()
+
+    summary = runner.summarize()
+    output_file.write(format_plan_summary(summary) + "\n")
+    if len(options.report_file) > 0:
+        with open(options.report_file, 'w') as report_file:
+            json.dump(summary, report_file, indent=2, sort_keys=True)
+
+    if runner.number_failed > 0:
+        return EXIT_SERIES_FAILED
+    return EXIT_SUCCESS
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
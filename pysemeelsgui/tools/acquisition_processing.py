@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_processing
+   :synopsis: Process the saved spectra in the background during the acquisition.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Process the saved spectra in the background during the acquisition.
+
+Each saved .elv file is given to :py:meth:`BackgroundProcessor.submit`, which never blocks: the file is put in a bounded
+queue, or kept in a list of deferred files when the queue is full and put in the queue as soon as there is room. The
+files are converted to MSA and HDF5, their zero loss peak is fitted and a thumbnail is drawn on a worker process with a
+lower priority, so the processing does not take the CPU or the GIL from the acquisition loop.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import csv
+import time
+import logging
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from six.moves import queue
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.parallel_batch_convert import get_output_file_path, read_elv_file, convert_elv_outputs, \
+    MSA_EXTENSION, HDF5_EXTENSION
+from pysemeelsgui.tools.figure_engine import SpectrumFigureTemplate, get_figure_file_paths
+from pysemeelsgui.zero_loss_peak_batch_fit import fit_zero_loss_peak, ZeroLossPeakFitResult, RESULT_COLUMNS
+
+# Globals and constants variables.
+THUMBNAIL_SUFFIX = "_thumbnail"
+ZERO_LOSS_PEAK_CSV_SUFFIX = "_zero_loss_peak.csv"
+THUMBNAIL_OPTIONS = {"figure_size": (3, 2), "dpi": 60}
+WORKER_NICE_INCREMENT = 10
+
+_worker_thumbnail_template = None
+
+
+class ProcessingOptions(object):
+    """
+    Outputs created for each saved spectrum.
+
+    :ivar fit_function: picklable callable ``fit_function(energies_eV, counts)`` returning a
+        :py:class:`pysemeelsgui.zero_loss_peak_batch_fit.ZeroLossPeakFitResult`.
+    :ivar convert_function: picklable callable ``convert_function(elv_file_path, convert_msa, convert_hdf5, elv_file)``
+        writing the MSA and HDF5 files from the parsed file,
+        :py:func:`pysemeelsgui.tools.parallel_batch_convert.convert_elv_outputs` by default.
+    """
+
+    def __init__(self, convert_msa=True, convert_hdf5=True, fit_zero_loss_peak=True, generate_thumbnail=True,
+                 fit_function=fit_zero_loss_peak, convert_function=convert_elv_outputs):
+        self.convert_msa = convert_msa
+        self.convert_hdf5 = convert_hdf5
+        self.fit_zero_loss_peak = fit_zero_loss_peak
+        self.generate_thumbnail = generate_thumbnail
+        self.fit_function = fit_function
+        self.convert_function = convert_function
+
+
+class ProcessedSpectrum(object):
+    """
+    Results of the processing of one saved spectrum.
+
+    :ivar zero_loss_peak: :py:class:`ZeroLossPeakFitResult`, None if the peak was not fitted.
+    :ivar error_message: None if the processing succeeded.
+    """
+
+    def __init__(self, elv_file_path):
+        self.elv_file_path = elv_file_path
+        self.output_file_paths = []
+        self.zero_loss_peak = None
+        self.elapsed_time_s = 0.0
+        self.error_message = None
+
+    @property
+    def success(self):
+        return self.error_message is None
+
+
+def get_zero_loss_peak_csv_path(save_folder, basename):
+    return os.path.join(save_folder, basename + ZERO_LOSS_PEAK_CSV_SUFFIX)
+
+
+def _initialize_worker():
+    # The acquisition has priority over the processing.
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICE_INCREMENT)
+
+
+def _get_process_id():
+    return os.getpid()
+
+
+def process_saved_file(elv_file_path, options):
+    """
+    Create the outputs of one saved spectrum, in a worker process.
+
+    :return: :py:class:`ProcessedSpectrum`, with the error message if the processing failed.
+    """
+    global _worker_thumbnail_template
+
+    start_time = time.perf_counter()
+    processed_spectrum = ProcessedSpectrum(elv_file_path)
+    try:
+        elv_file = read_elv_file(elv_file_path)
+        energies_eV = np.asarray(elv_file.energies_eV, dtype=np.float64)
+        counts = np.asarray(elv_file.counts, dtype=np.float64)
+        title = os.path.splitext(os.path.basename(elv_file_path))[0]
+
+        if options.convert_msa or options.convert_hdf5:
+            options.convert_function(elv_file_path, options.convert_msa, options.convert_hdf5, elv_file)
+        if options.convert_msa:
+            processed_spectrum.output_file_paths.append(get_output_file_path(elv_file_path, MSA_EXTENSION))
+        if options.convert_hdf5:
+            processed_spectrum.output_file_paths.append(get_output_file_path(elv_file_path, HDF5_EXTENSION))
+
+        if options.fit_zero_loss_peak:
+            # The last channel of the .elv files is not a measurement.
+            try:
+                processed_spectrum.zero_loss_peak = options.fit_function(energies_eV[:-1], counts[:-1])
+            except Exception as message:
+                processed_spectrum.zero_loss_peak = ZeroLossPeakFitResult()
+                processed_spectrum.zero_loss_peak.error_message = str(message)
+
+        if options.generate_thumbnail:
+            if _worker_thumbnail_template is None:
+                _worker_thumbnail_template = SpectrumFigureTemplate(**THUMBNAIL_OPTIONS)
+            thumbnail_file_paths = get_figure_file_paths(elv_file_path, THUMBNAIL_SUFFIX)
+            _worker_thumbnail_template.render(energies_eV, counts, title, thumbnail_file_paths)
+            processed_spectrum.output_file_paths.extend(thumbnail_file_paths)
+    except Exception as message:
+        processed_spectrum.error_message = str(message)
+
+    processed_spectrum.elapsed_time_s = time.perf_counter() - start_time
+    return processed_spectrum
+
+
+class BackgroundProcessor(object):
+    """
+    Process the saved spectra on *number_workers* processes while the acquisition continues.
+
+    :param queue_size: number of files waiting in the queue, the next files are deferred.
+    :ivar result_callback: optional ``result_callback(processed_spectrum)`` called from a processing thread,
+        one result at a time.
+    :ivar results: list of :py:class:`ProcessedSpectrum` in the order of the end of their processing.
+    :ivar number_deferred: number of files submitted when the queue was full.
+    """
+
+    def __init__(self, options=None, queue_size=8, number_workers=1):
+        self.options = options if options is not None else ProcessingOptions()
+        self.queue_size = max(1, queue_size)
+        self.number_workers = max(1, number_workers)
+
+        self.result_callback = None
+        self.results = []
+        self.number_deferred = 0
+
+        self._lock = threading.Lock()
+        self._result_lock = threading.Lock()
+        self._file_queue = None
+        self._deferred_file_paths = []
+        self._executor = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        self.results = []
+        self.number_deferred = 0
+        self._deferred_file_paths = []
+        self._file_queue = queue.Queue(maxsize=self.queue_size)
+
+        self._executor = ProcessPoolExecutor(max_workers=self.number_workers,
+                                             mp_context=multiprocessing.get_context(),
+                                             initializer=_initialize_worker)
+        # The worker processes are started now, before the caller starts other threads.
+        self._executor.submit(_get_process_id).result()
+
+        self._thread = threading.Thread(target=self._run, name="BackgroundProcessor")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, elv_file_path):
+        """
+        Give a saved file to process, without waiting.
+
+        :return: False if the queue is full and the file is deferred.
+        """
+        with self._lock:
+            self._deferred_file_paths.append(elv_file_path)
+            self._put_deferred()
+            if len(self._deferred_file_paths) > 0 and self._deferred_file_paths[-1] == elv_file_path:
+                self.number_deferred += 1
+                logging.debug("Processing queue full, {} deferred".format(elv_file_path))
+                return False
+
+        return True
+
+    def close(self):
+        """
+        Wait until all the submitted files are processed.
+        """
+        if self._thread is None:
+            return
+
+        with self._lock:
+            deferred_file_paths, self._deferred_file_paths = self._deferred_file_paths, []
+        for elv_file_path in deferred_file_paths + [None]:
+            self._file_queue.put(elv_file_path)
+
+        self._thread.join()
+        self._thread = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def export_zero_loss_peak_csv(self, file_path):
+        """
+        Write the zero loss peak results of the processed spectra, in the order of the file names.
+        """
+        processed_spectra = sorted((processed_spectrum for processed_spectrum in self.results
+                                    if processed_spectrum.zero_loss_peak is not None),
+                                   key=lambda processed_spectrum: processed_spectrum.elv_file_path)
+
+        with open(file_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["spectrum"] + RESULT_COLUMNS + ["error"])
+            for processed_spectrum in processed_spectra:
+                result = processed_spectrum.zero_loss_peak
+                row = [os.path.basename(processed_spectrum.elv_file_path)]
+                row.extend(getattr(result, column) for column in RESULT_COLUMNS)
+                row.append(result.error_message or "")
+                writer.writerow(row)
+
+    def _put_deferred(self):
+        while len(self._deferred_file_paths) > 0:
+            try:
+                self._file_queue.put_nowait(self._deferred_file_paths[0])
+            except queue.Full:
+                return
+            self._deferred_file_paths.pop(0)
+
+    def _run(self):
+        # At most number_workers files are in the pool, the next ones wait in the queue or are deferred.
+        in_flight = threading.BoundedSemaphore(self.number_workers)
+        while True:
+            elv_file_path = self._file_queue.get()
+            if elv_file_path is None:
+                break
+
+            with self._lock:
+                self._put_deferred()
+
+            in_flight.acquire()
+            future = self._executor.submit(process_saved_file, elv_file_path, self.options)
+            future.add_done_callback(functools.partial(self._end_processing, elv_file_path, in_flight))
+
+        for _slot in range(self.number_workers):
+            in_flight.acquire()
+
+    def _end_processing(self, elv_file_path, in_flight, future):
+        try:
+            processed_spectrum = future.result()
+        except Exception as message:
+            processed_spectrum = ProcessedSpectrum(elv_file_path)
+            processed_spectrum.error_message = str(message)
+
+        try:
+            if not processed_spectrum.success:
+                logging.error("Cannot process {}: {}".format(elv_file_path, processed_spectrum.error_message))
+            with self._result_lock:
+                self.results.append(processed_spectrum)
+                if self.result_callback is not None:
+                    self.result_callback(processed_spectrum)
+        finally:
+            in_flight.release()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_timing
+   :synopsis: Time each step of the acquisition loop and summarize the latencies.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Time each step of the acquisition loop and summarize the latencies.
+
+Each step gives a record with the spectrum id, the step, its duration and its outcome. The records are kept in memory
+and, with a record file, written as JSON lines: a ``session`` line with the acquisition options, one ``step`` line per
+step and a ``summary`` line with the percentiles of each step and the effective spectra per minute.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import json
+import time
+import contextlib
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+STEP_WAIT_READY = "wait_ready"
+STEP_START_ACQUISITION = "start_acquisition"
+STEP_ACQUISITION_DELAY = "acquisition_delay"
+STEP_WAIT_ACQUIRED = "wait_acquired"
+STEP_SAVE_DIALOG = "save_dialog"
+STEP_SAVE_AS = "save_as"
+STEP_CONFIRM_OVERWRITE = "confirm_overwrite"
+STEP_WAIT_SAVED = "wait_saved"
+STEP_VERIFY_SAVED = "verify_saved"
+STEP_SUBMIT_PROCESSING = "submit_processing"
+STEP_SPECTRUM = "spectrum"
+STEPS = (STEP_WAIT_READY, STEP_START_ACQUISITION, STEP_ACQUISITION_DELAY, STEP_WAIT_ACQUIRED, STEP_SAVE_DIALOG,
+         STEP_SAVE_AS, STEP_CONFIRM_OVERWRITE, STEP_WAIT_SAVED, STEP_VERIFY_SAVED, STEP_SUBMIT_PROCESSING,
+         STEP_SPECTRUM)
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_NOT_SHOWN = "not_shown"
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def compute_step_statistics(durations_s, percentiles=PERCENTILES):
+    """
+    :return: dict with the count, mean, maximum and percentiles ``p50_s``... of the durations.
+    """
+    durations_s = np.asarray(durations_s, dtype=np.float64)
+    statistics = {"count": len(durations_s)}
+    if len(durations_s) == 0:
+        return statistics
+
+    statistics["mean_s"] = float(np.mean(durations_s))
+    statistics["max_s"] = float(np.max(durations_s))
+    for percentile, value in zip(percentiles, np.percentile(durations_s, percentiles)):
+        statistics["p{:d}_s".format(percentile)] = float(value)
+
+    return statistics
+
+
+class AcquisitionTimer(object):
+    """
+    Records of the duration of each step of the acquisition loop.
+
+    :param record_file: optional text file where the records are written as JSON lines.
+    """
+
+    def __init__(self, record_file=None):
+        self.record_file = record_file
+
+        self.records = []
+        self.start_time = None
+        self.end_time = None
+
+    def start_session(self, **options):
+        self.records = []
+        self.start_time = time.time()
+        self.end_time = None
+        self._write(dict(event="session", time=self.start_time, **options))
+
+    @contextlib.contextmanager
+    def measure(self, spectrum_id, step):
+        """
+        Time the block as a step of the spectrum. The block can change the ``outcome`` of the record given, an exception
+        gives the error outcome and is raised again.
+        """
+        record = {"event": "step", "spectrum_id": spectrum_id, "step": step, "outcome": OUTCOME_OK,
+                  "time": time.time()}
+        start_time = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record["outcome"] = OUTCOME_ERROR
+            raise
+        finally:
+            record["duration_s"] = time.perf_counter() - start_time
+            self.records.append(record)
+            self.end_time = time.time()
+            self._write(record)
+
+    def get_durations(self, step, outcome=OUTCOME_OK):
+        return [record["duration_s"] for record in self.records
+                if record["step"] == step and record["outcome"] == outcome]
+
+    def summarize(self):
+        """
+        :return: dict with the statistics of each step and the effective spectra per minute of the session.
+        """
+        steps = {}
+        for step in STEPS:
+            statistics = compute_step_statistics(self.get_durations(step))
+            statistics["errors"] = len(self.get_durations(step, OUTCOME_ERROR))
+            if statistics["count"] > 0 or statistics["errors"] > 0:
+                steps[step] = statistics
+
+        number_spectra = len(self.get_durations(STEP_SPECTRUM))
+        elapsed_time_s = 0.0
+        if self.start_time is not None and self.end_time is not None:
+            elapsed_time_s = self.end_time - self.start_time
+        spectra_per_minute = 0.0
+        if elapsed_time_s > 0.0:
+            spectra_per_minute = 60.0 * number_spectra / elapsed_time_s
+
+        return {"number_spectra": number_spectra, "elapsed_s": elapsed_time_s,
+                "spectra_per_minute": spectra_per_minute, "steps": steps}
+
+    def end_session(self):
+        summary = self.summarize()
+        self._write(dict(event="summary", time=time.time(), **summary))
+        return summary
+
+    def _write(self, record):
+        if self.record_file is not None:
+            self.record_file.write(json.dumps(record, sort_keys=True) + "\n")
+            self.record_file.flush()
+
+
+def format_summary(summary):
+    """
+    Text table of the summary, one line per step.
+    """
+    lines = ["{:d} spectra in {:.1f} s, {:.1f} spectra per minute".format(
+        summary["number_spectra"], summary["elapsed_s"], summary["spectra_per_minute"])]
+
+    columns = ["step", "count", "errors", "mean_s"] + ["p{:d}_s".format(percentile) for percentile in PERCENTILES] + \
+        ["max_s"]
+    lines.append("  ".join("{:>18}".format(column) for column in columns))
+    for step in STEPS:
+        statistics = summary["steps"].get(step)
+        if statistics is None:
+            continue
+
+        values = [step, "{:d}".format(statistics["count"]), "{:d}".format(statistics["errors"])]
+        values.extend("{:.3f}".format(statistics[column]) if column in statistics else "-" for column in columns[3:])
+        lines.append("  ".join("{:>18}".format(value) for value in values))
+
+    return "\n".join(lines)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.acquisition_tuning
+   :synopsis: Tune the timeout of each wait of the acquisition from the measured response times.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tune the timeout of each wait of the acquisition from the measured response times.
+
+The first waits of each step use the initial timeout while the response times are measured. Then the timeout of the
+step is the percentile of the last response times multiplied by a safety factor plus a margin. When a wait times out,
+the timeout of the step is multiplied by the backoff factor, the wait continues with the new timeout and the new timeout
+is the minimum timeout of the step for the rest of the session.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import time
+import logging
+import collections
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.polling import poll_until, WaitTimeoutError
+
+# Globals and constants variables.
+DEFAULT_CALIBRATION_COUNT = 5
+DEFAULT_PERCENTILE = 95
+DEFAULT_SAFETY_FACTOR = 3.0
+DEFAULT_MARGIN_s = 0.25
+DEFAULT_BACKOFF_FACTOR = 2.0
+DEFAULT_HISTORY_SIZE = 50
+
+
+class TimeoutTuner(object):
+    """
+    Timeout of each wait step tuned from its response times.
+
+    :param initial_timeout_s: timeout of a step during its calibration.
+    :param minimum_timeout_s: lower limit of the tuned timeouts.
+    :param maximum_timeout_s: upper limit of the timeouts, a wait timing out at this timeout raises the error.
+    :param calibration_count: number of response times measured before the timeout of a step is tuned.
+    :param percentile: percentile of the last *history_size* response times used for the timeout.
+    """
+
+    def __init__(self, initial_timeout_s=10.0, minimum_timeout_s=0.5, maximum_timeout_s=30.0,
+                 calibration_count=DEFAULT_CALIBRATION_COUNT, percentile=DEFAULT_PERCENTILE,
+                 safety_factor=DEFAULT_SAFETY_FACTOR, margin_s=DEFAULT_MARGIN_s, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 history_size=DEFAULT_HISTORY_SIZE):
+        self.initial_timeout_s = initial_timeout_s
+        self.minimum_timeout_s = minimum_timeout_s
+        self.maximum_timeout_s = max(maximum_timeout_s, initial_timeout_s)
+        self.calibration_count = calibration_count
+        self.percentile = percentile
+        self.safety_factor = safety_factor
+        self.margin_s = margin_s
+        self.backoff_factor = backoff_factor
+        self.history_size = history_size
+
+        self._durations_s = {}
+        self._floors_s = {}
+        self._number_timeouts = {}
+
+    def get_options(self):
+        return {"initial_timeout_s": self.initial_timeout_s, "minimum_timeout_s": self.minimum_timeout_s,
+                "maximum_timeout_s": self.maximum_timeout_s, "calibration_count": self.calibration_count,
+                "percentile": self.percentile, "safety_factor": self.safety_factor, "margin_s": self.margin_s,
+                "backoff_factor": self.backoff_factor}
+
+    def is_calibrated(self, step):
+        return len(self._durations_s.get(step, ())) >= self.calibration_count
+
+    def get_timeout(self, step, initial_timeout_s=None):
+        """
+        :param initial_timeout_s: timeout of this step during its calibration, the tuner initial timeout if None.
+        """
+        floor_s = self._floors_s.get(step, self.minimum_timeout_s)
+        if not self.is_calibrated(step):
+            if initial_timeout_s is None:
+                initial_timeout_s = self.initial_timeout_s
+            return min(max(initial_timeout_s, floor_s), self.maximum_timeout_s)
+
+        response_time_s = float(np.percentile(self._durations_s[step], self.percentile))
+        timeout_s = self.safety_factor * response_time_s + self.margin_s
+        return min(max(timeout_s, floor_s, self.minimum_timeout_s), self.maximum_timeout_s)
+
+    def record(self, step, duration_s):
+        if step not in self._durations_s:
+            self._durations_s[step] = collections.deque(maxlen=self.history_size)
+        self._durations_s[step].append(duration_s)
+
+    def back_off(self, step, timeout_s):
+        """
+        Increase the timeout of the step after a timeout.
+
+        :return: the new timeout.
+        """
+        new_timeout_s = min(timeout_s * self.backoff_factor, self.maximum_timeout_s)
+        self._floors_s[step] = max(self._floors_s.get(step, 0.0), new_timeout_s)
+        self._number_timeouts[step] = self._number_timeouts.get(step, 0) + 1
+        logging.warning("Timeout of {} after {:.2f} s, new timeout {:.2f} s".format(step, timeout_s, new_timeout_s))
+        return new_timeout_s
+
+    def wait(self, step, condition, description=None, initial_timeout_s=None, back_off=True):
+        """
+        Call *condition()* until it returns a true value, with the timeout of the step, and record the response time.
+
+        :param back_off: if False, a timeout raises the error without changing the timeout, for a window that may not
+            be shown.
+        :return: the value of the condition.
+        :raise WaitTimeoutError: if the condition is still false after the maximum timeout.
+        """
+        if description is None:
+            description = step
+
+        timeout_s = self.get_timeout(step, initial_timeout_s)
+        start_time = time.perf_counter()
+        while True:
+            try:
+                value = poll_until(condition, timeout_s - (time.perf_counter() - start_time), description=description)
+                break
+            except WaitTimeoutError:
+                if not back_off or timeout_s >= self.maximum_timeout_s:
+                    raise
+                timeout_s = self.back_off(step, timeout_s)
+
+        self.record(step, time.perf_counter() - start_time)
+        return value
+
+    def summarize(self):
+        """
+        :return: dict of each step to its number of response times, timeouts and current timeout.
+        """
+        summary = {}
+        for step in sorted(set(self._durations_s) | set(self._number_timeouts)):
+            durations_s = self._durations_s.get(step, ())
+            statistics = {"count": len(durations_s), "timeouts": self._number_timeouts.get(step, 0),
+                          "timeout_s": self.get_timeout(step), "calibrated": self.is_calibrated(step)}
+            if len(durations_s) > 0:
+                statistics["p{:d}_s".format(self.percentile)] = float(np.percentile(durations_s, self.percentile))
+            summary[step] = statistics
+
+        return summary
@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.batch_benchmark
+   :synopsis: Benchmark the batch processing throughput on synthetic spectra.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Benchmark the batch processing throughput on synthetic spectra.
+
+A folder of synthetic .elv files is generated, then processed by :py:class:`BatchProcessing` once for each mode, the
+single pass pipeline (the default) and the multi pass run, and each number of workers. Each run is done in a new
+process, so its peak memory is not hidden by the previous runs. The report gives the files per second, the time of each
+stage and the peak memory of each case labelled with its mode, and can be compared with the report of a previous
+version to find regressions. The single pass stage times of the outputs are the sum of the time spent on each file, the
+figure times are summed over the worker processes. The multi pass stage times are the elapsed times of its passes.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import optparse
+import multiprocessing
+from six.moves import queue
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_runner import BatchProcessing, STAGE_BATCH_CONVERT, STATE_DONE
+from pysemeelsgui.tools.folder_scanner import FolderScanner, ELV_EXTENSION
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder, DEFAULT_NUMBER_CHANNELS
+from pysemeelsgui.tools.batch_manifest import OUTPUT_MSA, OUTPUT_HDF5, OUTPUT_PROJECT_HDF5, OUTPUT_SPECTRUM_FIGURE, \
+    OUTPUT_WINDOW_FIGURE
+
+# Globals and constants variables.
+REPORT_VERSION = 2
+
+BENCHMARK_OUTPUTS = (OUTPUT_MSA, OUTPUT_HDF5, OUTPUT_PROJECT_HDF5, OUTPUT_SPECTRUM_FIGURE, OUTPUT_WINDOW_FIGURE)
+DEFAULT_OUTPUTS = (OUTPUT_MSA, OUTPUT_HDF5, OUTPUT_PROJECT_HDF5, OUTPUT_SPECTRUM_FIGURE)
+DEFAULT_WORKER_COUNTS = (1, 2, 4)
+
+MODE_SINGLE_PASS = "single_pass"
+MODE_MULTI_PASS = "multi_pass"
+BENCHMARK_MODES = (MODE_SINGLE_PASS, MODE_MULTI_PASS)
+
+STAGE_SCAN = "scan"
+STAGE_PARSE = "parse"
+
+PROJECT_FILE_NAME = "benchmark_project.hdf5"
+
+EXIT_SUCCESS = 0
+EXIT_REGRESSION = 1
+EXIT_USAGE_ERROR = 2
+
+
+def get_peak_memory_mb():
+    """
+    Peak resident memory of this process and of its largest terminated child process.
+
+    :return: tuple (process MB, child MB), None when the platform does not give it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None, None
+
+    # The maximum resident set size is in kilobytes on Linux and in bytes on macOS.
+    scale = 1.0 / 1024.0 if sys.platform != "darwin" else 1.0 / (1024.0 * 1024.0)
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def clean_outputs(data_folder):
+    """
+    Remove all the files of the folder except the .elv files, so each run creates all the outputs.
+    """
+    for root, _folders, file_names in os.walk(data_folder):
+        for file_name in file_names:
+            if not file_name.lower().endswith(ELV_EXTENSION):
+                os.remove(os.path.join(root, file_name))
+
+
+def time_scan(data_folder, number_threads=1):
+    """
+    :return: tuple (number of files, scan time in second).
+    """
+    start_time = time.perf_counter()
+    number_files = sum(1 for _elv_file_path in FolderScanner(data_folder, number_threads=number_threads))
+    return number_files, time.perf_counter() - start_time
+
+
+def create_batch_processing(data_folder, number_workers, outputs, mode=MODE_SINGLE_PASS):
+    batch_processing = BatchProcessing()
+    batch_processing.data_folder = data_folder
+    batch_processing.overwrite = True
+    batch_processing.single_pass = mode == MODE_SINGLE_PASS
+    batch_processing.parallel = True
+    batch_processing.number_workers = number_workers
+
+    batch_processing.convert_msa = OUTPUT_MSA in outputs
+    batch_processing.convert_hdf5 = OUTPUT_HDF5 in outputs
+    batch_processing.use_project_hdf5_file = OUTPUT_PROJECT_HDF5 in outputs
+    batch_processing.project_hdf5_file = os.path.join(data_folder, PROJECT_FILE_NAME)
+    batch_processing.generate_spectrum_figure = OUTPUT_SPECTRUM_FIGURE in outputs
+    batch_processing.generate_window_figure = OUTPUT_WINDOW_FIGURE in outputs
+
+    return batch_processing
+
+
+def run_case(data_folder, number_workers, outputs, mode=MODE_SINGLE_PASS):
+    """
+    Process the folder once with *number_workers* workers in this process.
+
+    The multi pass run creates the MSA, HDF5 and project files together, their time is the one of the conversion
+    stage.
+
+    :return: dict of the case results.
+    """
+    clean_outputs(data_folder)
+
+    number_files, scan_time_s = time_scan(data_folder)
+    stage_times_s = {STAGE_SCAN: scan_time_s}
+
+    def record_stage(stage, state, elapsed_time_s):
+        if stage == STAGE_BATCH_CONVERT and state == STATE_DONE:
+            stage_times_s[STAGE_BATCH_CONVERT] = elapsed_time_s
+
+    batch_processing = create_batch_processing(data_folder, number_workers, outputs, mode)
+    batch_processing.stage_callback = record_stage
+    batch_processing.run()
+
+    stage_times_s.update(batch_processing.output_elapsed_times_s)
+
+    number_converted = len(batch_processing.converted_file_paths)
+    files_per_s = 0.0
+    if batch_processing.elapsed_time_s > 0.0:
+        files_per_s = number_converted / batch_processing.elapsed_time_s
+
+    peak_memory_mb, peak_worker_memory_mb = get_peak_memory_mb()
+
+    return {"mode": mode,
+            "number_workers": number_workers,
+            "number_files": number_files,
+            "number_converted": number_converted,
+            "number_failed": len(batch_processing.failed_file_paths),
+            "elapsed_s": batch_processing.elapsed_time_s,
+            "files_per_s": files_per_s,
+            "stage_times_s": stage_times_s,
+            "peak_memory_mb": peak_memory_mb,
+            "peak_worker_memory_mb": peak_worker_memory_mb}
+
+
+def _run_case_process(result_queue, data_folder, number_workers, outputs, mode):
+    try:
+        result = run_case(data_folder, number_workers, outputs, mode)
+    except Exception as message:
+        logging.exception(message)
+        result = {"mode": mode, "number_workers": number_workers, "error": str(message)}
+    result_queue.put(result)
+
+
+def run_isolated_case(data_folder, number_workers, outputs, mode=MODE_SINGLE_PASS):
+    """
+    Run :py:func:`run_case` in a new process, the peak memory is the one of this case only.
+    """
+    context = multiprocessing.get_context()
+    result_queue = context.Queue()
+    process = context.Process(target=_run_case_process,
+                              args=(result_queue, data_folder, number_workers, outputs, mode))
+    process.start()
+
+    result = None
+    while result is None:
+        try:
+            result = result_queue.get(timeout=0.5)
+        except queue.Empty:
+            if not process.is_alive():
+                result = {"mode": mode, "number_workers": number_workers,
+                          "error": "Benchmark process ended with exit code {}".format(process.exitcode)}
+    process.join()
+
+    return result
+
+
+def run_benchmark(data_folder, worker_counts=DEFAULT_WORKER_COUNTS, outputs=DEFAULT_OUTPUTS, modes=BENCHMARK_MODES,
+                  isolated=True, case_callback=None):
+    """
+    Process the folder once for each mode and number of workers.
+
+    :param case_callback: optional ``case_callback(result)`` called after each case.
+    :return: report dict.
+    """
+    report = {"version": REPORT_VERSION,
+              "created_time": time.time(),
+              "python_version": platform.python_version(),
+              "platform": platform.platform(),
+              "cpu_count": os.cpu_count(),
+              "outputs": list(outputs),
+              "modes": list(modes),
+              "cases": []}
+
+    for mode in modes:
+        for number_workers in worker_counts:
+            if isolated:
+                result = run_isolated_case(data_folder, number_workers, outputs, mode)
+            else:
+                result = run_case(data_folder, number_workers, outputs, mode)
+            report["cases"].append(result)
+
+            if case_callback is not None:
+                case_callback(result)
+
+    clean_outputs(data_folder)
+    return report
+
+
+def format_report(report):
+    """
+    Text table of the report, one line per case.
+    """
+    stage_names = [STAGE_SCAN, STAGE_PARSE]
+    if MODE_MULTI_PASS in report["modes"]:
+        stage_names.append(STAGE_BATCH_CONVERT)
+    stage_names.extend(output for output in BENCHMARK_OUTPUTS if output in report["outputs"])
+
+    columns = ["mode", "workers", "files", "failed", "elapsed_s", "files_per_s"] + \
+              ["{}_s".format(stage_name) for stage_name in stage_names] + ["peak_mb", "worker_peak_mb"]
+    lines = ["  ".join("{:>14}".format(column) for column in columns)]
+
+    for case in report["cases"]:
+        if "error" in case:
+            lines.append("{:>14}  {:>14}  error: {}".format(case["mode"], case["number_workers"], case["error"]))
+            continue
+
+        values = [case["mode"], "{:d}".format(case["number_workers"]), "{:d}".format(case["number_files"]),
+                  "{:d}".format(case["number_failed"]), "{:.2f}".format(case["elapsed_s"]),
+                  "{:.1f}".format(case["files_per_s"])]
+        values.extend("{:.2f}".format(case["stage_times_s"].get(stage_name, 0.0)) for stage_name in stage_names)
+        for memory_mb in (case["peak_memory_mb"], case["peak_worker_memory_mb"]):
+            values.append("-" if memory_mb is None else "{:.0f}".format(memory_mb))
+        lines.append("  ".join("{:>14}".format(value) for value in values))
+
+    return "\n".join(lines)
+
+
+def _get_case_key(case):
+    return case.get("mode", MODE_SINGLE_PASS), case["number_workers"]
+
+
+def compare_reports(report, baseline_report, tolerance=0.2):
+    """
+    Find the cases slower than the same mode and number of workers in the baseline report by more than *tolerance*.
+    The cases of a report without mode are single pass cases.
+
+    :return: list of regression messages, empty without regression.
+    """
+    baseline_cases = dict((_get_case_key(case), case) for case in baseline_report["cases"] if "error" not in case)
+
+    regressions = []
+    for case in report["cases"]:
+        baseline_case = baseline_cases.get(_get_case_key(case))
+        if baseline_case is None:
+            continue
+
+        mode, number_workers = _get_case_key(case)
+        if "error" in case:
+            regressions.append("{} {:d} workers: {}".format(mode, number_workers, case["error"]))
+        elif case["files_per_s"] < (1.0 - tolerance) * baseline_case["files_per_s"]:
+            regressions.append("{} {:d} workers: {:.1f} files/s, baseline {:.1f} files/s".format(
+                mode, number_workers, case["files_per_s"], baseline_case["files_per_s"]))
+
+    return regressions
+
+
+def create_option_parser():
+    option_parser = optparse.OptionParser(usage="%prog [options]",
+                                          description="Benchmark the batch processing on synthetic spectra.")
+    option_parser.add_option("-n", "--files", action="store", type="int", dest="number_files", default=200,
+                             help="Number of synthetic elv files (default: 200)")
+    option_parser.add_option("--folders", action="store", type="int", dest="number_folders", default=4,
+                             help="Number of sub-folders of the synthetic files (default: 4)")
+    option_parser.add_option("--channels", action="store", type="int", dest="number_channels",
+                             default=DEFAULT_NUMBER_CHANNELS,
+                             help="Number of channels of the spectra (default: {:d})".format(DEFAULT_NUMBER_CHANNELS))
+    option_parser.add_option("--seed", action="store", type="int", dest="seed", default=0,
+                             help="Seed of the synthetic spectra (default: 0)")
+    option_parser.add_option("-d", "--folder", action="store", type="string", dest="data_folder", default="",
+                             help="Generate the files in this new folder and keep them, instead of a temporary folder")
+    option_parser.add_option("-j", "--jobs", action="store", type="string", dest="worker_counts",
+                             default=",".join(str(number) for number in DEFAULT_WORKER_COUNTS),
+                             help="Comma separated numbers of workers (default: 1,2,4)")
+    option_parser.add_option("--outputs", action="store", type="string", dest="outputs",
+                             default=",".join(DEFAULT_OUTPUTS),
+                             help="Comma separated outputs: {} (default: {})".format(", ".join(BENCHMARK_OUTPUTS),
+                                                                                     ",".join(DEFAULT_OUTPUTS)))
+    option_parser.add_option("--modes", action="store", type="string", dest="modes",
+                             default=",".join(BENCHMARK_MODES),
+                             help="Comma separated batch processing modes: {0} (default: {0})".format(
+                                 ",".join(BENCHMARK_MODES)))
+    option_parser.add_option("--report", action="store", type="string", dest="report_file", default="",
+                             help="Write the JSON report in this file")
+    option_parser.add_option("--baseline", action="store", type="string", dest="baseline_file", default="",
+                             help="Compare the files per second with this JSON report")
+    option_parser.add_option("--tolerance", action="store", type="float", dest="tolerance", default=0.2,
+                             help="Fraction of the baseline files per second lost before a regression (default: 0.2)")
+    option_parser.add_option("-v", "--verbose", action="store_true", dest="verbose", default=False,
+                             help="Log messages on stderr")
+
+    return option_parser
+
+
+def _split_list(text):
+    return [item.strip() for item in text.split(",") if len(item.strip()) > 0]
+
+
+def main(argv=None, output_file=None):
+    if output_file is None:
+        output_file = sys.stdout
+
+    option_parser = create_option_parser()
+    try:
+        options, arguments = option_parser.parse_args(argv)
+    except SystemExit as exit_status:
+        return exit_status.code if exit_status.code else EXIT_SUCCESS
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if options.verbose else logging.WARNING)
+
+    outputs = _split_list(options.outputs)
+    modes = _split_list(options.modes)
+    try:
+        worker_counts = [int(number) for number in _split_list(options.worker_counts)]
+    except ValueError:
+        worker_counts = []
+
+    usage_error = None
+    if len(arguments) > 0:
+        usage_error = "Unexpected arguments: {}".format(" ".join(arguments))
+    elif options.number_files < 1:
+        usage_error = "The number of files must be at least 1"
+    elif len(worker_counts) == 0 or min(worker_counts) < 1:
+        usage_error = "Invalid numbers of jobs: {}".format(options.worker_counts)
+    elif len(outputs) == 0 or not set(outputs) <= set(BENCHMARK_OUTPUTS):
+        usage_error = "Unknown output: {}".format(options.outputs)
+    elif len(modes) == 0 or not set(modes) <= set(BENCHMARK_MODES):
+        usage_error = "Unknown mode: {}".format(options.modes)
+    elif len(options.data_folder) > 0 and os.path.exists(options.data_folder):
+        usage_error = "Folder already exists: {}".format(options.data_folder)
+    elif len(options.baseline_file) > 0 and not os.path.isfile(options.baseline_file):
+        usage_error = "Baseline report not found: {}".format(options.baseline_file)
+    if usage_error is not None:
+        output_file.write(usage_error + "\n")
+        return EXIT_USAGE_ERROR
+
+    if len(options.data_folder) > 0:
+        data_folder = options.data_folder
+        os.makedirs(data_folder)
+    else:
+        data_folder = tempfile.mkdtemp(prefix="pysemeels_benchmark_")
+
+    try:
+        generate_start_time = time.perf_counter()
+        generate_data_folder(data_folder, options.number_files, options.number_folders, options.number_channels,
+                             options.seed)
+        output_file.write("Generated {:d} files of {:d} channels in {:.1f} s\n".format(
+            options.number_files, options.number_channels, time.perf_counter() - generate_start_time))
+        output_file.flush()
+
+        report = run_benchmark(data_folder, worker_counts, outputs, modes)
+    finally:
+        if len(options.data_folder) == 0:
+            shutil.rmtree(data_folder, ignore_errors=True)
+
+    report["number_files"] = options.number_files
+    report["number_channels"] = options.number_channels
+    output_file.write(format_report(report) + "\n")
+
+    if len(options.report_file) > 0:
+        with open(options.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+
+    if len(options.baseline_file) > 0:
+        with open(options.baseline_file, 'r') as baseline_file:
+            regressions = compare_reports(report, json.load(baseline_file), options.tolerance)
+        for regression in regressions:
+            output_file.write("Regression: {}\n".format(regression))
+        if len(regressions) > 0:
+            return EXIT_REGRESSION
+
+    return EXIT_SUCCESS
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.batch_checkpoint
+   :synopsis: Checkpoint journal and atomic outputs to resume an interrupted batch processing.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Checkpoint journal and atomic outputs to resume an interrupted batch processing.
+
+Each output is written in a partial file renamed when complete, so a crash never leaves a truncated file with the final
+name. When an output is complete, a line is appended to the checkpoint journal of the data folder. A run started with
+the resume option skips the outputs in the journal and continues where the interrupted run stopped.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import json
+import logging
+import contextlib
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_manifest import normalize_options
+
+# Globals and constants variables.
+CHECKPOINT_FILE_NAME = ".pysemeels_batch_checkpoint.jsonl"
+CHECKPOINT_VERSION = 1
+
+PARTIAL_SUFFIX = ".partial"
+
+
+def get_checkpoint_file_path(data_folder):
+    return os.path.join(data_folder, CHECKPOINT_FILE_NAME)
+
+
+def get_partial_file_path(file_path):
+    """
+    Hidden partial file in the same folder, with the same extension so the writers select the same format.
+    """
+    folder, file_name = os.path.split(file_path)
+    root, extension = os.path.splitext(file_name)
+    return os.path.join(folder, "." + root + PARTIAL_SUFFIX + extension)
+
+
+@contextlib.contextmanager
+def atomic_output_file(file_path):
+    """
+    Give the partial file path to write, renamed to *file_path* only if the block ends without exception.
+    """
+    partial_file_path = get_partial_file_path(file_path)
+    try:
+        yield partial_file_path
+    except BaseException:
+        if os.path.exists(partial_file_path):
+            os.remove(partial_file_path)
+        raise
+
+    os.replace(partial_file_path, file_path)
+
+
+class CheckpointJournal(object):
+    """
+    Append-only journal of the outputs completed by a batch run.
+
+    An entry is valid only if the source file still has the size and modification time it had when the output was
+    created. The journal is flushed after each entry and synced to the disk every *sync_interval* entries, an entry lost
+    by a crash only means the output is created again.
+    """
+
+    def __init__(self, journal_file_path, sync_interval=32):
+        self.journal_file_path = journal_file_path
+        self.sync_interval = max(1, sync_interval)
+
+        self.entries = {}
+        self._journal_file = None
+        self._number_unsynced = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def load(self):
+        """
+        Read the entries of an interrupted run, a partial last line is ignored.
+
+        :return: True if the journal exists and has the current version.
+        """
+        self.entries = {}
+        if not os.path.isfile(self.journal_file_path):
+            return False
+
+        with open(self.journal_file_path, 'r') as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logging.warning("Ignore incomplete checkpoint entry in {}".format(self.journal_file_path))
+                    continue
+
+                if entry.get("version", CHECKPOINT_VERSION) != CHECKPOINT_VERSION:
+                    logging.warning("Ignore checkpoint {} of another version".format(self.journal_file_path))
+                    self.entries = {}
+                    return False
+                if "source" in entry:
+                    self.entries[(entry["source"], entry["output"])] = entry
+
+        return True
+
+    def start(self, resume=False):
+        """
+        Open the journal to append entries. Without *resume*, the entries of a previous run are removed.
+        """
+        if resume and self.load():
+            mode = 'a'
+        else:
+            self.entries = {}
+            mode = 'w'
+
+        self._journal_file = open(self.journal_file_path, mode)
+        if mode == 'w':
+            self._write({"version": CHECKPOINT_VERSION})
+
+    def close(self):
+        if self._journal_file is not None:
+            self._sync()
+            self._journal_file.close()
+            self._journal_file = None
+
+    def remove(self):
+        """
+        Remove the journal when the run is complete.
+        """
+        self.close()
+        if os.path.isfile(self.journal_file_path):
+            os.remove(self.journal_file_path)
+        self.entries = {}
+
+    def is_done(self, source_path, output_name, options=None):
+        entry = self.entries.get((os.path.abspath(source_path), output_name))
+        if entry is None or entry.get("options") != normalize_options(options):
+            return False
+
+        try:
+            stat_result = os.stat(source_path)
+        except OSError:
+            return False
+        return entry["size"] == stat_result.st_size and entry["mtime_ns"] == stat_result.st_mtime_ns
+
+    def record(self, source_path, output_name, options=None):
+        stat_result = os.stat(source_path)
+        entry = {"source": os.path.abspath(source_path), "output": output_name, "options": normalize_options(options),
+                 "size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+        self.entries[(entry["source"], output_name)] = entry
+        self._write(entry)
+
+    def _write(self, entry):
+        self._journal_file.write(json.dumps(entry, sort_keys=True) + "\n")
+        self._journal_file.flush()
+
+        self._number_unsynced += 1
+        if self._number_unsynced >= self.sync_interval:
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._journal_file.fileno())
+        self._number_unsynced = 0
+
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.batch_manifest
+   :synopsis: Manifest of the batch processing outputs to skip unchanged files.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Manifest of the batch processing outputs to skip unchanged files.
+
+For each source file the manifest keeps its size, modification time and optionally its content hash, and for each
+output (MSA, HDF5, project HDF5, figures) the options used to create it. An output is stale when the source changed,
+the options changed or the output file is missing.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import json
+import hashlib
+import logging
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+MANIFEST_FILE_NAME = ".pysemeels_batch_manifest.json"
+MANIFEST_VERSION = 1
+
+OUTPUT_MSA = "msa"
+OUTPUT_HDF5 = "hdf5"
+OUTPUT_PROJECT_HDF5 = "project_hdf5"
+OUTPUT_SPECTRUM_FIGURE = "spectrum_figure"
+OUTPUT_WINDOW_FIGURE = "window_figure"
+
+
+def get_manifest_file_path(data_folder):
+    return os.path.join(data_folder, MANIFEST_FILE_NAME)
+
+
+def compute_file_hash(file_path, block_size=1024 * 1024):
+    file_hash = hashlib.sha1()
+    with open(file_path, 'rb') as source_file:
+        for block in iter(lambda: source_file.read(block_size), b''):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+class BatchManifest(object):
+    """
+    Manifest of the source files and of the outputs created from them.
+
+    :param use_content_hash: compare the content hash of the source files instead of their modification time, so a
+        file copied or touched without change is not processed again.
+    """
+
+    def __init__(self, manifest_file_path, use_content_hash=False):
+        self.manifest_file_path = manifest_file_path
+        self.use_content_hash = use_content_hash
+
+        self.sources = {}
+        self._signatures = {}
+
+    def load(self):
+        self.sources = {}
+        self._signatures = {}
+
+        if not os.path.isfile(self.manifest_file_path):
+            return
+
+        try:
+            with open(self.manifest_file_path, 'r') as manifest_file:
+                data = json.load(manifest_file)
+        except (IOError, ValueError) as message:
+            logging.warning("Cannot read manifest {}, all files will be processed: {}".format(
+                self.manifest_file_path, message))
+            return
+
+        if data.get("version") == MANIFEST_VERSION:
+            self.sources = data.get("sources", {})
+
+    def save(self):
+        data = {"version": MANIFEST_VERSION, "sources": self.sources}
+
+        temporary_file_path = self.manifest_file_path + ".tmp"
+        with open(temporary_file_path, 'w') as manifest_file:
+            json.dump(data, manifest_file, indent=1, sort_keys=True)
+        os.replace(temporary_file_path, self.manifest_file_path)
+
+    def get_source_signature(self, source_path):
+        """
+        Size, modification time and, if used, content hash of the source file, computed once per run.
+        """
+        source_path = os.path.abspath(source_path)
+        if source_path not in self._signatures:
+            stat_result = os.stat(source_path)
+            signature = {"size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+            if self.use_content_hash:
+                signature["sha1"] = compute_file_hash(source_path)
+            self._signatures[source_path] = signature
+
+        return self._signatures[source_path]
+
+    def is_source_changed(self, source_path):
+        entry = self.sources.get(os.path.abspath(source_path))
+        if entry is None:
+            return True
+
+        signature = self.get_source_signature(source_path)
+        if entry["size"] != signature["size"]:
+            return True
+        if self.use_content_hash and "sha1" in entry:
+            return entry["sha1"] != signature["sha1"]
+        return entry["mtime_ns"] != signature["mtime_ns"]
+
+    def is_stale(self, source_path, output_name, options=None, output_file_paths=()):
+        """
+        Return True if the output needs to be created again.
+
+        :param options: JSON serializable options used to create the output.
+        :param output_file_paths: output files that must exist.
+        """
+        if self.is_source_changed(source_path):
+            return True
+
+        output = self.sources[os.path.abspath(source_path)]["outputs"].get(output_name)
+        if output is None or output.get("options") != normalize_options(options):
+            return True
+
+        for output_file_path in output_file_paths:
+            if not os.path.exists(output_file_path):
+                return True
+
+        return False
+
+    def record(self, source_path, output_name, options=None):
+        """
+        Record that the output was created from the current source file with these options.
+        """
+        source_path = os.path.abspath(source_path)
+        signature = self.get_source_signature(source_path)
+
+        entry = self.sources.get(source_path)
+        if entry is None or self.is_source_changed(source_path):
+            entry = {"outputs": {}}
+            self.sources[source_path] = entry
+        entry.update(signature)
+        entry["outputs"][output_name] = {"options": normalize_options(options)}
+
+
+def normalize_options(options):
+    """
+    Round trip through JSON so the options compare equal to the ones read from a JSON file.
+    """
+    return json.loads(json.dumps(options if options is not None else {}, sort_keys=True))
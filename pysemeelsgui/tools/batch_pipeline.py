@@ -0,0 +1,591 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.batch_pipeline
+   :synopsis: Single pass batch processing of EELS files.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Single pass batch processing of EELS files.
+
+The data folder is scanned once and each .elv file is parsed once, as soon as it is found by the scanner. The parsed
+spectrum is sent to all the enabled output stages (MSA, HDF5, project HDF5, spectrum figure and window figure), each
+stage running on its own thread and reading a bounded queue, so a slow stage slows down the parsing instead of filling
+the memory. The figures are rendered on worker processes by
+:py:class:`pysemeelsgui.tools.figure_engine.ParallelFigureEngine`.
+
+The MSA and HDF5 files are written from the parsed spectrum by the same function as the batch conversion, so no output
+reads the .elv file again.
+
+The figures are written in partial files renamed when complete. With a
+:py:class:`pysemeelsgui.tools.batch_checkpoint.CheckpointJournal`, each completed output is journaled and the outputs
+of an interrupted run are skipped when it is resumed.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import time
+import logging
+import threading
+import functools
+from concurrent.futures import Future
+from six.moves import queue
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.parallel_batch_convert import get_output_file_path, read_elv_file, convert_elv_outputs, \
+    MSA_EXTENSION, HDF5_EXTENSION
+from pysemeelsgui.tools.batch_manifest import OUTPUT_MSA, OUTPUT_HDF5, OUTPUT_PROJECT_HDF5, OUTPUT_SPECTRUM_FIGURE, \
+    OUTPUT_WINDOW_FIGURE
+from pysemeelsgui.tools.figure_engine import ParallelFigureEngine, get_figure_file_paths, FORMAT_PNG
+from pysemeelsgui.tools.project_hdf5 import ProjectHdf5Writer, PROJECT_LAYOUT_VERSION
+from pysemeelsgui.tools.folder_scanner import FolderScanner, FileListScanner
+
+# Globals and constants variables.
+SPECTRUM_FIGURE_SUFFIX = "_spectrum"
+WINDOW_FIGURE_SUFFIX = "_windows"
+
+DEFAULT_ENERGY_WINDOWS_eV = ((-5.0, 5.0), (-5.0, 50.0), (None, None))
+
+
+class ParsedSpectrum(object):
+    """
+    Spectrum of an .elv file parsed once and shared by all the output stages.
+
+    :ivar elv_file: the parsed file returned by the read function.
+    """
+
+    def __init__(self, elv_file_path, energies_eV, counts, elv_file=None):
+        self.elv_file_path = elv_file_path
+        self.energies_eV = energies_eV
+        self.counts = counts
+        self.elv_file = elv_file
+
+    @property
+    def title(self):
+        return os.path.splitext(os.path.basename(self.elv_file_path))[0]
+
+
+class OutputStage(object):
+    """
+    Output created from each parsed spectrum.
+
+    The methods :py:meth:`start` and :py:meth:`finish` are called on the stage thread before the first and after the
+    last spectrum. :py:meth:`process` can return a :py:class:`concurrent.futures.Future` of the processing time when
+    the work is done elsewhere, the output is complete when the future is done.
+
+    :cvar output_name: name of the output in the batch manifest.
+    :ivar max_in_flight: maximum number of futures not done, None for the pipeline queue size.
+    """
+    output_name = None
+
+    def __init__(self):
+        self.elapsed_time_s = 0.0
+        self.max_in_flight = None
+
+    def get_output_file_paths(self, elv_file_path):
+        return []
+
+    def get_options(self):
+        return None
+
+    def start(self):
+        pass
+
+    def process(self, parsed_spectrum):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class ConvertOutputStage(OutputStage):
+    """
+    File written from the parsed .elv file by the *convert_function(elv_file_path, convert_msa, convert_hdf5,
+    elv_file)* of the pipeline.
+    """
+    extension = None
+
+    def __init__(self, convert_function=convert_elv_outputs):
+        super(ConvertOutputStage, self).__init__()
+
+        self.convert_function = convert_function
+
+    def get_output_file_paths(self, elv_file_path):
+        return [get_output_file_path(elv_file_path, self.extension)]
+
+    def process(self, parsed_spectrum):
+        self.convert_function(parsed_spectrum.elv_file_path, self.extension == MSA_EXTENSION,
+                              self.extension == HDF5_EXTENSION, parsed_spectrum.elv_file)
+
+
+class MsaOutputStage(ConvertOutputStage):
+    output_name = OUTPUT_MSA
+    extension = MSA_EXTENSION
+
+
+class Hdf5OutputStage(ConvertOutputStage):
+    output_name = OUTPUT_HDF5
+    extension = HDF5_EXTENSION
+
+
+class ProjectHdf5OutputStage(OutputStage):
+    """
+    Add all the spectra to the project HDF5 file, opened once for the whole run.
+
+    The project file is updated in place. A spectrum is complete only when the batch of rows containing it is written
+    and flushed, so the future returned by :py:meth:`process` is done at the end of the batch.
+    """
+    output_name = OUTPUT_PROJECT_HDF5
+
+    def __init__(self, project_hdf5_file_path, data_folder, batch_size=64):
+        super(ProjectHdf5OutputStage, self).__init__()
+
+        self.project_hdf5_file_path = project_hdf5_file_path
+        self.data_folder = data_folder
+        self.batch_size = batch_size
+        self.max_in_flight = batch_size
+        self.project_writer = None
+
+        self._pending = []
+
+    def get_output_file_paths(self, elv_file_path):
+        return [self.project_hdf5_file_path]
+
+    def get_options(self):
+        return {"project_hdf5_file": os.path.abspath(self.project_hdf5_file_path),
+                "layout_version": PROJECT_LAYOUT_VERSION}
+
+    def start(self):
+        self._pending = []
+        self.project_writer = ProjectHdf5Writer(self.project_hdf5_file_path, self.data_folder,
+                                                batch_size=self.batch_size)
+        self.project_writer.open()
+
+    def process(self, parsed_spectrum):
+        future = Future()
+        start_time = time.perf_counter()
+        try:
+            self.project_writer.write_spectrum(parsed_spectrum.elv_file_path, parsed_spectrum.energies_eV,
+                                               parsed_spectrum.counts)
+        except Exception as message:
+            self._pending.append((future, 0.0))
+            self._end_pending(message)
+            return future
+
+        self._pending.append((future, time.perf_counter() - start_time))
+        if self.project_writer.number_pending_rows == 0:
+            self._end_pending()
+        return future
+
+    def finish(self):
+        error = None
+        start_time = time.perf_counter()
+        try:
+            self.project_writer.close()
+        except Exception as message:
+            error = message
+        self.project_writer = None
+
+        # The last batch is written when the file is closed, its time is given to the last spectrum.
+        if len(self._pending) > 0:
+            future, elapsed_time_s = self._pending[-1]
+            self._pending[-1] = (future, elapsed_time_s + time.perf_counter() - start_time)
+        self._end_pending(error)
+
+    def _end_pending(self, error=None):
+        pending, self._pending = self._pending, []
+        for future, elapsed_time_s in pending:
+            if error is None:
+                future.set_result(elapsed_time_s)
+            else:
+                future.set_exception(error)
+
+
+class FigureStage(OutputStage):
+    """
+    Figure rendered by the figure engine set by the pipeline.
+    """
+    figure_suffix = None
+
+    def __init__(self, figure_formats=(FORMAT_PNG,), dpi=100):
+        super(FigureStage, self).__init__()
+
+        self.figure_formats = tuple(figure_formats)
+        self.dpi = dpi
+        self.figure_engine = None
+
+    def get_output_file_paths(self, elv_file_path):
+        return get_figure_file_paths(elv_file_path, self.figure_suffix, self.figure_formats)
+
+    def get_options(self):
+        return {"dpi": self.dpi, "formats": list(self.figure_formats)}
+
+    def get_template_options(self):
+        raise NotImplementedError
+
+    def process(self, parsed_spectrum):
+        return self.figure_engine.submit(self.output_name, parsed_spectrum.energies_eV, parsed_spectrum.counts,
+                                         parsed_spectrum.title,
+                                         self.get_output_file_paths(parsed_spectrum.elv_file_path))
+
+
+class SpectrumFigureStage(FigureStage):
+    output_name = OUTPUT_SPECTRUM_FIGURE
+    figure_suffix = SPECTRUM_FIGURE_SUFFIX
+
+    def get_template_options(self):
+        return {"energy_windows_eV": [(None, None)], "figure_size": (8, 6), "dpi": self.dpi}
+
+
+class WindowFigureStage(FigureStage):
+    """
+    Spectrum shown in each energy window, for example the zero-loss peak and the low-loss region.
+
+    :param energy_windows_eV: list of (minimum, maximum) energies, None for the spectrum limit.
+    """
+    output_name = OUTPUT_WINDOW_FIGURE
+    figure_suffix = WINDOW_FIGURE_SUFFIX
+
+    def __init__(self, energy_windows_eV=DEFAULT_ENERGY_WINDOWS_eV, figure_formats=(FORMAT_PNG,), dpi=100):
+        super(WindowFigureStage, self).__init__(figure_formats, dpi)
+
+        self.energy_windows_eV = [tuple(energy_window_eV) for energy_window_eV in energy_windows_eV]
+
+    def get_options(self):
+        options = super(WindowFigureStage, self).get_options()
+        options["energy_windows_eV"] = self.energy_windows_eV
+        return options
+
+    def get_template_options(self):
+        return {"energy_windows_eV": self.energy_windows_eV, "figure_size": (6 * len(self.energy_windows_eV), 5),
+                "dpi": self.dpi}
+
+
+class BatchPipeline(object):
+    """
+    Create all the outputs of the .elv files of a folder in a single pass.
+
+    The attributes are the same as :py:class:`pysemeelsgui.tools.parallel_batch_convert.ParallelBatchConvertElv`,
+    with the figure options. The optional *read_function(elv_file_path)* returns an object with ``energies_eV`` and
+    ``counts``, the optional *convert_function(elv_file_path, convert_msa, convert_hdf5, elv_file)* writes the MSA and
+    HDF5 files from this object. The figures are rendered on *number_workers* processes and the folders are read by
+    *number_scan_threads* threads.
+
+    The total number of files given to ``progress_callback`` grows while the folder is scanned: it counts the files to
+    process found so far, including the files found but not yet compared with the manifest. With *elv_file_paths*,
+    these files are processed and the folder is not scanned.
+    """
+
+    def __init__(self, data_folder, read_function=read_elv_file, queue_size=16, number_workers=None,
+                 convert_function=convert_elv_outputs):
+        self.data_folder = data_folder
+        self.read_function = read_function
+        self.convert_function = convert_function
+        self.queue_size = queue_size
+
+        if number_workers is None:
+            number_workers = os.cpu_count() or 1
+        self.number_workers = max(1, number_workers)
+
+        self.overwrite = True
+        self.recursive = True
+        self.convert_msa = True
+        self.convert_hdf5 = True
+        self.project_hdf5_file = ""
+        self.generate_spectrum_figure = False
+        self.generate_window_figure = False
+        self.figure_formats = (FORMAT_PNG,)
+        self.number_scan_threads = 1
+        self.elv_file_paths = None
+
+        self.progress_callback = None
+        self.manifest = None
+        self.checkpoint = None
+        self.cancel_event = None
+
+        self.stages = []
+        self.figure_engine = None
+        self.scanner = None
+        self.converted_file_paths = []
+        self.failed_file_paths = []
+        self.number_discovered = 0
+        self.number_unchanged = 0
+        self.parse_time_s = 0.0
+        self.elapsed_time_s = 0.0
+
+        self._lock = threading.Lock()
+        self._remaining_stages = {}
+        self._failed_files = set()
+        self._start_time = 0.0
+        self._number_examined = 0
+        self._number_dispatched = 0
+
+    @property
+    def files_per_s(self):
+        if self.elapsed_time_s > 0.0:
+            return len(self.converted_file_paths) / self.elapsed_time_s
+        return 0.0
+
+    @property
+    def number_processed(self):
+        return len(self.converted_file_paths) + len(self.failed_file_paths)
+
+    def get_number_files_to_process(self):
+        number_not_examined = 0
+        if self.scanner is not None:
+            number_not_examined = self.scanner.number_discovered - self._number_examined
+        return self._number_dispatched + number_not_examined
+
+    def is_cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def create_stages(self):
+        stages = []
+        if self.convert_msa:
+            stages.append(MsaOutputStage(self.convert_function))
+        if self.convert_hdf5:
+            stages.append(Hdf5OutputStage(self.convert_function))
+        if len(self.project_hdf5_file) > 0:
+            stages.append(ProjectHdf5OutputStage(self.project_hdf5_file, self.data_folder))
+        if self.generate_spectrum_figure:
+            stages.append(SpectrumFigureStage(figure_formats=self.figure_formats))
+        if self.generate_window_figure:
+            stages.append(WindowFigureStage(figure_formats=self.figure_formats))
+
+        return stages
+
+    def is_stage_resumed(self, stage, elv_file_path):
+        """
+        Return True if the output was completed by the interrupted run of the checkpoint. The output is then recorded in
+        the manifest, which was not saved by the interrupted run.
+        """
+        if self.checkpoint is None:
+            return False
+        if not self.checkpoint.is_done(elv_file_path, stage.output_name, stage.get_options()):
+            return False
+        if not all(os.path.exists(output_file_path) for output_file_path in stage.get_output_file_paths(elv_file_path)):
+            return False
+
+        if self.manifest is not None:
+            self.manifest.record(elv_file_path, stage.output_name, stage.get_options())
+        return True
+
+    def is_stage_needed(self, stage, elv_file_path):
+        output_file_paths = stage.get_output_file_paths(elv_file_path)
+        if self.manifest is not None:
+            return self.manifest.is_stale(elv_file_path, stage.output_name, stage.get_options(), output_file_paths)
+
+        # The project file contains all the spectra, it is rewritten even if the file outputs exist.
+        if self.overwrite or isinstance(stage, ProjectHdf5OutputStage):
+            return True
+
+        return not all(os.path.isfile(output_file_path) for output_file_path in output_file_paths)
+
+    def convert(self):
+        self._start_time = time.perf_counter()
+        self.converted_file_paths = []
+        self.failed_file_paths = []
+        self.parse_time_s = 0.0
+        self._remaining_stages = {}
+        self._failed_files = set()
+        self._number_examined = 0
+        self._number_dispatched = 0
+
+        self.stages = self.create_stages()
+
+        # The worker processes are started before the stage and scanner threads.
+        self.figure_engine = self.create_figure_engine()
+
+        stage_queues = [queue.Queue(maxsize=self.queue_size) for _stage in self.stages]
+        stage_threads = []
+        for stage, stage_queue in zip(self.stages, stage_queues):
+            stage_thread = threading.Thread(target=self._run_stage, args=(stage, stage_queue),
+                                            name="BatchPipeline-{}".format(stage.output_name))
+            stage_thread.daemon = True
+            stage_thread.start()
+            stage_threads.append(stage_thread)
+
+        if self.elv_file_paths is not None:
+            self.scanner = FileListScanner(self.elv_file_paths)
+        else:
+            self.scanner = FolderScanner(self.data_folder, recursive=self.recursive,
+                                         number_threads=self.number_scan_threads)
+        try:
+            for elv_file_path in self.scanner:
+                if self.is_cancelled():
+                    break
+
+                with self._lock:
+                    self._number_examined += 1
+                    stage_ids = [stage_id for stage_id, stage in enumerate(self.stages)
+                                 if not self.is_stage_resumed(stage, elv_file_path) and
+                                 self.is_stage_needed(stage, elv_file_path)]
+                    if len(stage_ids) > 0:
+                        self._number_dispatched += 1
+                if len(stage_ids) == 0:
+                    continue
+
+                parsed_spectrum = self._parse(elv_file_path, len(stage_ids))
+                if parsed_spectrum is None:
+                    continue
+
+                for stage_id in stage_ids:
+                    stage_queues[stage_id].put(parsed_spectrum)
+        finally:
+            for stage_queue in stage_queues:
+                stage_queue.put(None)
+            for stage_thread in stage_threads:
+                stage_thread.join()
+            if self.figure_engine is not None:
+                self.figure_engine.close()
+                self.figure_engine = None
+            if self.manifest is not None:
+                self.manifest.save()
+
+        self.number_discovered = self.scanner.number_discovered
+        self.number_unchanged = self._number_examined - self._number_dispatched
+        self.converted_file_paths.sort()
+        self.failed_file_paths.sort()
+        self.elapsed_time_s = time.perf_counter() - self._start_time
+        logging.info("Processed {:d} of {:d} discovered elv files ({:d} unchanged) in {:.1f} s ({:.1f} files/s)".format(
+            self.number_processed, self.number_discovered, self.number_unchanged, self.elapsed_time_s,
+            self.files_per_s))
+
+    def create_figure_engine(self):
+        figure_stages = [stage for stage in self.stages if isinstance(stage, FigureStage)]
+        if len(figure_stages) == 0:
+            return None
+
+        template_options = dict((stage.output_name, stage.get_template_options()) for stage in figure_stages)
+        figure_engine = ParallelFigureEngine(template_options, self.number_workers)
+        figure_engine.start()
+        for stage in figure_stages:
+            stage.figure_engine = figure_engine
+
+        return figure_engine
+
+    def _parse(self, elv_file_path, number_stages):
+        parse_start_time = time.perf_counter()
+        try:
+            elv_file = self.read_function(elv_file_path)
+            parsed_spectrum = ParsedSpectrum(elv_file_path, np.asarray(elv_file.energies_eV),
+                                             np.asarray(elv_file.counts), elv_file)
+        except Exception as message:
+            logging.error("Cannot read {}: {}".format(elv_file_path, message))
+            with self._lock:
+                self._failed_files.add(elv_file_path)
+                self._end_file(elv_file_path)
+            return None
+        finally:
+            self.parse_time_s += time.perf_counter() - parse_start_time
+
+        with self._lock:
+            self._remaining_stages[elv_file_path] = number_stages
+
+        return parsed_spectrum
+
+    def _run_stage(self, stage, stage_queue):
+        start_error = None
+        try:
+            stage.start()
+        except Exception as message:
+            logging.error("Cannot start output {}: {}".format(stage.output_name, message))
+            start_error = message
+
+        # Limit the work submitted elsewhere and not yet done.
+        max_in_flight = stage.max_in_flight if stage.max_in_flight is not None else self.queue_size
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        # The queue is read until the end even if the stage failed, so the parsing is never blocked.
+        while True:
+            parsed_spectrum = stage_queue.get()
+            if parsed_spectrum is None:
+                break
+
+            elv_file_path = parsed_spectrum.elv_file_path
+            if start_error is not None:
+                self._end_stage(stage, elv_file_path, start_error, 0.0)
+                continue
+
+            stage_start_time = time.perf_counter()
+            try:
+                result = stage.process(parsed_spectrum)
+            except Exception as message:
+                self._end_stage(stage, elv_file_path, message, time.perf_counter() - stage_start_time)
+                continue
+
+            if isinstance(result, Future):
+                in_flight.acquire()
+                result.add_done_callback(functools.partial(self._end_submitted_stage, stage, elv_file_path,
+                                                           in_flight))
+            else:
+                self._end_stage(stage, elv_file_path, None, time.perf_counter() - stage_start_time)
+
+        # The stage can complete its pending work when finishing.
+        if start_error is None:
+            try:
+                stage.finish()
+            except Exception as message:
+                logging.error("Cannot finish output {}: {}".format(stage.output_name, message))
+
+        # All the submitted work is done when all the slots are free.
+        for _slot in range(max_in_flight):
+            in_flight.acquire()
+
+    def _end_submitted_stage(self, stage, elv_file_path, in_flight, future):
+        try:
+            error = future.exception()
+            elapsed_time_s = future.result() if error is None else 0.0
+            self._end_stage(stage, elv_file_path, error, elapsed_time_s)
+        finally:
+            in_flight.release()
+
+    def _end_stage(self, stage, elv_file_path, error, elapsed_time_s):
+        with self._lock:
+            stage.elapsed_time_s += elapsed_time_s
+            if error is None:
+                if self.manifest is not None:
+                    self.manifest.record(elv_file_path, stage.output_name, stage.get_options())
+                if self.checkpoint is not None:
+                    self.checkpoint.record(elv_file_path, stage.output_name, stage.get_options())
+            else:
+                logging.error("Cannot create {} of {}: {}".format(stage.output_name, elv_file_path, error))
+                self._failed_files.add(elv_file_path)
+
+            self._remaining_stages[elv_file_path] -= 1
+            if self._remaining_stages[elv_file_path] == 0:
+                del self._remaining_stages[elv_file_path]
+                self._end_file(elv_file_path)
+
+    def _end_file(self, elv_file_path):
+        if elv_file_path in self._failed_files:
+            self.failed_file_paths.append(elv_file_path)
+        else:
+            self.converted_file_paths.append(elv_file_path)
+
+        if self.progress_callback is not None:
+            self.progress_callback(self.number_processed, self.get_number_files_to_process(),
+                                   time.perf_counter() - self._start_time)
@@ -28,27 +28,35 @@ GUI to process EELS files in batch mode.
 
 # Standard library modules.
 import six
+import os
 import logging
 if six.PY3:
     from tkinter import ttk
-    from tkinter import filedialog, N, W, E, S, StringVar, BooleanVar, Tk
+    from tkinter import filedialog, N, W, E, S, StringVar, BooleanVar, IntVar, DoubleVar, Tk, DISABLED, NORMAL
 elif six.PY2:
     import ttk
-    from Tkinter import N, W, E, S, StringVar, BooleanVar, Tk
+    from Tkinter import N, W, E, S, StringVar, BooleanVar, IntVar, DoubleVar, Tk, DISABLED, NORMAL
     import tkFileDialog as filedialog
 
 
 # Third party modules.
 
 # Local modules.
-from pysemeels.tools.convert_elv import ConvertElv
-from pysemeels.tools.batch_convert_elv import BatchConvertElv
-from pysemeels.tools.batch_generate_spectra import BatchGenerateSpectra
-from pysemeels.tools.batch_generate_windows_figure import BatchGenerateWindowsFigure
 
 # Project modules.
+from pysemeelsgui.tools.batch_runner import BatchProcessing, STAGE_CONVERT_FILE, STAGE_BATCH_CONVERT, \
+    STAGE_SPECTRUM_FIGURE, STAGE_WINDOW_FIGURE, STAGE_PIPELINE, STATE_START, STATE_UNCHANGED, STATE_CANCELLED, compute_rate
+from pysemeelsgui.tools.tk_worker import TkWorker, MESSAGE_FINISHED, MESSAGE_ERROR
 
 # Globals and constants variables.
+MESSAGE_STAGE = "stage"
+MESSAGE_PROGRESS = "progress"
+
+STAGE_TEXTS = {STAGE_CONVERT_FILE: "Convert file",
+               STAGE_BATCH_CONVERT: "Batch converting files",
+               STAGE_SPECTRUM_FIGURE: "Generate spectra figures",
+               STAGE_WINDOW_FIGURE: "Generate windows figures",
+               STAGE_PIPELINE: "Processing files in a single pass"}
 
 
 class TkMainGui(ttk.Frame):
@@ -69,6 +77,10 @@ class TkMainGui(ttk.Frame):
         self.recursive.set(True)
         self.overwrite = BooleanVar()
         self.overwrite.set(True)
+        self.skip_unchanged = BooleanVar()
+        self.skip_unchanged.set(False)
+        self.use_content_hash = BooleanVar()
+        self.use_content_hash.set(False)
 
         self.convert_msa = BooleanVar()
         self.convert_msa.set(False)
@@ -83,7 +95,22 @@ class TkMainGui(ttk.Frame):
         self.generate_window_figure = BooleanVar()
         self.generate_window_figure.set(False)
 
+        self.single_pass = BooleanVar()
+        self.single_pass.set(True)
+        self.resume = BooleanVar()
+        self.resume.set(False)
+        self.use_acquisition_manifest = BooleanVar()
+        self.use_acquisition_manifest.set(False)
+        self.parallel = BooleanVar()
+        self.parallel.set(True)
+        self.number_workers = IntVar()
+        self.number_workers.set(os.cpu_count() or 1)
+
         self.results_text = StringVar()
+        self.progress_value = DoubleVar()
+        self.progress_text = StringVar()
+
+        self.worker = None
 
         logging.debug("Create file button")
         row_id = 1
@@ -106,6 +133,11 @@ class TkMainGui(ttk.Frame):
                                                                                                            row=row_id,
                                                                                                            sticky=W)
 
+        row_id += 1
+        ttk.Checkbutton(self, text="Skip unchanged files (manifest)", var=self.skip_unchanged, width=80).grid(column=3, row=row_id, sticky=W)
+        row_id += 1
+        ttk.Checkbutton(self, text="Compare file content to find changed files", var=self.use_content_hash, width=80).grid(column=3, row=row_id, sticky=W)
+
         row_id += 1
         ttk.Checkbutton(self, text="Export MSA", var=self.convert_msa, width=80).grid(column=3, row=row_id, sticky=W)
 
@@ -125,12 +157,33 @@ class TkMainGui(ttk.Frame):
         ttk.Checkbutton(self, text="Generate window figure", var=self.generate_window_figure, width=80).grid(column=3, row=row_id, sticky=W)
 
         row_id += 1
-        ttk.Button(self, text="Process data", command=self.process_data, width=80).grid(column=2, row=row_id, sticky=W)
+        ttk.Checkbutton(self, text="Read each file once for all outputs", var=self.single_pass, width=80).grid(column=3, row=row_id, sticky=W)
+        row_id += 1
+        ttk.Checkbutton(self, text="Resume the interrupted processing", var=self.resume, width=80).grid(column=3, row=row_id, sticky=W)
+        row_id += 1
+        ttk.Checkbutton(self, text="Use the acquisition manifests instead of scanning", var=self.use_acquisition_manifest, width=80).grid(column=3, row=row_id, sticky=W)
+        row_id += 1
+        ttk.Checkbutton(self, text="Parallel conversion", var=self.parallel, width=80).grid(column=3, row=row_id, sticky=W)
+        row_id += 1
+        ttk.Label(self, text="Number of worker processes: ").grid(column=2, row=row_id, sticky=E)
+        ttk.Entry(self, width=10, textvariable=self.number_workers).grid(column=3, row=row_id, sticky=W)
+
+        row_id += 1
+        self.process_button = ttk.Button(self, text="Process data", command=self.process_data, width=80)
+        self.process_button.grid(column=2, row=row_id, sticky=W)
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel_processing, state=DISABLED)
+        self.cancel_button.grid(column=3, row=row_id, sticky=W)
 
         row_id += 1
         results_label = ttk.Label(self, textvariable=self.results_text, state="readonly")
         results_label.grid(column=2, row=row_id, sticky=(W, E))
 
+        row_id += 1
+        progress_bar = ttk.Progressbar(self, orient="horizontal", mode="determinate", variable=self.progress_value)
+        progress_bar.grid(column=2, row=row_id, sticky=(W, E))
+        progress_label = ttk.Label(self, textvariable=self.progress_text, state="readonly")
+        progress_label.grid(column=3, row=row_id, sticky=W)
+
         for child in self.winfo_children():
             child.grid_configure(padx=5, pady=5)
 
@@ -160,48 +213,98 @@ class TkMainGui(ttk.Frame):
     def process_data(self):
         logging.debug("process_data")
 
-        elv_file_path = self.file_path.get()
-
-        if self.is_conversion_needed() and len(elv_file_path) > 0:
-            self.results_text.set("Convert file ...")
-            convert_elv = ConvertElv(elv_file_path)
-
-            convert_elv.convert_msa = self.convert_msa.get()
-            convert_elv.convert_hdf5 = self.convert_hdf5.get()
-
-            convert_elv.convert()
-            self.results_text.set("Convert file ... Done")
-
-        data_folder = self.data_folder.get()
-        if len(data_folder) > 0:
-            if self.is_conversion_needed():
-                self.results_text.set("Batch converting files ...")
-                batch_convert_elv = BatchConvertElv(data_folder)
-                batch_convert_elv.overwrite = self.overwrite.get()
-                batch_convert_elv.recursive = self.recursive.get()
-                batch_convert_elv.convert_msa = self.convert_msa.get()
-                batch_convert_elv.convert_hdf5 = self.convert_hdf5.get()
-                batch_convert_elv.project_hdf5_file = self.project_hdf5_file.get()
-
-                batch_convert_elv.convert()
-                self.results_text.set("Batch converting files ... Done")
-
-            if self.generate_spectrum_figure.get():
-                self.results_text.set("Generate spectra figures ...")
-                batch_generate_spectra = BatchGenerateSpectra(data_folder)
-                batch_generate_spectra.generate()
-                self.results_text.set("Generate spectra figures ... Done")
-
-            if self.generate_window_figure.get():
-                self.results_text.set("Generate windows figures ...")
-                batch_generate_windows_figure = BatchGenerateWindowsFigure(data_folder)
-                batch_generate_windows_figure.generate()
-                self.results_text.set("Generate windows figures ... Done")
-
-        self.results_text.set("Completed")
-
-    def is_conversion_needed(self):
-        return self.convert_msa.get() or self.convert_hdf5.get() or self.convert_hdf5.get()
+        batch_processing = self.create_batch_processing()
+
+        def run_batch_processing(post_message, cancel_event):
+            batch_processing.cancel_event = cancel_event
+            batch_processing.stage_callback = lambda *values: post_message(MESSAGE_STAGE, *values)
+            batch_processing.progress_callback = lambda *values: post_message(MESSAGE_PROGRESS, *values)
+            batch_processing.run()
+            return batch_processing
+
+        self.process_button.config(state=DISABLED)
+        self.cancel_button.config(state=NORMAL)
+        self.progress_value.set(0.0)
+        self.progress_text.set("")
+
+        self.worker = TkWorker(self, run_batch_processing, self.process_message)
+        self.worker.start()
+
+    def cancel_processing(self):
+        if self.worker is not None:
+            self.results_text.set("Cancelling after the current files ...")
+            self.worker.cancel()
+
+    def process_message(self, kind, *values):
+        if kind == MESSAGE_STAGE:
+            self.update_stage(*values)
+        elif kind == MESSAGE_PROGRESS:
+            self.update_progress(*values)
+        elif kind == MESSAGE_FINISHED:
+            batch_processing = values[0]
+            if batch_processing.is_cancelled():
+                self.results_text.set("Cancelled")
+            elif len(batch_processing.failed_file_paths) > 0:
+                self.results_text.set("Completed, {:d} files failed".format(len(batch_processing.failed_file_paths)))
+            elif batch_processing.number_discovered > 0:
+                self.results_text.set("Completed, {:d} files discovered, {:d} unchanged".format(
+                    batch_processing.number_discovered, batch_processing.number_unchanged))
+            else:
+                self.results_text.set("Completed")
+            self.end_processing()
+        elif kind == MESSAGE_ERROR:
+            self.results_text.set("Error: {}".format(values[0]))
+            self.end_processing()
+
+    def end_processing(self):
+        self.worker = None
+        self.process_button.config(state=NORMAL)
+        self.cancel_button.config(state=DISABLED)
+
+    def create_batch_processing(self):
+        batch_processing = BatchProcessing()
+
+        batch_processing.file_path = self.file_path.get()
+        batch_processing.data_folder = self.data_folder.get()
+
+        batch_processing.recursive = self.recursive.get()
+        batch_processing.overwrite = self.overwrite.get()
+        batch_processing.skip_unchanged = self.skip_unchanged.get()
+        batch_processing.use_content_hash = self.use_content_hash.get()
+
+        batch_processing.convert_msa = self.convert_msa.get()
+        batch_processing.convert_hdf5 = self.convert_hdf5.get()
+        batch_processing.use_project_hdf5_file = self.use_project_hdf5_file.get()
+        batch_processing.project_hdf5_file = self.project_hdf5_file.get()
+
+        batch_processing.generate_spectrum_figure = self.generate_spectrum_figure.get()
+        batch_processing.generate_window_figure = self.generate_window_figure.get()
+
+        batch_processing.single_pass = self.single_pass.get()
+        batch_processing.resume = self.resume.get()
+        batch_processing.use_acquisition_manifest = self.use_acquisition_manifest.get()
+        batch_processing.parallel = self.parallel.get()
+        batch_processing.number_workers = self.number_workers.get()
+
+        return batch_processing
+
+    def update_stage(self, stage, state, elapsed_time_s):
+        stage_text = STAGE_TEXTS.get(stage, stage)
+        if state == STATE_START:
+            self.results_text.set("{} ...".format(stage_text))
+        elif state == STATE_UNCHANGED:
+            self.results_text.set("{} ... Unchanged".format(stage_text))
+        elif state == STATE_CANCELLED:
+            self.results_text.set("{} ... Cancelled".format(stage_text))
+        else:
+            self.results_text.set("{} ... Done ({:.1f} s)".format(stage_text, elapsed_time_s))
+
+    def update_progress(self, number_done, number_total, elapsed_time_s):
+        if number_total > 0:
+            self.progress_value.set(100.0 * number_done / number_total)
+        files_per_s, eta_s = compute_rate(number_done, number_total, elapsed_time_s)
+        self.progress_text.set("{:d}/{:d} files, {:.1f} files/s, ETA {:.0f} s".format(number_done, number_total,
+                                                                                     files_per_s, eta_s))
 
 
 def main_gui():
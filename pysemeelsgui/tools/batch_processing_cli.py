@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.batch_processing_cli
+   :synopsis: Command line tool to process EELS files in batch mode.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Command line tool to process EELS files in batch mode.
+
+The options are the same as the batch processing window. The progress is written on stdout as JSON lines, one object
+per event, so the tool can be followed from cron or a cluster job. The exit code is one of the ``EXIT_`` constants.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import sys
+import json
+import time
+import logging
+import optparse
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_runner import BatchProcessing, compute_rate
+from pysemeelsgui.tools.figure_engine import FIGURE_FORMATS
+
+# Globals and constants variables.
+EXIT_SUCCESS = 0
+EXIT_FILES_FAILED = 1
+EXIT_USAGE_ERROR = 2
+EXIT_PROCESSING_ERROR = 3
+EXIT_INTERRUPTED = 130
+
+
+class JsonLinesReporter(object):
+    """
+    Write the batch processing events as JSON lines.
+    """
+
+    def __init__(self, output_file=None):
+        self.output_file = output_file if output_file is not None else sys.stdout
+        self.start_time = time.time()
+
+    def write(self, event, **values):
+        record = {"event": event, "time": time.time(), "elapsed_s": time.time() - self.start_time}
+        record.update(values)
+        self.output_file.write(json.dumps(record, sort_keys=True) + "\n")
+        self.output_file.flush()
+
+    def stage(self, stage, state, elapsed_time_s):
+        self.write("stage", stage=stage, state=state, stage_elapsed_s=elapsed_time_s)
+
+    def progress(self, number_done, number_total, elapsed_time_s):
+        files_per_s, eta_s = compute_rate(number_done, number_total, elapsed_time_s)
+        self.write("progress", done=number_done, total=number_total, files_per_s=files_per_s, eta_s=eta_s)
+
+
+def create_option_parser():
+    option_parser = optparse.OptionParser(usage="%prog [options]",
+                                          description="Process EELS files in batch mode.")
+    option_parser.add_option("-f", "--file", action="store", type="string", dest="file_path", default="",
+                             help="Convert a single elv file")
+    option_parser.add_option("-d", "--folder", action="store", type="string", dest="data_folder", default="",
+                             help="Process all the elv files of a folder")
+    option_parser.add_option("--no-recursive", action="store_false", dest="recursive", default=True,
+                             help="Do not process the sub-folders")
+    option_parser.add_option("--no-overwrite", action="store_false", dest="overwrite", default=True,
+                             help="Keep the existing processing result files")
+    option_parser.add_option("--skip-unchanged", action="store_true", dest="skip_unchanged", default=False,
+                             help="Process only new or changed files using the folder manifest")
+    option_parser.add_option("--content-hash", action="store_true", dest="use_content_hash", default=False,
+                             help="Compare the file content to find changed files")
+    option_parser.add_option("--resume", action="store_true", dest="resume", default=False,
+                             help="Continue the interrupted processing of the folder")
+    option_parser.add_option("--msa", action="store_true", dest="convert_msa", default=False,
+                             help="Export MSA files")
+    option_parser.add_option("--hdf5", action="store_true", dest="convert_hdf5", default=False,
+                             help="Export single HDF5 files")
+    option_parser.add_option("--project-hdf5", action="store", type="string", dest="project_hdf5_file", default="",
+                             help="Export in this project HDF5 file")
+    option_parser.add_option("--spectrum-figures", action="store_true", dest="generate_spectrum_figure",
+                             default=False, help="Generate spectrum figures")
+    option_parser.add_option("--window-figures", action="store_true", dest="generate_window_figure",
+                             default=False, help="Generate window figures")
+    option_parser.add_option("--figure-formats", action="store", type="string", dest="figure_formats", default="png",
+                             help="Comma separated figure formats: {} (default: png)".format(", ".join(FIGURE_FORMATS)))
+    option_parser.add_option("--single-pass", action="store_true", dest="single_pass", default=True,
+                             help="Read each file once for all outputs (default)")
+    option_parser.add_option("--multi-pass", action="store_false", dest="single_pass",
+                             help="Convert all the files, then read them again for each figure output")
+    option_parser.add_option("-j", "--jobs", action="store", type="int", dest="number_workers",
+                             default=os.cpu_count() or 1,
+                             help="Number of worker processes (default: number of CPU)")
+    option_parser.add_option("--scan-threads", action="store", type="int", dest="number_scan_threads", default=1,
+                             help="Number of threads reading the folders, more for network shares (default: 1)")
+    option_parser.add_option("-v", "--verbose", action="store_true", dest="verbose", default=False,
+                             help="Log messages on stderr")
+
+    return option_parser
+
+
+def get_figure_formats(options):
+    return tuple(figure_format.strip().lower() for figure_format in options.figure_formats.split(",")
+                 if len(figure_format.strip()) > 0)
+
+
+def is_output_requested(options):
+    if options.convert_msa or options.convert_hdf5 or len(options.project_hdf5_file) > 0:
+        return True
+    return len(options.data_folder) > 0 and (options.generate_spectrum_figure or options.generate_window_figure)
+
+
+def create_batch_processing(options):
+    batch_processing = BatchProcessing()
+
+    batch_processing.file_path = options.file_path
+    batch_processing.data_folder = options.data_folder
+
+    batch_processing.recursive = options.recursive
+    batch_processing.overwrite = options.overwrite
+    batch_processing.skip_unchanged = options.skip_unchanged
+    batch_processing.use_content_hash = options.use_content_hash
+    batch_processing.resume = options.resume
+
+    batch_processing.convert_msa = options.convert_msa
+    batch_processing.convert_hdf5 = options.convert_hdf5
+    batch_processing.use_project_hdf5_file = len(options.project_hdf5_file) > 0
+    batch_processing.project_hdf5_file = options.project_hdf5_file
+
+    batch_processing.generate_spectrum_figure = options.generate_spectrum_figure
+    batch_processing.generate_window_figure = options.generate_window_figure
+    batch_processing.figure_formats = get_figure_formats(options)
+
+    batch_processing.single_pass = options.single_pass
+    batch_processing.parallel = True
+    batch_processing.number_workers = options.number_workers
+    batch_processing.number_scan_threads = options.number_scan_threads
+
+    return batch_processing
+
+
+def main(argv=None, output_file=None):
+    option_parser = create_option_parser()
+    try:
+        options, arguments = option_parser.parse_args(argv)
+    except SystemExit as exit_status:
+        return exit_status.code if exit_status.code else EXIT_SUCCESS
+
+    reporter = JsonLinesReporter(output_file)
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if options.verbose else logging.WARNING)
+
+    usage_error = None
+    if len(arguments) > 0:
+        usage_error = "Unexpected arguments: {}".format(" ".join(arguments))
+    elif len(options.file_path) == 0 and len(options.data_folder) == 0:
+        usage_error = "A file or a folder is required"
+    elif len(options.file_path) > 0 and not os.path.isfile(options.file_path):
+        usage_error = "File not found: {}".format(options.file_path)
+    elif len(options.data_folder) > 0 and not os.path.isdir(options.data_folder):
+        usage_error = "Folder not found: {}".format(options.data_folder)
+    elif options.number_workers < 1:
+        usage_error = "The number of jobs must be at least 1"
+    elif options.number_scan_threads < 1:
+        usage_error = "The number of scan threads must be at least 1"
+    elif not is_output_requested(options):
+        usage_error = "No output requested, use --msa, --hdf5, --project-hdf5, --spectrum-figures or --window-figures"
+    elif not set(get_figure_formats(options)) <= set(FIGURE_FORMATS):
+        usage_error = "Unknown figure format: {}".format(options.figure_formats)
+    if usage_error is not None:
+        reporter.write("error", message=usage_error)
+        return EXIT_USAGE_ERROR
+
+    batch_processing = create_batch_processing(options)
+    batch_processing.stage_callback = reporter.stage
+    batch_processing.progress_callback = reporter.progress
+
+    reporter.write("start", file=options.file_path, folder=options.data_folder, jobs=options.number_workers)
+    try:
+        batch_processing.run()
+    except KeyboardInterrupt:
+        reporter.write("interrupted")
+        return EXIT_INTERRUPTED
+    except Exception as message:
+        logging.exception(message)
+        reporter.write("error", message=str(message))
+        return EXIT_PROCESSING_ERROR
+
+    files_per_s, _eta_s = compute_rate(len(batch_processing.converted_file_paths), 0,
+                                       batch_processing.elapsed_time_s)
+    reporter.write("summary", discovered=batch_processing.number_discovered,
+                   unchanged=batch_processing.number_unchanged, converted=len(batch_processing.converted_file_paths),
+                   failed=len(batch_processing.failed_file_paths), failed_files=batch_processing.failed_file_paths,
+                   total_elapsed_s=batch_processing.elapsed_time_s, files_per_s=files_per_s,
+                   output_elapsed_s=batch_processing.output_elapsed_times_s)
+
+    if len(batch_processing.failed_file_paths) > 0:
+        return EXIT_FILES_FAILED
+    return EXIT_SUCCESS
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.batch_runner
+   :synopsis: Process EELS files in batch mode without user interface.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Process EELS files in batch mode without user interface.
+
+The processing is shared by the Tk batch processing window and the command line tool, this module must not import Tk.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import time
+import logging
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.parallel_batch_convert import ParallelBatchConvertElv, convert_elv_outputs
+from pysemeelsgui.tools.acquisition_manifest import find_manifest_elv_files
+from pysemeelsgui.tools.batch_pipeline import BatchPipeline
+from pysemeelsgui.tools.figure_engine import FORMAT_PNG
+from pysemeelsgui.tools.batch_checkpoint import CheckpointJournal, get_checkpoint_file_path
+from pysemeelsgui.tools.batch_manifest import BatchManifest, get_manifest_file_path, OUTPUT_SPECTRUM_FIGURE, \
+    OUTPUT_WINDOW_FIGURE
+
+# Globals and constants variables.
+STAGE_CONVERT_FILE = "convert_file"
+STAGE_BATCH_CONVERT = "batch_convert"
+STAGE_SPECTRUM_FIGURE = "spectrum_figure"
+STAGE_WINDOW_FIGURE = "window_figure"
+STAGE_PIPELINE = "pipeline"
+
+STATE_START = "start"
+STATE_DONE = "done"
+STATE_UNCHANGED = "unchanged"
+STATE_CANCELLED = "cancelled"
+
+
+def compute_rate(number_done, number_total, elapsed_time_s):
+    """
+    Processing rate and estimated remaining time.
+
+    :return: tuple (files per second, ETA in second).
+    """
+    if elapsed_time_s <= 0.0 or number_done <= 0:
+        return 0.0, 0.0
+
+    files_per_s = number_done / elapsed_time_s
+    eta_s = (number_total - number_done) / files_per_s
+    return files_per_s, eta_s
+
+
+class BatchProcessing(object):
+    """
+    Options and processing of the batch tool.
+
+    :ivar stage_callback: optional ``stage_callback(stage, state, elapsed_time_s)`` called when a stage starts and ends.
+    :ivar progress_callback: optional ``progress_callback(number_done, number_total, elapsed_time_s)`` called after
+        each converted file.
+    :ivar cancel_event: :py:class:`threading.Event` set by :py:meth:`cancel` from another thread, the processing stops
+        between files.
+    :ivar single_pass: create all the outputs of the data folder with :py:class:`BatchPipeline`, reading each file
+        once, instead of one pass per output. It is the default, the multi pass run reads the files again for the
+        figures.
+    :ivar resume: skip the outputs completed by an interrupted run, found in the checkpoint journal of the data folder.
+        The journal is removed when a run ends without being cancelled.
+    :ivar use_acquisition_manifest: in a single pass run, process the files saved by the acquisition manifests of the
+        data folder instead of scanning it, the folder is scanned if it has no acquisition manifest.
+    """
+
+    def __init__(self):
+        self.file_path = ""
+        self.data_folder = ""
+
+        self.recursive = True
+        self.overwrite = True
+        self.skip_unchanged = False
+        self.use_content_hash = False
+        self.resume = False
+        self.use_acquisition_manifest = False
+
+        self.convert_msa = False
+        self.convert_hdf5 = False
+        self.use_project_hdf5_file = True
+        self.project_hdf5_file = ""
+
+        self.generate_spectrum_figure = False
+        self.generate_window_figure = False
+        self.figure_formats = (FORMAT_PNG,)
+
+        self.single_pass = True
+        self.parallel = True
+        self.number_workers = os.cpu_count() or 1
+        self.number_scan_threads = 1
+
+        self.stage_callback = None
+        self.progress_callback = None
+        self.cancel_event = threading.Event()
+
+        self.converted_file_paths = []
+        self.failed_file_paths = []
+        self.output_elapsed_times_s = {}
+        self.number_discovered = 0
+        self.number_unchanged = 0
+        self.elapsed_time_s = 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def is_conversion_needed(self):
+        export_project = self.use_project_hdf5_file and len(self.project_hdf5_file) > 0
+        return self.convert_msa or self.convert_hdf5 or export_project
+
+    def is_figure_needed(self):
+        return self.generate_spectrum_figure or self.generate_window_figure
+
+    def run(self):
+        start_time = time.perf_counter()
+        self.converted_file_paths = []
+        self.failed_file_paths = []
+        self.output_elapsed_times_s = {}
+        self.number_discovered = 0
+        self.number_unchanged = 0
+
+        if self.is_conversion_needed() and len(self.file_path) > 0:
+            stage_start_time = self._start_stage(STAGE_CONVERT_FILE)
+            convert_elv_outputs(self.file_path, self.convert_msa, self.convert_hdf5)
+            self.converted_file_paths.append(self.file_path)
+            self._end_stage(STAGE_CONVERT_FILE, STATE_DONE, stage_start_time)
+
+        if len(self.data_folder) > 0:
+            manifest = None
+            if self.skip_unchanged:
+                manifest = BatchManifest(get_manifest_file_path(self.data_folder), self.use_content_hash)
+                manifest.load()
+
+            checkpoint = CheckpointJournal(get_checkpoint_file_path(self.data_folder))
+            checkpoint.start(self.resume)
+            try:
+                if self.single_pass:
+                    if self.is_conversion_needed() or self.is_figure_needed():
+                        self.run_pipeline(manifest, checkpoint)
+                else:
+                    if self.is_conversion_needed() and not self.is_cancelled():
+                        self.batch_convert(manifest, checkpoint)
+
+                    if self.generate_spectrum_figure and not self.is_cancelled():
+                        self.generate_figures(manifest, checkpoint, STAGE_SPECTRUM_FIGURE, OUTPUT_SPECTRUM_FIGURE)
+
+                    if self.generate_window_figure and not self.is_cancelled():
+                        self.generate_figures(manifest, checkpoint, STAGE_WINDOW_FIGURE, OUTPUT_WINDOW_FIGURE)
+            finally:
+                checkpoint.close()
+            if not self.is_cancelled():
+                checkpoint.remove()
+
+            if manifest is not None:
+                manifest.save()
+
+        self.elapsed_time_s = time.perf_counter() - start_time
+
+    def create_pipeline(self, manifest, checkpoint):
+        number_workers = self.number_workers if self.parallel else 1
+        pipeline = BatchPipeline(self.data_folder, number_workers=number_workers)
+        pipeline.overwrite = self.overwrite
+        pipeline.recursive = self.recursive
+        pipeline.figure_formats = self.figure_formats
+        pipeline.number_scan_threads = self.number_scan_threads
+        pipeline.progress_callback = self.progress_callback
+        pipeline.manifest = manifest
+        pipeline.cancel_event = self.cancel_event
+        pipeline.checkpoint = checkpoint
+        return pipeline
+
+    def run_pipeline(self, manifest, checkpoint=None):
+        stage_start_time = self._start_stage(STAGE_PIPELINE)
+
+        pipeline = self.create_pipeline(manifest, checkpoint)
+        pipeline.convert_msa = self.convert_msa
+        pipeline.convert_hdf5 = self.convert_hdf5
+        if self.use_project_hdf5_file:
+            pipeline.project_hdf5_file = self.project_hdf5_file
+        pipeline.generate_spectrum_figure = self.generate_spectrum_figure
+        pipeline.generate_window_figure = self.generate_window_figure
+        if self.use_acquisition_manifest:
+            pipeline.elv_file_paths = find_manifest_elv_files(self.data_folder)
+        pipeline.convert()
+
+        self.converted_file_paths.extend(pipeline.converted_file_paths)
+        self.failed_file_paths.extend(pipeline.failed_file_paths)
+        self.number_discovered = pipeline.number_discovered
+        self.number_unchanged = pipeline.number_unchanged
+        self.output_elapsed_times_s["parse"] = pipeline.parse_time_s
+        for stage in pipeline.stages:
+            self.output_elapsed_times_s[stage.output_name] = stage.elapsed_time_s
+
+        if self.is_cancelled():
+            self._end_stage(STAGE_PIPELINE, STATE_CANCELLED, stage_start_time)
+        else:
+            self._end_stage(STAGE_PIPELINE, STATE_DONE, stage_start_time)
+
+    def batch_convert(self, manifest, checkpoint=None):
+        stage_start_time = self._start_stage(STAGE_BATCH_CONVERT)
+
+        # The conversion without parallel processing uses a single worker, so the project file has the same layout.
+        number_workers = self.number_workers if self.parallel else 1
+        batch_convert_elv = ParallelBatchConvertElv(self.data_folder, number_workers)
+        batch_convert_elv.progress_callback = self.progress_callback
+        batch_convert_elv.manifest = manifest
+        batch_convert_elv.checkpoint = checkpoint
+        batch_convert_elv.cancel_event = self.cancel_event
+        batch_convert_elv.number_scan_threads = self.number_scan_threads
+        batch_convert_elv.overwrite = self.overwrite
+        batch_convert_elv.recursive = self.recursive
+        batch_convert_elv.convert_msa = self.convert_msa
+        batch_convert_elv.convert_hdf5 = self.convert_hdf5
+        if self.use_project_hdf5_file:
+            batch_convert_elv.project_hdf5_file = self.project_hdf5_file
+        else:
+            batch_convert_elv.project_hdf5_file = ""
+
+        batch_convert_elv.convert()
+
+        self.converted_file_paths.extend(batch_convert_elv.converted_file_paths)
+        self.failed_file_paths.extend(batch_convert_elv.failed_file_paths)
+        self.number_discovered = batch_convert_elv.number_discovered
+        self.number_unchanged = batch_convert_elv.number_unchanged
+
+        if self.is_cancelled():
+            self._end_stage(STAGE_BATCH_CONVERT, STATE_CANCELLED, stage_start_time)
+        else:
+            self._end_stage(STAGE_BATCH_CONVERT, STATE_DONE, stage_start_time)
+
+    def generate_figures(self, manifest, checkpoint, stage, output_name):
+        """
+        Render the figures of the new or changed files on the worker processes of the figure engine, the same figures
+        as the single pass run. Each file is read again for each kind of figure.
+        """
+        stage_start_time = self._start_stage(stage)
+
+        pipeline = self.create_pipeline(manifest, checkpoint)
+        pipeline.convert_msa = False
+        pipeline.convert_hdf5 = False
+        pipeline.generate_spectrum_figure = output_name == OUTPUT_SPECTRUM_FIGURE
+        pipeline.generate_window_figure = output_name == OUTPUT_WINDOW_FIGURE
+        pipeline.convert()
+
+        # A file is converted only if all its outputs were created.
+        failed_file_paths = set(self.failed_file_paths).union(pipeline.failed_file_paths)
+        converted_file_paths = set(self.converted_file_paths).union(pipeline.converted_file_paths)
+        self.converted_file_paths = sorted(converted_file_paths - failed_file_paths)
+        self.failed_file_paths = sorted(failed_file_paths)
+        self.number_discovered = max(self.number_discovered, pipeline.number_discovered)
+        self.output_elapsed_times_s[output_name] = pipeline.elapsed_time_s
+
+        if self.is_cancelled():
+            self._end_stage(stage, STATE_CANCELLED, stage_start_time)
+        elif pipeline.number_processed == 0:
+            self._end_stage(stage, STATE_UNCHANGED, stage_start_time)
+        else:
+            self._end_stage(stage, STATE_DONE, stage_start_time)
+
+    def _start_stage(self, stage):
+        logging.info("Start {}".format(stage))
+        if self.stage_callback is not None:
+            self.stage_callback(stage, STATE_START, 0.0)
+        return time.perf_counter()
+
+    def _end_stage(self, stage, state, stage_start_time):
+        elapsed_time_s = time.perf_counter() - stage_start_time
+        logging.info("End {}: {} in {:.1f} s".format(stage, state, elapsed_time_s))
+        if self.stage_callback is not None:
+            self.stage_callback(stage, state, elapsed_time_s)
@@ -5,54 +5,70 @@ Spyder Editor
 This is a temporary script file.
 """
 import optparse
-import time
 import logging
 
-from pywinauto.application import Application
+from pysemeelsgui.tools.acquisition_driver import create_driver, BACKEND_ELEMENTS_VIEW, BACKEND_SIMULATED, BACKENDS
+from pysemeelsgui.tools.acquisition_loop import AcquisitionLoop, ACQUISITION_MODE_MANUAL
+from pysemeelsgui.tools.acquisition_timing import format_summary
+from pysemeelsgui.tools.queued_logging import start_queued_logging, stop_queued_logging
+from pysemeelsgui.tools.acquisition_manifest import AcquisitionManifest, get_acquisition_manifest_file_path
+from pysemeelsgui.tools.acquisition_processing import BackgroundProcessor, get_zero_loss_peak_csv_path
 
-ADDITIONAL_WAIT_TIME_s = 1.0
 
+def create_acquisition_driver(options):
+    if options.backend == BACKEND_SIMULATED:
+        return create_driver(BACKEND_SIMULATED, save_folder=options.save_folder or ".",
+                             acquisition_time_s=options.spectra_acquistion_time_s)
 
-def run(options):
-    basename = options.basename
-    number_spectra = options.number_spectra
-    spectra_acquistion_time_s = options.spectra_acquistion_time_s
-
-    program_path = r"C:\Program Files\ElementsView\30kV ElementsView.exe"
-    app = Application(backend="win32").connect(path=program_path)
-    print("Application connected")
-
-    top_window = app.top_window()
-
-    print(top_window.print_control_identifiers(depth=1))
-    # top_window.Button2.click()
-
-    print(top_window.Button2.print_control_identifiers(depth=1))
-
-    for spectrum_id in range(1, number_spectra+1):
-        print("Spectrum id: %i" % (spectrum_id))
-        top_window.wait("exists enabled visible ready")
+    return create_driver(BACKEND_ELEMENTS_VIEW, auto_tune=options.auto_tune)
 
-        top_window.Button2.click()
-
-        time.sleep(spectra_acquistion_time_s + ADDITIONAL_WAIT_TIME_s)
-
-        top_window.menu_select("File -> Save")
-        logging.info("File->Save")
-
-        app.Comment.wait("exists enabled visible ready")
-        logging.info(app.Comment.print_control_identifiers())
-        app.CommentEdit.Edit.SetEditText("auto script")
-        app.Comment.OK.click()
-        logging.info("Comment")
-
-        app['Save As'].wait("exists enabled visible ready")
-        logging.info(app['Save As'].print_control_identifiers(depth=2))
-        file_name = "%s_%i.elv" % (basename, spectrum_id)
-        app['Save As'].Edit.SetEditText(file_name)
-        app['Save As'].Save.click()
-        logging.info("Save")
 
+def run(options):
+    processor = None
+    if options.process and options.save_folder:
+        processor = BackgroundProcessor(queue_size=options.queue_size)
+        processor.start()
+
+    try:
+        acquire(options, processor)
+    finally:
+        if processor is not None:
+            processor.close()
+
+    if processor is not None:
+        csv_file_path = get_zero_loss_peak_csv_path(options.save_folder, options.basename)
+        processor.export_zero_loss_peak_csv(csv_file_path)
+        print("{:d} spectra processed, {:d} deferred, zero loss peaks in {}".format(
+            len(processor.results), processor.number_deferred, csv_file_path))
+
+
+def acquire(options, processor=None):
+    with create_acquisition_driver(options) as driver:
+        print("Application connected")
+
+        acquisition_loop = AcquisitionLoop(driver)
+        acquisition_loop.basename = options.basename
+        acquisition_loop.number_spectra = options.number_spectra
+        acquisition_loop.acquisition_mode = ACQUISITION_MODE_MANUAL
+        acquisition_loop.delay_spectrum_s = options.spectra_acquistion_time_s
+        acquisition_loop.save_folder = options.save_folder
+        if processor is not None:
+            acquisition_loop.saved_file_callback = processor.submit
+        if options.save_folder:
+            manifest_file_path = get_acquisition_manifest_file_path(options.save_folder, options.basename)
+            acquisition_loop.manifest = AcquisitionManifest(manifest_file_path)
+
+        if options.timing_file:
+            with open(options.timing_file, 'w') as timing_file:
+                acquisition_loop.timer.record_file = timing_file
+                acquisition_loop.run()
+        else:
+            acquisition_loop.run()
+
+    print(format_summary(acquisition_loop.timer.summarize()))
+    if acquisition_loop.manifest is not None:
+        print("{:d} file issues in {}".format(len(acquisition_loop.manifest.issues),
+                                              acquisition_loop.manifest.manifest_file_path))
     logging.info("Done")
 
 
@@ -67,6 +83,25 @@ def parse_arguments(argv):
     option_parser.add_option("-t", "--time", action="store", type="float",
                              dest="spectra_acquistion_time_s",
                              help="EELS spectrum acquisition time")
+    option_parser.add_option("--backend", action="store", type="choice", choices=list(BACKENDS),
+                             dest="backend", default=BACKEND_ELEMENTS_VIEW,
+                             help="Acquisition backend: {}".format(", ".join(BACKENDS)))
+    option_parser.add_option("--save-folder", action="store", type="string",
+                             dest="save_folder", default="",
+                             help="Save the spectra in this folder and wait for each saved file")
+    option_parser.add_option("--timing-file", action="store", type="string",
+                             dest="timing_file", default="",
+                             help="Write the duration of each step in this JSON lines file")
+    option_parser.add_option("--auto-tune", action="store_true",
+                             dest="auto_tune", default=False,
+                             help="Tune the timeout of each ElementsView window from its measured response times")
+    option_parser.add_option("--process", action="store_true",
+                             dest="process", default=False,
+                             help="Convert the saved spectra, fit their zero loss peak and draw a thumbnail during the "
+                                  "acquisition, needs --save-folder")
+    option_parser.add_option("--queue-size", action="store", type="int",
+                             dest="queue_size", default=8,
+                             help="Number of saved spectra waiting to be processed")
 
     options, arguments = option_parser.parse_args()
     logging.info("Remaining arguments: {}".format(arguments))
@@ -78,11 +113,14 @@ def parse_arguments(argv):
 
 
 if __name__ == "__main__":
-    logging.getLogger().setLevel(logging.INFO)
+    start_queued_logging(stream_level=logging.INFO)
 
     import sys
     logging.debug("Number of arguments: {}".format(len(sys.argv)))
 
-    options = parse_arguments(sys.argv)
+    try:
+        options = parse_arguments(sys.argv)
 
-    run(options)
+        run(options)
+    finally:
+        stop_queued_logging()
@@ -28,29 +28,44 @@ GUI to process EELS files in batch mode.
 
 # Standard library modules.
 import six
-import time
 import os.path
 import logging
+import datetime
 if six.PY3:
     from tkinter import ttk
-    from tkinter import filedialog, N, W, E, S, StringVar, BooleanVar, IntVar, DoubleVar, Tk, DISABLED, NORMAL
+    from tkinter import filedialog, N, W, E, S, StringVar, BooleanVar, IntVar, DoubleVar, Tk, Toplevel, DISABLED, \
+        NORMAL
 elif six.PY2:
     import ttk
-    from Tkinter import N, W, E, S, StringVar, BooleanVar, IntVar, DoubleVar, Tk, DISABLED, NORMAL
+    from Tkinter import N, W, E, S, StringVar, BooleanVar, IntVar, DoubleVar, Tk, Toplevel, DISABLED, NORMAL
     import tkFileDialog as filedialog
 
 # Third party modules.
-from pywinauto.application import Application, AppNotConnected, ProcessNotFoundError
-from pywinauto.timings import TimeoutError, Timings
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 # Local modules.
 
 # Project modules.
+from pysemeelsgui.tools.acquisition_driver import create_driver, AcquisitionError, BACKENDS, BACKEND_ELEMENTS_VIEW, \
+    BACKEND_SIMULATED, ELEMENT_TOP_WINDOW, ELEMENT_MANUAL_ACQUISITION, ELEMENT_SAVE_AS
+from pysemeelsgui.tools.acquisition_loop import AcquisitionLoop, ACQUISITION_MODE_LIVE, ACQUISITION_MODE_MANUAL
+from pysemeelsgui.tools.acquisition_timing import format_summary
+from pysemeelsgui.tools.acquisition_processing import BackgroundProcessor, get_zero_loss_peak_csv_path
+from pysemeelsgui.tools.acquisition_manifest import AcquisitionManifest, get_acquisition_manifest_file_path
+from pysemeelsgui.tools.acquisition_plan import AcquisitionPlanRunner, read_acquisition_plan, format_plan_summary
+from pysemeelsgui.tools.acquisition_monitor import AcquisitionMonitor, MonitorFigure, Threshold, METRICS, \
+    METRIC_LABELS
+from pysemeelsgui.tools.batch_runner import compute_rate
+from pysemeelsgui.tools.tk_worker import TkWorker, MESSAGE_FINISHED, MESSAGE_ERROR
+from pysemeelsgui.tools.queued_logging import start_queued_logging, stop_queued_logging
 
 # Globals and constants variables.
-ADDITIONAL_WAIT_TIME_s = 1.0
-ACQUISITION_MODE_LIVE = "Live"
-ACQUISITION_MODE_MANUAL = "Manual"
+MESSAGE_PROGRESS = "progress"
+MESSAGE_MANIFEST_ISSUE = "manifest_issue"
+MESSAGE_SERIES = "series"
+MONITOR_REFRESH_INTERVAL_ms = 1000
+LOG_FOLDER_ENVIRONMENT_VARIABLE = "PYSEMEELSGUI_LOG_FOLDER"
 
 
 def get_current_module_path(module_path, relative_path=""):
@@ -63,38 +78,39 @@ def get_current_module_path(module_path, relative_path=""):
 
 
 def get_save_path():
-    path = get_current_module_path(__file__, "../../log")
+    """
+    Log folder given by the ``PYSEMEELSGUI_LOG_FOLDER`` environment variable, otherwise in the user home folder.
+    """
+    path = os.environ.get(LOG_FOLDER_ENVIRONMENT_VARIABLE, "")
+    if len(path) == 0:
+        path = os.path.join(os.path.expanduser("~"), ".pysemeelsgui", "log")
     if not os.path.isdir(path):
         os.makedirs(path)
 
     return path
 
 
-def setup_logger():
-    new_logger = logging.getLogger()
-    new_logger.setLevel(logging.DEBUG)
-
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-
-    log_format = '%(asctime)s : %(name)-40s : %(levelname)-10s : %(message)s'
-    formatter = logging.Formatter(log_format)
-
-    ch.setFormatter(formatter)
+def get_timing_file_path(save_folder=""):
+    """
+    Step timing file of a run, in the save folder with the spectra if there is one, otherwise in the log folder.
+    """
+    file_name = "acquisition_timing_{}.jsonl".format(datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    if len(save_folder) > 0:
+        return os.path.join(save_folder, file_name)
+    return os.path.join(get_save_path(), file_name)
 
-    new_logger.addHandler(ch)
 
-    path = get_save_path()
-    log_file_path = os.path.join(path, "{}.log".format("element_view_script"))
-    fh = logging.FileHandler(log_file_path)
-    fh.setFormatter(formatter)
-    fh.setLevel(logging.DEBUG)
-    new_logger.addHandler(fh)
+def setup_logger():
+    """
+    Write the log on the console and in the log folder from a background thread, called by :py:func:`main_gui`.
 
-    return new_logger
+    :return: the started :py:class:`logging.handlers.QueueListener`.
+    """
+    log_file_path = os.path.join(get_save_path(), "{}.log".format("element_view_script"))
+    return start_queued_logging(log_file_path, stream_level=logging.INFO, file_level=logging.DEBUG)
 
 
-logger = setup_logger()
+logger = logging.getLogger(__name__)
 
 
 class TkMainGui(ttk.Frame):
@@ -112,6 +128,15 @@ class TkMainGui(ttk.Frame):
         file_path = os.path.join(self.default_folder, "30kV ElementsView.exe")
         self.program_path.set(file_path)
 
+        self.backend = StringVar()
+        self.backend.set(BACKEND_ELEMENTS_VIEW)
+
+        self.save_folder = StringVar()
+        self.save_folder.set("")
+
+        self.plan_file_path = StringVar()
+        self.plan_file_path.set("")
+
         self.basename = StringVar()
         self.basename.set("test")
 
@@ -130,6 +155,12 @@ class TkMainGui(ttk.Frame):
         self.fast_acquisition = BooleanVar()
         self.fast_acquisition.set(False)
 
+        self.auto_tune = BooleanVar()
+        self.auto_tune.set(False)
+
+        self.process_spectra = BooleanVar()
+        self.process_spectra.set(False)
+
         self.is_top_window = BooleanVar()
         self.is_top_window.set(False)
         self.is_manual_acquisition_button = BooleanVar()
@@ -138,6 +169,11 @@ class TkMainGui(ttk.Frame):
         self.is_save_as.set(False)
 
         self.results_text = StringVar()
+        self.progress_value = DoubleVar()
+        self.progress_text = StringVar()
+
+        self.worker = None
+        self.acquisition_loop = None
 
         widget_width = 40
 
@@ -147,6 +183,22 @@ class TkMainGui(ttk.Frame):
         file_path_entry.grid(column=2, row=row_id, sticky=(W, E))
         ttk.Button(self, width=widget_width, text="Select ElementView program file", command=self.open_element_view_program).grid(column=3, row=row_id, sticky=W)
 
+        row_id += 1
+        backend_label = ttk.Label(self, width=widget_width, text="Acquisition backend: ", state="readonly")
+        backend_label.grid(column=2, row=row_id, sticky=(W, E))
+        backend_entry = ttk.Combobox(self, width=widget_width, textvariable=self.backend, values=list(BACKENDS))
+        backend_entry.grid(column=3, row=row_id, sticky=(W, E))
+
+        row_id += 1
+        save_folder_entry = ttk.Entry(self, width=widget_width, textvariable=self.save_folder)
+        save_folder_entry.grid(column=2, row=row_id, sticky=(W, E))
+        ttk.Button(self, width=widget_width, text="Select save folder", command=self.open_save_folder).grid(column=3, row=row_id, sticky=W)
+
+        row_id += 1
+        plan_file_path_entry = ttk.Entry(self, width=widget_width, textvariable=self.plan_file_path)
+        plan_file_path_entry.grid(column=2, row=row_id, sticky=(W, E))
+        ttk.Button(self, width=widget_width, text="Select plan file", command=self.open_plan_file).grid(column=3, row=row_id, sticky=W)
+
         logger.debug("Create basename label and edit entry")
         row_id += 1
         basename_label = ttk.Label(self, width=widget_width, text="basename: ", state="readonly")
@@ -168,7 +220,7 @@ class TkMainGui(ttk.Frame):
         number_spectra_entry.grid(column=3, row=row_id, sticky=(W, E))
 
         row_id += 1
-        delay_spectrum_label = ttk.Label(self, width=widget_width, text="Delay between of spectrum (s): ", state="readonly")
+        delay_spectrum_label = ttk.Label(self, width=widget_width, text="Acquisition time of spectrum (s): ", state="readonly")
         delay_spectrum_label.grid(column=2, row=row_id, sticky=(W, E))
         delay_spectrum_entry = ttk.Entry(self, width=widget_width, textvariable=self.delay_spectrum_s)
         delay_spectrum_entry.grid(column=3, row=row_id, sticky=(W, E))
@@ -179,6 +231,12 @@ class TkMainGui(ttk.Frame):
         row_id += 1
         ttk.Checkbutton(self, width=widget_width, text="Fast acquisition", variable=self.fast_acquisition).grid(column=3, row=row_id, sticky=(W, E))
 
+        row_id += 1
+        ttk.Checkbutton(self, width=widget_width, text="Auto-tune timeouts", variable=self.auto_tune).grid(column=3, row=row_id, sticky=(W, E))
+
+        row_id += 1
+        ttk.Checkbutton(self, width=widget_width, text="Process the saved spectra", variable=self.process_spectra).grid(column=3, row=row_id, sticky=(W, E))
+
         row_id += 1
         ttk.Button(self, width=widget_width, text="Find ElementView", command=self.find_element_view).grid(column=3, row=row_id, sticky=W)
 
@@ -193,11 +251,28 @@ class TkMainGui(ttk.Frame):
         row_id += 1
         self.start_button = ttk.Button(self, width=widget_width, text="Start script", command=self.start_script, state=DISABLED)
         self.start_button.grid(column=3, row=row_id, sticky=W)
+        self.start_plan_button = ttk.Button(self, width=widget_width, text="Start plan", command=self.start_plan, state=DISABLED)
+        self.start_plan_button.grid(column=2, row=row_id, sticky=W)
+
+        row_id += 1
+        self.pause_button = ttk.Button(self, width=widget_width, text="Pause", command=self.pause_script, state=DISABLED)
+        self.pause_button.grid(column=2, row=row_id, sticky=W)
+        self.stop_button = ttk.Button(self, width=widget_width, text="Stop", command=self.stop_script, state=DISABLED)
+        self.stop_button.grid(column=3, row=row_id, sticky=W)
+
+        row_id += 1
+        ttk.Button(self, width=widget_width, text="Monitor save folder", command=self.open_monitor).grid(column=3, row=row_id, sticky=W)
 
         row_id += 1
         results_label = ttk.Label(self, textvariable=self.results_text, state="readonly")
         results_label.grid(column=2, row=row_id, sticky=(W, E))
 
+        row_id += 1
+        progress_bar = ttk.Progressbar(self, orient="horizontal", mode="determinate", variable=self.progress_value)
+        progress_bar.grid(column=2, row=row_id, sticky=(W, E))
+        progress_label = ttk.Label(self, textvariable=self.progress_text, state="readonly")
+        progress_label.grid(column=3, row=row_id, sticky=W)
+
         for child in self.winfo_children():
             child.grid_configure(padx=5, pady=5)
 
@@ -211,134 +286,352 @@ class TkMainGui(ttk.Frame):
         logger.debug(file_path)
         self.program_path.set(file_path)
 
+    def open_save_folder(self):
+        logger.debug("open_save_folder")
+
+        folder = filedialog.askdirectory(initialdir=self.save_folder.get())
+        logger.debug(folder)
+        self.save_folder.set(folder)
+
+    def open_plan_file(self):
+        logger.debug("open_plan_file")
+
+        file_path = filedialog.askopenfilename(filetypes=(("plan file", "*.json"), ), initialdir=self.save_folder.get())
+        logger.debug(file_path)
+        self.plan_file_path.set(file_path)
+
+    def open_monitor(self):
+        save_folder = self.save_folder.get()
+        if not os.path.isdir(save_folder):
+            self.results_text.set("Select the save folder to monitor")
+            return
+
+        TkMonitorWindow(self, save_folder)
+
+    def create_driver(self):
+        if self.backend.get() == BACKEND_SIMULATED:
+            return create_driver(BACKEND_SIMULATED, save_folder=self.save_folder.get(),
+                                 acquisition_time_s=self.delay_spectrum_s.get())
+
+        return create_driver(self.backend.get(), program_path=self.program_path.get(),
+                             fast=self.fast_acquisition.get(), auto_tune=self.auto_tune.get())
+
     def find_element_view(self):
+        elements = {}
         try:
-            app = Application(backend="win32").connect(path=self.program_path.get())
-            logger.info("Application connected")
-            # logger.info("app: {}".format(app.print_control_identifiers(depth=1)))
-
-            try:
-                top_window = app.top_window()
-                top_window.wait("exists enabled visible ready")
-                self.is_top_window.set(True)
-                logger.info("top_window: {}".format(top_window.print_control_identifiers(depth=1)))
-
-                try:
-                    logger.info("Button2: {}".format(top_window.Button2.print_control_identifiers(depth=1)))
-                    self.is_manual_acquisition_button.set(True)
-                except Exception as message:
-                    logger.error(message)
-                    self.is_manual_acquisition_button.set(False)
-
-                try:
-                    top_window.menu_select("File -> Save")
-                    logger.info("File->Save")
-                    app.Comment.wait("exists enabled visible ready")
-                    logger.info(app.Comment.print_control_identifiers())
-                    # app.CommentEdit.Edit.SetEditText("auto script")
-                    app.Comment.OK.click()
-                    logger.info("Comment")
-
-                    app['Save As'].wait("exists enabled visible ready")
-                    logger.info(app['Save As'].print_control_identifiers(depth=2))
-                    app['Save As'].Cancel.click()
-                    logger.info("Cancel")
-                    self.is_save_as.set(True)
-                except Exception as message:
-                    logger.error(message)
-                    self.is_save_as.set(False)
-
-            except Exception as message:
-                logger.errror(message)
-                self.is_top_window.set(False)
-                self.is_manual_acquisition_button.set(False)
-                self.is_save_as.set(False)
-
-        except (TimeoutError, AppNotConnected, ProcessNotFoundError) as message:
+            with self.create_driver() as driver:
+                elements = driver.find_elements()
+        except (AcquisitionError, ImportError, ValueError) as message:
             logger.error(message)
-            self.is_top_window.set(False)
-            self.is_manual_acquisition_button.set(False)
-            self.is_save_as.set(False)
+
+        self.is_top_window.set(elements.get(ELEMENT_TOP_WINDOW, False))
+        self.is_manual_acquisition_button.set(elements.get(ELEMENT_MANUAL_ACQUISITION, False))
+        self.is_save_as.set(elements.get(ELEMENT_SAVE_AS, False))
 
         if self.is_top_window.get() and self.is_manual_acquisition_button.get() and self.is_save_as.get():
             self.results_text.set("ElementView elements found")
             self.start_button.config(state=NORMAL)
+            self.start_plan_button.config(state=NORMAL)
         else:
             self.results_text.set("ElementView elements NOT found")
             self.start_button.config(state=DISABLED)
+            self.start_plan_button.config(state=DISABLED)
 
     def start_script(self):
-        self.save_spectra()
-
-    def save_spectra(self):
         acquisition_mode = self.acquisition_mode.get()
-        safe_acquisition = not self.fast_acquisition.get()
-        overwrite = self.overwrite.get()
-
-        if self.fast_acquisition.get():
-            Timings.Fast()
-            Timings.window_find_timeout = 2
 
         if acquisition_mode == ACQUISITION_MODE_MANUAL:
             self.results_text.set("Manual save")
         if acquisition_mode == ACQUISITION_MODE_LIVE:
             self.results_text.set("Live save")
 
-        app = Application(backend="win32").connect(path=self.program_path.get())
-        logger.info("Application connected")
-
-        top_window = app.window(title_re=".*ElementsView.*")
-        if safe_acquisition:
-            top_window.wait("exists enabled visible ready")
-
-        for spectrum_id in range(1, self.number_spectra.get() + 1):
-            logger.info("Spectrum id: {:d}".format(spectrum_id))
-
-            if safe_acquisition:
-                top_window.wait("exists enabled visible ready")
-
-            if acquisition_mode == ACQUISITION_MODE_MANUAL:
-                top_window.Button2.click()
-
-                time.sleep(self.delay_spectrum_s.get())
-
-            if safe_acquisition:
-                top_window.wait("exists enabled visible ready")
-            top_window.menu_select("File -> Save")
-
-            if safe_acquisition:
-                app.Comment.wait("exists enabled visible ready")
-                app.CommentEdit.Edit.SetEditText("auto script")
-            app.Comment.OK.click()
-
-            save_as_window = app['Save As']
-            if safe_acquisition:
-                save_as_window.wait("exists enabled visible ready")
-            file_name = "%s_%i.elv" % (self.basename.get(), spectrum_id)
-            save_as_window.Edit.SetEditText(file_name)
-            save_as_window.Save.click()
-
-            if overwrite:
-                try:
-                    window_confirm = app['Confirm Save As']
-                    if safe_acquisition:
-                        window_confirm.wait("exists enabled visible ready")
-                    if self.overwrite.get():
-                        window_confirm.Yes.click()
-                    else:
-                        window_confirm.No.click()
-                        save_as_window.Cancel.click()
-                        self.results_text.set("Cancel save file already exist")
-                        return
-                except Exception as message:
-                    logger.error(message)
+        save_folder = self.save_folder.get()
+        if len(save_folder) == 0:
+            self.results_text.set("{}, no save folder: the saved files are not checked".format(
+                self.results_text.get()))
+        processor = None
+        if self.process_spectra.get() and len(save_folder) > 0:
+            # Started before the worker thread, the worker processes do not copy the threads.
+            processor = BackgroundProcessor()
+            processor.start()
+
+        try:
+            driver = self.create_driver()
+        except (ImportError, ValueError) as message:
+            logger.error(message)
+            self.results_text.set("Error: {}".format(message))
+            if processor is not None:
+                processor.close()
+            return
+
+        # The Tk variables are read on the mainloop, the worker thread only uses the acquisition loop.
+        acquisition_loop = AcquisitionLoop(driver)
+        acquisition_loop.basename = self.basename.get()
+        acquisition_loop.number_spectra = self.number_spectra.get()
+        acquisition_loop.acquisition_mode = acquisition_mode
+        acquisition_loop.delay_spectrum_s = self.delay_spectrum_s.get()
+        acquisition_loop.overwrite = self.overwrite.get()
+        acquisition_loop.save_folder = save_folder
+        if processor is not None:
+            acquisition_loop.saved_file_callback = processor.submit
+        if len(save_folder) > 0:
+            manifest_file_path = get_acquisition_manifest_file_path(save_folder, acquisition_loop.basename)
+            acquisition_loop.manifest = AcquisitionManifest(manifest_file_path)
+
+        def save_spectra(post_message, cancel_event):
+            acquisition_loop.cancel_event = cancel_event
+            acquisition_loop.progress_callback = lambda *values: post_message(MESSAGE_PROGRESS, *values)
+            if acquisition_loop.manifest is not None:
+                acquisition_loop.manifest.issue_callback = lambda issue: post_message(MESSAGE_MANIFEST_ISSUE, issue)
+            return self.save_spectra(acquisition_loop, processor)
+
+        self.start_worker(acquisition_loop, save_spectra)
+
+    def start_plan(self):
+        plan_file_path = self.plan_file_path.get()
+        try:
+            series_list = read_acquisition_plan(plan_file_path)
+        except (IOError, ValueError) as message:
+            logger.error(message)
+            self.results_text.set("Error: {}".format(message))
+            return
+
+        save_folder = self.save_folder.get()
+        processor = None
+        if self.process_spectra.get() and len(save_folder) > 0:
+            processor = BackgroundProcessor()
+            processor.start()
+
+        try:
+            driver = self.create_driver()
+        except (ImportError, ValueError) as message:
+            logger.error(message)
+            self.results_text.set("Error: {}".format(message))
+            if processor is not None:
+                processor.close()
+            return
+
+        runner = AcquisitionPlanRunner(driver, series_list)
+        runner.save_folder = save_folder
+        if processor is not None:
+            runner.saved_file_callback = processor.submit
+        plan_name = os.path.splitext(os.path.basename(plan_file_path))[0]
+
+        def run_plan(post_message, cancel_event):
+            runner.cancel_event = cancel_event
+            runner.series_callback = lambda *values: post_message(MESSAGE_SERIES, *values)
+            runner.progress_callback = lambda *values: post_message(MESSAGE_PROGRESS, *values)
+            runner.issue_callback = lambda issue: post_message(MESSAGE_MANIFEST_ISSUE, issue)
+            return self.run_plan(runner, plan_name, processor)
+
+        self.results_text.set("Plan {}: {:d} series".format(plan_name, len(series_list)))
+        if len(save_folder) == 0:
+            self.results_text.set("{}, no save folder: the saved files are not checked".format(
+                self.results_text.get()))
+        self.start_worker(runner, run_plan)
+
+    def start_worker(self, acquisition, target):
+        """
+        :param acquisition: the acquisition loop or the plan runner, paused and stopped by the buttons.
+        """
+        self.start_button.config(state=DISABLED)
+        self.start_plan_button.config(state=DISABLED)
+        self.pause_button.config(state=NORMAL, text="Pause")
+        self.stop_button.config(state=NORMAL)
+        self.progress_value.set(0.0)
+        self.progress_text.set("")
+
+        self.acquisition_loop = acquisition
+        self.worker = TkWorker(self, target, self.process_message)
+        self.worker.start()
+
+    def pause_script(self):
+        if self.acquisition_loop is None:
+            return
+
+        if self.acquisition_loop.is_paused():
+            self.acquisition_loop.resume()
+            self.results_text.set("Resumed")
+            self.pause_button.config(text="Pause")
+        else:
+            self.acquisition_loop.pause()
+            self.results_text.set("Pausing after the current spectrum ...")
+            self.pause_button.config(text="Resume")
+
+    def stop_script(self):
+        if self.worker is not None:
+            self.results_text.set("Stopping after the current spectrum ...")
+            self.worker.cancel()
+
+    def save_spectra(self, acquisition_loop, processor=None):
+        """
+        Run the acquisition loop, on the worker thread.
+
+        :return: summary of the step timings.
+        """
+        timing_file_path = get_timing_file_path(acquisition_loop.save_folder)
+        try:
+            with acquisition_loop.driver, open(timing_file_path, 'w') as timing_file:
+                acquisition_loop.timer.record_file = timing_file
+                acquisition_loop.run()
+        finally:
+            if processor is not None:
+                processor.close()
+
+        if processor is not None:
+            csv_file_path = get_zero_loss_peak_csv_path(acquisition_loop.save_folder, acquisition_loop.basename)
+            processor.export_zero_loss_peak_csv(csv_file_path)
+            logger.info("{:d} spectra processed, zero loss peaks in {}".format(len(processor.results), csv_file_path))
+
+        summary = acquisition_loop.timer.summarize()
+        logger.info("Step timings in {}:\n{}".format(timing_file_path, format_summary(summary)))
+        logger.info("Done")
+        return summary
+
+    def run_plan(self, runner, plan_name, processor=None):
+        """
+        Run the series of the plan, on the worker thread.
 
+        :return: summary of the plan.
+        """
+        timing_file_path = get_timing_file_path(runner.save_folder)
+        try:
+            with runner.driver, open(timing_file_path, 'w') as timing_file:
+                runner.record_file = timing_file
+                runner.run()
+        finally:
+            if processor is not None:
+                processor.close()
+
+        if processor is not None:
+            csv_file_path = get_zero_loss_peak_csv_path(runner.save_folder, plan_name)
+            processor.export_zero_loss_peak_csv(csv_file_path)
+            logger.info("{:d} spectra processed, zero loss peaks in {}".format(len(processor.results), csv_file_path))
+
+        summary = runner.summarize()
+        logger.info("Plan {}, step timings in {}:\n{}".format(plan_name, timing_file_path,
+                                                              format_plan_summary(summary)))
         logger.info("Done")
-        self.results_text.set("Done")
+        return summary
+
+    def process_message(self, kind, *values):
+        if kind == MESSAGE_PROGRESS:
+            self.update_progress(*values)
+        elif kind == MESSAGE_SERIES:
+            series_index, number_series, series = values
+            self.results_text.set("Series {:d}/{:d}: {}".format(series_index, number_series, series.basename))
+        elif kind == MESSAGE_MANIFEST_ISSUE:
+            issue = values[0]
+            self.results_text.set("Spectrum {:d}: {}".format(issue["spectrum_id"], issue["message"]))
+        elif kind == MESSAGE_FINISHED and isinstance(self.acquisition_loop, AcquisitionPlanRunner):
+            summary = values[0]
+            text = "Stopped" if self.acquisition_loop.is_cancelled() else "Done"
+            text += ": {:d}/{:d} series, {:.1f} spectra per minute".format(summary["number_run"],
+                                                                          summary["number_series"],
+                                                                          summary["spectra_per_minute"])
+            if summary["number_failed"] > 0:
+                text += ", {:d} series failed".format(summary["number_failed"])
+            self.results_text.set(text)
+            self.end_script()
+        elif kind == MESSAGE_FINISHED:
+            summary = values[0]
+            if self.acquisition_loop.is_cancelled():
+                text = "Stopped: {:.1f} spectra per minute".format(summary["spectra_per_minute"])
+            else:
+                text = "Done: {:.1f} spectra per minute".format(summary["spectra_per_minute"])
+            manifest = self.acquisition_loop.manifest
+            if manifest is not None and len(manifest.issues) > 0:
+                text += ", {:d} file issues in {}".format(len(manifest.issues),
+                                                          os.path.basename(manifest.manifest_file_path))
+            self.results_text.set(text)
+            self.end_script()
+        elif kind == MESSAGE_ERROR:
+            self.results_text.set("Error: {}".format(values[0]))
+            self.end_script()
+
+    def end_script(self):
+        self.worker = None
+        self.acquisition_loop = None
+        self.start_button.config(state=NORMAL)
+        self.start_plan_button.config(state=NORMAL)
+        self.pause_button.config(state=DISABLED, text="Pause")
+        self.stop_button.config(state=DISABLED)
+
+    def update_progress(self, number_done, number_total, elapsed_time_s):
+        if number_total > 0:
+            self.progress_value.set(100.0 * number_done / number_total)
+        spectra_per_s, eta_s = compute_rate(number_done, number_total, elapsed_time_s)
+        self.progress_text.set("Spectrum {:d}/{:d}, {:.0f} s, {:.1f} spectra/min, ETA {:.0f} s".format(
+            number_done, number_total, elapsed_time_s, 60.0 * spectra_per_s, eta_s))
+
+
+class TkMonitorWindow(Toplevel):
+    """
+    Rolling plots of the metrics of the spectra saved in the folder, refreshed on the mainloop.
+    """
+
+    def __init__(self, parent, save_folder):
+        Toplevel.__init__(self, parent)
+        self.title("Monitor {}".format(save_folder))
+
+        self.monitor = AcquisitionMonitor(save_folder)
+        self.monitor_figure = MonitorFigure(Figure(figsize=(6, 6), dpi=100))
+        self.alarm_text = StringVar()
+        self.alarm_text.set("No alarm")
+        self.limits = dict((metric, (StringVar(), StringVar())) for metric in METRICS)
+
+        self.canvas = FigureCanvasTkAgg(self.monitor_figure.figure, master=self)
+        self.canvas.get_tk_widget().grid(column=0, row=0, columnspan=3, sticky=(N, W, E, S))
+
+        row_id = 1
+        for metric in METRICS:
+            minimum, maximum = self.limits[metric]
+            ttk.Label(self, text="{} limits: ".format(METRIC_LABELS[metric])).grid(column=0, row=row_id, sticky=W)
+            ttk.Entry(self, width=12, textvariable=minimum).grid(column=1, row=row_id, sticky=(W, E))
+            ttk.Entry(self, width=12, textvariable=maximum).grid(column=2, row=row_id, sticky=(W, E))
+            row_id += 1
+        ttk.Button(self, text="Apply limits", command=self.apply_limits).grid(column=2, row=row_id, sticky=W)
+        ttk.Label(self, textvariable=self.alarm_text).grid(column=0, row=row_id, columnspan=2, sticky=(W, E))
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.monitor.start()
+        self.refresh()
+
+    def apply_limits(self):
+        thresholds = []
+        try:
+            for metric in METRICS:
+                minimum, maximum = [float(limit.get()) if limit.get().strip() else None
+                                    for limit in self.limits[metric]]
+                if minimum is not None or maximum is not None:
+                    thresholds.append(Threshold(metric, minimum, maximum))
+        except ValueError as message:
+            self.alarm_text.set("Invalid limit: {}".format(message))
+            return
+
+        self.monitor.thresholds = thresholds
+        self.monitor_figure.set_thresholds(thresholds)
+        self.canvas.draw_idle()
+
+    def refresh(self):
+        # The alarms are read here, the alarm callback runs on the polling thread.
+        if len(self.monitor.alarms) > 0:
+            alarm = self.monitor.alarms[-1]
+            self.alarm_text.set("{:d} alarms, spectrum {:d}: {}".format(len(self.monitor.alarms),
+                                                                       alarm["spectrum_number"], alarm["message"]))
+        self.monitor_figure.update(self.monitor)
+        self.canvas.draw_idle()
+        self._refresh_id = self.after(MONITOR_REFRESH_INTERVAL_ms, self.refresh)
+
+    def close(self):
+        self.after_cancel(self._refresh_id)
+        self.monitor.stop()
+        self.destroy()
 
 
 def main_gui():
     import sys
+    setup_logger()
     logger.debug("main_gui")
 
     logger.debug("Create root")
@@ -351,7 +644,10 @@ def main_gui():
     TkMainGui(root, default_folder=default_folder).pack()
 
     logger.debug("Mainloop")
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        stop_queued_logging()
 
 
 if __name__ == '__main__':  # pragma: no cover
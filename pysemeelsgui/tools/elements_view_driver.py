@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.elements_view_driver
+   :synopsis: Acquisition driver of the ElementsView program with pywinauto.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Acquisition driver of the ElementsView program with pywinauto.
+
+The windows are checked with adaptive polling, see :py:func:`pysemeelsgui.tools.polling.poll_until`, instead of the
+pywinauto waits with their fixed retry interval, so each step starts as soon as its window is ready. With *auto_tune*,
+the pywinauto fast timings are used and the timeout of each wait is tuned from the measured response times of the
+windows, see :py:class:`pysemeelsgui.tools.acquisition_tuning.TimeoutTuner`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import io
+import logging
+import contextlib
+
+# Third party modules.
+from pywinauto.application import Application, AppNotConnected, ProcessNotFoundError
+from pywinauto.timings import TimeoutError, Timings
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_driver import AcquisitionDriver, AcquisitionError, BACKEND_ELEMENTS_VIEW, \
+    ELEMENT_TOP_WINDOW, ELEMENT_MANUAL_ACQUISITION, ELEMENT_SAVE_AS
+from pysemeelsgui.tools.polling import poll_until
+from pysemeelsgui.tools.acquisition_tuning import TimeoutTuner
+
+# Globals and constants variables.
+DEFAULT_PROGRAM_PATH = r"C:\Program Files\ElementsView\30kV ElementsView.exe"
+TOP_WINDOW_TITLE_RE = ".*ElementsView.*"
+READY_STATE = "exists enabled visible ready"
+
+WAIT_MAIN_WINDOW = "main_window"
+WAIT_COMMENT_DIALOG = "comment_dialog"
+WAIT_SAVE_AS_DIALOG = "save_as_dialog"
+WAIT_CONFIRM_DIALOG = "confirm_dialog"
+
+
+class ElementsViewDriver(AcquisitionDriver):
+    """
+    Drive the ElementsView windows with pywinauto.
+
+    With *fast*, the pywinauto fast timings are used and the windows are not waited for before each step. With
+    *auto_tune*, the pywinauto fast timings are used and the windows are waited for with tuned timeouts.
+
+    :param ready_timeout_s: maximum time waiting for a window, the initial timeout when tuned.
+    :param confirm_timeout_s: maximum time waiting for the overwrite confirmation dialog.
+    :ivar timeout_tuner: :py:class:`TimeoutTuner` with *auto_tune*, else None.
+    """
+    backend = BACKEND_ELEMENTS_VIEW
+
+    def __init__(self, program_path=DEFAULT_PROGRAM_PATH, fast=False, ready_timeout_s=10.0, confirm_timeout_s=2.0,
+                 auto_tune=False):
+        self.program_path = program_path
+        self.fast = fast and not auto_tune
+        self.ready_timeout_s = ready_timeout_s
+        self.confirm_timeout_s = confirm_timeout_s
+
+        self.timeout_tuner = None
+        if auto_tune:
+            self.timeout_tuner = TimeoutTuner(initial_timeout_s=ready_timeout_s)
+
+        self.app = None
+        self.top_window = None
+
+    def get_options(self):
+        options = super(ElementsViewDriver, self).get_options()
+        options.update({"fast": self.fast, "ready_timeout_s": self.ready_timeout_s,
+                        "confirm_timeout_s": self.confirm_timeout_s,
+                        "window_find_timeout": Timings.window_find_timeout,
+                        "after_click_wait": Timings.after_click_wait,
+                        "after_menu_wait": Timings.after_menu_wait,
+                        "after_setfocus_wait": Timings.after_setfocus_wait})
+        if self.timeout_tuner is not None:
+            options["auto_tune"] = self.timeout_tuner.get_options()
+        return options
+
+    def connect(self):
+        if self.fast or self.timeout_tuner is not None:
+            Timings.Fast()
+        if self.fast:
+            Timings.window_find_timeout = 2
+
+        try:
+            self.app = Application(backend="win32").connect(path=self.program_path)
+        except (TimeoutError, AppNotConnected, ProcessNotFoundError) as message:
+            raise AcquisitionError("Cannot connect to {}: {}".format(self.program_path, message))
+        logging.info("Application connected")
+
+        self.top_window = self.app.window(title_re=TOP_WINDOW_TITLE_RE)
+
+    def disconnect(self):
+        if self.timeout_tuner is not None:
+            logging.info("Tuned timeouts: {}".format(self.timeout_tuner.summarize()))
+        self.app = None
+        self.top_window = None
+
+    def find_elements(self):
+        elements = {ELEMENT_TOP_WINDOW: False, ELEMENT_MANUAL_ACQUISITION: False, ELEMENT_SAVE_AS: False}
+
+        try:
+            top_window = self.app.top_window()
+            top_window.wait(READY_STATE)
+            elements[ELEMENT_TOP_WINDOW] = True
+            _log_control_identifiers("top_window", top_window, depth=1)
+        except Exception as message:
+            logging.error(message)
+            return elements
+
+        try:
+            _log_control_identifiers("Button2", top_window.Button2, depth=1)
+            top_window.Button2.wait("exists")
+            elements[ELEMENT_MANUAL_ACQUISITION] = True
+        except Exception as message:
+            logging.error(message)
+
+        try:
+            top_window.menu_select("File -> Save")
+            logging.info("File->Save")
+            self.app.Comment.wait(READY_STATE)
+            _log_control_identifiers("Comment", self.app.Comment)
+            self.app.Comment.OK.click()
+            logging.info("Comment")
+
+            self.app['Save As'].wait(READY_STATE)
+            _log_control_identifiers("Save As", self.app['Save As'], depth=2)
+            self.app['Save As'].Cancel.click()
+            logging.info("Cancel")
+            elements[ELEMENT_SAVE_AS] = True
+        except Exception as message:
+            logging.error(message)
+
+        return elements
+
+    def wait_ready(self):
+        if not self.fast:
+            self._wait(self.top_window, WAIT_MAIN_WINDOW)
+
+    def start_acquisition(self):
+        self.top_window.Button2.click()
+
+    def open_save_dialog(self, comment=""):
+        self.top_window.menu_select("File -> Save")
+
+        if not self.fast:
+            self._wait(self.app.Comment, WAIT_COMMENT_DIALOG)
+            self.app.CommentEdit.Edit.SetEditText(comment)
+        self.app.Comment.OK.click()
+
+    def save_as(self, file_name):
+        save_as_window = self.app['Save As']
+        if not self.fast:
+            self._wait(save_as_window, WAIT_SAVE_AS_DIALOG)
+        save_as_window.Edit.SetEditText(file_name)
+        save_as_window.Save.click()
+
+    def confirm_overwrite(self):
+        try:
+            window_confirm = self.app['Confirm Save As']
+            self._wait(window_confirm, WAIT_CONFIRM_DIALOG, self.confirm_timeout_s)
+            window_confirm.Yes.click()
+        except Exception as message:
+            logging.error(message)
+            return False
+
+        return True
+
+    def _wait(self, window_specification, step, timeout_s=None):
+        """
+        Wait for the window of the step, the confirmation dialog is not shown for a new file and its timeout is not
+        increased.
+        """
+        def condition():
+            return _is_ready(window_specification)
+
+        description = step.replace("_", " ")
+        if self.timeout_tuner is not None:
+            self.timeout_tuner.wait(step, condition, description, initial_timeout_s=timeout_s,
+                                    back_off=step != WAIT_CONFIRM_DIALOG)
+            return
+
+        if timeout_s is None:
+            timeout_s = self.ready_timeout_s
+        poll_until(condition, timeout_s, description=description)
+
+
+def _log_control_identifiers(name, window_specification, depth=None):
+    """
+    Log the controls of the window at the debug level, the window is not inspected at a higher level.
+    """
+    if not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return
+
+    # print_control_identifiers writes on stdout.
+    text = io.StringIO()
+    with contextlib.redirect_stdout(text):
+        window_specification.print_control_identifiers(depth=depth)
+    logging.debug("{}:\n{}".format(name, text.getvalue()))
+
+
+def _is_ready(window_specification):
+    try:
+        # A timeout of 0 checks the window once.
+        window_specification.wait(READY_STATE, timeout=0)
+    except TimeoutError:
+        return False
+    return True
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.elv_export
+   :synopsis: Write the MSA and HDF5 files of a parsed .elv file.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Write the MSA and HDF5 files of a parsed .elv file.
+
+The files are written from the parsed file, so a spectrum read once for the batch processing is not read again for its
+outputs. The header of the .elv file is taken from the attributes of the parsed file with a single value, a dict
+attribute is flattened, and the columns are the attributes with one value per channel, like the raw counts, the gain
+corrections and the dark currents.
+
+The MSA file has the energy and counts columns of the EMSA/MAS format, the header of the .elv file is written as
+user-defined ``##`` keywords. The HDF5 file has one dataset per column and the header as attributes of the root group.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os.path
+import time
+import numbers
+
+# Third party modules.
+import six
+import numpy as np
+import h5py
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+ENERGIES_COLUMN = "energies_eV"
+COUNTS_COLUMN = "counts"
+SOURCE_PATH_ATTRIBUTE = "source_path"
+
+
+def _is_header_value(value):
+    return isinstance(value, six.string_types + (numbers.Number,))
+
+
+def get_elv_header(elv_file):
+    """
+    Header values of a parsed .elv file, sorted by name.
+
+    :return: list of (name, value) tuples.
+    """
+    header = {}
+    for name, value in vars(elv_file).items():
+        if name.startswith("_"):
+            continue
+        if isinstance(value, dict):
+            header.update((str(key), item) for key, item in value.items() if _is_header_value(item))
+        elif _is_header_value(value):
+            header[name] = value
+
+    return sorted(header.items())
+
+
+def get_elv_columns(elv_file):
+    """
+    Columns of a parsed .elv file, the energies and counts first, then the other columns sorted by name.
+
+    :return: list of (name, array) tuples.
+    """
+    energies_eV = np.asarray(elv_file.energies_eV, dtype=np.float64)
+    counts = np.asarray(elv_file.counts, dtype=np.float64)
+
+    other_columns = []
+    for name, value in vars(elv_file).items():
+        if name.startswith("_") or name in (ENERGIES_COLUMN, COUNTS_COLUMN):
+            continue
+        if not isinstance(value, (list, tuple, np.ndarray)) or len(value) != len(counts):
+            continue
+        values = np.asarray(value)
+        if values.ndim == 1 and values.dtype.kind in "biuf":
+            other_columns.append((name, values))
+
+    return [(ENERGIES_COLUMN, energies_eV), (COUNTS_COLUMN, counts)] + sorted(other_columns,
+                                                                             key=lambda column: column[0])
+
+
+def write_msa_file(msa_file_path, elv_file, title=""):
+    """
+    Write a parsed .elv file in the EMSA/MAS spectral data file format (version 1.0).
+    """
+    energies_eV = np.asarray(elv_file.energies_eV, dtype=np.float64)
+    counts = np.asarray(elv_file.counts, dtype=np.float64)
+    channel_width_eV = energies_eV[1] - energies_eV[0] if len(energies_eV) > 1 else 0.0
+    offset_eV = energies_eV[0] if len(energies_eV) > 0 else 0.0
+
+    lines = ["#FORMAT      : EMSA/MAS Spectral Data File",
+             "#VERSION     : 1.0",
+             "#TITLE       : {}".format(title),
+             "#DATE        : {}".format(time.strftime("%d-%b-%Y")),
+             "#TIME        : {}".format(time.strftime("%H:%M")),
+             "#OWNER       : ",
+             "#NPOINTS     : {:d}".format(len(counts)),
+             "#NCOLUMNS    : 1",
+             "#XUNITS      : eV",
+             "#YUNITS      : counts",
+             "#DATATYPE    : XY",
+             "#XPERCHAN    : {!r}".format(float(channel_width_eV)),
+             "#OFFSET      : {!r}".format(float(offset_eV)),
+             "#SIGNALTYPE  : ELS"]
+    lines.extend("##{} : {}".format(name, " ".join(str(value).split())) for name, value in get_elv_header(elv_file))
+    lines.append("#SPECTRUM    : Spectral Data Starts Here")
+    lines.extend("{!r}, {!r}".format(float(energy_eV), float(count)) for energy_eV, count in zip(energies_eV, counts))
+    lines.append("#ENDOFDATA   : ")
+
+    with open(msa_file_path, 'w') as msa_file:
+        msa_file.write("\n".join(lines) + "\n")
+
+
+def write_hdf5_file(hdf5_file_path, elv_file, source_path):
+    """
+    Write all the columns and the header of a parsed .elv file in a HDF5 file.
+    """
+    with h5py.File(hdf5_file_path, 'w') as hdf5_file:
+        for name, values in get_elv_columns(elv_file):
+            hdf5_file.create_dataset(name, data=values)
+        for name, value in get_elv_header(elv_file):
+            hdf5_file.attrs[name] = value
+        hdf5_file.attrs[SOURCE_PATH_ATTRIBUTE] = os.path.abspath(source_path)
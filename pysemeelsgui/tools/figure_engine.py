@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.figure_engine
+   :synopsis: Render the batch spectrum figures on many processes.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Render the batch spectrum figures on many processes.
+
+Creating and closing a matplotlib figure costs much more than drawing a spectrum. Each worker process creates one
+template figure per kind of figure with the Agg backend and reuses it for all the spectra: only the line data, the
+axis limits and the title are updated before the figure is saved. The axes have fixed margins, so the layout is the
+same for all the spectra without being computed again.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+
+# Third party modules.
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_checkpoint import atomic_output_file
+
+# Globals and constants variables.
+FORMAT_PNG = "png"
+FORMAT_PDF = "pdf"
+FIGURE_FORMATS = (FORMAT_PNG, FORMAT_PDF)
+
+LIMIT_MARGIN = 0.05
+
+# Space around the axes, in inches, wide enough for the tick labels of any spectrum.
+AXES_MARGINS_in = {"left": 0.9, "right": 0.2, "bottom": 0.6, "top": 0.4}
+
+_worker_template_options = None
+_worker_templates = None
+
+
+def get_figure_file_paths(elv_file_path, suffix, formats=(FORMAT_PNG,)):
+    root_path = os.path.splitext(elv_file_path)[0]
+    return ["{}{}.{}".format(root_path, suffix, figure_format) for figure_format in formats]
+
+
+def compute_limits(energies_eV, counts, energy_window_eV=(None, None)):
+    """
+    Axis limits of the spectrum in the energy window, the intensity range is computed in the window only.
+
+    :return: tuple (x limits, y limits).
+    """
+    minimum_eV, maximum_eV = energy_window_eV
+    if minimum_eV is None:
+        minimum_eV = energies_eV[0]
+    if maximum_eV is None:
+        maximum_eV = energies_eV[-1]
+
+    mask = (energies_eV >= minimum_eV) & (energies_eV <= maximum_eV)
+    counts_window = counts[mask] if np.any(mask) else counts
+    minimum_counts = np.min(counts_window)
+    maximum_counts = np.max(counts_window)
+    margin = LIMIT_MARGIN * (maximum_counts - minimum_counts)
+    if margin <= 0.0:
+        margin = 1.0
+
+    return (minimum_eV, maximum_eV), (minimum_counts - margin, maximum_counts + margin)
+
+
+def compute_subplots_margins(figure_size, number_windows):
+    """
+    Fixed margins of the axes as fractions of the figure, for :py:meth:`matplotlib.figure.Figure.subplots_adjust`.
+    """
+    width_in, height_in = figure_size
+    space_in = AXES_MARGINS_in["left"] + AXES_MARGINS_in["right"]
+    axes_width_in = (width_in - space_in * number_windows) / number_windows
+
+    return {"left": AXES_MARGINS_in["left"] / width_in, "right": 1.0 - AXES_MARGINS_in["right"] / width_in,
+            "bottom": AXES_MARGINS_in["bottom"] / height_in, "top": 1.0 - AXES_MARGINS_in["top"] / height_in,
+            "wspace": space_in / max(axes_width_in, space_in)}
+
+
+class SpectrumFigureTemplate(object):
+    """
+    Figure created once with one axes per energy window and updated for each spectrum.
+
+    :param energy_windows_eV: list of (minimum, maximum) energies, None for the spectrum limit.
+    """
+
+    def __init__(self, energy_windows_eV=((None, None),), figure_size=(8, 6), dpi=100):
+        self.energy_windows_eV = [tuple(energy_window_eV) for energy_window_eV in energy_windows_eV]
+
+        self.figure = Figure(figsize=figure_size, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+
+        self.axes = []
+        self.lines = []
+        number_windows = len(self.energy_windows_eV)
+        for window_id in range(number_windows):
+            axes = self.figure.add_subplot(1, number_windows, window_id + 1)
+            line, = axes.plot([], [])
+            axes.set_xlabel(r"Energy loss (eV)")
+            axes.set_ylabel(r"Electron intensity")
+            self.axes.append(axes)
+            self.lines.append(line)
+
+        # The layout does not depend on the tick labels of the spectrum, unlike tight_layout.
+        self.figure.subplots_adjust(**compute_subplots_margins(figure_size, number_windows))
+
+    def update(self, energies_eV, counts, title=""):
+        energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.float64)
+
+        for axes, line, energy_window_eV in zip(self.axes, self.lines, self.energy_windows_eV):
+            line.set_data(energies_eV, counts)
+            x_limits, y_limits = compute_limits(energies_eV, counts, energy_window_eV)
+            axes.set_xlim(*x_limits)
+            axes.set_ylim(*y_limits)
+            axes.set_title(title)
+
+    def save(self, figure_file_paths):
+        for figure_file_path in figure_file_paths:
+            with atomic_output_file(figure_file_path) as partial_file_path:
+                self.figure.savefig(partial_file_path)
+
+    def render(self, energies_eV, counts, title, figure_file_paths):
+        self.update(energies_eV, counts, title)
+        self.save(figure_file_paths)
+
+
+def _initialize_worker(template_options):
+    global _worker_template_options, _worker_templates
+    _worker_template_options = template_options
+    _worker_templates = {}
+
+
+def _get_process_id():
+    return os.getpid()
+
+
+def render_figure(kind, energies_eV, counts, title, figure_file_paths):
+    """
+    Render the figure in a worker process with its template, created on first use.
+
+    :return: rendering time in second.
+    """
+    start_time = time.perf_counter()
+
+    if kind not in _worker_templates:
+        _worker_templates[kind] = SpectrumFigureTemplate(**_worker_template_options[kind])
+    _worker_templates[kind].render(energies_eV, counts, title, figure_file_paths)
+
+    return time.perf_counter() - start_time
+
+
+class ParallelFigureEngine(object):
+    """
+    Render the figures on worker processes, or in the calling thread when *number_workers* is 1.
+
+    :param template_options: dict of figure kind to the keyword arguments of :py:class:`SpectrumFigureTemplate`.
+    """
+
+    def __init__(self, template_options, number_workers=None):
+        self.template_options = template_options
+
+        if number_workers is None:
+            number_workers = os.cpu_count() or 1
+        self.number_workers = max(1, number_workers)
+
+        self.executor = None
+
+    def start(self):
+        if self.number_workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.number_workers,
+                                                mp_context=multiprocessing.get_context(),
+                                                initializer=_initialize_worker, initargs=(self.template_options,))
+            # The worker processes are started now, before the caller starts other threads.
+            self.executor.submit(_get_process_id).result()
+        else:
+            _initialize_worker(self.template_options)
+
+    def submit(self, kind, energies_eV, counts, title, figure_file_paths):
+        """
+        :return: :py:class:`concurrent.futures.Future` of the rendering time in second.
+        """
+        if self.executor is not None:
+            return self.executor.submit(render_figure, kind, energies_eV, counts, title, figure_file_paths)
+
+        future = Future()
+        try:
+            future.set_result(render_figure(kind, energies_eV, counts, title, figure_file_paths))
+        except Exception as message:
+            future.set_exception(message)
+        return future
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
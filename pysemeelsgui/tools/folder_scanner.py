@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.folder_scanner
+   :synopsis: Find the files of a data folder while they are processed.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Find the files of a data folder while they are processed.
+
+The folders are read with :py:func:`os.scandir`, which gives the file type without another system call per entry.
+:py:class:`FolderScanner` walks the folders on background threads and yields each file as soon as it is found, so the
+processing of the first files overlaps with the walk of a large network share.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from six.moves import queue
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+ELV_EXTENSION = ".elv"
+
+
+def scan_folder_entries(folder, extensions=(ELV_EXTENSION,)):
+    """
+    Files with one of the extensions and sub-folders of a folder.
+
+    :return: tuple (file paths, sub-folder paths).
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+
+    file_paths = []
+    sub_folders = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                sub_folders.append(entry.path)
+            elif entry.name.lower().endswith(extensions) and entry.is_file():
+                file_paths.append(entry.path)
+
+    return file_paths, sub_folders
+
+
+def scan_files(data_folder, extensions=(ELV_EXTENSION,), recursive=True):
+    """
+    Generate the files with one of the extensions, folder by folder.
+    """
+    folders = [data_folder]
+    while len(folders) > 0:
+        folder = folders.pop()
+        try:
+            file_paths, sub_folders = scan_folder_entries(folder, extensions)
+        except OSError as message:
+            logging.warning("Cannot read folder {}: {}".format(folder, message))
+            continue
+
+        for file_path in file_paths:
+            yield file_path
+
+        if recursive:
+            folders.extend(reversed(sub_folders))
+
+
+class FolderScanner(object):
+    """
+    Iterate over the files of a data folder found by background threads.
+
+    The sub-folders are read in parallel with *number_threads* greater than 1, useful on network shares where each
+    folder read waits on the server. The files are not sorted.
+
+    :ivar number_discovered: number of files found so far, ahead of the files already returned by the iteration.
+    :ivar is_done: True when all the folders were read.
+    """
+
+    def __init__(self, data_folder, extensions=(ELV_EXTENSION,), recursive=True, number_threads=1):
+        self.data_folder = data_folder
+        self.extensions = tuple(extensions)
+        self.recursive = recursive
+        self.number_threads = max(1, number_threads)
+
+        self.number_discovered = 0
+        self.is_done = False
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._file_queue = None
+        self._executor = None
+        self._number_pending_folders = 0
+
+    def __iter__(self):
+        self.number_discovered = 0
+        self.is_done = False
+        self._stop_event.clear()
+        self._file_queue = queue.Queue()
+        self._number_pending_folders = 1
+
+        self._executor = ThreadPoolExecutor(max_workers=self.number_threads)
+        self._executor.submit(self._scan_folder, self.data_folder)
+        try:
+            while True:
+                file_path = self._file_queue.get()
+                if file_path is None:
+                    break
+                yield file_path
+            self.is_done = True
+        finally:
+            # The iteration can be stopped before the end, the folders not yet read are skipped.
+            self._stop_event.set()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _scan_folder(self, folder):
+        try:
+            if self._stop_event.is_set():
+                return
+
+            file_paths, sub_folders = scan_folder_entries(folder, self.extensions)
+            with self._lock:
+                self.number_discovered += len(file_paths)
+            for file_path in file_paths:
+                self._file_queue.put(file_path)
+
+            if self.recursive:
+                with self._lock:
+                    self._number_pending_folders += len(sub_folders)
+                for sub_folder in sub_folders:
+                    self._executor.submit(self._scan_folder, sub_folder)
+        except OSError as message:
+            logging.warning("Cannot read folder {}: {}".format(folder, message))
+        finally:
+            with self._lock:
+                self._number_pending_folders -= 1
+                if self._number_pending_folders == 0:
+                    self._file_queue.put(None)
+
+
+class FileListScanner(object):
+    """
+    Iterate over a known list of files with the interface of :py:class:`FolderScanner`, for a folder listed by an
+    acquisition manifest.
+    """
+
+    def __init__(self, file_paths):
+        self.file_paths = list(file_paths)
+
+        self.number_discovered = 0
+        self.is_done = False
+
+    def __iter__(self):
+        self.number_discovered = len(self.file_paths)
+        self.is_done = True
+        for file_path in self.file_paths:
+            yield file_path
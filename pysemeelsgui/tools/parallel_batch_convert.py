@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.parallel_batch_convert
+   :synopsis: Convert EELS files in batch mode on many processes.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Convert EELS files in batch mode on many processes.
+
+Each .elv file is converted by a worker process, which reads it once and writes the MSA and HDF5 files from the parsed
+file with :py:mod:`pysemeelsgui.tools.elv_export`. The spectra exported in the project HDF5 file are sent to a single
+writer process, the only one opening the project file. The writer acknowledges each spectrum written and the closing of
+the project file; if it stops before, the conversion fails with :py:class:`ProjectWriterError`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from six.moves import queue
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pysemeels.hitachi.eels_su.elv_file import ElvFile
+
+# Project modules.
+from pysemeelsgui.tools.batch_manifest import OUTPUT_MSA, OUTPUT_HDF5, OUTPUT_PROJECT_HDF5
+from pysemeelsgui.tools.project_hdf5 import ProjectHdf5Writer, PROJECT_LAYOUT_VERSION
+from pysemeelsgui.tools.folder_scanner import FolderScanner, scan_files, ELV_EXTENSION
+from pysemeelsgui.tools.elv_export import write_msa_file, write_hdf5_file
+from pysemeelsgui.tools.batch_checkpoint import atomic_output_file
+
+# Globals and constants variables.
+MSA_EXTENSION = ".msa"
+HDF5_EXTENSION = ".hdf5"
+WRITER_TIMEOUT_s = 1.0
+
+_worker_writer_queue = None
+_worker_writer_failed = None
+
+
+class ProjectWriterError(Exception):
+    """
+    The project HDF5 writer process stopped before writing all the spectra.
+    """
+
+
+def find_elv_files(data_folder, recursive=True):
+    """
+    Find the .elv files of the data folder, sorted by path.
+    """
+    return sorted(scan_files(data_folder, (ELV_EXTENSION,), recursive))
+
+
+def get_output_file_path(elv_file_path, extension):
+    return os.path.splitext(elv_file_path)[0] + extension
+
+
+def read_elv_file(elv_file_path):
+    with open(elv_file_path, 'r') as elv_text_file:
+        elv_file = ElvFile()
+        elv_file.read(elv_text_file)
+
+    return elv_file
+
+
+def _initialize_worker(writer_queue, writer_failed):
+    global _worker_writer_queue, _worker_writer_failed
+    _worker_writer_queue = writer_queue
+    _worker_writer_failed = writer_failed
+
+
+def put_to_writer(writer_queue, item, writer_failed):
+    """
+    Put an item in the bounded writer queue, waiting while it is full, unless the writer has failed.
+    """
+    while True:
+        if writer_failed.is_set():
+            raise ProjectWriterError("The project HDF5 writer stopped")
+        try:
+            writer_queue.put(item, timeout=WRITER_TIMEOUT_s)
+            return
+        except queue.Full:
+            pass
+
+
+def convert_elv_outputs(elv_file_path, convert_msa, convert_hdf5, elv_file=None):
+    """
+    Write the MSA and HDF5 files of an .elv file, with its header and all its columns. Each file is written in a partial
+    file renamed when complete.
+
+    :param elv_file: the parsed .elv file, read from *elv_file_path* if None.
+    """
+    if not convert_msa and not convert_hdf5:
+        return
+    if elv_file is None:
+        elv_file = read_elv_file(elv_file_path)
+
+    if convert_msa:
+        title = os.path.splitext(os.path.basename(elv_file_path))[0]
+        with atomic_output_file(get_output_file_path(elv_file_path, MSA_EXTENSION)) as partial_file_path:
+            write_msa_file(partial_file_path, elv_file, title)
+    if convert_hdf5:
+        with atomic_output_file(get_output_file_path(elv_file_path, HDF5_EXTENSION)) as partial_file_path:
+            write_hdf5_file(partial_file_path, elv_file, elv_file_path)
+
+
+def convert_elv_file(elv_file_path, convert_msa, convert_hdf5, export_project):
+    """
+    Convert one .elv file in a worker process and send its spectrum to the project writer if needed, the file is read
+    once for all its outputs.
+    """
+    elv_file = read_elv_file(elv_file_path)
+    convert_elv_outputs(elv_file_path, convert_msa, convert_hdf5, elv_file)
+
+    if export_project:
+        put_to_writer(_worker_writer_queue,
+                      (elv_file_path, np.asarray(elv_file.energies_eV), np.asarray(elv_file.counts)),
+                      _worker_writer_failed)
+
+    return elv_file_path
+
+
+def write_project_hdf5(writer_queue, acknowledgment_queue, project_hdf5_file_path, data_folder):
+    """
+    Writer process: add the spectra received on the queue to the project HDF5 file until None is received.
+
+    The path of each spectrum written is put on the acknowledgment queue, then None once the project file is closed.
+    """
+    with ProjectHdf5Writer(project_hdf5_file_path, data_folder) as project_writer:
+        while True:
+            item = writer_queue.get()
+            if item is None:
+                break
+
+            elv_file_path, energies_eV, counts = item
+            project_writer.write_spectrum(elv_file_path, energies_eV, counts)
+            acknowledgment_queue.put(elv_file_path)
+
+    acknowledgment_queue.put(None)
+
+
+class ProjectWriter(object):
+    """
+    Start the project HDF5 writer process and follow its acknowledgments from the main process.
+
+    :ivar written_file_paths: .elv files written in the project file, acknowledged by the writer.
+    :ivar closed: True when the writer acknowledged the closing of the project file.
+    """
+
+    def __init__(self, context, project_hdf5_file_path, data_folder, queue_size):
+        self.queue = context.Queue(maxsize=queue_size)
+        self.failed_event = context.Event()
+        self.written_file_paths = []
+        self.closed = False
+
+        self._acknowledgment_queue = context.Queue()
+        self._process = context.Process(target=write_project_hdf5,
+                                        args=(self.queue, self._acknowledgment_queue, project_hdf5_file_path,
+                                              data_folder))
+        self._process.start()
+
+    def check(self):
+        """
+        Read the acknowledgments received and tell the workers if the writer process stopped before closing.
+
+        :return: True if the writer process is running or has closed the project file.
+        """
+        self._read_acknowledgments()
+        if not self.closed and not self._process.is_alive():
+            # Acknowledgments sent just before the end of the process.
+            self._read_acknowledgments()
+        if not self.closed and not self._process.is_alive():
+            self.failed_event.set()
+            return False
+        return True
+
+    def stop(self):
+        """
+        Send the end of the spectra and wait for the writer process.
+
+        :raise ProjectWriterError: if the writer process stopped before closing the project file.
+        """
+        try:
+            put_to_writer(self.queue, None, self.failed_event)
+        except ProjectWriterError:
+            pass
+
+        while self.check() and not self.closed:
+            time.sleep(0.01)
+        self._process.join()
+
+        if not self.closed:
+            raise ProjectWriterError("The project HDF5 writer stopped with exit code {}".format(
+                self._process.exitcode))
+
+    def _read_acknowledgments(self):
+        while not self.closed:
+            try:
+                elv_file_path = self._acknowledgment_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            if elv_file_path is None:
+                self.closed = True
+            else:
+                self.written_file_paths.append(elv_file_path)
+
+
+class ParallelBatchConvertElv(object):
+    """
+    Convert all the .elv files of a folder on worker processes.
+
+    The attributes are the same as :py:class:`pysemeels.tools.batch_convert_elv.BatchConvertElv`, with the number of
+    worker processes and an optional ``progress_callback(number_done, number_total, elapsed_time_s)``.
+
+    When a :py:class:`pysemeelsgui.tools.batch_manifest.BatchManifest` is set, only the outputs of new or changed files,
+    or created with other options, are converted and the *overwrite* option is not used.
+
+    When the optional *cancel_event* is set, the files not yet started are not converted.
+
+    With a :py:class:`pysemeelsgui.tools.batch_checkpoint.CheckpointJournal`, the outputs of each converted file are
+    journaled and the outputs of an interrupted run are skipped when it is resumed. The MSA and HDF5 files are written
+    in partial files renamed when complete, so an interrupted run never leaves a truncated output.
+
+    Each file is submitted to the workers as soon as it is found by the scanner, at most *max_pending* files are waiting
+    or converted at the same time. The total number of files given to ``progress_callback`` grows while the folder is
+    scanned: it counts the files submitted and the files found but not yet compared with the manifest.
+
+    The project HDF5 output is recorded in the manifest and the journal only for the spectra acknowledged by the
+    writer, once the project file is closed. If the writer stops before, :py:meth:`convert` raises
+    :py:class:`ProjectWriterError`.
+    """
+
+    def __init__(self, data_folder, number_workers=None, max_pending=None):
+        self.data_folder = data_folder
+
+        self.overwrite = True
+        self.recursive = True
+        self.convert_msa = True
+        self.convert_hdf5 = True
+        self.project_hdf5_file = ""
+
+        if number_workers is None:
+            number_workers = os.cpu_count() or 1
+        self.number_workers = max(1, number_workers)
+        if max_pending is None:
+            max_pending = 4 * self.number_workers
+        self.max_pending = max(1, max_pending)
+        self.number_scan_threads = 1
+
+        self.progress_callback = None
+        self.manifest = None
+        self.checkpoint = None
+        self.cancel_event = None
+
+        self.scanner = None
+        self.converted_file_paths = []
+        self.failed_file_paths = []
+        self.number_discovered = 0
+        self.number_unchanged = 0
+        self.elapsed_time_s = 0.0
+
+        self._start_time = 0.0
+        self._stopped = False
+        self._number_examined = 0
+        self._number_submitted = 0
+
+    @property
+    def files_per_s(self):
+        if self.elapsed_time_s > 0.0:
+            return len(self.converted_file_paths) / self.elapsed_time_s
+        return 0.0
+
+    def is_cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def get_number_files_to_process(self):
+        number_not_examined = 0
+        if self.scanner is not None:
+            number_not_examined = self.scanner.number_discovered - self._number_examined
+        return self._number_submitted + number_not_examined
+
+    def get_project_options(self):
+        return {"project_hdf5_file": os.path.abspath(self.project_hdf5_file),
+                "layout_version": PROJECT_LAYOUT_VERSION}
+
+    def is_output_resumed(self, elv_file_path, output_name, options, output_file_paths):
+        """
+        Return True if the output was completed by the interrupted run of the checkpoint. The output is then recorded in
+        the manifest, which was not saved by the interrupted run.
+        """
+        if self.checkpoint is None:
+            return False
+        if not self.checkpoint.is_done(elv_file_path, output_name, options):
+            return False
+        if not all(os.path.exists(output_file_path) for output_file_path in output_file_paths):
+            return False
+
+        if self.manifest is not None:
+            self.manifest.record(elv_file_path, output_name, options)
+        return True
+
+    def get_outputs_needed(self, elv_file_path):
+        """
+        Outputs to create for this file.
+
+        :return: tuple of booleans (convert_msa, convert_hdf5, export_project).
+        """
+        msa_file_path = get_output_file_path(elv_file_path, MSA_EXTENSION)
+        hdf5_file_path = get_output_file_path(elv_file_path, HDF5_EXTENSION)
+        convert_msa = self.convert_msa and not self.is_output_resumed(elv_file_path, OUTPUT_MSA, None, [msa_file_path])
+        convert_hdf5 = self.convert_hdf5 and not self.is_output_resumed(elv_file_path, OUTPUT_HDF5, None,
+                                                                        [hdf5_file_path])
+        export_project = len(self.project_hdf5_file) > 0 and \
+            not self.is_output_resumed(elv_file_path, OUTPUT_PROJECT_HDF5, self.get_project_options(),
+                                       [self.project_hdf5_file])
+
+        if self.manifest is not None:
+            convert_msa = convert_msa and self.manifest.is_stale(elv_file_path, OUTPUT_MSA,
+                                                                 output_file_paths=[msa_file_path])
+            convert_hdf5 = convert_hdf5 and self.manifest.is_stale(elv_file_path, OUTPUT_HDF5,
+                                                                   output_file_paths=[hdf5_file_path])
+            export_project = export_project and self.manifest.is_stale(elv_file_path, OUTPUT_PROJECT_HDF5,
+                                                                       self.get_project_options(),
+                                                                       [self.project_hdf5_file])
+            return convert_msa, convert_hdf5, export_project
+
+        if self.overwrite:
+            return convert_msa, convert_hdf5, export_project
+
+        # The project file contains all the spectra, it is rewritten even if the file outputs exist.
+        convert_msa = convert_msa and not os.path.isfile(msa_file_path)
+        convert_hdf5 = convert_hdf5 and not os.path.isfile(hdf5_file_path)
+        return convert_msa, convert_hdf5, export_project
+
+    def record_outputs(self, elv_file_path, outputs_needed):
+        """
+        Record the outputs completed in the manifest and the checkpoint journal.
+        """
+        convert_msa, convert_hdf5, export_project = outputs_needed
+        for is_done, output_name, options in [(convert_msa, OUTPUT_MSA, None), (convert_hdf5, OUTPUT_HDF5, None),
+                                              (export_project, OUTPUT_PROJECT_HDF5, self.get_project_options())]:
+            if not is_done:
+                continue
+            if self.manifest is not None:
+                self.manifest.record(elv_file_path, output_name, options)
+            if self.checkpoint is not None:
+                self.checkpoint.record(elv_file_path, output_name, options)
+
+    def convert(self):
+        self._start_time = time.perf_counter()
+        self.converted_file_paths = []
+        self.failed_file_paths = []
+        self._stopped = False
+        self._number_examined = 0
+        self._number_submitted = 0
+        logging.info("Converting elv files with {:d} workers".format(self.number_workers))
+
+        # The workers receive the writer queue when they start, so the writer is started before them.
+        context = multiprocessing.get_context()
+        project_writer = None
+        initargs = (None, None)
+        if len(self.project_hdf5_file) > 0:
+            project_writer = ProjectWriter(context, self.project_hdf5_file, self.data_folder, 4 * self.number_workers)
+            initargs = (project_writer.queue, project_writer.failed_event)
+
+        project_file_paths = []
+        self.scanner = FolderScanner(self.data_folder, recursive=self.recursive,
+                                     number_threads=self.number_scan_threads)
+        try:
+            with ProcessPoolExecutor(max_workers=self.number_workers, mp_context=context,
+                                     initializer=_initialize_worker, initargs=initargs) as executor:
+                futures = {}
+                for elv_file_path in self.scanner:
+                    if self.is_cancelled() or self._stopped:
+                        break
+
+                    self._number_examined += 1
+                    outputs_needed = self.get_outputs_needed(elv_file_path)
+                    if not any(outputs_needed):
+                        continue
+
+                    future = executor.submit(convert_elv_file, elv_file_path, *outputs_needed)
+                    futures[future] = (elv_file_path, outputs_needed)
+                    self._number_submitted += 1
+                    if outputs_needed[2]:
+                        project_file_paths.append(elv_file_path)
+
+                    while len(futures) >= self.max_pending:
+                        self._wait_conversions(futures, project_writer)
+
+                while len(futures) > 0:
+                    self._wait_conversions(futures, project_writer)
+        finally:
+            try:
+                if project_writer is not None:
+                    project_writer.stop()
+                    self._record_project_outputs(project_writer.written_file_paths, project_file_paths)
+            finally:
+                if self.manifest is not None:
+                    self.manifest.save()
+
+        self.number_discovered = self.scanner.number_discovered
+        self.number_unchanged = self._number_examined - self._number_submitted
+        self.converted_file_paths.sort()
+        self.failed_file_paths.sort()
+        self.elapsed_time_s = time.perf_counter() - self._start_time
+        logging.info("Converted {:d} of {:d} discovered elv files ({:d} unchanged) in {:.1f} s ({:.1f} files/s)".format(
+            len(self.converted_file_paths), self.number_discovered, self.number_unchanged, self.elapsed_time_s,
+            self.files_per_s))
+
+    def _wait_conversions(self, futures, project_writer):
+        """
+        Wait for the end of at least one conversion, or the writer timeout, and remove the ended conversions.
+        """
+        done_futures, _pending_futures = wait(list(futures), timeout=WRITER_TIMEOUT_s, return_when=FIRST_COMPLETED)
+        if project_writer is not None and not project_writer.check():
+            self._cancel(futures)
+        for future in sorted(done_futures, key=lambda done_future: futures[done_future][0]):
+            if self.is_cancelled():
+                self._cancel(futures)
+            self._end_conversion(future, futures.pop(future))
+
+    def _cancel(self, futures):
+        self._stopped = True
+        for pending_future in futures:
+            pending_future.cancel()
+
+    def _end_conversion(self, future, work_item):
+        if future.cancelled():
+            return
+
+        elv_file_path, outputs_needed = work_item
+        try:
+            future.result()
+            self.converted_file_paths.append(elv_file_path)
+            convert_msa, convert_hdf5, _export_project = outputs_needed
+            self.record_outputs(elv_file_path, (convert_msa, convert_hdf5, False))
+        except Exception as message:
+            logging.error("Cannot convert {}: {}".format(elv_file_path, message))
+            self.failed_file_paths.append(elv_file_path)
+
+        if self.progress_callback is not None:
+            number_done = len(self.converted_file_paths) + len(self.failed_file_paths)
+            self.progress_callback(number_done, self.get_number_files_to_process(),
+                                   time.perf_counter() - self._start_time)
+
+    def _record_project_outputs(self, written_file_paths, project_file_paths):
+        written_file_paths = set(written_file_paths)
+        for elv_file_path in project_file_paths:
+            if elv_file_path in written_file_paths:
+                self.record_outputs(elv_file_path, (False, False, True))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.polling
+   :synopsis: Wait for a condition or a saved file with adaptive polling.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Wait for a condition or a saved file with adaptive polling.
+
+The condition is checked again after a short interval growing up to a maximum, so a condition true almost at once is
+seen within a few milliseconds, while a long wait costs few checks. A saved file is complete when it differs from the
+file before the save and its size and modification time are stable for a short time.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import time
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_driver import AcquisitionError
+
+# Globals and constants variables.
+INITIAL_INTERVAL_s = 0.005
+MAXIMUM_INTERVAL_s = 0.1
+INTERVAL_GROWTH = 1.5
+
+DEFAULT_STABLE_TIME_s = 0.2
+
+
+class WaitTimeoutError(AcquisitionError):
+    """
+    The condition was not true before the timeout.
+    """
+
+
+def poll_until(condition, timeout_s=10.0, initial_interval_s=INITIAL_INTERVAL_s,
+               maximum_interval_s=MAXIMUM_INTERVAL_s, description="condition"):
+    """
+    Call *condition()* until it returns a true value.
+
+    :return: the value of the condition.
+    :raise WaitTimeoutError: if the condition is still false after *timeout_s*.
+    """
+    end_time = time.perf_counter() + timeout_s
+    interval_s = initial_interval_s
+    while True:
+        value = condition()
+        if value:
+            return value
+
+        remaining_s = end_time - time.perf_counter()
+        if remaining_s <= 0.0:
+            raise WaitTimeoutError("Timeout after {:.1f} s waiting for {}".format(timeout_s, description))
+
+        time.sleep(min(interval_s, remaining_s))
+        interval_s = min(interval_s * INTERVAL_GROWTH, maximum_interval_s)
+
+
+def get_file_signature(file_path):
+    """
+    :return: tuple (size, modification time in ns), None if the file does not exist.
+    """
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return stat_result.st_size, stat_result.st_mtime_ns
+
+
+def wait_for_saved_file(file_path, previous_signature=None, stable_time_s=DEFAULT_STABLE_TIME_s, timeout_s=30.0):
+    """
+    Wait until the file exists, differs from *previous_signature* and is unchanged for *stable_time_s*.
+
+    :param previous_signature: :py:func:`get_file_signature` of the file before the save, None if it did not exist.
+    :return: signature of the saved file.
+    """
+    state = {"signature": None, "time": 0.0}
+
+    def is_saved():
+        signature = get_file_signature(file_path)
+        now = time.perf_counter()
+        if signature is None or signature == previous_signature or signature[0] == 0:
+            state["signature"] = None
+            return None
+
+        if signature != state["signature"]:
+            state["signature"] = signature
+            state["time"] = now
+            return None
+
+        if now - state["time"] >= stable_time_s:
+            return signature
+        return None
+
+    return poll_until(is_saved, timeout_s, description="saved file {}".format(file_path))
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.project_hdf5
+   :synopsis: Read and write the spectra of a project HDF5 file.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Read and write the spectra of a project HDF5 file.
+
+All the spectra of the project are rows of two chunked and compressed datasets, ``spectra/energies_eV`` and
+``spectra/counts``. The metadata of the spectra is a columnar table, one dataset per column in the ``metadata`` group.
+The datasets are resizable, so the spectra of a new acquisition day are appended to an existing project, and the
+``metadata/relative_path`` column is the index from the source file to its row. A spectrum shorter than the widest one
+is padded with NaN.
+
+The layout version is the ``layout_version`` attribute of the root group. An existing file with another version, or
+without version but with other groups like the group-per-file layout of pysemeels, is not modified.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import time
+
+# Third party modules.
+import numpy as np
+import h5py
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_checkpoint import get_partial_file_path
+
+# Globals and constants variables.
+PROJECT_LAYOUT_VERSION = 2
+
+SPECTRA_GROUP = "spectra"
+METADATA_GROUP = "metadata"
+ENERGIES_DATASET = "energies_eV"
+COUNTS_DATASET = "counts"
+
+COLUMN_SOURCE_PATH = "source_path"
+COLUMN_RELATIVE_PATH = "relative_path"
+COLUMN_SIZE = "size_bytes"
+COLUMN_MTIME = "mtime_s"
+COLUMN_NUMBER_CHANNELS = "number_channels"
+COLUMN_WRITTEN_TIME = "written_time_s"
+
+_STRING_DTYPE = h5py.special_dtype(vlen=str)
+METADATA_COLUMNS = ((COLUMN_SOURCE_PATH, _STRING_DTYPE),
+                    (COLUMN_RELATIVE_PATH, _STRING_DTYPE),
+                    (COLUMN_SIZE, np.int64),
+                    (COLUMN_MTIME, np.float64),
+                    (COLUMN_NUMBER_CHANNELS, np.int32),
+                    (COLUMN_WRITTEN_TIME, np.float64))
+
+
+def get_relative_path(elv_file_path, data_folder):
+    return os.path.relpath(elv_file_path, data_folder).replace(os.sep, "/")
+
+
+def check_project_layout(project_file):
+    """
+    Raise ValueError if the opened project file is not empty and does not have the current layout.
+    """
+    layout_version = project_file.attrs.get("layout_version")
+    if layout_version is None and len(project_file) == 0:
+        return
+
+    foreign_names = sorted(set(project_file) - set([SPECTRA_GROUP, METADATA_GROUP]))
+    if layout_version != PROJECT_LAYOUT_VERSION or len(foreign_names) > 0:
+        raise ValueError("Cannot append to {}: layout version {} expected, found {} with the groups {}".format(
+            project_file.filename, PROJECT_LAYOUT_VERSION, layout_version, ", ".join(sorted(project_file))))
+
+
+def _to_text(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+class ProjectHdf5Writer(object):
+    """
+    Append spectra to a project HDF5 file.
+
+    The spectra are kept in memory and written *batch_size* rows at a time, the file is flushed after each batch. A
+    spectrum of a source file already in the project replaces its row. A new project file is written in a partial file
+    renamed when closed, so a crash never leaves a truncated project file. Opening an existing project file with
+    another layout raises ValueError.
+
+    :param chunk_rows: number of spectra in a chunk of the datasets.
+    :param compression: HDF5 compression filter, "gzip", "lzf" or None.
+    """
+
+    def __init__(self, project_hdf5_file_path, data_folder, batch_size=64, chunk_rows=64, compression="gzip",
+                 compression_level=4):
+        self.project_hdf5_file_path = project_hdf5_file_path
+        self.data_folder = data_folder
+        self.batch_size = max(1, batch_size)
+        self.chunk_rows = max(1, chunk_rows)
+        self.compression = compression
+        self.compression_level = compression_level
+
+        self.project_file = None
+        self.index = {}
+        self.number_rows = 0
+
+        self._pending_rows = {}
+        self._partial_file_path = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def number_pending_rows(self):
+        return len(self._pending_rows)
+
+    def open(self):
+        if os.path.exists(self.project_hdf5_file_path):
+            self._partial_file_path = None
+            self.project_file = h5py.File(self.project_hdf5_file_path, 'a')
+            try:
+                check_project_layout(self.project_file)
+            except ValueError:
+                self.project_file.close()
+                self.project_file = None
+                raise
+        else:
+            self._partial_file_path = get_partial_file_path(self.project_hdf5_file_path)
+            self.project_file = h5py.File(self._partial_file_path, 'w')
+        self.project_file.attrs["layout_version"] = PROJECT_LAYOUT_VERSION
+
+        self.index = {}
+        self.number_rows = 0
+        self._pending_rows = {}
+        if METADATA_GROUP in self.project_file:
+            relative_paths = self.project_file[METADATA_GROUP][COLUMN_RELATIVE_PATH][...]
+            self.index = dict((_to_text(relative_path), row) for row, relative_path in enumerate(relative_paths))
+            self.number_rows = len(relative_paths)
+
+    def close(self):
+        if self.project_file is None:
+            return
+
+        try:
+            self.flush()
+        finally:
+            self.project_file.close()
+            self.project_file = None
+
+        if self._partial_file_path is not None:
+            os.replace(self._partial_file_path, self.project_hdf5_file_path)
+            self._partial_file_path = None
+
+    def write_spectrum(self, elv_file_path, energies_eV, counts):
+        relative_path = get_relative_path(elv_file_path, self.data_folder)
+        row = self.index.get(relative_path)
+        if row is None:
+            row = self.number_rows
+            self.index[relative_path] = row
+            self.number_rows += 1
+
+        try:
+            stat_result = os.stat(elv_file_path)
+            size_bytes, mtime_s = stat_result.st_size, stat_result.st_mtime
+        except OSError:
+            size_bytes, mtime_s = -1, np.nan
+
+        energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.float64)
+        metadata = {COLUMN_SOURCE_PATH: os.path.abspath(elv_file_path),
+                    COLUMN_RELATIVE_PATH: relative_path,
+                    COLUMN_SIZE: size_bytes,
+                    COLUMN_MTIME: mtime_s,
+                    COLUMN_NUMBER_CHANNELS: len(counts),
+                    COLUMN_WRITTEN_TIME: time.time()}
+        self._pending_rows[row] = (energies_eV, counts, metadata)
+
+        if len(self._pending_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self._pending_rows) == 0:
+            return
+
+        rows = sorted(self._pending_rows)
+        number_channels = max(len(self._pending_rows[row][1]) for row in rows)
+        self._resize(self.number_rows, number_channels)
+
+        spectra_group = self.project_file[SPECTRA_GROUP]
+        metadata_group = self.project_file[METADATA_GROUP]
+        width = spectra_group[COUNTS_DATASET].shape[1]
+
+        # Consecutive rows, the usual case when appending, are written with one call per dataset.
+        for first_id, last_id in _find_consecutive_runs(rows):
+            run_rows = rows[first_id:last_id]
+            start, stop = run_rows[0], run_rows[-1] + 1
+            for dataset_name, item_id in ((ENERGIES_DATASET, 0), (COUNTS_DATASET, 1)):
+                values = np.full((len(run_rows), width), np.nan)
+                for value_id, row in enumerate(run_rows):
+                    data = self._pending_rows[row][item_id]
+                    values[value_id, :len(data)] = data
+                spectra_group[dataset_name][start:stop] = values
+
+            for column_name, column_dtype in METADATA_COLUMNS:
+                values = [self._pending_rows[row][2][column_name] for row in run_rows]
+                if column_dtype is _STRING_DTYPE:
+                    values = np.array(values, dtype=object)
+                metadata_group[column_name][start:stop] = values
+
+        self._pending_rows = {}
+        self.project_file.flush()
+
+    def _resize(self, number_rows, number_channels):
+        if SPECTRA_GROUP not in self.project_file:
+            self._create_datasets(number_channels)
+
+        spectra_group = self.project_file[SPECTRA_GROUP]
+        metadata_group = self.project_file[METADATA_GROUP]
+
+        width = max(spectra_group[COUNTS_DATASET].shape[1], number_channels)
+        for dataset_name in (ENERGIES_DATASET, COUNTS_DATASET):
+            dataset = spectra_group[dataset_name]
+            if dataset.shape != (number_rows, width):
+                dataset.resize((number_rows, width))
+        for column_name, _column_dtype in METADATA_COLUMNS:
+            dataset = metadata_group[column_name]
+            if dataset.shape[0] != number_rows:
+                dataset.resize((number_rows,))
+
+    def _create_datasets(self, number_channels):
+        compression_options = {}
+        if self.compression is not None:
+            compression_options["compression"] = self.compression
+            compression_options["shuffle"] = True
+            if self.compression == "gzip":
+                compression_options["compression_opts"] = self.compression_level
+
+        spectra_group = self.project_file.create_group(SPECTRA_GROUP)
+        for dataset_name in (ENERGIES_DATASET, COUNTS_DATASET):
+            spectra_group.create_dataset(dataset_name, shape=(0, number_channels), maxshape=(None, None),
+                                         dtype=np.float64, chunks=(self.chunk_rows, number_channels),
+                                         fillvalue=np.nan, **compression_options)
+
+        metadata_group = self.project_file.create_group(METADATA_GROUP)
+        for column_name, column_dtype in METADATA_COLUMNS:
+            metadata_group.create_dataset(column_name, shape=(0,), maxshape=(None,), dtype=column_dtype,
+                                          chunks=(max(1024, self.chunk_rows),), **compression_options)
+
+
+def _find_consecutive_runs(rows):
+    """
+    Runs of consecutive rows of a sorted list.
+
+    :return: list of (first index, last index + 1) in the list.
+    """
+    runs = []
+    first_id = 0
+    for row_id in range(1, len(rows) + 1):
+        if row_id == len(rows) or rows[row_id] != rows[row_id - 1] + 1:
+            runs.append((first_id, row_id))
+            first_id = row_id
+
+    return runs
+
+
+class ProjectHdf5Reader(object):
+    """
+    Read the spectra of a project HDF5 file, one by one or as a stack.
+    """
+
+    def __init__(self, project_hdf5_file_path):
+        self.project_hdf5_file_path = project_hdf5_file_path
+
+        self.project_file = None
+        self.index = {}
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        self.project_file = h5py.File(self.project_hdf5_file_path, 'r')
+
+        self.index = {}
+        if METADATA_GROUP in self.project_file:
+            relative_paths = self.project_file[METADATA_GROUP][COLUMN_RELATIVE_PATH][...]
+            self.index = dict((_to_text(relative_path), row) for row, relative_path in enumerate(relative_paths))
+
+    def close(self):
+        if self.project_file is not None:
+            self.project_file.close()
+            self.project_file = None
+
+    @property
+    def number_spectra(self):
+        return len(self.index)
+
+    @property
+    def relative_paths(self):
+        return sorted(self.index, key=self.index.get)
+
+    def get_metadata(self, column_name):
+        values = self.project_file[METADATA_GROUP][column_name][...]
+        if values.dtype == object:
+            values = np.array([_to_text(value) for value in values], dtype=object)
+        return values
+
+    def get_spectrum(self, relative_path):
+        """
+        :return: tuple (energies_eV, counts) without the padding.
+        """
+        row = self.index[relative_path]
+        number_channels = self.project_file[METADATA_GROUP][COLUMN_NUMBER_CHANNELS][row]
+        spectra_group = self.project_file[SPECTRA_GROUP]
+        energies_eV = spectra_group[ENERGIES_DATASET][row, :number_channels]
+        counts = spectra_group[COUNTS_DATASET][row, :number_channels]
+        return energies_eV, counts
+
+    def get_stack(self, start=0, stop=None):
+        """
+        :return: tuple (energies_eV, counts) 2D arrays of the rows from *start* to *stop*, padded with NaN.
+        """
+        spectra_group = self.project_file[SPECTRA_GROUP]
+        return spectra_group[ENERGIES_DATASET][start:stop], spectra_group[COUNTS_DATASET][start:stop]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.queued_logging
+   :synopsis: Write the log records on a background thread.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Write the log records on a background thread.
+
+The root logger has a :py:class:`logging.handlers.QueueHandler` instead of the stream and file handlers, a log call
+puts the record in a queue and returns. A :py:class:`logging.handlers.QueueListener` thread gives the records to the
+stream and file handlers, so the acquisition loop does not wait for the console or the disk.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import logging
+import logging.handlers
+from six.moves import queue
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+LOG_FORMAT = '%(asctime)s : %(name)-40s : %(levelname)-10s : %(message)s'
+
+_queue_handler = None
+_queue_listener = None
+
+
+def start_queued_logging(log_file_path=None, stream_level=logging.INFO, file_level=logging.DEBUG):
+    """
+    Add a queue handler to the root logger, the records are written on the console and, with *log_file_path*, in the
+    file by a listener thread. Calling it again restarts the logging with the new handlers.
+
+    :return: the started :py:class:`logging.handlers.QueueListener`.
+    """
+    global _queue_handler, _queue_listener
+    stop_queued_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(stream_level)
+    stream_handler.setFormatter(formatter)
+    handlers.append(stream_handler)
+
+    level = stream_level
+    if log_file_path:
+        file_handler = logging.FileHandler(log_file_path)
+        file_handler.setLevel(file_level)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+        level = min(level, file_level)
+
+    records = queue.Queue()
+    _queue_handler = logging.handlers.QueueHandler(records)
+    _queue_listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(_queue_handler)
+    # The records below the level of all the handlers are not created.
+    root_logger.setLevel(level)
+
+    _queue_listener.start()
+    return _queue_listener
+
+
+def stop_queued_logging():
+    """
+    Write the queued records, close the handlers and remove the queue handler of the root logger.
+    """
+    global _queue_handler, _queue_listener
+    if _queue_listener is None:
+        return
+
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_listener.stop()
+    for handler in _queue_listener.handlers:
+        handler.close()
+
+    _queue_handler = None
+    _queue_listener = None
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.simulated_driver
+   :synopsis: Simulated acquisition driver writing synthetic .elv files.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Simulated acquisition driver writing synthetic .elv files.
+
+Each step waits the latency of the ElementsView dialog it replaces, multiplied by *time_scale*, so the acquisition loop
+can be run, profiled and benchmarked without the instrument. The saved file is written on a background thread in two
+parts, like a file still growing on the disk, and the main window is not ready until the file is complete. A spectrum
+saved before the end of its acquisition time is counted as incomplete.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import time
+import logging
+import datetime
+import threading
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_driver import AcquisitionDriver, AcquisitionError, BACKEND_SIMULATED, ELEMENTS
+from pysemeelsgui.tools.synthetic_elv import generate_spectrum, format_elv_text, DEFAULT_NUMBER_CHANNELS
+
+# Globals and constants variables.
+LATENCY_CONNECT = "connect"
+LATENCY_READY = "ready"
+LATENCY_START_ACQUISITION = "start_acquisition"
+LATENCY_MENU_SAVE = "menu_save"
+LATENCY_COMMENT_DIALOG = "comment_dialog"
+LATENCY_SAVE_AS_DIALOG = "save_as_dialog"
+LATENCY_WRITE_FILE = "write_file"
+LATENCY_CONFIRM_DIALOG = "confirm_dialog"
+
+DEFAULT_LATENCIES_s = {LATENCY_CONNECT: 0.5,
+                       LATENCY_READY: 0.02,
+                       LATENCY_START_ACQUISITION: 0.1,
+                       LATENCY_MENU_SAVE: 0.15,
+                       LATENCY_COMMENT_DIALOG: 0.25,
+                       LATENCY_SAVE_AS_DIALOG: 0.4,
+                       LATENCY_WRITE_FILE: 0.1,
+                       LATENCY_CONFIRM_DIALOG: 0.2}
+
+
+class SimulatedDriver(AcquisitionDriver):
+    """
+    Acquisition driver of a simulated ElementsView program.
+
+    :param save_folder: folder of the saved files, the folder of the save as dialog.
+    :param acquisition_time_s: acquisition time of a spectrum in manual mode.
+    :param latencies_s: dict of the ``LATENCY_`` constants to the latency in second, missing latencies have the default
+        value.
+    :param time_scale: factor of all the latencies and of the acquisition time, 0 to run without waiting.
+    :ivar number_saved: number of saved files.
+    :ivar number_incomplete: number of spectra saved before the end of the acquisition.
+    """
+    backend = BACKEND_SIMULATED
+
+    def __init__(self, save_folder, acquisition_time_s=1.0, latencies_s=None, time_scale=1.0,
+                 number_channels=DEFAULT_NUMBER_CHANNELS, seed=0):
+        self.save_folder = save_folder
+        self.acquisition_time_s = acquisition_time_s
+        self.latencies_s = dict(DEFAULT_LATENCIES_s)
+        if latencies_s is not None:
+            self.latencies_s.update(latencies_s)
+        self.time_scale = time_scale
+        self.number_channels = number_channels
+
+        self.number_saved = 0
+        self.number_incomplete = 0
+
+        self._random_state = np.random.RandomState(seed)
+        self._is_connected = False
+        self._acquisition_end_time = None
+        self._is_save_dialog_open = False
+        self._confirm_file_path = None
+        self._writer_thread = None
+
+    def get_options(self):
+        options = super(SimulatedDriver, self).get_options()
+        options.update({"acquisition_time_s": self.acquisition_time_s, "latencies_s": self.latencies_s,
+                        "time_scale": self.time_scale})
+        return options
+
+    def connect(self):
+        if not os.path.isdir(self.save_folder):
+            raise AcquisitionError("Save folder not found: {}".format(self.save_folder))
+
+        self._wait(LATENCY_CONNECT)
+        self._is_connected = True
+        logging.info("Simulated application connected")
+
+    def disconnect(self):
+        self._join_writer()
+        self._is_connected = False
+
+    def find_elements(self):
+        self._check_connected()
+        self._wait(LATENCY_READY)
+        self._wait(LATENCY_MENU_SAVE)
+        self._wait(LATENCY_COMMENT_DIALOG)
+        self._wait(LATENCY_SAVE_AS_DIALOG)
+
+        return dict((element, True) for element in ELEMENTS)
+
+    def wait_ready(self):
+        self._check_connected()
+        if self._confirm_file_path is not None:
+            raise AcquisitionError("The overwrite confirmation dialog of {} is open".format(self._confirm_file_path))
+
+        self._join_writer()
+        self._wait(LATENCY_READY)
+
+    def start_acquisition(self):
+        self._check_connected()
+        self._wait(LATENCY_START_ACQUISITION)
+        self._acquisition_end_time = time.perf_counter() + self.acquisition_time_s * self.time_scale
+
+    def open_save_dialog(self, comment=""):
+        self._check_connected()
+        if self._acquisition_end_time is not None and time.perf_counter() < self._acquisition_end_time:
+            logging.warning("Spectrum saved before the end of the acquisition")
+            self.number_incomplete += 1
+        self._acquisition_end_time = None
+
+        self._wait(LATENCY_MENU_SAVE)
+        self._wait(LATENCY_COMMENT_DIALOG)
+        self._is_save_dialog_open = True
+
+    def save_as(self, file_name):
+        if not self._is_save_dialog_open:
+            raise AcquisitionError("The save as dialog is not open")
+        self._wait(LATENCY_SAVE_AS_DIALOG)
+        self._is_save_dialog_open = False
+
+        elv_file_path = os.path.join(self.save_folder, file_name)
+        if os.path.exists(elv_file_path):
+            self._confirm_file_path = elv_file_path
+        else:
+            self._start_writer(elv_file_path)
+
+    def confirm_overwrite(self):
+        if self._confirm_file_path is None:
+            return False
+
+        self._wait(LATENCY_CONFIRM_DIALOG)
+        elv_file_path, self._confirm_file_path = self._confirm_file_path, None
+        self._start_writer(elv_file_path)
+        return True
+
+    def _check_connected(self):
+        if not self._is_connected:
+            raise AcquisitionError("The simulated application is not connected")
+
+    def _wait(self, latency_name):
+        delay_s = self.latencies_s[latency_name] * self.time_scale
+        if delay_s > 0.0:
+            time.sleep(delay_s)
+
+    def _start_writer(self, elv_file_path):
+        self._join_writer()
+
+        energies_eV, counts = generate_spectrum(self._random_state, self.number_channels)
+        text = format_elv_text(energies_eV, counts, datetime.datetime.now(), os.path.basename(elv_file_path))
+
+        self._writer_thread = threading.Thread(target=self._write_file, args=(elv_file_path, text),
+                                               name="SimulatedDriver-writer")
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    def _write_file(self, elv_file_path, text):
+        middle = len(text) // 2
+        with open(elv_file_path, 'w') as elv_file:
+            elv_file.write(text[:middle])
+            elv_file.flush()
+            self._wait(LATENCY_WRITE_FILE)
+            elv_file.write(text[middle:])
+
+        self.number_saved += 1
+
+    def _join_writer(self):
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+            self._writer_thread = None
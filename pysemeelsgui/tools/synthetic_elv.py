@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.synthetic_elv
+   :synopsis: Generate synthetic .elv spectrum files for benchmarks and simulations.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Generate synthetic .elv spectrum files for benchmarks and simulations.
+
+The spectra have a zero-loss peak, a plasmon peak and a power law background with Poisson noise. The files have the
+layout of the Hitachi EELS SU export: ``KEY=value`` header lines followed by one tab separated line per channel with the
+energy, the counts, the raw counts, the gain correction and the dark current. The random generator is seeded, the same
+arguments give the same files.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import datetime
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.folder_scanner import ELV_EXTENSION
+
+# Globals and constants variables.
+DEFAULT_NUMBER_CHANNELS = 1024
+DEFAULT_ENERGY_START_eV = -32.0
+DEFAULT_ENERGY_STEP_eV = 0.5
+
+ZERO_LOSS_FWHM_eV = 1.2
+PLASMON_ENERGY_eV = 16.7
+PLASMON_FWHM_eV = 6.0
+DARK_CURRENT = 100
+
+
+def generate_spectrum(random_state, number_channels=DEFAULT_NUMBER_CHANNELS, energy_start_eV=DEFAULT_ENERGY_START_eV,
+                      energy_step_eV=DEFAULT_ENERGY_STEP_eV, zero_loss_height=50000.0):
+    """
+    Spectrum with a zero-loss peak, a plasmon peak and a background, the peak positions and heights vary a little.
+
+    :param random_state: :py:class:`numpy.random.RandomState` of the noise and variations.
+    :return: tuple (energies_eV, counts) of integer counts.
+    """
+    energies_eV = energy_start_eV + energy_step_eV * np.arange(number_channels)
+
+    zero_loss_eV = random_state.normal(0.0, 0.05)
+    height = zero_loss_height * random_state.uniform(0.8, 1.2)
+    sigma_eV = ZERO_LOSS_FWHM_eV / 2.3548
+    model = height * np.exp(-0.5 * ((energies_eV - zero_loss_eV) / sigma_eV) ** 2)
+
+    plasmon_eV = PLASMON_ENERGY_eV + random_state.normal(0.0, 0.2)
+    sigma_eV = PLASMON_FWHM_eV / 2.3548
+    model += 0.05 * height * np.exp(-0.5 * ((energies_eV - plasmon_eV) / sigma_eV) ** 2)
+
+    loss_eV = np.maximum(energies_eV - zero_loss_eV, 0.0) + 5.0
+    model += 0.2 * height * (loss_eV / 5.0) ** -3.0 * (energies_eV > zero_loss_eV)
+
+    counts = random_state.poisson(model)
+    return energies_eV, counts
+
+
+def format_elv_text(energies_eV, counts, acquisition_time, comment=""):
+    """
+    Text of an .elv file.
+
+    :param acquisition_time: :py:class:`datetime.datetime` of the header.
+    """
+    header = ["DATE={}".format(acquisition_time.strftime("%Y/%m/%d")),
+              "TIME={}".format(acquisition_time.strftime("%H:%M:%S")),
+              "COMMENT={}".format(comment),
+              "DOSE=Fast",
+              "LE=1.00 eV",
+              "RAW=Off",
+              "ENERGY=0.00 eV",
+              "DUALDET_POSITION=Off",
+              "DUALDET_POST=0.0 eV",
+              "DUALDET_CENTER=0.0 eV"]
+
+    raw_counts = counts + DARK_CURRENT
+    lines = ["{:.2f}\t{:d}\t{:d}\t{:.4f}\t{:d}".format(energy_eV, count, raw_count, 1.0, DARK_CURRENT)
+             for energy_eV, count, raw_count in zip(energies_eV, counts, raw_counts)]
+
+    return "\n".join(header + lines) + "\n"
+
+
+def write_elv_file(elv_file_path, energies_eV, counts, acquisition_time=None, comment=""):
+    if acquisition_time is None:
+        acquisition_time = datetime.datetime.now()
+
+    with open(elv_file_path, 'w') as elv_file:
+        elv_file.write(format_elv_text(energies_eV, counts, acquisition_time, comment))
+
+
+def generate_data_folder(data_folder, number_files, number_folders=1, number_channels=DEFAULT_NUMBER_CHANNELS,
+                         seed=0):
+    """
+    Write *number_files* spectra in *number_folders* sub-folders of *data_folder*, or directly in it for one folder.
+
+    :return: list of the .elv file paths.
+    """
+    random_state = np.random.RandomState(seed)
+    start_time = datetime.datetime(2017, 1, 1, 8, 0, 0)
+    number_folders = max(1, number_folders)
+
+    elv_file_paths = []
+    for file_id in range(number_files):
+        folder = data_folder
+        if number_folders > 1:
+            folder = os.path.join(data_folder, "day_{:03d}".format(file_id % number_folders + 1))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        elv_file_path = os.path.join(folder, "spectrum_{:06d}{}".format(file_id, ELV_EXTENSION))
+        energies_eV, counts = generate_spectrum(random_state, number_channels)
+        acquisition_time = start_time + datetime.timedelta(seconds=30 * file_id)
+        write_elv_file(elv_file_path, energies_eV, counts, acquisition_time, "Synthetic spectrum {:d}".format(file_id))
+        elv_file_paths.append(elv_file_path)
+
+    return elv_file_paths
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_loop
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_loop`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_loop`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_loop import AcquisitionLoop, get_spectrum_file_name, ACQUISITION_MODE_LIVE
+from pysemeelsgui.tools.simulated_driver import SimulatedDriver
+from pysemeelsgui.tools.acquisition_driver import AcquisitionError
+from pysemeelsgui.tools.acquisition_timing import STEP_CONFIRM_OVERWRITE, STEP_WAIT_SAVED, STEP_ACQUISITION_DELAY, \
+    STEP_WAIT_READY, STEP_WAIT_ACQUIRED
+
+
+# Globals and constants variables.
+
+class TestAcquisitionLoop(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_loop`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.save_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.save_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _create_loop(self, driver, number_spectra=3):
+        acquisition_loop = AcquisitionLoop(driver)
+        acquisition_loop.basename = "test"
+        acquisition_loop.number_spectra = number_spectra
+        acquisition_loop.delay_spectrum_s = 0.0
+        acquisition_loop.additional_wait_time_s = 0.0
+        return acquisition_loop
+
+    def testGetSpectrumFileName(self):
+        """
+        Tests the file names are numbered from 1.
+        """
+
+        self.assertEqual("sample_a_12.elv", get_spectrum_file_name("sample_a", 12))
+
+    def testRun(self):
+        """
+        Tests all the spectra are saved in manual and live modes with the progress.
+        """
+
+        progress = []
+        with SimulatedDriver(self.save_folder, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver)
+            acquisition_loop.progress_callback = lambda number_done, number_total, elapsed_time_s: \
+                progress.append((number_done, number_total))
+            acquisition_loop.run()
+
+            acquisition_loop.basename = "live"
+            acquisition_loop.acquisition_mode = ACQUISITION_MODE_LIVE
+            acquisition_loop.run()
+
+        self.assertEqual(["live_1.elv", "live_2.elv", "live_3.elv"], acquisition_loop.saved_file_names)
+        self.assertEqual(["live_1.elv", "live_2.elv", "live_3.elv", "test_1.elv", "test_2.elv", "test_3.elv"],
+                         sorted(os.listdir(self.save_folder)))
+        self.assertEqual([(1, 3), (2, 3), (3, 3)] * 2, progress)
+        self.assertEqual(6, driver.number_saved)
+
+    def testOverwrite(self):
+        """
+        Tests the existing files are overwritten.
+        """
+
+        with SimulatedDriver(self.save_folder, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=2)
+            acquisition_loop.run()
+            acquisition_loop.overwrite = True
+            acquisition_loop.run()
+
+        self.assertEqual(4, driver.number_saved)
+
+    def testWaitForSavedFiles(self):
+        """
+        Tests each saved file is complete when the loop continues, and the existing files are overwritten.
+        """
+
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.1, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=2)
+            acquisition_loop.save_folder = self.save_folder
+            acquisition_loop.stable_time_s = 0.05
+            acquisition_loop.progress_callback = lambda number_done, number_total, elapsed_time_s: \
+                self.assertEqual(number_done, driver.number_saved)
+            acquisition_loop.run()
+
+            acquisition_loop.overwrite = True
+            acquisition_loop.progress_callback = None
+            acquisition_loop.run()
+
+        self.assertEqual(4, driver.number_saved)
+        self.assertEqual(0, driver.number_incomplete)
+
+        summary = acquisition_loop.timer.summarize()
+        self.assertEqual(2, summary["number_spectra"])
+        self.assertEqual(2, summary["steps"][STEP_CONFIRM_OVERWRITE]["count"])
+        self.assertEqual(2, summary["steps"][STEP_WAIT_SAVED]["count"])
+
+    def testExistingFilesWithoutOverwrite(self):
+        """
+        Tests the loop stops before the first spectrum if a file of the series exists without overwrite.
+        """
+
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=2)
+            acquisition_loop.save_folder = self.save_folder
+            acquisition_loop.stable_time_s = 0.01
+            acquisition_loop.number_spectra = 1
+            self.assertEqual([], acquisition_loop.find_existing_file_paths())
+            acquisition_loop.run()
+
+            acquisition_loop.number_spectra = 2
+            self.assertEqual([os.path.join(self.save_folder, "test_1.elv")],
+                             acquisition_loop.find_existing_file_paths())
+            self.assertRaises(AcquisitionError, acquisition_loop.run)
+
+        self.assertEqual(1, driver.number_saved)
+
+    def testAdditionalWaitTime(self):
+        """
+        Tests the additional wait time is added to the acquisition time only without save folder.
+        """
+
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=2)
+            acquisition_loop.additional_wait_time_s = 0.05
+            acquisition_loop.run()
+            for duration_s in acquisition_loop.timer.get_durations(STEP_ACQUISITION_DELAY):
+                self.assertGreaterEqual(duration_s, 0.05)
+
+            acquisition_loop.basename = "folder"
+            acquisition_loop.save_folder = self.save_folder
+            acquisition_loop.stable_time_s = 0.01
+            acquisition_loop.run()
+            for duration_s in acquisition_loop.timer.get_durations(STEP_ACQUISITION_DELAY):
+                self.assertLess(duration_s, 0.05)
+
+        self.assertEqual(4, driver.number_saved)
+
+    def testManualSteps(self):
+        """
+        Tests each step of a manual acquisition is measured once for each spectrum.
+        """
+
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=2)
+            acquisition_loop.run()
+
+        for step in (STEP_WAIT_READY, STEP_ACQUISITION_DELAY, STEP_WAIT_ACQUIRED):
+            spectrum_ids = [record["spectrum_id"] for record in acquisition_loop.timer.records
+                            if record["step"] == step and record["spectrum_id"] > 0]
+            self.assertEqual([1, 2], spectrum_ids, step)
+
+    def testCancel(self):
+        """
+        Tests the loop stops between spectra when cancelled.
+        """
+
+        with SimulatedDriver(self.save_folder, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=10)
+
+            def progress_callback(number_done, number_total, elapsed_time_s):
+                if number_done == 2:
+                    acquisition_loop.cancel()
+            acquisition_loop.progress_callback = progress_callback
+            acquisition_loop.run()
+
+        self.assertEqual(["test_1.elv", "test_2.elv"], acquisition_loop.saved_file_names)
+
+    def testPauseResume(self):
+        """
+        Tests the loop waits between spectra while paused, and a paused loop can be cancelled.
+        """
+
+        with SimulatedDriver(self.save_folder, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = self._create_loop(driver, number_spectra=4)
+            paused = threading.Event()
+
+            def progress_callback(number_done, number_total, elapsed_time_s):
+                if number_done == 2:
+                    acquisition_loop.pause()
+                    paused.set()
+            acquisition_loop.progress_callback = progress_callback
+
+            thread = threading.Thread(target=acquisition_loop.run)
+            thread.start()
+            self.assertTrue(paused.wait(5.0))
+            thread.join(0.3)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(["test_1.elv", "test_2.elv"], acquisition_loop.saved_file_names)
+
+            acquisition_loop.resume()
+            thread.join(5.0)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(4, len(acquisition_loop.saved_file_names))
+            self.assertLess(acquisition_loop.elapsed_time_s, 0.3)
+
+            acquisition_loop.pause()
+            thread = threading.Thread(target=acquisition_loop.run)
+            thread.start()
+            thread.join(0.2)
+            acquisition_loop.cancel()
+            thread.join(5.0)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual([], acquisition_loop.saved_file_names)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_manifest
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_manifest`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_manifest`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_manifest import AcquisitionManifest, get_acquisition_manifest_file_path, \
+    find_manifest_elv_files, STATUS_SAVED, STATUS_MISSING, ISSUE_MISSING, ISSUE_GAP, ISSUE_DUPLICATE, ISSUE_CHANGED
+from pysemeelsgui.tools.acquisition_loop import AcquisitionLoop
+from pysemeelsgui.tools.acquisition_timing import STEP_VERIFY_SAVED
+from pysemeelsgui.tools.simulated_driver import SimulatedDriver
+
+
+# Globals and constants variables.
+
+class OtherFolderDriver(SimulatedDriver):
+    """
+    Simulated driver saving the files in its own folder, whatever the folder given to the save as dialog.
+    """
+
+    def save_as(self, file_name):
+        SimulatedDriver.save_as(self, os.path.basename(file_name))
+
+
+class TestAcquisitionManifest(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_manifest`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.save_folder = tempfile.mkdtemp()
+        self.manifest_file_path = get_acquisition_manifest_file_path(self.save_folder, "test")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.save_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _write_file(self, file_name, text):
+        file_path = os.path.join(self.save_folder, file_name)
+        with open(file_path, 'w') as saved_file:
+            saved_file.write(text)
+        return file_path
+
+    def _start_manifest(self, number_spectra):
+        manifest = AcquisitionManifest(self.manifest_file_path)
+        issues = []
+        manifest.issue_callback = issues.append
+        manifest.start(dict((spectrum_id, "test_{:d}.elv".format(spectrum_id))
+                            for spectrum_id in range(1, number_spectra + 1)), basename="test")
+        return manifest, issues
+
+    def testRecordSaved(self):
+        """
+        Tests the gaps and duplicates are reported when the files are recorded, and the manifest read back.
+        """
+
+        manifest, issues = self._start_manifest(4)
+        self.assertTrue(os.path.isfile(self.manifest_file_path))
+
+        manifest.record_saved(1, self._write_file("test_1.elv", "spectrum 1"))
+        self.assertEqual([], issues)
+
+        manifest.record_saved(3, self._write_file("test_3.elv", "spectrum 1"))
+        self.assertEqual([(2, ISSUE_GAP), (3, ISSUE_DUPLICATE)],
+                         [(issue["spectrum_id"], issue["issue"]) for issue in issues])
+
+        manifest.record_missing(4, "timeout")
+        self.assertEqual((4, ISSUE_MISSING), (issues[-1]["spectrum_id"], issues[-1]["issue"]))
+
+        entry = manifest.entries[1]
+        self.assertEqual(STATUS_SAVED, entry["status"])
+        self.assertEqual(len("spectrum 1"), entry["size"])
+        self.assertEqual(40, len(entry["sha1"]))
+
+        manifest_read = AcquisitionManifest(self.manifest_file_path)
+        manifest_read.load()
+        self.assertEqual(manifest.entries, manifest_read.entries)
+        self.assertEqual(3, len(manifest_read.issues))
+        self.assertEqual("test", manifest_read.options["basename"])
+        self.assertEqual(STATUS_MISSING, manifest_read.entries[2]["status"])
+
+    def testVerify(self):
+        """
+        Tests the files changed or removed after they were saved are reported.
+        """
+
+        manifest, issues = self._start_manifest(3)
+        for spectrum_id in range(1, 4):
+            file_name = "test_{:d}.elv".format(spectrum_id)
+            manifest.record_saved(spectrum_id, self._write_file(file_name, "spectrum {:d}".format(spectrum_id)))
+        self.assertEqual([], manifest.verify())
+
+        self._write_file("test_2.elv", "spectrum 2 changed")
+        os.remove(os.path.join(self.save_folder, "test_3.elv"))
+
+        self.assertEqual([(2, ISSUE_CHANGED), (3, ISSUE_MISSING)],
+                         [(issue["spectrum_id"], issue["issue"]) for issue in manifest.verify()])
+
+    def testFindManifestElvFiles(self):
+        """
+        Tests the saved files are listed from the manifests of the folder.
+        """
+
+        self.assertIsNone(find_manifest_elv_files(self.save_folder))
+
+        manifest, _issues = self._start_manifest(2)
+        file_path = self._write_file("test_1.elv", "spectrum 1")
+        manifest.record_saved(1, file_path)
+        self._write_file("other.elv", "not in the manifest")
+
+        self.assertEqual([file_path], find_manifest_elv_files(self.save_folder))
+
+    def testAcquisitionLoop(self):
+        """
+        Tests the saved files of the acquisition loop are recorded and a file not saved is reported.
+        """
+
+        manifest = AcquisitionManifest(self.manifest_file_path)
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop = AcquisitionLoop(driver)
+            acquisition_loop.number_spectra = 2
+            acquisition_loop.delay_spectrum_s = 0.0
+            acquisition_loop.save_folder = self.save_folder
+            acquisition_loop.stable_time_s = 0.01
+            acquisition_loop.manifest = manifest
+            acquisition_loop.run()
+
+            self.assertEqual([], manifest.issues)
+            self.assertEqual(2, len(manifest.get_saved_file_paths()))
+            self.assertEqual(2, acquisition_loop.timer.summarize()["steps"][STEP_VERIFY_SAVED]["count"])
+
+        # The file is saved in another folder, it is not found in the save folder.
+        other_folder = os.path.join(self.save_folder, "other")
+        os.makedirs(other_folder)
+        with OtherFolderDriver(other_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            acquisition_loop.driver = driver
+            acquisition_loop.basename = "other"
+            acquisition_loop.number_spectra = 1
+            acquisition_loop.save_timeout_s = 0.1
+            acquisition_loop.run()
+
+        self.assertEqual([(1, ISSUE_MISSING)], [(issue["spectrum_id"], issue["issue"]) for issue in manifest.issues])
+        self.assertEqual([], acquisition_loop.saved_file_names)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_monitor
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_monitor`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_monitor`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+
+# Third party modules.
+import numpy as np
+from six.moves import StringIO
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_monitor import RingBuffer, compute_spectrum_metrics, Threshold, \
+    get_natural_sort_key, AcquisitionMonitor, MonitorFigure, create_thresholds, main, METRICS, METRIC_TOTAL_COUNTS, \
+    METRIC_ZERO_LOSS_PEAK_HEIGHT, METRIC_ZERO_LOSS_PEAK_POSITION, ALARM_HIGH, EXIT_SUCCESS, EXIT_ALARM, \
+    EXIT_USAGE_ERROR
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder, generate_spectrum, write_elv_file
+
+
+# Globals and constants variables.
+
+class TestAcquisitionMonitor(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_monitor`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.save_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.save_folder, ignore_errors=True)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testRingBuffer(self):
+        """
+        Tests the ring buffer keeps the last values in order.
+        """
+
+        ring_buffer = RingBuffer(4)
+        self.assertEqual(0, len(ring_buffer))
+        self.assertEqual(None, ring_buffer.get_last())
+
+        ring_buffer.extend([1.0, 2.0, 3.0])
+        np.testing.assert_array_equal([1.0, 2.0, 3.0], ring_buffer.get_values())
+        self.assertFalse(ring_buffer.is_full())
+
+        ring_buffer.extend([4.0, 5.0])
+        np.testing.assert_array_equal([2.0, 3.0, 4.0, 5.0], ring_buffer.get_values())
+        self.assertTrue(ring_buffer.is_full())
+
+        ring_buffer.append(6.0)
+        np.testing.assert_array_equal([3.0, 4.0, 5.0, 6.0], ring_buffer.get_values())
+        self.assertEqual(6.0, ring_buffer.get_last())
+
+        ring_buffer.extend(np.arange(10.0))
+        np.testing.assert_array_equal([6.0, 7.0, 8.0, 9.0], ring_buffer.get_values())
+        ring_buffer.append(10.0)
+        np.testing.assert_array_equal([7.0, 8.0, 9.0, 10.0], ring_buffer.get_values())
+
+        self.assertRaises(ValueError, RingBuffer, 0)
+
+    def testComputeSpectrumMetrics(self):
+        """
+        Tests the metrics of several spectra are computed at once.
+        """
+
+        energies_eV = -10.0 + 0.5 * np.arange(100)
+        counts = np.ones((2, 100))
+        counts[0, 20:23] = [50.0, 100.0, 50.0]
+        counts[1, 21:24] = [25.0, 200.0, 75.0]
+
+        metrics = compute_spectrum_metrics(energies_eV, counts)
+
+        np.testing.assert_allclose(metrics[METRIC_TOTAL_COUNTS], [97.0 + 200.0, 97.0 + 300.0])
+        np.testing.assert_allclose(metrics[METRIC_ZERO_LOSS_PEAK_HEIGHT], [100.0, 200.0])
+        # Parabola through the three channels around the maximum.
+        np.testing.assert_allclose(metrics[METRIC_ZERO_LOSS_PEAK_POSITION], [0.5, 1.0 + 0.5 * 50.0 / 300.0 * 0.5])
+
+        metrics = compute_spectrum_metrics(energies_eV, counts[0])
+        self.assertEqual((1,), metrics[METRIC_TOTAL_COUNTS].shape)
+
+        self.assertRaises(ValueError, compute_spectrum_metrics, energies_eV, counts, (100.0, 200.0))
+
+    def testThresholds(self):
+        """
+        Tests an alarm is reported when a metric goes out of its limits, not for each spectrum.
+        """
+
+        energies_eV = -10.0 + 0.5 * np.arange(100)
+        heights = [100.0, 300.0, 400.0, 100.0, 300.0]
+        counts = np.zeros((len(heights), 100))
+        counts[:, 20] = heights
+
+        monitor = AcquisitionMonitor(self.save_folder, capacity=3)
+        monitor.thresholds = [Threshold(METRIC_ZERO_LOSS_PEAK_HEIGHT, maximum=250.0)]
+        alarms = []
+        monitor.alarm_callback = alarms.append
+        monitor.add_spectra(energies_eV, counts)
+
+        self.assertEqual([2, 5], [alarm["spectrum_number"] for alarm in alarms])
+        self.assertEqual([ALARM_HIGH, ALARM_HIGH], [alarm["alarm"] for alarm in alarms])
+        spectrum_numbers, values = monitor.get_values(METRIC_ZERO_LOSS_PEAK_HEIGHT)
+        np.testing.assert_array_equal([3, 4, 5], spectrum_numbers)
+        np.testing.assert_array_equal([400.0, 100.0, 300.0], values)
+
+        summary = monitor.summarize()
+        self.assertEqual(5, summary["number_spectra"])
+        self.assertEqual(2, summary["number_alarms"])
+        self.assertEqual(3, summary["metrics"][METRIC_ZERO_LOSS_PEAK_HEIGHT]["count"])
+
+        thresholds = create_thresholds(["zero_loss_peak_position_eV=-1"], ["zero_loss_peak_position_eV=1",
+                                                                           "total_counts=1e6"])
+        self.assertEqual([(METRIC_TOTAL_COUNTS, None, 1.0e6), (METRIC_ZERO_LOSS_PEAK_POSITION, -1.0, 1.0)],
+                         [(threshold.metric, threshold.minimum, threshold.maximum) for threshold in thresholds])
+        self.assertRaises(ValueError, create_thresholds, ["counts=1"], [])
+
+    def testPoll(self):
+        """
+        Tests the new files are read once their size and modification time are stable.
+        """
+
+        generate_data_folder(self.save_folder, 2, number_channels=128)
+        monitor = AcquisitionMonitor(self.save_folder)
+        monitor.reset()
+
+        self.assertEqual(0, monitor.poll())
+        generate_data_folder(self.save_folder, 3, number_channels=128, seed=1)
+        os.rename(os.path.join(self.save_folder, "spectrum_000002.elv"),
+                  os.path.join(self.save_folder, "new_000002.elv"))
+        self.assertEqual(0, monitor.poll())
+        self.assertEqual(1, monitor.poll())
+        self.assertEqual(0, monitor.poll())
+        self.assertEqual(1, monitor.number_spectra)
+
+        with open(os.path.join(self.save_folder, "invalid.elv"), 'w') as elv_file:
+            elv_file.write("not a spectrum")
+        monitor.poll()
+        self.assertEqual(0, monitor.poll())
+        self.assertEqual(1, monitor.number_errors)
+
+        monitor = AcquisitionMonitor(self.save_folder, include_existing=True)
+        monitor.reset()
+        monitor.poll()
+        self.assertEqual(3, monitor.poll())
+        _spectrum_numbers, positions_eV = monitor.get_values(METRIC_ZERO_LOSS_PEAK_POSITION)
+        self.assertTrue(np.all(np.abs(positions_eV) < 0.5))
+
+    def testNaturalOrder(self):
+        """
+        Tests the spectra are added in the order of the numbers of their file names.
+        """
+
+        self.assertEqual(["a_1.elv", "a_2.elv", "a_10.elv", "b_1.elv"],
+                         sorted(["b_1.elv", "a_10.elv", "a_2.elv", "a_1.elv"], key=get_natural_sort_key))
+
+        energies_eV, counts = generate_spectrum(np.random.RandomState(0), number_channels=128)
+        for spectrum_id in (1, 2, 10, 11):
+            write_elv_file(os.path.join(self.save_folder, "test_{:d}.elv".format(spectrum_id)), energies_eV,
+                           counts * spectrum_id)
+
+        monitor = AcquisitionMonitor(self.save_folder, include_existing=True)
+        monitor.reset()
+        monitor.poll()
+        self.assertEqual(4, monitor.poll())
+
+        _spectrum_numbers, total_counts = monitor.get_values(METRIC_TOTAL_COUNTS)
+        np.testing.assert_allclose(total_counts / total_counts[0], [1.0, 2.0, 10.0, 11.0])
+
+    def testMonitorFigure(self):
+        """
+        Tests the rolling plots are updated and saved.
+        """
+
+        energies_eV, counts = generate_spectrum(np.random.RandomState(0), number_channels=128)
+        monitor = AcquisitionMonitor(self.save_folder)
+        monitor.add_spectra(energies_eV, np.vstack([counts, counts]))
+
+        monitor_figure = MonitorFigure(figure_size=(3, 3), dpi=50)
+        monitor_figure.set_thresholds([Threshold(METRIC_TOTAL_COUNTS, 0.0, 1.0e9)])
+        monitor_figure.set_thresholds([Threshold(METRIC_TOTAL_COUNTS, maximum=1.0e9)])
+        monitor_figure.update(monitor)
+        self.assertEqual(1, len(monitor_figure.limit_lines[METRIC_TOTAL_COUNTS]))
+        for metric in METRICS:
+            self.assertEqual(2, len(monitor_figure.lines[metric].get_xdata()))
+
+        figure_file_path = os.path.join(self.save_folder, "monitor.png")
+        monitor_figure.save(figure_file_path)
+        self.assertTrue(os.path.isfile(figure_file_path))
+
+    def testMain(self):
+        """
+        Tests the command line reads the folder once and reports the alarms.
+        """
+
+        generate_data_folder(self.save_folder, 3, number_channels=128)
+        figure_file_path = os.path.join(self.save_folder, "monitor.png")
+
+        output_file = StringIO()
+        self.assertEqual(EXIT_SUCCESS, main(["--once", "--figure", figure_file_path, self.save_folder], output_file))
+        self.assertIn("3 spectra", output_file.getvalue())
+        self.assertTrue(os.path.isfile(figure_file_path))
+
+        output_file = StringIO()
+        self.assertEqual(EXIT_ALARM, main(["--once", "--maximum", "total_counts=1", self.save_folder], output_file))
+        self.assertIn("Alarm, spectrum 1", output_file.getvalue())
+
+        self.assertEqual(EXIT_USAGE_ERROR, main([], StringIO()))
+        self.assertEqual(EXIT_USAGE_ERROR, main(["--once", "--minimum", "counts=1", self.save_folder], StringIO()))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_plan
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_plan`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_plan`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import json
+
+# Third party modules.
+from six.moves import StringIO
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_plan import parse_acquisition_plan, read_acquisition_plan, \
+    AcquisitionPlanRunner, AcquisitionSeries, format_plan_summary, main, EXIT_SUCCESS, EXIT_USAGE_ERROR
+from pysemeelsgui.tools.acquisition_driver import AcquisitionError
+from pysemeelsgui.tools.acquisition_loop import ACQUISITION_MODE_LIVE, ACQUISITION_MODE_MANUAL
+from pysemeelsgui.tools.acquisition_manifest import get_acquisition_manifest_file_path
+from pysemeelsgui.tools.simulated_driver import SimulatedDriver
+
+
+# Globals and constants variables.
+
+class FailingDriver(SimulatedDriver):
+    """
+    Simulated driver failing to save the files of the basename *failing_basename*.
+    """
+
+    failing_basename = "failing"
+
+    def save_as(self, file_path):
+        if os.path.basename(file_path).startswith(self.failing_basename):
+            raise AcquisitionError("Cannot save {}".format(file_path))
+        SimulatedDriver.save_as(self, file_path)
+
+
+class TestAcquisitionPlan(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_plan`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.save_folder = tempfile.mkdtemp()
+        self.plan = {"version": 1, "defaults": {"delay_spectrum_s": 0.0},
+                     "series": [{"basename": "sample_a", "number_spectra": 2},
+                                {"basename": "sample_b", "number_spectra": 3,
+                                 "acquisition_mode": ACQUISITION_MODE_LIVE}]}
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.save_folder, ignore_errors=True)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _write_plan(self, plan):
+        plan_file_path = os.path.join(self.save_folder, "plan.json")
+        with open(plan_file_path, 'w') as plan_file:
+            json.dump(plan, plan_file)
+        return plan_file_path
+
+    def _create_runner(self, driver, series_list):
+        runner = AcquisitionPlanRunner(driver, series_list)
+        runner.save_folder = self.save_folder
+        runner.stable_time_s = 0.01
+        return runner
+
+    def testParsePlan(self):
+        """
+        Tests the defaults are applied to each series and the invalid plans are reported.
+        """
+
+        series_list = read_acquisition_plan(self._write_plan(self.plan))
+
+        self.assertEqual(["sample_a", "sample_b"], [series.basename for series in series_list])
+        self.assertEqual([2, 3], [series.number_spectra for series in series_list])
+        self.assertEqual([ACQUISITION_MODE_MANUAL, ACQUISITION_MODE_LIVE],
+                         [series.acquisition_mode for series in series_list])
+        self.assertEqual([0.0, 0.0], [series.delay_spectrum_s for series in series_list])
+
+        invalid_series = [[], [{"number_spectra": 2}], [{"basename": "a", "number_spectra": 0}],
+                          [{"basename": "a", "number_spectra": 1, "acquisition_mode": "Auto"}],
+                          [{"basename": "a", "number_spectra": 1, "delay": 1.0}],
+                          [{"basename": "a", "number_spectra": 1}, {"basename": "a", "number_spectra": 1}],
+                          ["a"], [None], [{"basename": ["a"], "number_spectra": 1}],
+                          [{"basename": "a", "number_spectra": True}],
+                          [{"basename": "a", "number_spectra": 1, "delay_spectrum_s": False}],
+                          [{"basename": "a", "number_spectra": 1, "overwrite": "false"}],
+                          [{"basename": "a", "number_spectra": 1, "comment": 2}]]
+        for series_data in invalid_series:
+            self.assertRaises(ValueError, parse_acquisition_plan, {"series": series_data})
+        self.assertRaises(ValueError, parse_acquisition_plan, {"version": 2, "series": self.plan["series"]})
+        self.assertRaises(ValueError, parse_acquisition_plan, {"defaults": [], "series": self.plan["series"]})
+
+    def testRun(self):
+        """
+        Tests the series are acquired back to back with the statistics of each series.
+        """
+
+        series_list = parse_acquisition_plan(self.plan)
+        started_series = []
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            runner = self._create_runner(driver, series_list)
+            runner.series_callback = lambda index, number, series: started_series.append((index, series.basename))
+            runner.run()
+
+            self.assertEqual(5, driver.number_saved)
+
+        self.assertEqual([(1, "sample_a"), (2, "sample_b")], started_series)
+        summary = runner.summarize()
+        self.assertEqual(2, summary["number_run"])
+        self.assertEqual(0, summary["number_failed"])
+        self.assertEqual(5, summary["number_saved"])
+        self.assertEqual([2, 3], [result["timing"]["number_spectra"] for result in summary["series"]])
+        self.assertEqual([0, 0], [result["number_issues"] for result in summary["series"]])
+        for basename in ["sample_a", "sample_b"]:
+            self.assertTrue(os.path.isfile(get_acquisition_manifest_file_path(self.save_folder, basename)))
+
+        lines = format_plan_summary(summary).splitlines()
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines[2].strip().startswith("sample_a"))
+
+    def testStopOnError(self):
+        """
+        Tests a failed series stops the plan, or the next series is acquired.
+        """
+
+        series_list = [AcquisitionSeries("failing", 1, 0.0), AcquisitionSeries("sample", 1, 0.0)]
+        with FailingDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            runner = self._create_runner(driver, series_list)
+            runner.run()
+            self.assertEqual(1, len(runner.results))
+            self.assertEqual(1, runner.number_failed)
+            self.assertTrue(runner.results[0].error_message.startswith("Cannot save"))
+
+            runner.stop_on_error = False
+            runner.run()
+            self.assertEqual(2, len(runner.results))
+            self.assertEqual([0, 1], [result.number_saved for result in runner.results])
+
+    def testCancel(self):
+        """
+        Tests the next series are not acquired when the plan is cancelled.
+        """
+
+        series_list = parse_acquisition_plan(self.plan)
+        with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0, number_channels=16) as driver:
+            runner = self._create_runner(driver, series_list)
+
+            def progress_callback(number_done, number_total, elapsed_time_s):
+                runner.cancel()
+
+            runner.progress_callback = progress_callback
+            runner.run()
+
+        self.assertEqual(1, len(runner.results))
+        self.assertEqual(1, runner.results[0].number_saved)
+        self.assertTrue(runner.results[0].is_cancelled)
+
+    def testMain(self):
+        """
+        Tests the command line runs the plan with the simulated backend and writes the report.
+        """
+
+        plan_file_path = self._write_plan(self.plan)
+        report_file_path = os.path.join(self.save_folder, "report.json")
+        timing_file_path = os.path.join(self.save_folder, "timing.jsonl")
+
+        output_file = StringIO()
+        exit_code = main(["--backend", "Simulated", "--time-scale", "0", "--save-folder", self.save_folder,
+                          "--report", report_file_path, "--timing-file", timing_file_path, plan_file_path],
+                         output_file)
+        self.assertEqual(EXIT_SUCCESS, exit_code, output_file.getvalue())
+        with open(report_file_path, 'r') as report_file:
+            self.assertEqual(5, json.load(report_file)["number_saved"])
+        with open(timing_file_path, 'r') as timing_file:
+            events = [json.loads(line)["event"] for line in timing_file]
+        self.assertEqual(2, events.count("session"))
+        self.assertEqual(2, events.count("summary"))
+
+        output_file = StringIO()
+        self.assertEqual(EXIT_SUCCESS, main(["--dry-run", plan_file_path], output_file))
+        self.assertEqual(2, len(output_file.getvalue().splitlines()))
+
+        self.assertEqual(EXIT_USAGE_ERROR, main([], StringIO()))
+        self.assertEqual(EXIT_USAGE_ERROR, main([self._write_plan({"series": []})], StringIO()))
+        self.assertEqual(EXIT_USAGE_ERROR, main([self._write_plan({"series": ["sample_a"]})], StringIO()))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
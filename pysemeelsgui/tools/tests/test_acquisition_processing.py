@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_processing
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_processing`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_processing`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import csv
+import glob
+import time
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_processing import BackgroundProcessor, ProcessingOptions, process_saved_file, \
+    get_zero_loss_peak_csv_path
+from pysemeelsgui.tools.acquisition_loop import AcquisitionLoop
+from pysemeelsgui.tools.acquisition_timing import STEP_SUBMIT_PROCESSING
+from pysemeelsgui.tools.simulated_driver import SimulatedDriver
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder
+from pysemeelsgui.zero_loss_peak_batch_fit import ZeroLossPeakFitResult
+
+
+# Globals and constants variables.
+
+def fit_maximum(energies_eV, counts):
+    result = ZeroLossPeakFitResult()
+    result.position_eV = float(energies_eV[np.argmax(counts)])
+    result.height = float(np.max(counts))
+    return result
+
+
+def fit_error(energies_eV, counts):
+    raise RuntimeError("No peak")
+
+
+class RecordingConverter(object):
+    """
+    Record the parsed files given to the converter.
+    """
+
+    def __init__(self):
+        self.elv_files = []
+
+    def __call__(self, elv_file_path, convert_msa, convert_hdf5, elv_file):
+        self.elv_files.append(elv_file)
+
+
+class FitWaitingOtherWorker(object):
+    """
+    Fit which succeeds only if another worker process is fitting at the same time.
+    """
+
+    def __init__(self, folder, number_workers, timeout_s=10.0):
+        self.folder = folder
+        self.number_workers = number_workers
+        self.timeout_s = timeout_s
+
+    def __call__(self, energies_eV, counts):
+        open(os.path.join(self.folder, "worker_{:d}.started".format(os.getpid())), 'w').close()
+        end_time = time.time() + self.timeout_s
+        while len(glob.glob(os.path.join(self.folder, "worker_*.started"))) < self.number_workers:
+            if time.time() > end_time:
+                raise RuntimeError("No other worker")
+            time.sleep(0.01)
+        return fit_maximum(energies_eV, counts)
+
+
+class TestAcquisitionProcessing(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_processing`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.save_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.save_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testProcessSavedFile(self):
+        """
+        Tests the outputs of a saved file and the fit errors kept in the result.
+        """
+
+        elv_file_path = generate_data_folder(self.save_folder, 1, number_channels=64)[0]
+        root_path = os.path.splitext(elv_file_path)[0]
+
+        processed_spectrum = process_saved_file(elv_file_path, ProcessingOptions(fit_function=fit_maximum))
+
+        self.assertTrue(processed_spectrum.success)
+        self.assertEqual([root_path + ".msa", root_path + ".hdf5", root_path + "_thumbnail.png"],
+                         processed_spectrum.output_file_paths)
+        for file_path in processed_spectrum.output_file_paths:
+            self.assertTrue(os.path.isfile(file_path))
+        self.assertAlmostEqual(0.0, processed_spectrum.zero_loss_peak.position_eV, delta=1.0)
+
+        options = ProcessingOptions(convert_msa=False, convert_hdf5=False, generate_thumbnail=False,
+                                    fit_function=fit_error)
+        processed_spectrum = process_saved_file(elv_file_path, options)
+        self.assertTrue(processed_spectrum.success)
+        self.assertEqual([], processed_spectrum.output_file_paths)
+        self.assertEqual("No peak", processed_spectrum.zero_loss_peak.error_message)
+
+        processed_spectrum = process_saved_file(root_path + "_missing.elv", options)
+        self.assertFalse(processed_spectrum.success)
+
+    def testConvertParsedFile(self):
+        """
+        Tests the converter receives the file parsed for the fit instead of reading it again.
+        """
+
+        elv_file_path = generate_data_folder(self.save_folder, 1, number_channels=64)[0]
+        converter = RecordingConverter()
+        options = ProcessingOptions(generate_thumbnail=False, fit_function=fit_maximum, convert_function=converter)
+
+        processed_spectrum = process_saved_file(elv_file_path, options)
+
+        self.assertTrue(processed_spectrum.success)
+        self.assertEqual(1, len(converter.elv_files))
+        self.assertEqual(64, len(converter.elv_files[0].counts))
+
+    def testSubmitDeferred(self):
+        """
+        Tests the files submitted when the queue is full are deferred and all processed at the close.
+        """
+
+        elv_file_paths = generate_data_folder(self.save_folder, 6, number_channels=64)
+        options = ProcessingOptions(convert_hdf5=False, generate_thumbnail=False, fit_function=fit_maximum)
+
+        processed_file_paths = []
+        with BackgroundProcessor(options, queue_size=1) as processor:
+            processor.result_callback = lambda processed_spectrum: \
+                processed_file_paths.append(processed_spectrum.elv_file_path)
+            submitted = [processor.submit(elv_file_path) for elv_file_path in elv_file_paths]
+
+        self.assertIn(False, submitted)
+        self.assertEqual(submitted.count(False), processor.number_deferred)
+        self.assertEqual(elv_file_paths, processed_file_paths)
+        self.assertTrue(all(processed_spectrum.success for processed_spectrum in processor.results))
+
+        csv_file_path = get_zero_loss_peak_csv_path(self.save_folder, "test")
+        processor.export_zero_loss_peak_csv(csv_file_path)
+        with open(csv_file_path, 'r') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        self.assertEqual([os.path.basename(elv_file_path) for elv_file_path in elv_file_paths],
+                         [row["spectrum"] for row in rows])
+
+    def testSeveralWorkers(self):
+        """
+        Tests the saved files are processed at the same time on several workers.
+        """
+
+        elv_file_paths = generate_data_folder(self.save_folder, 2, number_channels=64)
+        marker_folder = os.path.join(self.save_folder, "markers")
+        os.makedirs(marker_folder)
+        options = ProcessingOptions(convert_msa=False, convert_hdf5=False, generate_thumbnail=False,
+                                    fit_function=FitWaitingOtherWorker(marker_folder, 2))
+
+        with BackgroundProcessor(options, number_workers=2) as processor:
+            for elv_file_path in elv_file_paths:
+                processor.submit(elv_file_path)
+
+        self.assertEqual(sorted(elv_file_paths),
+                         sorted(processed_spectrum.elv_file_path for processed_spectrum in processor.results))
+        for processed_spectrum in processor.results:
+            self.assertIsNone(processed_spectrum.zero_loss_peak.error_message)
+
+    def testAcquisitionLoop(self):
+        """
+        Tests each saved spectrum of the acquisition loop is processed.
+        """
+
+        options = ProcessingOptions(generate_thumbnail=False, fit_function=fit_maximum)
+        with BackgroundProcessor(options) as processor:
+            with SimulatedDriver(self.save_folder, acquisition_time_s=0.0, time_scale=0.0,
+                                 number_channels=64) as driver:
+                acquisition_loop = AcquisitionLoop(driver)
+                acquisition_loop.number_spectra = 3
+                acquisition_loop.delay_spectrum_s = 0.0
+                acquisition_loop.save_folder = self.save_folder
+                acquisition_loop.stable_time_s = 0.01
+                acquisition_loop.saved_file_callback = processor.submit
+                acquisition_loop.run()
+
+        self.assertEqual(3, len(processor.results))
+        self.assertEqual(3, acquisition_loop.timer.summarize()["steps"][STEP_SUBMIT_PROCESSING]["count"])
+        for spectrum_id in range(1, 4):
+            self.assertTrue(os.path.isfile(os.path.join(self.save_folder, "test_{:d}.msa".format(spectrum_id))))
+            self.assertTrue(os.path.isfile(os.path.join(self.save_folder, "test_{:d}.hdf5".format(spectrum_id))))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
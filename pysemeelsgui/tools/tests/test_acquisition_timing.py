@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_timing
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_timing`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_timing`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import json
+
+# Third party modules.
+from six.moves import StringIO
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_timing import AcquisitionTimer, compute_step_statistics, format_summary, \
+    STEP_SAVE_AS, STEP_SPECTRUM, STEP_CONFIRM_OVERWRITE, OUTCOME_OK, OUTCOME_ERROR, OUTCOME_NOT_SHOWN
+
+
+# Globals and constants variables.
+
+class TestAcquisitionTiming(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_timing`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testComputeStepStatistics(self):
+        """
+        Tests the percentiles of the durations.
+        """
+
+        statistics = compute_step_statistics([float(value) for value in range(1, 101)])
+
+        self.assertEqual(100, statistics["count"])
+        self.assertAlmostEqual(50.5, statistics["p50_s"])
+        self.assertAlmostEqual(99.01, statistics["p99_s"])
+        self.assertAlmostEqual(100.0, statistics["max_s"])
+        self.assertEqual({"count": 0}, compute_step_statistics([]))
+
+    def testMeasure(self):
+        """
+        Tests the outcome of the records and the JSON lines.
+        """
+
+        record_file = StringIO()
+        timer = AcquisitionTimer(record_file)
+        timer.start_session(basename="test")
+
+        for spectrum_id in [1, 2]:
+            with timer.measure(spectrum_id, STEP_SPECTRUM):
+                with timer.measure(spectrum_id, STEP_SAVE_AS):
+                    pass
+        with timer.measure(2, STEP_CONFIRM_OVERWRITE) as record:
+            record["outcome"] = OUTCOME_NOT_SHOWN
+        with self.assertRaises(RuntimeError):
+            with timer.measure(3, STEP_SAVE_AS):
+                raise RuntimeError("Save as dialog not found")
+
+        summary = timer.end_session()
+
+        self.assertEqual([OUTCOME_OK] * 4 + [OUTCOME_NOT_SHOWN, OUTCOME_ERROR],
+                         [record["outcome"] for record in timer.records])
+        self.assertEqual(2, summary["number_spectra"])
+        self.assertEqual(2, summary["steps"][STEP_SAVE_AS]["count"])
+        self.assertEqual(1, summary["steps"][STEP_SAVE_AS]["errors"])
+        self.assertNotIn(STEP_CONFIRM_OVERWRITE, summary["steps"])
+        self.assertGreater(summary["spectra_per_minute"], 0.0)
+
+        records = [json.loads(line) for line in record_file.getvalue().splitlines()]
+        self.assertEqual(["session"] + ["step"] * 6 + ["summary"], [record["event"] for record in records])
+        self.assertEqual("test", records[0]["basename"])
+
+        lines = format_summary(summary).splitlines()
+        self.assertEqual(4, len(lines))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_acquisition_tuning
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_tuning`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.acquisition_tuning`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import time
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.acquisition_tuning import TimeoutTuner
+from pysemeelsgui.tools.polling import WaitTimeoutError
+
+
+# Globals and constants variables.
+
+def create_delayed_condition(delay_s):
+    end_time = time.perf_counter() + delay_s
+    return lambda: time.perf_counter() >= end_time
+
+
+class TestAcquisitionTuning(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.acquisition_tuning`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testGetTimeout(self):
+        """
+        Tests the initial timeout during the calibration and the tuned timeout in the limits.
+        """
+
+        tuner = TimeoutTuner(initial_timeout_s=10.0, minimum_timeout_s=1.0, maximum_timeout_s=30.0,
+                             calibration_count=3, percentile=50, safety_factor=2.0, margin_s=0.5)
+
+        self.assertEqual(10.0, tuner.get_timeout("dialog"))
+        self.assertEqual(2.0, tuner.get_timeout("dialog", initial_timeout_s=2.0))
+        for duration_s in [1.0, 2.0]:
+            tuner.record("dialog", duration_s)
+        self.assertFalse(tuner.is_calibrated("dialog"))
+        self.assertEqual(10.0, tuner.get_timeout("dialog"))
+
+        tuner.record("dialog", 3.0)
+        self.assertTrue(tuner.is_calibrated("dialog"))
+        self.assertAlmostEqual(4.5, tuner.get_timeout("dialog"))
+
+        for step, duration_s in [("fast", 0.01), ("slow", 100.0)]:
+            for _ in range(3):
+                tuner.record(step, duration_s)
+        self.assertEqual(1.0, tuner.get_timeout("fast"))
+        self.assertEqual(30.0, tuner.get_timeout("slow"))
+
+    def testBackOff(self):
+        """
+        Tests the timeout increased after a timeout stays the minimum timeout of the step.
+        """
+
+        tuner = TimeoutTuner(initial_timeout_s=1.0, minimum_timeout_s=0.1, maximum_timeout_s=4.0, calibration_count=1,
+                             safety_factor=1.0, margin_s=0.0, backoff_factor=2.0)
+        tuner.record("dialog", 0.2)
+        self.assertAlmostEqual(0.2, tuner.get_timeout("dialog"))
+
+        self.assertAlmostEqual(0.4, tuner.back_off("dialog", 0.2))
+        self.assertAlmostEqual(0.4, tuner.get_timeout("dialog"))
+        self.assertEqual(4.0, tuner.back_off("dialog", 3.0))
+        self.assertEqual(2, tuner.summarize()["dialog"]["timeouts"])
+
+    def testWait(self):
+        """
+        Tests a slow window is waited for with an increased timeout, and the timeout errors.
+        """
+
+        tuner = TimeoutTuner(initial_timeout_s=0.05, minimum_timeout_s=0.01, maximum_timeout_s=0.4,
+                             calibration_count=1, safety_factor=1.0, margin_s=0.0, backoff_factor=2.0)
+
+        self.assertTrue(tuner.wait("dialog", create_delayed_condition(0.12)))
+        summary = tuner.summarize()["dialog"]
+        self.assertEqual(1, summary["count"])
+        self.assertEqual(2, summary["timeouts"])
+        self.assertAlmostEqual(0.2, tuner.get_timeout("dialog"))
+
+        self.assertRaises(WaitTimeoutError, tuner.wait, "dialog", lambda: False)
+        self.assertEqual(0.4, tuner.get_timeout("dialog"))
+
+        self.assertRaises(WaitTimeoutError, tuner.wait, "confirm", lambda: False, initial_timeout_s=0.02,
+                          back_off=False)
+        self.assertEqual(0, tuner.summarize().get("confirm", {"timeouts": 0})["timeouts"])
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_batch_benchmark
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.batch_benchmark`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.batch_benchmark`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+
+# Third party modules.
+from six.moves import StringIO
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_benchmark import run_benchmark, compare_reports, format_report, clean_outputs, main, \
+    EXIT_SUCCESS, EXIT_USAGE_ERROR, STAGE_SCAN, STAGE_PARSE, MODE_SINGLE_PASS, MODE_MULTI_PASS
+from pysemeelsgui.tools.batch_runner import STAGE_BATCH_CONVERT
+from pysemeelsgui.tools.batch_manifest import OUTPUT_MSA
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder
+
+
+# Globals and constants variables.
+
+class TestBatchBenchmark(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.batch_benchmark`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.elv_file_paths = generate_data_folder(self.data_folder, 4, number_folders=2, number_channels=32)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testRunBenchmark(self):
+        """
+        Tests one case per mode and number of workers with the stage times, and the outputs are removed at the end.
+        """
+
+        report = run_benchmark(self.data_folder, worker_counts=[1, 2], outputs=[OUTPUT_MSA], isolated=False)
+
+        self.assertEqual([(MODE_SINGLE_PASS, 1), (MODE_SINGLE_PASS, 2), (MODE_MULTI_PASS, 1), (MODE_MULTI_PASS, 2)],
+                         [(case["mode"], case["number_workers"]) for case in report["cases"]])
+        stage_names = {MODE_SINGLE_PASS: [STAGE_SCAN, STAGE_PARSE, OUTPUT_MSA],
+                       MODE_MULTI_PASS: [STAGE_SCAN, STAGE_BATCH_CONVERT]}
+        for case in report["cases"]:
+            self.assertEqual(4, case["number_files"])
+            self.assertEqual(4, case["number_converted"])
+            self.assertGreater(case["files_per_s"], 0.0)
+            for stage_name in stage_names[case["mode"]]:
+                self.assertIn(stage_name, case["stage_times_s"])
+
+        lines = format_report(report).splitlines()
+        self.assertEqual(4, len(lines) - 1)
+        self.assertEqual([MODE_SINGLE_PASS] * 2 + [MODE_MULTI_PASS] * 2, [line.split()[0] for line in lines[1:]])
+        for root, _folders, file_names in os.walk(self.data_folder):
+            for file_name in file_names:
+                self.assertTrue(file_name.endswith(".elv"))
+
+    def testCleanOutputs(self):
+        """
+        Tests only the elv files are kept.
+        """
+
+        msa_file_path = os.path.splitext(self.elv_file_paths[0])[0] + ".msa"
+        with open(msa_file_path, 'w') as msa_file:
+            msa_file.write("")
+
+        clean_outputs(self.data_folder)
+
+        self.assertFalse(os.path.exists(msa_file_path))
+        self.assertTrue(all(os.path.isfile(elv_file_path) for elv_file_path in self.elv_file_paths))
+
+    def testCompareReports(self):
+        """
+        Tests a case slower than the tolerance is a regression, compared with the case of the same mode.
+        """
+
+        baseline_report = {"cases": [{"number_workers": 1, "files_per_s": 100.0},
+                                     {"number_workers": 2, "files_per_s": 200.0},
+                                     {"mode": MODE_MULTI_PASS, "number_workers": 2, "files_per_s": 50.0}]}
+        report = {"cases": [{"mode": MODE_SINGLE_PASS, "number_workers": 1, "files_per_s": 85.0},
+                            {"mode": MODE_SINGLE_PASS, "number_workers": 2, "files_per_s": 150.0},
+                            {"mode": MODE_SINGLE_PASS, "number_workers": 4, "files_per_s": 1.0},
+                            {"mode": MODE_MULTI_PASS, "number_workers": 2, "files_per_s": 45.0}]}
+
+        regressions = compare_reports(report, baseline_report, tolerance=0.2)
+
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith("single_pass 2 workers"))
+
+    def testMainUsageError(self):
+        """
+        Tests the invalid options.
+        """
+
+        for argv in [["-j", "0"], ["--outputs", "movie"], ["-n", "0"], ["-d", self.data_folder],
+                     ["--modes", "fast"]]:
+            output_file = StringIO()
+            self.assertEqual(EXIT_USAGE_ERROR, main(argv, output_file))
+
+    def testMain(self):
+        """
+        Tests the report of a small run.
+        """
+
+        output_file = StringIO()
+        exit_code = main(["-n", "3", "--channels", "32", "-j", "1", "--outputs", OUTPUT_MSA], output_file)
+
+        self.assertEqual(EXIT_SUCCESS, exit_code)
+        self.assertIn("Generated 3 files", output_file.getvalue())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_batch_checkpoint
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.batch_checkpoint`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.batch_checkpoint`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_checkpoint import CheckpointJournal, atomic_output_file, get_checkpoint_file_path, \
+    get_partial_file_path
+
+
+# Globals and constants variables.
+
+class TestBatchCheckpoint(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.batch_checkpoint`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.data_folder, "spectrum_1.elv")
+        self._write(self.source_path, "spectrum")
+
+        self.journal_file_path = get_checkpoint_file_path(self.data_folder)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def _write(self, file_path, text, mtime_ns=None):
+        with open(file_path, 'w') as output_file:
+            output_file.write(text)
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testPartialFilePath(self):
+        """
+        Tests the partial file is hidden and keeps the extension.
+        """
+
+        partial_file_path = get_partial_file_path(os.path.join("data", "spectrum_1_spectrum.png"))
+        self.assertEqual(os.path.join("data", ".spectrum_1_spectrum.partial.png"), partial_file_path)
+
+    def testAtomicOutputFile(self):
+        """
+        Tests the output is renamed only when complete.
+        """
+
+        file_path = os.path.join(self.data_folder, "spectrum_1.msa")
+        with atomic_output_file(file_path) as partial_file_path:
+            self._write(partial_file_path, "msa")
+            self.assertFalse(os.path.exists(file_path))
+        self.assertTrue(os.path.isfile(file_path))
+        self.assertFalse(os.path.exists(partial_file_path))
+
+        failed_file_path = os.path.join(self.data_folder, "spectrum_2.msa")
+        with self.assertRaises(ValueError):
+            with atomic_output_file(failed_file_path) as partial_file_path:
+                self._write(partial_file_path, "partial")
+                raise ValueError("Crash")
+        self.assertFalse(os.path.exists(failed_file_path))
+        self.assertFalse(os.path.exists(partial_file_path))
+
+    def testResume(self):
+        """
+        Tests the entries are kept only when resuming.
+        """
+
+        checkpoint = CheckpointJournal(self.journal_file_path)
+        checkpoint.start()
+        checkpoint.record(self.source_path, "msa")
+        checkpoint.record(self.source_path, "spectrum_figure", {"dpi": 100})
+        checkpoint.close()
+        # Line cut by a crash.
+        with open(self.journal_file_path, 'a') as journal_file:
+            journal_file.write('{"output": "hdf5", "sour')
+
+        checkpoint = CheckpointJournal(self.journal_file_path)
+        checkpoint.start(resume=True)
+        self.assertTrue(checkpoint.is_done(self.source_path, "msa"))
+        self.assertTrue(checkpoint.is_done(self.source_path, "spectrum_figure", {"dpi": 100}))
+        self.assertFalse(checkpoint.is_done(self.source_path, "spectrum_figure", {"dpi": 200}))
+        self.assertFalse(checkpoint.is_done(self.source_path, "hdf5"))
+        checkpoint.close()
+
+        checkpoint = CheckpointJournal(self.journal_file_path)
+        checkpoint.start(resume=False)
+        self.assertFalse(checkpoint.is_done(self.source_path, "msa"))
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(self.journal_file_path))
+
+    def testChangedSource(self):
+        """
+        Tests an entry is not valid when the source changed after the interrupted run.
+        """
+
+        with CheckpointJournal(self.journal_file_path) as checkpoint:
+            checkpoint.start()
+            checkpoint.record(self.source_path, "msa")
+
+        self._write(self.source_path, "spectrum changed")
+
+        checkpoint = CheckpointJournal(self.journal_file_path)
+        self.assertTrue(checkpoint.load())
+        self.assertFalse(checkpoint.is_done(self.source_path, "msa"))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
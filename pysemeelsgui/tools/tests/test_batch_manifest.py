@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_batch_manifest
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.batch_manifest`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.batch_manifest`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_manifest import BatchManifest, get_manifest_file_path, OUTPUT_MSA, \
+    OUTPUT_PROJECT_HDF5
+
+
+# Globals and constants variables.
+
+class TestBatchManifest(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.batch_manifest`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.data_folder, "spectrum_1.elv")
+        self.output_path = os.path.join(self.data_folder, "spectrum_1.msa")
+        self._write(self.source_path, "spectrum")
+        self._write(self.output_path, "msa")
+
+        self.manifest_file_path = get_manifest_file_path(self.data_folder)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def _write(self, file_path, text, mtime_ns=None):
+        with open(file_path, 'w') as output_file:
+            output_file.write(text)
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testRecordAndReload(self):
+        """
+        Test that a recorded output is up to date after saving and loading the manifest.
+        """
+        manifest = BatchManifest(self.manifest_file_path)
+        manifest.load()
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_MSA, output_file_paths=[self.output_path]))
+
+        manifest.record(self.source_path, OUTPUT_MSA)
+        manifest.save()
+
+        manifest = BatchManifest(self.manifest_file_path)
+        manifest.load()
+        self.assertFalse(manifest.is_stale(self.source_path, OUTPUT_MSA, output_file_paths=[self.output_path]))
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_PROJECT_HDF5))
+
+    def testStaleOptionsAndOutput(self):
+        """
+        Test that changed options and missing outputs are stale.
+        """
+        manifest = BatchManifest(self.manifest_file_path)
+        manifest.record(self.source_path, OUTPUT_PROJECT_HDF5, {"project_hdf5_file": "a.hdf5"})
+
+        self.assertFalse(manifest.is_stale(self.source_path, OUTPUT_PROJECT_HDF5, {"project_hdf5_file": "a.hdf5"}))
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_PROJECT_HDF5, {"project_hdf5_file": "b.hdf5"}))
+
+        manifest.record(self.source_path, OUTPUT_MSA)
+        os.remove(self.output_path)
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_MSA, output_file_paths=[self.output_path]))
+
+    def testChangedSource(self):
+        """
+        Test that a modified source makes all its outputs stale.
+        """
+        manifest = BatchManifest(self.manifest_file_path)
+        manifest.record(self.source_path, OUTPUT_MSA)
+        manifest.record(self.source_path, OUTPUT_PROJECT_HDF5)
+        manifest.save()
+
+        self._write(self.source_path, "spectrum 2")
+
+        manifest = BatchManifest(self.manifest_file_path)
+        manifest.load()
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_MSA))
+
+        manifest.record(self.source_path, OUTPUT_MSA)
+        self.assertFalse(manifest.is_stale(self.source_path, OUTPUT_MSA))
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_PROJECT_HDF5))
+
+    def testContentHash(self):
+        """
+        Test that a touched file with the same content is unchanged when the content hash is used.
+        """
+        manifest = BatchManifest(self.manifest_file_path, use_content_hash=True)
+        manifest.record(self.source_path, OUTPUT_MSA)
+        manifest.save()
+
+        self._write(self.source_path, "spectrum", mtime_ns=10 ** 18)
+
+        manifest = BatchManifest(self.manifest_file_path, use_content_hash=True)
+        manifest.load()
+        self.assertFalse(manifest.is_stale(self.source_path, OUTPUT_MSA))
+
+        manifest = BatchManifest(self.manifest_file_path, use_content_hash=False)
+        manifest.load()
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_MSA))
+
+    def testCorruptedManifest(self):
+        """
+        Test that a corrupted manifest processes all the files.
+        """
+        self._write(self.manifest_file_path, "{not json")
+
+        manifest = BatchManifest(self.manifest_file_path)
+        manifest.load()
+
+        self.assertTrue(manifest.is_stale(self.source_path, OUTPUT_MSA))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
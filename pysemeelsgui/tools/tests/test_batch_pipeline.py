@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_batch_pipeline
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.batch_pipeline`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.batch_pipeline`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+import threading
+
+# Third party modules.
+import numpy as np
+import h5py
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_pipeline import BatchPipeline, SPECTRUM_FIGURE_SUFFIX, WINDOW_FIGURE_SUFFIX
+from pysemeelsgui.tools.batch_manifest import BatchManifest, get_manifest_file_path
+from pysemeelsgui.tools.project_hdf5 import ProjectHdf5Reader
+from pysemeelsgui.tools.batch_checkpoint import CheckpointJournal, get_checkpoint_file_path
+
+
+# Globals and constants variables.
+
+class FakeElvFile(object):
+    def __init__(self, energies_eV, counts):
+        self.energies_eV = energies_eV
+        self.counts = counts
+
+
+class CountingReader(object):
+    """
+    Read the fake .elv files written by the test and count how many times each file is read.
+    """
+
+    def __init__(self):
+        self.number_reads = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, elv_file_path):
+        with self.lock:
+            self.number_reads[elv_file_path] = self.number_reads.get(elv_file_path, 0) + 1
+
+        with open(elv_file_path, 'r') as elv_file:
+            text = elv_file.read()
+        if text == "bad":
+            raise ValueError("Cannot parse")
+        scale = float(text)
+        energies_eV = np.linspace(-10.0, 90.0, 101)
+        return FakeElvFile(energies_eV, scale * np.exp(-0.5 * energies_eV ** 2))
+
+
+class TestBatchPipeline(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.batch_pipeline`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.data_folder, "day_2"))
+        self.elv_file_paths = [os.path.join(self.data_folder, "spectrum_1.elv"),
+                               os.path.join(self.data_folder, "spectrum_2.elv"),
+                               os.path.join(self.data_folder, "day_2", "spectrum_3.elv")]
+        for index, elv_file_path in enumerate(self.elv_file_paths):
+            with open(elv_file_path, 'w') as elv_file:
+                elv_file.write("{:d}".format(index + 1))
+
+        self.project_hdf5_file_path = os.path.join(self.data_folder, "project.hdf5")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def _create_pipeline(self, reader):
+        pipeline = BatchPipeline(self.data_folder, read_function=reader, queue_size=1, number_workers=2)
+        pipeline.convert_msa = True
+        pipeline.convert_hdf5 = True
+        pipeline.project_hdf5_file = self.project_hdf5_file_path
+        pipeline.generate_spectrum_figure = True
+        pipeline.generate_window_figure = True
+        return pipeline
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testSinglePass(self):
+        """
+        Tests each file is read once and all the outputs are created.
+        """
+
+        reader = CountingReader()
+        progress = []
+        pipeline = self._create_pipeline(reader)
+        pipeline.progress_callback = lambda *values: progress.append(values[:2])
+        pipeline.convert()
+
+        self.assertEqual(sorted(self.elv_file_paths), pipeline.converted_file_paths)
+        self.assertEqual([], pipeline.failed_file_paths)
+        self.assertEqual({elv_file_path: 1 for elv_file_path in self.elv_file_paths}, reader.number_reads)
+        self.assertEqual([1, 2, 3], [number_done for number_done, _number_total in progress])
+        self.assertEqual((3, 3), progress[-1])
+        self.assertEqual(3, pipeline.number_discovered)
+
+        for elv_file_path in self.elv_file_paths:
+            root_path = os.path.splitext(elv_file_path)[0]
+            for suffix in [".msa", ".hdf5", SPECTRUM_FIGURE_SUFFIX + ".png", WINDOW_FIGURE_SUFFIX + ".png"]:
+                self.assertTrue(os.path.isfile(root_path + suffix), root_path + suffix)
+
+        with ProjectHdf5Reader(self.project_hdf5_file_path) as project_reader:
+            _energies_eV, counts = project_reader.get_spectrum("day_2/spectrum_3.elv")
+        self.assertAlmostEqual(3.0, counts.max())
+
+        # The MSA and HDF5 files are written from the parsed spectrum.
+        with h5py.File(self.elv_file_paths[2][:-4] + ".hdf5", 'r') as hdf5_file:
+            self.assertAlmostEqual(3.0, hdf5_file["counts"][...].max())
+
+    def testFailedFile(self):
+        """
+        Tests a file that cannot be read does not stop the other files.
+        """
+
+        with open(self.elv_file_paths[0], 'w') as elv_file:
+            elv_file.write("bad")
+
+        pipeline = self._create_pipeline(CountingReader())
+        pipeline.convert()
+
+        self.assertEqual([self.elv_file_paths[0]], pipeline.failed_file_paths)
+        self.assertEqual(2, len(pipeline.converted_file_paths))
+        self.assertFalse(os.path.isfile(self.elv_file_paths[0][:-4] + ".msa"))
+
+    def testManifest(self):
+        """
+        Tests the unchanged files are not read again.
+        """
+
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        pipeline = self._create_pipeline(CountingReader())
+        pipeline.manifest = manifest
+        pipeline.convert()
+
+        reader = CountingReader()
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        manifest.load()
+        pipeline = self._create_pipeline(reader)
+        pipeline.manifest = manifest
+        pipeline.convert()
+
+        self.assertEqual({}, reader.number_reads)
+        self.assertEqual(3, pipeline.number_discovered)
+        self.assertEqual(3, pipeline.number_unchanged)
+        self.assertEqual([], pipeline.converted_file_paths)
+
+    def testFileList(self):
+        """
+        Tests only the listed files are processed, without scanning the folder.
+        """
+
+        reader = CountingReader()
+        pipeline = self._create_pipeline(reader)
+        pipeline.elv_file_paths = self.elv_file_paths[1:]
+        pipeline.convert()
+
+        self.assertEqual(sorted(self.elv_file_paths[1:]), pipeline.converted_file_paths)
+        self.assertEqual(sorted(self.elv_file_paths[1:]), sorted(reader.number_reads))
+        self.assertEqual(2, pipeline.number_discovered)
+
+    def testCancel(self):
+        """
+        Tests no file is read after the cancel event is set.
+        """
+
+        reader = CountingReader()
+        pipeline = self._create_pipeline(reader)
+        pipeline.cancel_event = threading.Event()
+        pipeline.cancel_event.set()
+        pipeline.convert()
+
+        self.assertEqual({}, reader.number_reads)
+
+    def testResume(self):
+        """
+        Tests the outputs completed before the interruption are not created again.
+        """
+
+        checkpoint = CheckpointJournal(get_checkpoint_file_path(self.data_folder))
+        checkpoint.start()
+        pipeline = self._create_pipeline(CountingReader())
+        pipeline.project_hdf5_file = ""
+        pipeline.checkpoint = checkpoint
+        pipeline.convert()
+        checkpoint.close()
+
+        os.remove(self.elv_file_paths[1][:-4] + ".msa")
+
+        reader = CountingReader()
+        checkpoint = CheckpointJournal(get_checkpoint_file_path(self.data_folder))
+        checkpoint.start(resume=True)
+        pipeline = self._create_pipeline(reader)
+        pipeline.project_hdf5_file = ""
+        pipeline.checkpoint = checkpoint
+        pipeline.convert()
+        checkpoint.close()
+
+        self.assertEqual({self.elv_file_paths[1]: 1}, reader.number_reads)
+        self.assertTrue(os.path.isfile(self.elv_file_paths[1][:-4] + ".msa"))
+        self.assertEqual(2, pipeline.number_unchanged)
+
+    def testProjectCompleteWhenFlushed(self):
+        """
+        Tests the project outputs are journaled only after their rows are written.
+        """
+
+        checkpoint = CheckpointJournal(get_checkpoint_file_path(self.data_folder))
+        checkpoint.start()
+        pipeline = BatchPipeline(self.data_folder, read_function=CountingReader(), queue_size=1, number_workers=1)
+        pipeline.convert_msa = False
+        pipeline.convert_hdf5 = False
+        pipeline.project_hdf5_file = self.project_hdf5_file_path
+        pipeline.checkpoint = checkpoint
+        pipeline.convert()
+        checkpoint.close()
+
+        self.assertEqual(3, len(pipeline.converted_file_paths))
+        self.assertEqual(3, len(checkpoint.entries))
+        with ProjectHdf5Reader(self.project_hdf5_file_path) as project_reader:
+            self.assertEqual(3, project_reader.number_spectra)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
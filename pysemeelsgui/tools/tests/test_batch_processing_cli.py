@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_batch_processing_cli
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.batch_processing_cli`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.batch_processing_cli`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+import json
+from six.moves import StringIO
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_processing_cli import main, EXIT_SUCCESS, EXIT_FILES_FAILED, EXIT_USAGE_ERROR, \
+    EXIT_PROCESSING_ERROR, EXIT_INTERRUPTED
+from pysemeelsgui.tools.batch_runner import STAGE_BATCH_CONVERT, STAGE_PIPELINE, STATE_START, STATE_DONE
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder
+
+# Globals and constants variables.
+
+
+class InterruptedOutput(StringIO):
+    """
+    Output interrupted by the user when the first progress event is written.
+    """
+
+    def __init__(self):
+        StringIO.__init__(self)
+        self.interrupted = False
+
+    def write(self, text):
+        if not self.interrupted and '"event": "progress"' in text:
+            self.interrupted = True
+            raise KeyboardInterrupt()
+        return StringIO.write(self, text)
+
+
+def read_events(output_file):
+    return [json.loads(line) for line in output_file.getvalue().splitlines()]
+
+
+class TestBatchProcessingCli(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.batch_processing_cli`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.elv_file_paths = generate_data_folder(self.data_folder, 4, number_channels=64)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _run(self, argv, output_file=None):
+        if output_file is None:
+            output_file = StringIO()
+        exit_code = main(argv, output_file)
+        return exit_code, read_events(output_file)
+
+    def testSuccess(self):
+        """
+        Tests the events of a successful run.
+        """
+
+        exit_code, events = self._run(["-d", self.data_folder, "--msa", "-j", "1"])
+
+        self.assertEqual(EXIT_SUCCESS, exit_code)
+        self.assertEqual("start", events[0]["event"])
+        self.assertEqual(1, events[0]["jobs"])
+        self.assertEqual([(STAGE_PIPELINE, STATE_START), (STAGE_PIPELINE, STATE_DONE)],
+                         [(event["stage"], event["state"]) for event in events if event["event"] == "stage"])
+        self.assertEqual([(number_done, 4) for number_done in range(1, 5)],
+                         [(event["done"], event["total"]) for event in events if event["event"] == "progress"])
+
+        summary = events[-1]
+        self.assertEqual("summary", summary["event"])
+        self.assertEqual(4, summary["converted"])
+        self.assertEqual(0, summary["failed"])
+        for event in events:
+            self.assertIn("time", event)
+            self.assertIn("elapsed_s", event)
+
+    def testMultiPass(self):
+        """
+        Tests the stages of a multi pass run.
+        """
+
+        exit_code, events = self._run(["-d", self.data_folder, "--msa", "--multi-pass", "-j", "1"])
+
+        self.assertEqual(EXIT_SUCCESS, exit_code)
+        self.assertEqual([(STAGE_BATCH_CONVERT, STATE_START), (STAGE_BATCH_CONVERT, STATE_DONE)],
+                         [(event["stage"], event["state"]) for event in events if event["event"] == "stage"])
+        self.assertEqual(4, events[-1]["converted"])
+
+    def testFilesFailed(self):
+        """
+        Tests the exit code and the summary when a file cannot be processed.
+        """
+
+        invalid_file_path = os.path.join(self.data_folder, "invalid.elv")
+        with open(invalid_file_path, 'w') as elv_file:
+            elv_file.write("Not a spectrum\n")
+
+        exit_code, events = self._run(["-d", self.data_folder, "--msa", "-j", "1"])
+
+        self.assertEqual(EXIT_FILES_FAILED, exit_code)
+        self.assertEqual("summary", events[-1]["event"])
+        self.assertEqual(4, events[-1]["converted"])
+        self.assertEqual([invalid_file_path], events[-1]["failed_files"])
+
+    def testUsageError(self):
+        """
+        Tests the invalid options are reported before processing.
+        """
+
+        for argv in ([], ["-d", os.path.join(self.data_folder, "missing")], ["-d", self.data_folder, "extra"],
+                     ["-d", self.data_folder, "-j", "0"], ["-d", self.data_folder, "--figure-formats", "bmp"],
+                     ["-d", self.data_folder], ["-f", self.elv_file_paths[0], "--spectrum-figures"]):
+            exit_code, events = self._run(argv)
+            self.assertEqual(EXIT_USAGE_ERROR, exit_code, argv)
+            self.assertEqual(["error"], [event["event"] for event in events], argv)
+
+        exit_code, events = self._run(["-d", self.data_folder, "--msa", "-j", "not_a_number"])
+        self.assertEqual(EXIT_USAGE_ERROR, exit_code)
+        self.assertEqual([], events)
+
+    def testProcessingError(self):
+        """
+        Tests the exit code when the multi pass processing stops with an error, the single pass processing reports
+        the files as failed.
+        """
+
+        project_hdf5_file = os.path.join(self.data_folder, "missing_folder", "project.hdf5")
+        exit_code, events = self._run(["-d", self.data_folder, "--project-hdf5", project_hdf5_file, "--multi-pass",
+                                       "-j", "1"])
+
+        self.assertEqual(EXIT_PROCESSING_ERROR, exit_code)
+        self.assertEqual("error", events[-1]["event"])
+
+        exit_code, events = self._run(["-d", self.data_folder, "--project-hdf5", project_hdf5_file, "-j", "1"])
+
+        self.assertEqual(EXIT_FILES_FAILED, exit_code)
+        self.assertEqual(sorted(self.elv_file_paths), events[-1]["failed_files"])
+
+    def testInterrupted(self):
+        """
+        Tests the exit code when the user interrupts the processing.
+        """
+
+        exit_code, events = self._run(["-d", self.data_folder, "--msa", "--multi-pass", "-j", "1"],
+                                      InterruptedOutput())
+
+        self.assertEqual(EXIT_INTERRUPTED, exit_code)
+        self.assertEqual("interrupted", events[-1]["event"])
+        self.assertNotIn("summary", [event["event"] for event in events])
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_batch_runner
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.batch_runner`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.batch_runner`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_runner import BatchProcessing, compute_rate, STAGE_CONVERT_FILE, STAGE_BATCH_CONVERT, \
+    STAGE_SPECTRUM_FIGURE, STAGE_WINDOW_FIGURE, STAGE_PIPELINE, STATE_START, STATE_DONE, STATE_UNCHANGED, \
+    STATE_CANCELLED
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder
+from pysemeelsgui.tools.project_hdf5 import ProjectHdf5Reader
+from pysemeelsgui.tools.batch_checkpoint import get_checkpoint_file_path
+from pysemeelsgui.tools.batch_pipeline import SPECTRUM_FIGURE_SUFFIX, WINDOW_FIGURE_SUFFIX
+
+# Globals and constants variables.
+
+
+class TestBatchRunner(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.batch_runner`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.elv_file_paths = generate_data_folder(self.data_folder, 3, number_channels=64)
+        self.stages = []
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _create_batch_processing(self):
+        batch_processing = BatchProcessing()
+        batch_processing.data_folder = self.data_folder
+        batch_processing.convert_msa = True
+        batch_processing.use_project_hdf5_file = False
+        batch_processing.generate_spectrum_figure = True
+        batch_processing.generate_window_figure = True
+        batch_processing.number_workers = 1
+        batch_processing.single_pass = False
+        batch_processing.stage_callback = lambda stage, state, elapsed_time_s: self.stages.append((stage, state))
+        return batch_processing
+
+    def testComputeRate(self):
+        """
+        Tests the processing rate and the remaining time.
+        """
+
+        self.assertEqual((0.0, 0.0), compute_rate(0, 10, 1.0))
+        self.assertEqual((0.0, 0.0), compute_rate(5, 10, 0.0))
+        self.assertEqual((2.0, 2.5), compute_rate(5, 10, 2.5))
+
+    def testStagesMultiPass(self):
+        """
+        Tests the stages of the multi pass run and the unchanged figures skipped with the manifest.
+        """
+
+        batch_processing = self._create_batch_processing()
+        batch_processing.skip_unchanged = True
+        batch_processing.run()
+
+        self.assertEqual([(STAGE_BATCH_CONVERT, STATE_START), (STAGE_BATCH_CONVERT, STATE_DONE),
+                          (STAGE_SPECTRUM_FIGURE, STATE_START), (STAGE_SPECTRUM_FIGURE, STATE_DONE),
+                          (STAGE_WINDOW_FIGURE, STATE_START), (STAGE_WINDOW_FIGURE, STATE_DONE)], self.stages)
+        self.assertEqual(sorted(self.elv_file_paths), batch_processing.converted_file_paths)
+        for elv_file_path in self.elv_file_paths:
+            root_path = os.path.splitext(elv_file_path)[0]
+            for suffix in [SPECTRUM_FIGURE_SUFFIX, WINDOW_FIGURE_SUFFIX]:
+                self.assertTrue(os.path.isfile(root_path + suffix + ".png"), root_path + suffix)
+
+        self.stages = []
+        batch_processing.run()
+        self.assertEqual([(STAGE_BATCH_CONVERT, STATE_START), (STAGE_BATCH_CONVERT, STATE_DONE),
+                          (STAGE_SPECTRUM_FIGURE, STATE_START), (STAGE_SPECTRUM_FIGURE, STATE_UNCHANGED),
+                          (STAGE_WINDOW_FIGURE, STATE_START), (STAGE_WINDOW_FIGURE, STATE_UNCHANGED)], self.stages)
+        self.assertEqual([], batch_processing.converted_file_paths)
+
+    def testStagesFileAndSinglePass(self):
+        """
+        Tests the stage of a single file and of the single pass run.
+        """
+
+        batch_processing = self._create_batch_processing()
+        batch_processing.data_folder = ""
+        batch_processing.file_path = self.elv_file_paths[0]
+        batch_processing.run()
+        self.assertEqual([(STAGE_CONVERT_FILE, STATE_START), (STAGE_CONVERT_FILE, STATE_DONE)], self.stages)
+
+        self.stages = []
+        batch_processing = self._create_batch_processing()
+        batch_processing.generate_spectrum_figure = False
+        batch_processing.generate_window_figure = False
+        batch_processing.single_pass = True
+        batch_processing.run()
+        self.assertEqual([(STAGE_PIPELINE, STATE_START), (STAGE_PIPELINE, STATE_DONE)], self.stages)
+
+    def testSerialProjectExport(self):
+        """
+        Tests the conversion without parallel processing writes the project file with the same layout.
+        """
+
+        project_hdf5_file = os.path.join(self.data_folder, "project.hdf5")
+        batch_processing = self._create_batch_processing()
+        batch_processing.generate_spectrum_figure = False
+        batch_processing.generate_window_figure = False
+        batch_processing.use_project_hdf5_file = True
+        batch_processing.project_hdf5_file = project_hdf5_file
+        batch_processing.parallel = False
+        batch_processing.run()
+
+        self.assertEqual(sorted(self.elv_file_paths), batch_processing.converted_file_paths)
+        with ProjectHdf5Reader(project_hdf5_file) as project_reader:
+            self.assertEqual(3, project_reader.number_spectra)
+
+    def testCancelled(self):
+        """
+        Tests no stage is started once the run is cancelled.
+        """
+
+        batch_processing = self._create_batch_processing()
+        batch_processing.cancel()
+        batch_processing.run()
+
+        self.assertEqual([], self.stages)
+
+    def testCancelSerialConversion(self):
+        """
+        Tests the conversion without parallel processing stops when it is cancelled.
+        """
+
+        data_folder = os.path.join(self.data_folder, "serial")
+        elv_file_paths = generate_data_folder(data_folder, 12, number_channels=64)
+        batch_processing = self._create_batch_processing()
+        batch_processing.data_folder = data_folder
+        batch_processing.generate_spectrum_figure = False
+        batch_processing.generate_window_figure = False
+        batch_processing.parallel = False
+        batch_processing.progress_callback = lambda number_done, number_total, elapsed_time_s: \
+            batch_processing.cancel()
+        batch_processing.run()
+
+        self.assertGreater(len(batch_processing.converted_file_paths), 0)
+        self.assertLess(len(batch_processing.converted_file_paths), len(elv_file_paths))
+        self.assertEqual((STAGE_BATCH_CONVERT, STATE_CANCELLED), self.stages[-1])
+
+    def testResumeMultiPass(self):
+        """
+        Tests the multi pass conversion resumed after a cancel converts only the remaining files.
+        """
+
+        data_folder = os.path.join(self.data_folder, "resume")
+        elv_file_paths = generate_data_folder(data_folder, 12, number_channels=64)
+        batch_processing = self._create_batch_processing()
+        batch_processing.data_folder = data_folder
+        batch_processing.generate_spectrum_figure = False
+        batch_processing.generate_window_figure = False
+        batch_processing.progress_callback = lambda number_done, number_total, elapsed_time_s: \
+            batch_processing.cancel()
+        batch_processing.run()
+        converted_file_paths = batch_processing.converted_file_paths
+        self.assertLess(len(converted_file_paths), len(elv_file_paths))
+        self.assertTrue(os.path.isfile(get_checkpoint_file_path(data_folder)))
+
+        batch_processing = self._create_batch_processing()
+        batch_processing.data_folder = data_folder
+        batch_processing.generate_spectrum_figure = False
+        batch_processing.generate_window_figure = False
+        batch_processing.resume = True
+        batch_processing.run()
+
+        self.assertEqual(sorted(set(elv_file_paths) - set(converted_file_paths)),
+                         batch_processing.converted_file_paths)
+        self.assertEqual(len(converted_file_paths), batch_processing.number_unchanged)
+        self.assertFalse(os.path.isfile(get_checkpoint_file_path(data_folder)))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_elv_export
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.elv_export`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.elv_export`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+
+# Third party modules.
+import numpy as np
+import h5py
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.elv_export import get_elv_header, get_elv_columns, write_msa_file, write_hdf5_file
+
+
+# Globals and constants variables.
+
+class HeaderElvFile(object):
+    """
+    Parsed .elv file with header values, a header dict and extra columns.
+    """
+
+    def __init__(self):
+        self.date = "2017/06/05"
+        self.dose = 1.5
+        self.header = {"Mag": 25000, "Comment": "grid\tA"}
+        self.energies_eV = np.linspace(-2.0, 2.0, 5)
+        self.counts = [1, 5, 20, 5, 1]
+        self.raw_counts = np.array([101, 105, 120, 105, 101])
+        self.dark_currents = [100] * 5
+        self.comments = ["a", "b"]
+        self._parsed = True
+
+
+class TestElvExport(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.elv_export`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.temporary_dir = tempfile.mkdtemp()
+        self.elv_file = HeaderElvFile()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.temporary_dir)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testHeaderAndColumns(self):
+        """
+        Tests the header values and the columns with one value per channel are found.
+        """
+
+        self.assertEqual([("Comment", "grid\tA"), ("Mag", 25000), ("date", "2017/06/05"), ("dose", 1.5)],
+                         get_elv_header(self.elv_file))
+        self.assertEqual(["energies_eV", "counts", "dark_currents", "raw_counts"],
+                         [name for name, _values in get_elv_columns(self.elv_file)])
+
+    def testWriteMsaFile(self):
+        """
+        Tests the MSA file has the header as user-defined keywords and the spectrum.
+        """
+
+        msa_file_path = os.path.join(self.temporary_dir, "spectrum.msa")
+        write_msa_file(msa_file_path, self.elv_file, "spectrum")
+
+        with open(msa_file_path, 'r') as msa_file:
+            lines = msa_file.read().splitlines()
+        self.assertIn("#NPOINTS     : 5", lines)
+        self.assertIn("##Comment : grid A", lines)
+        self.assertIn("##dose : 1.5", lines)
+        data_start = lines.index("#SPECTRUM    : Spectral Data Starts Here") + 1
+        self.assertEqual(["0.0, 20.0"], lines[data_start + 2:data_start + 3])
+        self.assertEqual("#ENDOFDATA   : ", lines[-1])
+
+    def testWriteHdf5File(self):
+        """
+        Tests the HDF5 file has all the columns and the header.
+        """
+
+        hdf5_file_path = os.path.join(self.temporary_dir, "spectrum.hdf5")
+        write_hdf5_file(hdf5_file_path, self.elv_file, "spectrum.elv")
+
+        with h5py.File(hdf5_file_path, 'r') as hdf5_file:
+            self.assertEqual(["counts", "dark_currents", "energies_eV", "raw_counts"], sorted(hdf5_file))
+            np.testing.assert_array_equal(self.elv_file.raw_counts, hdf5_file["raw_counts"][...])
+            self.assertEqual(25000, hdf5_file.attrs["Mag"])
+            self.assertEqual("2017/06/05", hdf5_file.attrs["date"])
+            self.assertEqual(os.path.abspath("spectrum.elv"), hdf5_file.attrs["source_path"])
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
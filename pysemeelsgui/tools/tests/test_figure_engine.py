@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_figure_engine
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.figure_engine`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.figure_engine`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.figure_engine import SpectrumFigureTemplate, ParallelFigureEngine, compute_limits, \
+    get_figure_file_paths, FORMAT_PNG, FORMAT_PDF
+
+
+# Globals and constants variables.
+
+class TestFigureEngine(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.figure_engine`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.output_folder = tempfile.mkdtemp()
+        self.energies_eV = np.linspace(-10.0, 90.0, 201)
+        self.counts = 100.0 * np.exp(-0.5 * self.energies_eV ** 2) + 1.0
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.output_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testComputeLimits(self):
+        """
+        Tests the intensity range is computed in the energy window.
+        """
+
+        x_limits, y_limits = compute_limits(self.energies_eV, self.counts)
+        self.assertEqual((-10.0, 90.0), x_limits)
+        self.assertAlmostEqual(101.0 + 0.05 * 100.0, y_limits[1])
+
+        x_limits, y_limits = compute_limits(self.energies_eV, self.counts, (20.0, None))
+        self.assertEqual((20.0, 90.0), x_limits)
+        self.assertAlmostEqual(1.0 + 1.0, y_limits[1])
+
+    def testGetFigureFilePaths(self):
+        """
+        Tests the figure file names.
+        """
+
+        file_paths = get_figure_file_paths(os.path.join("data", "spectrum.elv"), "_spectrum", (FORMAT_PNG, FORMAT_PDF))
+        self.assertEqual([os.path.join("data", "spectrum_spectrum.png"), os.path.join("data", "spectrum_spectrum.pdf")],
+                         file_paths)
+
+    def testTemplateReused(self):
+        """
+        Tests the template updates the same figure for each spectrum.
+        """
+
+        template = SpectrumFigureTemplate(((-5.0, 5.0), (None, None)), figure_size=(4, 3), dpi=50)
+        figure = template.figure
+        lines = list(template.lines)
+
+        for index in range(2):
+            figure_file_path = os.path.join(self.output_folder, "spectrum_{:d}.png".format(index))
+            template.render(self.energies_eV, (index + 1) * self.counts, "spectrum {:d}".format(index),
+                            [figure_file_path])
+            self.assertTrue(os.path.isfile(figure_file_path))
+
+        self.assertIs(figure, template.figure)
+        self.assertEqual(lines, template.lines)
+        self.assertEqual(2, len(figure.axes))
+        self.assertEqual("spectrum 1", template.axes[1].get_title())
+        np.testing.assert_allclose(2 * self.counts, template.lines[0].get_ydata())
+
+    def testParallelEngine(self):
+        """
+        Tests the figures are rendered on worker processes in all the formats.
+        """
+
+        template_options = {"spectrum": {"figure_size": (4, 3), "dpi": 50}}
+        figure_engine = ParallelFigureEngine(template_options, number_workers=2)
+        figure_engine.start()
+        try:
+            futures = []
+            for index in range(4):
+                elv_file_path = os.path.join(self.output_folder, "spectrum_{:d}.elv".format(index))
+                figure_file_paths = get_figure_file_paths(elv_file_path, "_spectrum", (FORMAT_PNG, FORMAT_PDF))
+                futures.append(figure_engine.submit("spectrum", self.energies_eV, self.counts, "title",
+                                                    figure_file_paths))
+            for future in futures:
+                self.assertGreater(future.result(), 0.0)
+        finally:
+            figure_engine.close()
+
+        self.assertEqual(8, len(os.listdir(self.output_folder)))
+
+    def testSerialEngineError(self):
+        """
+        Tests an error is returned in the future when the engine runs in the calling thread.
+        """
+
+        figure_engine = ParallelFigureEngine({"spectrum": {}}, number_workers=1)
+        figure_engine.start()
+        future = figure_engine.submit("spectrum", self.energies_eV, self.counts, "title",
+                                      [os.path.join(self.output_folder, "missing", "spectrum.png")])
+        figure_engine.close()
+
+        self.assertIsNotNone(future.exception())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_folder_scanner
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.folder_scanner`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.folder_scanner`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.folder_scanner import FolderScanner, scan_files, scan_folder_entries
+
+
+# Globals and constants variables.
+
+class TestFolderScanner(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.folder_scanner`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.elv_file_paths = []
+        for folder_id in range(4):
+            folder = os.path.join(self.data_folder, "day_{:d}".format(folder_id), "sample")
+            os.makedirs(folder)
+            for file_id in range(3):
+                elv_file_path = os.path.join(folder, "spectrum_{:d}.elv".format(file_id))
+                self._touch(elv_file_path)
+                self.elv_file_paths.append(elv_file_path)
+            self._touch(os.path.join(folder, "spectrum_0.msa"))
+        root_file_path = os.path.join(self.data_folder, "SPECTRUM.ELV")
+        self._touch(root_file_path)
+        self.elv_file_paths.append(root_file_path)
+        self.elv_file_paths.sort()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def _touch(self, file_path):
+        with open(file_path, 'w') as output_file:
+            output_file.write("")
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testScanFolderEntries(self):
+        """
+        Tests the extension filter is not case sensitive and the sub-folders are returned.
+        """
+
+        file_paths, sub_folders = scan_folder_entries(self.data_folder)
+
+        self.assertEqual([os.path.join(self.data_folder, "SPECTRUM.ELV")], file_paths)
+        self.assertEqual(4, len(sub_folders))
+
+    def testScanFiles(self):
+        """
+        Tests the recursive and non recursive scans.
+        """
+
+        self.assertEqual(self.elv_file_paths, sorted(scan_files(self.data_folder)))
+        self.assertEqual([os.path.join(self.data_folder, "SPECTRUM.ELV")],
+                         list(scan_files(self.data_folder, recursive=False)))
+        self.assertEqual(4, len(list(scan_files(self.data_folder, extensions=(".msa",)))))
+
+    def testFolderScanner(self):
+        """
+        Tests the files found with one and many threads.
+        """
+
+        for number_threads in [1, 4]:
+            scanner = FolderScanner(self.data_folder, number_threads=number_threads)
+            self.assertEqual(self.elv_file_paths, sorted(scanner))
+            self.assertEqual(13, scanner.number_discovered)
+            self.assertTrue(scanner.is_done)
+
+    def testFolderScannerStopped(self):
+        """
+        Tests the iteration can be stopped before the end.
+        """
+
+        scanner = FolderScanner(self.data_folder, number_threads=2)
+        for _file_path in scanner:
+            break
+
+        self.assertFalse(scanner.is_done)
+        self.assertGreaterEqual(scanner.number_discovered, 1)
+
+    def testMissingFolder(self):
+        """
+        Tests a missing folder gives no file.
+        """
+
+        missing_folder = os.path.join(self.data_folder, "missing")
+        self.assertEqual([], list(FolderScanner(missing_folder)))
+        self.assertEqual([], list(scan_files(missing_folder)))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
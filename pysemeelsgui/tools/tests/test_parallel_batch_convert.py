@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_parallel_batch_convert
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.parallel_batch_convert`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.parallel_batch_convert`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os.path
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.batch_checkpoint import PARTIAL_SUFFIX
+from pysemeelsgui.tools.parallel_batch_convert import ParallelBatchConvertElv, ProjectWriterError, find_elv_files
+from pysemeelsgui.tools.batch_manifest import BatchManifest, get_manifest_file_path, OUTPUT_MSA, OUTPUT_HDF5, \
+    OUTPUT_PROJECT_HDF5
+from pysemeelsgui.tools.project_hdf5 import ProjectHdf5Reader, get_relative_path
+from pysemeelsgui.tools.synthetic_elv import generate_data_folder
+
+# Globals and constants variables.
+
+
+class TestParallelBatchConvert(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.parallel_batch_convert`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.elv_file_paths = generate_data_folder(self.data_folder, 12, number_folders=3, number_channels=64)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _create_converter(self, project_hdf5_file=""):
+        batch_convert_elv = ParallelBatchConvertElv(self.data_folder, number_workers=2)
+        batch_convert_elv.project_hdf5_file = project_hdf5_file
+        batch_convert_elv.manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        batch_convert_elv.manifest.load()
+        return batch_convert_elv
+
+    def _write_invalid_file(self):
+        elv_file_path = os.path.join(self.data_folder, "day_001", "invalid.elv")
+        with open(elv_file_path, 'w') as elv_file:
+            elv_file.write("Not a spectrum\n")
+        return elv_file_path
+
+    def testConvert(self):
+        """
+        Tests all the files of the sub-folders are converted and reported in the order of their paths.
+        """
+
+        self.assertEqual(sorted(self.elv_file_paths), find_elv_files(self.data_folder))
+        self.assertEqual([], find_elv_files(self.data_folder, recursive=False))
+
+        progress = []
+        batch_convert_elv = self._create_converter()
+        batch_convert_elv.progress_callback = lambda number_done, number_total, elapsed_time_s: \
+            progress.append((number_done, number_total))
+        batch_convert_elv.convert()
+
+        self.assertEqual(sorted(self.elv_file_paths), batch_convert_elv.converted_file_paths)
+        self.assertEqual([], batch_convert_elv.failed_file_paths)
+        # The total grows while the folders are scanned.
+        self.assertEqual(list(range(1, 13)), [number_done for number_done, _number_total in progress])
+        self.assertEqual(12, progress[-1][1])
+        number_totals = [number_total for _number_done, number_total in progress]
+        self.assertEqual(sorted(number_totals), number_totals)
+        self.assertEqual(12, batch_convert_elv.number_discovered)
+        for elv_file_path in self.elv_file_paths:
+            root_path = os.path.splitext(elv_file_path)[0]
+            self.assertTrue(os.path.isfile(root_path + ".msa"))
+            self.assertTrue(os.path.isfile(root_path + ".hdf5"))
+        partial_file_names = [file_name for _folder, _sub_folders, file_names in os.walk(self.data_folder)
+                              for file_name in file_names if PARTIAL_SUFFIX in file_name]
+        self.assertEqual([], partial_file_names)
+
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        manifest.load()
+        for elv_file_path in self.elv_file_paths:
+            self.assertFalse(manifest.is_stale(elv_file_path, OUTPUT_MSA))
+            self.assertFalse(manifest.is_stale(elv_file_path, OUTPUT_HDF5))
+
+        batch_convert_elv = self._create_converter()
+        batch_convert_elv.convert()
+        self.assertEqual([], batch_convert_elv.converted_file_paths)
+
+    def testFailure(self):
+        """
+        Tests an invalid file is reported as failed and not recorded, without stopping the other conversions.
+        """
+
+        invalid_file_path = self._write_invalid_file()
+        project_hdf5_file = os.path.join(self.data_folder, "project.h5")
+
+        batch_convert_elv = self._create_converter(project_hdf5_file)
+        batch_convert_elv.convert()
+
+        self.assertEqual(sorted(self.elv_file_paths), batch_convert_elv.converted_file_paths)
+        self.assertEqual([invalid_file_path], batch_convert_elv.failed_file_paths)
+
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        manifest.load()
+        self.assertTrue(manifest.is_stale(invalid_file_path, OUTPUT_MSA))
+        self.assertTrue(manifest.is_stale(invalid_file_path, OUTPUT_PROJECT_HDF5,
+                                          batch_convert_elv.get_project_options()))
+
+    def testCancel(self):
+        """
+        Tests the files not yet started are not converted when the conversion is cancelled.
+        """
+
+        batch_convert_elv = self._create_converter()
+        batch_convert_elv.number_workers = 1
+        batch_convert_elv.cancel_event = threading.Event()
+        batch_convert_elv.progress_callback = lambda number_done, number_total, elapsed_time_s: \
+            batch_convert_elv.cancel_event.set()
+        batch_convert_elv.convert()
+
+        number_converted = len(batch_convert_elv.converted_file_paths)
+        self.assertGreater(number_converted, 0)
+        self.assertLess(number_converted, len(self.elv_file_paths))
+
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        manifest.load()
+        self.assertEqual(number_converted, len(manifest.sources))
+
+        # No file is submitted once the conversion is cancelled.
+        batch_convert_elv = self._create_converter()
+        batch_convert_elv.cancel_event = threading.Event()
+        batch_convert_elv.cancel_event.set()
+        batch_convert_elv.convert()
+        self.assertEqual([], batch_convert_elv.converted_file_paths)
+
+    def testProjectExport(self):
+        """
+        Tests the spectra are written in the project file and recorded once the writer has closed it.
+        """
+
+        project_hdf5_file = os.path.join(self.data_folder, "project.h5")
+
+        batch_convert_elv = self._create_converter(project_hdf5_file)
+        batch_convert_elv.convert()
+
+        with ProjectHdf5Reader(project_hdf5_file) as reader:
+            self.assertEqual(sorted(get_relative_path(elv_file_path, self.data_folder)
+                                    for elv_file_path in self.elv_file_paths),
+                             sorted(reader.relative_paths))
+
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        manifest.load()
+        for elv_file_path in self.elv_file_paths:
+            self.assertFalse(manifest.is_stale(elv_file_path, OUTPUT_PROJECT_HDF5,
+                                               batch_convert_elv.get_project_options(), [project_hdf5_file]))
+
+    def testProjectWriterFailure(self):
+        """
+        Tests the conversion fails, without waiting forever, when the project writer stops.
+        """
+
+        project_hdf5_file = os.path.join(self.data_folder, "missing_folder", "project.h5")
+
+        batch_convert_elv = self._create_converter(project_hdf5_file)
+        self.assertRaises(ProjectWriterError, batch_convert_elv.convert)
+
+        manifest = BatchManifest(get_manifest_file_path(self.data_folder))
+        manifest.load()
+        for elv_file_path in self.elv_file_paths:
+            self.assertTrue(manifest.is_stale(elv_file_path, OUTPUT_PROJECT_HDF5,
+                                              batch_convert_elv.get_project_options()))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_polling
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.polling`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.polling`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+import time
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.polling import poll_until, wait_for_saved_file, get_file_signature, WaitTimeoutError
+from pysemeelsgui.tools.acquisition_driver import AcquisitionError
+
+
+# Globals and constants variables.
+
+class TestPolling(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.polling`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, "test_1.elv")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.folder)
+
+    def _write_later(self, parts, delay_s):
+        def write():
+            with open(self.file_path, 'w') as output_file:
+                for part in parts:
+                    time.sleep(delay_s)
+                    output_file.write(part)
+                    output_file.flush()
+
+        writer_thread = threading.Thread(target=write)
+        writer_thread.start()
+        return writer_thread
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testPollUntil(self):
+        """
+        Tests the value of the condition is returned as soon as it is true.
+        """
+
+        values = [0, 0, 0, "ready"]
+        start_time = time.perf_counter()
+        self.assertEqual("ready", poll_until(lambda: values.pop(0), timeout_s=1.0))
+        self.assertLess(time.perf_counter() - start_time, 0.5)
+
+    def testPollUntilTimeout(self):
+        """
+        Tests the timeout error is an acquisition error.
+        """
+
+        self.assertRaises(WaitTimeoutError, poll_until, lambda: False, 0.05)
+        self.assertTrue(issubclass(WaitTimeoutError, AcquisitionError))
+
+    def testWaitForSavedFile(self):
+        """
+        Tests the file is complete only when its size is stable.
+        """
+
+        writer_thread = self._write_later(["a" * 100, "b" * 100, "c" * 100], 0.05)
+        signature = wait_for_saved_file(self.file_path, stable_time_s=0.15, timeout_s=5.0)
+        writer_thread.join()
+
+        self.assertEqual(300, signature[0])
+        self.assertEqual(get_file_signature(self.file_path), signature)
+
+    def testWaitForOverwrittenFile(self):
+        """
+        Tests the previous version of the file is not taken as the saved file.
+        """
+
+        with open(self.file_path, 'w') as output_file:
+            output_file.write("old")
+        previous_signature = get_file_signature(self.file_path)
+
+        self.assertRaises(WaitTimeoutError, wait_for_saved_file, self.file_path, previous_signature, 0.01, 0.1)
+
+        writer_thread = self._write_later(["new content"], 0.05)
+        signature = wait_for_saved_file(self.file_path, previous_signature, stable_time_s=0.05, timeout_s=5.0)
+        writer_thread.join()
+
+        self.assertEqual(len("new content"), signature[0])
+        self.assertIsNone(get_file_signature(os.path.join(self.folder, "missing.elv")))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_project_hdf5
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.project_hdf5`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.project_hdf5`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+
+# Third party modules.
+import numpy as np
+import h5py
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.project_hdf5 import ProjectHdf5Writer, ProjectHdf5Reader, COLUMN_RELATIVE_PATH, \
+    COLUMN_NUMBER_CHANNELS, SPECTRA_GROUP, COUNTS_DATASET
+
+
+# Globals and constants variables.
+
+class TestProjectHdf5(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.project_hdf5`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+        self.project_hdf5_file_path = os.path.join(self.data_folder, "project.hdf5")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def _write_spectra(self, names, number_channels=10, scale=1.0, batch_size=2):
+        with ProjectHdf5Writer(self.project_hdf5_file_path, self.data_folder, batch_size=batch_size,
+                               chunk_rows=4) as project_writer:
+            for index, name in enumerate(names):
+                energies_eV = np.arange(number_channels) * 0.1
+                counts = scale * (index + 1) * np.ones(number_channels)
+                project_writer.write_spectrum(os.path.join(self.data_folder, name), energies_eV, counts)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testWriteAndRead(self):
+        """
+        Tests the spectra are read by path and as a stack.
+        """
+
+        self._write_spectra(["a.elv", "b.elv", os.path.join("day_2", "c.elv")])
+
+        with ProjectHdf5Reader(self.project_hdf5_file_path) as project_reader:
+            self.assertEqual(["a.elv", "b.elv", "day_2/c.elv"], project_reader.relative_paths)
+
+            energies_eV, counts = project_reader.get_spectrum("day_2/c.elv")
+            np.testing.assert_allclose(3.0 * np.ones(10), counts)
+            np.testing.assert_allclose(np.arange(10) * 0.1, energies_eV)
+
+            _energies_eV, counts = project_reader.get_stack(0, 2)
+            self.assertEqual((2, 10), counts.shape)
+            np.testing.assert_allclose([1.0, 2.0], counts[:, 0])
+
+            self.assertEqual(["a.elv", "b.elv", "day_2/c.elv"],
+                             list(project_reader.get_metadata(COLUMN_RELATIVE_PATH)))
+
+    def testNewProjectWrittenInPartialFile(self):
+        """
+        Tests a new project file has its final name only when it is closed.
+        """
+
+        project_writer = ProjectHdf5Writer(self.project_hdf5_file_path, self.data_folder, batch_size=1)
+        project_writer.open()
+        project_writer.write_spectrum(os.path.join(self.data_folder, "a.elv"), np.arange(4.0), np.ones(4))
+        self.assertFalse(os.path.exists(self.project_hdf5_file_path))
+        project_writer.close()
+
+        self.assertTrue(os.path.isfile(self.project_hdf5_file_path))
+        self.assertEqual([self.project_hdf5_file_path], [os.path.join(self.data_folder, name)
+                                                         for name in os.listdir(self.data_folder)])
+
+    def testAppendAndReplace(self):
+        """
+        Tests a new day is appended and a spectrum written again replaces its row.
+        """
+
+        self._write_spectra(["a.elv", "b.elv"])
+        self._write_spectra(["b.elv", "c.elv"], scale=10.0)
+
+        with ProjectHdf5Reader(self.project_hdf5_file_path) as project_reader:
+            self.assertEqual(["a.elv", "b.elv", "c.elv"], project_reader.relative_paths)
+            _energies_eV, counts = project_reader.get_stack()
+            np.testing.assert_allclose([1.0, 10.0, 20.0], counts[:, 0])
+
+    def testWiderSpectrum(self):
+        """
+        Tests a wider spectrum widens the datasets and the shorter spectra are padded.
+        """
+
+        self._write_spectra(["a.elv"], number_channels=10)
+        self._write_spectra(["b.elv"], number_channels=12)
+
+        with ProjectHdf5Reader(self.project_hdf5_file_path) as project_reader:
+            _energies_eV, counts = project_reader.get_stack()
+            self.assertEqual((2, 12), counts.shape)
+            self.assertTrue(np.all(np.isnan(counts[0, 10:])))
+            self.assertEqual(10, len(project_reader.get_spectrum("a.elv")[1]))
+            np.testing.assert_array_equal([10, 12], project_reader.get_metadata(COLUMN_NUMBER_CHANNELS))
+
+    def testForeignLayout(self):
+        """
+        Tests an existing file with another layout is refused and not modified.
+        """
+
+        with h5py.File(self.project_hdf5_file_path, 'w') as project_file:
+            project_file.create_group("a.elv").create_dataset("counts", data=np.ones(10))
+
+        project_writer = ProjectHdf5Writer(self.project_hdf5_file_path, self.data_folder)
+        self.assertRaises(ValueError, project_writer.open)
+        self.assertIsNone(project_writer.project_file)
+
+        with h5py.File(self.project_hdf5_file_path, 'r') as project_file:
+            self.assertEqual(["a.elv"], list(project_file))
+            self.assertNotIn("layout_version", project_file.attrs)
+
+        os.remove(self.project_hdf5_file_path)
+        self._write_spectra(["a.elv"])
+        with h5py.File(self.project_hdf5_file_path, 'r+') as project_file:
+            project_file.attrs["layout_version"] = 1
+        self.assertRaises(ValueError, ProjectHdf5Writer(self.project_hdf5_file_path, self.data_folder).open)
+
+        with h5py.File(self.project_hdf5_file_path, 'w'):
+            pass
+        self._write_spectra(["a.elv", "b.elv"])
+        with ProjectHdf5Reader(self.project_hdf5_file_path) as project_reader:
+            self.assertEqual(["a.elv", "b.elv"], project_reader.relative_paths)
+
+    def testLayout(self):
+        """
+        Tests the datasets are chunked, compressed and resizable.
+        """
+
+        self._write_spectra(["a.elv", "b.elv", "c.elv"], batch_size=64)
+
+        with h5py.File(self.project_hdf5_file_path, 'r') as project_file:
+            dataset = project_file[SPECTRA_GROUP][COUNTS_DATASET]
+            self.assertEqual((4, 10), dataset.chunks)
+            self.assertEqual("gzip", dataset.compression)
+            self.assertEqual((None, None), dataset.maxshape)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_queued_logging
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.queued_logging`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.queued_logging`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import logging
+import threading
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.queued_logging import start_queued_logging, stop_queued_logging
+
+
+# Globals and constants variables.
+
+class ThreadNameHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.thread_names = []
+
+    def emit(self, record):
+        self.thread_names.append(threading.current_thread().name)
+
+
+class TestQueuedLogging(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.queued_logging`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.temporary_folder = tempfile.mkdtemp()
+        self.root_level = logging.getLogger().level
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        stop_queued_logging()
+        logging.getLogger().setLevel(self.root_level)
+        shutil.rmtree(self.temporary_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testStartStop(self):
+        """
+        Tests the records are written in the file with its level, on the listener thread.
+        """
+
+        log_file_path = os.path.join(self.temporary_folder, "test.log")
+        listener = start_queued_logging(log_file_path, stream_level=logging.CRITICAL, file_level=logging.INFO)
+        thread_name_handler = ThreadNameHandler()
+        listener.handlers = listener.handlers + (thread_name_handler,)
+
+        root_logger = logging.getLogger()
+        self.assertEqual(logging.INFO, root_logger.level)
+        self.assertFalse(root_logger.isEnabledFor(logging.DEBUG))
+
+        logging.getLogger("test").debug("Debug message")
+        logging.getLogger("test").info("Info message")
+        stop_queued_logging()
+
+        with open(log_file_path, 'r') as log_file:
+            text = log_file.read()
+        self.assertIn("Info message", text)
+        self.assertNotIn("Debug message", text)
+        self.assertEqual(1, len(thread_name_handler.thread_names))
+        self.assertNotEqual(threading.current_thread().name, thread_name_handler.thread_names[0])
+
+        logging.getLogger("test").info("After stop")
+        with open(log_file_path, 'r') as log_file:
+            self.assertNotIn("After stop", log_file.read())
+
+    def testRestart(self):
+        """
+        Tests a second start replaces the queue handler of the first.
+        """
+
+        root_logger = logging.getLogger()
+        number_handlers = len(root_logger.handlers)
+
+        start_queued_logging(stream_level=logging.CRITICAL)
+        start_queued_logging(stream_level=logging.CRITICAL)
+        self.assertEqual(number_handlers + 1, len(root_logger.handlers))
+
+        stop_queued_logging()
+        self.assertEqual(number_handlers, len(root_logger.handlers))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_simulated_driver
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.simulated_driver`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.simulated_driver`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.simulated_driver import SimulatedDriver
+from pysemeelsgui.tools.acquisition_driver import create_driver, AcquisitionError, BACKEND_SIMULATED, ELEMENTS
+
+
+# Globals and constants variables.
+
+class TestSimulatedDriver(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.simulated_driver`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.save_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.save_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testSaveSpectrum(self):
+        """
+        Tests the file is complete when the main window is ready again.
+        """
+
+        with create_driver(BACKEND_SIMULATED, save_folder=self.save_folder, time_scale=0.0,
+                           number_channels=32) as driver:
+            self.assertEqual(dict((element, True) for element in ELEMENTS), driver.find_elements())
+
+            driver.wait_ready()
+            driver.start_acquisition()
+            driver.open_save_dialog("comment")
+            driver.save_as("test_1.elv")
+            driver.wait_ready()
+
+        with open(os.path.join(self.save_folder, "test_1.elv"), 'r') as elv_file:
+            data_lines = [line for line in elv_file if "=" not in line]
+        self.assertEqual(32, len(data_lines))
+        self.assertEqual(1, driver.number_saved)
+        self.assertEqual(0, driver.number_incomplete)
+
+    def testIncompleteSpectrum(self):
+        """
+        Tests a spectrum saved before the end of the acquisition is counted.
+        """
+
+        with SimulatedDriver(self.save_folder, acquisition_time_s=60.0, time_scale=0.01) as driver:
+            driver.start_acquisition()
+            driver.open_save_dialog()
+
+        self.assertEqual(1, driver.number_incomplete)
+
+    def testOverwrite(self):
+        """
+        Tests the confirmation dialog blocks the main window until it is accepted.
+        """
+
+        with open(os.path.join(self.save_folder, "test_1.elv"), 'w') as elv_file:
+            elv_file.write("old")
+
+        with SimulatedDriver(self.save_folder, time_scale=0.0, number_channels=8) as driver:
+            driver.open_save_dialog()
+            driver.save_as("test_1.elv")
+            self.assertRaises(AcquisitionError, driver.wait_ready)
+
+            self.assertTrue(driver.confirm_overwrite())
+            driver.wait_ready()
+            self.assertFalse(driver.confirm_overwrite())
+
+        with open(os.path.join(self.save_folder, "test_1.elv"), 'r') as elv_file:
+            self.assertNotEqual("old", elv_file.read())
+
+    def testErrors(self):
+        """
+        Tests the steps out of order and the missing save folder.
+        """
+
+        driver = SimulatedDriver(self.save_folder, time_scale=0.0)
+        self.assertRaises(AcquisitionError, driver.wait_ready)
+
+        driver.connect()
+        self.assertRaises(AcquisitionError, driver.save_as, "test_1.elv")
+        driver.disconnect()
+
+        missing_folder = os.path.join(self.save_folder, "missing")
+        self.assertRaises(AcquisitionError, SimulatedDriver(missing_folder).connect)
+        self.assertRaises(ValueError, create_driver, "Unknown")
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
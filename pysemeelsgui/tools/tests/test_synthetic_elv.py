@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_synthetic_elv
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.synthetic_elv`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.synthetic_elv`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import shutil
+import os
+import os.path
+import datetime
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.synthetic_elv import generate_spectrum, format_elv_text, generate_data_folder
+
+
+# Globals and constants variables.
+
+class TestSyntheticElv(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.synthetic_elv`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.data_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.data_folder)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testGenerateSpectrum(self):
+        """
+        Tests the zero-loss peak is the maximum and the spectrum depends only on the seed.
+        """
+
+        energies_eV, counts = generate_spectrum(np.random.RandomState(1), number_channels=256)
+
+        self.assertEqual((256,), counts.shape)
+        self.assertAlmostEqual(0.0, energies_eV[np.argmax(counts)], delta=1.0)
+        self.assertTrue(np.all(counts >= 0))
+
+        _energies_eV, same_counts = generate_spectrum(np.random.RandomState(1), number_channels=256)
+        np.testing.assert_array_equal(counts, same_counts)
+
+    def testFormatElvText(self):
+        """
+        Tests the header and one data line per channel.
+        """
+
+        text = format_elv_text(np.array([-1.0, 0.5]), np.array([10, 20]), datetime.datetime(2017, 3, 7, 9, 30, 0))
+        lines = text.splitlines()
+
+        self.assertEqual("DATE=2017/03/07", lines[0])
+        self.assertEqual("TIME=09:30:00", lines[1])
+        self.assertEqual(["-1.00", "10", "110", "1.0000", "100"], lines[-2].split("\t"))
+        self.assertEqual(["0.50", "20", "120", "1.0000", "100"], lines[-1].split("\t"))
+
+    def testGenerateDataFolder(self):
+        """
+        Tests the files are spread in the sub-folders.
+        """
+
+        elv_file_paths = generate_data_folder(self.data_folder, 5, number_folders=2, number_channels=16)
+
+        self.assertEqual(5, len(elv_file_paths))
+        self.assertEqual(["day_001", "day_002"], sorted(os.listdir(self.data_folder)))
+        self.assertEqual(3, len(os.listdir(os.path.join(self.data_folder, "day_001"))))
+        with open(elv_file_paths[0], 'r') as elv_file:
+            data_lines = [line for line in elv_file if "=" not in line]
+        self.assertEqual(16, len(data_lines))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
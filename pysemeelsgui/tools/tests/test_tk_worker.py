@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tests.test_tk_worker
+   :synopsis: Tests for the module :py:mod:`pysemeelsgui.tools.tk_worker`
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeelsgui.tools.tk_worker`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import time
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.tools.tk_worker import TkWorker, MESSAGE_FINISHED, MESSAGE_ERROR
+
+
+# Globals and constants variables.
+
+class FakeWidget(object):
+    """
+    Replace the Tk mainloop: the scheduled calls are run by :py:meth:`run_pending`.
+    """
+
+    def __init__(self):
+        self.pending_calls = []
+
+    def after(self, _delay_ms, callback):
+        self.pending_calls.append(callback)
+
+    def run_pending(self, timeout_s=5.0):
+        start_time = time.time()
+        while len(self.pending_calls) > 0 and time.time() - start_time < timeout_s:
+            callback = self.pending_calls.pop(0)
+            callback()
+            time.sleep(0.001)
+
+
+class TestTkWorker(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeelsgui.tools.tk_worker`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.widget = FakeWidget()
+        self.messages = []
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def _message_callback(self, kind, *values):
+        self.messages.append((kind,) + values)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def testMessages(self):
+        """
+        Tests the messages are received in order on the polling thread.
+        """
+
+        def target(post_message, _cancel_event):
+            for index in range(3):
+                post_message("progress", index)
+            return "result"
+
+        worker = TkWorker(self.widget, target, self._message_callback, poll_interval_ms=1)
+        worker.start()
+        self.widget.run_pending()
+
+        self.assertEqual([("progress", 0), ("progress", 1), ("progress", 2), (MESSAGE_FINISHED, "result")],
+                         self.messages)
+        self.assertEqual(0, len(self.widget.pending_calls))
+
+    def testError(self):
+        """
+        Tests an exception in the target is sent as an error message.
+        """
+
+        def target(_post_message, _cancel_event):
+            raise ValueError("bad file")
+
+        worker = TkWorker(self.widget, target, self._message_callback, poll_interval_ms=1)
+        worker.start()
+        self.widget.run_pending()
+
+        self.assertEqual(1, len(self.messages))
+        self.assertEqual(MESSAGE_ERROR, self.messages[0][0])
+        self.assertIsInstance(self.messages[0][1], ValueError)
+
+    def testCancel(self):
+        """
+        Tests the cancel event is seen by the target.
+        """
+
+        def target(_post_message, cancel_event):
+            return cancel_event.wait(5.0)
+
+        worker = TkWorker(self.widget, target, self._message_callback, poll_interval_ms=1)
+        worker.start()
+        worker.cancel()
+        self.widget.run_pending()
+
+        worker.thread.join()
+
+        self.assertEqual([(MESSAGE_FINISHED, True)], self.messages)
+        self.assertFalse(worker.is_running())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import nose
+
+    nose.runmodule()
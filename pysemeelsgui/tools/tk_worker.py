@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.tools.tk_worker
+   :synopsis: Run a long task of a Tk tool on a worker thread.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Run a long task of a Tk tool on a worker thread.
+
+Tk is not thread safe: the worker thread never touches a widget, it posts messages in a queue that is polled on the Tk
+mainloop with ``after``.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import threading
+import logging
+from six.moves import queue
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+MESSAGE_FINISHED = "finished"
+MESSAGE_ERROR = "error"
+
+
+class TkWorker(object):
+    """
+    Run ``target(post_message, cancel_event)`` on a worker thread.
+
+    The messages posted by the target with ``post_message(kind, *values)`` are given to ``message_callback(kind,
+    *values)`` on the Tk mainloop. When the target ends, :py:data:`MESSAGE_FINISHED` is sent with its return value, or
+    :py:data:`MESSAGE_ERROR` with the exception.
+
+    :param widget: any Tk widget, used for ``after``.
+    """
+
+    def __init__(self, widget, target, message_callback, poll_interval_ms=100):
+        self.widget = widget
+        self.target = target
+        self.message_callback = message_callback
+        self.poll_interval_ms = poll_interval_ms
+
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="TkWorker")
+        self.thread.daemon = True
+        self.thread.start()
+        self.widget.after(self.poll_interval_ms, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def post_message(self, kind, *values):
+        self.messages.put((kind,) + values)
+
+    def _run(self):
+        try:
+            result = self.target(self.post_message, self.cancel_event)
+            self.post_message(MESSAGE_FINISHED, result)
+        except Exception as message:
+            logging.exception(message)
+            self.post_message(MESSAGE_ERROR, message)
+
+    def _poll(self):
+        finished = False
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] in (MESSAGE_FINISHED, MESSAGE_ERROR):
+                finished = True
+            self.message_callback(*message)
+
+        if not finished:
+            self.widget.after(self.poll_interval_ms, self._poll)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.zero_loss_peak_batch_fit
+   :synopsis: Fit the zero loss peak of many spectra on a process pool.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Fit the zero loss peak of many spectra on a process pool.
+
+The counts of all the spectra are copied once in a shared memory block attached by each worker, so only the row
+index is sent to a worker and only the fit results come back. The results are returned in the order of the input rows.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import os
+import os.path
+import csv
+import time
+import logging
+import optparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+RESULT_COLUMNS = ["position_eV", "fwhm_eV", "sigma_eV", "gamma_eV", "area", "height"]
+
+_worker_shared_memory = None
+_worker_counts = None
+_worker_energies_eV = None
+_worker_fit_function = None
+
+
+class ZeroLossPeakFitResult(object):
+    """
+    Fit results of one spectrum.
+
+    :ivar parameters: dict of the fit parameter name to a tuple (value, standard error).
+    :ivar error_message: None if the fit succeeded.
+    """
+
+    def __init__(self):
+        self.position_eV = np.nan
+        self.fwhm_eV = np.nan
+        self.sigma_eV = np.nan
+        self.gamma_eV = np.nan
+        self.area = np.nan
+        self.height = np.nan
+        self.parameters = {}
+        self.error_message = None
+
+    @property
+    def success(self):
+        return self.error_message is None
+
+
+def fit_zero_loss_peak(energies_eV, counts):
+    """
+    Fit the zero loss peak of one spectrum with :py:class:`ZeroLossPeak`.
+    """
+    from pysemeels.analysis.zero_loss_peak import ZeroLossPeak
+
+    result = ZeroLossPeakFitResult()
+
+    zlp = ZeroLossPeak(energies_eV, counts)
+    zlp.compute_statistics()
+    zlp.compute_fwhm()
+    zlp.fit()
+
+    result.position_eV = zlp.fit_results_position_eV
+    result.fwhm_eV = zlp.fit_results_fwhm_eV
+    result.sigma_eV = zlp.fit_results_sigma_eV
+    result.gamma_eV = zlp.fit_results_gamma_eV
+    result.area = zlp.fit_results_area
+    result.height = zlp.fit_results_height
+    for name, parameter in zlp.fit_results.params.items():
+        result.parameters[name] = (parameter.value, parameter.stderr)
+
+    return result
+
+
+def _initialize_worker(shared_memory_name, shape, dtype, energies_eV, fit_function):
+    global _worker_shared_memory, _worker_counts, _worker_energies_eV, _worker_fit_function
+
+    _worker_shared_memory = shared_memory.SharedMemory(name=shared_memory_name)
+    _worker_counts = np.ndarray(shape, dtype=dtype, buffer=_worker_shared_memory.buf)
+    _worker_energies_eV = energies_eV
+    _worker_fit_function = fit_function
+
+
+def _fit_row(row_index):
+    return _safe_fit(_worker_fit_function, _worker_energies_eV, _worker_counts[row_index])
+
+
+def _safe_fit(fit_function, energies_eV, counts):
+    try:
+        return fit_function(energies_eV, np.array(counts))
+    except Exception as message:
+        result = ZeroLossPeakFitResult()
+        result.error_message = str(message)
+        return result
+
+
+class ZeroLossPeakBatchFit(object):
+    """
+    Fit the zero loss peak of every row of a 2D counts array.
+
+    :param number_workers: number of worker processes, the number of CPU by default. With one worker the spectra are
+        fitted in the current process.
+    :param fit_function: picklable callable ``fit_function(energies_eV, counts)`` returning a
+        :py:class:`ZeroLossPeakFitResult`.
+    """
+
+    def __init__(self, energies_eV, counts, number_workers=None, fit_function=fit_zero_loss_peak):
+        self.energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        self.counts = np.ascontiguousarray(counts, dtype=np.float64)
+        if self.counts.ndim != 2:
+            raise ValueError("counts must be a 2D array, not {:d}D".format(self.counts.ndim))
+
+        if number_workers is None:
+            number_workers = os.cpu_count() or 1
+        self.number_workers = max(1, number_workers)
+        self.fit_function = fit_function
+
+        self.results = []
+        self.elapsed_time_s = 0.0
+
+    @property
+    def number_spectra(self):
+        return self.counts.shape[0]
+
+    @property
+    def throughput_spectra_per_s(self):
+        if self.elapsed_time_s > 0.0:
+            return len(self.results) / self.elapsed_time_s
+        return 0.0
+
+    def fit(self):
+        """
+        Fit all the spectra.
+
+        :return: list of :py:class:`ZeroLossPeakFitResult` in the order of the rows of the counts array.
+        """
+        start_time = time.perf_counter()
+
+        number_workers = min(self.number_workers, self.number_spectra)
+        if number_workers <= 1:
+            self.results = [_safe_fit(self.fit_function, self.energies_eV, row) for row in self.counts]
+        else:
+            self.results = self._fit_pool(number_workers)
+
+        self.elapsed_time_s = time.perf_counter() - start_time
+        logging.info("Fitted {:d} spectra with {:d} workers in {:.2f} s ({:.1f} spectra/s)".format(
+            len(self.results), max(1, number_workers), self.elapsed_time_s, self.throughput_spectra_per_s))
+
+        return self.results
+
+    def _fit_pool(self, number_workers):
+        shared_counts = shared_memory.SharedMemory(create=True, size=max(1, self.counts.nbytes))
+        try:
+            counts = np.ndarray(self.counts.shape, dtype=self.counts.dtype, buffer=shared_counts.buf)
+            counts[:] = self.counts
+
+            initargs = (shared_counts.name, self.counts.shape, self.counts.dtype.str, self.energies_eV,
+                        self.fit_function)
+            chunk_size = max(1, self.number_spectra // (4 * number_workers))
+            with ProcessPoolExecutor(max_workers=number_workers, initializer=_initialize_worker,
+                                     initargs=initargs) as executor:
+                results = list(executor.map(_fit_row, range(self.number_spectra), chunksize=chunk_size))
+
+            del counts
+        finally:
+            shared_counts.close()
+            shared_counts.unlink()
+
+        return results
+
+    def export_csv(self, file_path, labels=None):
+        if labels is None:
+            labels = [str(index) for index in range(len(self.results))]
+
+        with open(file_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            parameter_names = sorted(set(name for result in self.results for name in result.parameters))
+            header = ["spectrum"] + RESULT_COLUMNS
+            for name in parameter_names:
+                header.extend([name, name + "_stderr"])
+            header.append("error")
+            writer.writerow(header)
+
+            for label, result in zip(labels, self.results):
+                row = [label] + [getattr(result, column) for column in RESULT_COLUMNS]
+                for name in parameter_names:
+                    row.extend(result.parameters.get(name, (None, None)))
+                row.append(result.error_message or "")
+                writer.writerow(row)
+
+
+def stack_spectra(elv_files, labels):
+    """
+    Energy axis and 2D counts array of spectra, without the last channel as in the zero loss peak analysis.
+
+    :param labels: file path of each spectrum, used in the error message.
+    :raise ValueError: if a spectrum does not have the energy axis of the first one, its rows would be fitted on the
+        wrong energies.
+    """
+    energies_eV = None
+    counts = []
+    for elv_file, label in zip(elv_files, labels):
+        spectrum_energies_eV = np.asarray(elv_file.energies_eV[:-1], dtype=np.float64)
+        if energies_eV is None:
+            energies_eV = spectrum_energies_eV
+        elif len(spectrum_energies_eV) != len(energies_eV):
+            raise ValueError("Spectrum {} has {:d} channels instead of {:d}".format(label, len(spectrum_energies_eV),
+                                                                                  len(energies_eV)))
+        elif not np.allclose(spectrum_energies_eV, energies_eV):
+            raise ValueError("Spectrum {} does not have the energy axis of the first spectrum".format(label))
+        counts.append(elv_file.counts[:-1])
+
+    if energies_eV is None:
+        return np.zeros(0), np.zeros((0, 0))
+    return energies_eV, np.array(counts, dtype=np.float64)
+
+
+def read_elv_files(file_paths):
+    """
+    Read .elv files into an energy axis and a 2D counts array, without the last channel.
+
+    :raise ValueError: if the files do not have the same energy axis.
+    """
+    from pysemeels.hitachi.eels_su.elv_file import ElvFile
+
+    elv_files = []
+    for file_path in file_paths:
+        with open(file_path, 'r') as elv_text_file:
+            elv_file = ElvFile()
+            elv_file.read(elv_text_file)
+        elv_files.append(elv_file)
+
+    return stack_spectra(elv_files, file_paths)
+
+
+def find_elv_files(paths):
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, file_names in os.walk(path):
+                file_paths.extend(os.path.join(root, file_name) for file_name in file_names
+                                  if os.path.splitext(file_name)[1] == ".elv")
+        elif os.path.splitext(path)[1] == ".elv":
+            file_paths.append(path)
+
+    return sorted(file_paths)
+
+
+def main(argv=None):
+    """
+    Headless entry point: fit all the .elv files given as arguments (files or folders).
+    """
+    option_parser = optparse.OptionParser(usage="%prog [options] elv_files_or_folders")
+    option_parser.add_option("-j", "--jobs", action="store", type="int", dest="number_workers", default=None,
+                             help="Number of worker processes (default: number of CPU)")
+    option_parser.add_option("-o", "--output", action="store", type="string", dest="output_file",
+                             default="zero_loss_peak_fit.csv", help="CSV file for the fit results")
+
+    options, arguments = option_parser.parse_args(argv)
+
+    file_paths = find_elv_files(arguments)
+    if len(file_paths) == 0:
+        option_parser.error("No .elv file found")
+
+    energies_eV, counts = read_elv_files(file_paths)
+
+    batch_fit = ZeroLossPeakBatchFit(energies_eV, counts, number_workers=options.number_workers)
+    batch_fit.fit()
+    batch_fit.export_csv(options.output_file, labels=file_paths)
+
+    print("{:d} spectra in {:.2f} s: {:.1f} spectra/s".format(len(batch_fit.results), batch_fit.elapsed_time_s,
+                                                              batch_fit.throughput_spectra_per_s))
+
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    import sys
+
+    logging.getLogger().setLevel(logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.zero_loss_peak_drift
+   :synopsis: History of the zero loss peak position and FWHM during an acquisition session.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+History of the zero loss peak position and FWHM during an acquisition session.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import csv
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.zero_loss_peak_stack import ZeroLossPeakStack
+
+# Globals and constants variables.
+DRIFT_DTYPE = np.dtype([("index", np.int64),
+                        ("time_s", np.float64),
+                        ("position_eV", np.float64),
+                        ("fwhm_eV", np.float64),
+                        ("asymmetry", np.float64)])
+DRIFT_COLUMNS = DRIFT_DTYPE.names + ("file_path",)
+
+
+class ZeroLossPeakDriftHistory(object):
+    """
+    Append-only history of zero loss peak results.
+
+    The results are stored in a structured array whose capacity is doubled when full, so appending a spectrum is
+    amortized O(1) and the earlier results are never recomputed.
+    """
+
+    def __init__(self, initial_capacity=256):
+        self._data = np.zeros(max(1, initial_capacity), dtype=DRIFT_DTYPE)
+        self._size = 0
+        self.file_paths = []
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def data(self):
+        """
+        View on the valid rows of the history.
+        """
+        return self._data[:self._size]
+
+    @property
+    def index(self):
+        return self.data["index"]
+
+    @property
+    def time_s(self):
+        return self.data["time_s"]
+
+    @property
+    def position_eV(self):
+        return self.data["position_eV"]
+
+    @property
+    def fwhm_eV(self):
+        return self.data["fwhm_eV"]
+
+    @property
+    def asymmetry(self):
+        return self.data["asymmetry"]
+
+    def append(self, time_s, position_eV, fwhm_eV, asymmetry, file_path=None):
+        if self._size == len(self._data):
+            new_data = np.zeros(2 * len(self._data), dtype=DRIFT_DTYPE)
+            new_data[:self._size] = self._data
+            self._data = new_data
+
+        self._data[self._size] = (self._size, time_s, position_eV, fwhm_eV, asymmetry)
+        self._size += 1
+        self.file_paths.append(file_path)
+
+        return self._size - 1
+
+    def append_spectrum(self, energies_eV, counts, time_s, file_path=None):
+        """
+        Analyze one spectrum and append its results.
+
+        :return: the index of the new row.
+        """
+        zlp_stack = ZeroLossPeakStack(energies_eV, counts)
+        zlp_stack.compute_fwhm()
+
+        return self.append(time_s, zlp_stack.position_eV[0], zlp_stack.fwhm_eV[0], zlp_stack.asymmetry[0], file_path)
+
+    def clear(self):
+        self._size = 0
+        self.file_paths = []
+
+    def export_csv(self, file_path):
+        with open(file_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(DRIFT_COLUMNS)
+            for row, spectrum_file_path in zip(self.data, self.file_paths):
+                values = [repr(float(row[name])) for name in DRIFT_DTYPE.names[1:]]
+                writer.writerow([int(row["index"])] + values + [spectrum_file_path or ""])
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.zero_loss_peak_drift_widget
+   :synopsis: Widget to follow the zero loss peak drift.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Widget to follow the zero loss peak drift.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import os.path
+import time
+
+# Third party modules.
+from qtpy.QtWidgets import QDockWidget, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QComboBox, QFileDialog
+from qtpy.QtCore import Qt
+import numpy as np
+
+import qtpy
+if qtpy.API == 'pyqt5':
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+elif qtpy.API == 'pyqt':
+    from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+# Local modules.
+
+# Project modules.
+from pysemeelsgui.zero_loss_peak_drift import ZeroLossPeakDriftHistory
+
+# Globals and constants variables.
+X_AXIS_INDEX = "Spectrum index"
+X_AXIS_TIME = "Time (s)"
+
+
+class ZeroLossPeakDriftWidget(QDockWidget):
+    def __init__(self, parent, spectra):
+        super(ZeroLossPeakDriftWidget, self).__init__("Zero loss peak drift", parent)
+
+        self.spectra = spectra
+        self.history = ZeroLossPeakDriftHistory()
+
+        main_widget = QWidget()
+        main_layout = QVBoxLayout()
+        main_widget.setLayout(main_layout)
+
+        self.setObjectName("zero_loss_peak_drift_dock")
+        self.setAllowedAreas(Qt.AllDockWidgetAreas)
+
+        self.fig = Figure(figsize=(3, 3), dpi=100)
+        self.axes_position = self.fig.add_subplot(211)
+        self.axes_fwhm = self.fig.add_subplot(212, sharex=self.axes_position)
+        self.line_position, = self.axes_position.plot([], [], '.-')
+        self.line_fwhm, = self.axes_fwhm.plot([], [], '.-')
+        self.axes_position.set_ylabel(r"Position (eV)")
+        self.axes_fwhm.set_ylabel(r"FWHM (eV)")
+        self.axes_fwhm.set_xlabel(X_AXIS_INDEX)
+
+        self.canvas = FigureCanvas(self.fig)
+        self.canvas.setParent(main_widget)
+        main_layout.addWidget(self.canvas)
+
+        buttons_layout = QHBoxLayout()
+        self.x_axis_combobox = QComboBox(self)
+        self.x_axis_combobox.addItems([X_AXIS_INDEX, X_AXIS_TIME])
+        self.x_axis_combobox.currentIndexChanged.connect(self.update_figure)
+        buttons_layout.addWidget(self.x_axis_combobox)
+
+        clear_button = QPushButton("Clear", self)
+        clear_button.setToolTip('Clear the drift history')
+        clear_button.clicked.connect(self.clear_history)
+        buttons_layout.addWidget(clear_button)
+
+        export_button = QPushButton("Export CSV", self)
+        export_button.setToolTip('Export the drift table in a CSV file')
+        export_button.clicked.connect(self.export_csv)
+        buttons_layout.addWidget(export_button)
+
+        main_layout.addLayout(buttons_layout)
+
+        self.setWidget(main_widget)
+
+        self.spectra.add_listener(self.add_spectrum)
+
+        self.setVisible(False)
+
+    def add_spectrum(self, elv_file, file_path=None):
+        """
+        Analyze only the new spectrum, append it to the history and update the plot.
+        """
+        if file_path is not None and os.path.isfile(file_path):
+            time_s = os.path.getmtime(file_path)
+        else:
+            time_s = time.time()
+
+        self.history.append_spectrum(elv_file.energies_eV[:-1], np.array(elv_file.counts[:-1]), time_s, file_path)
+        self.update_figure()
+
+    def update_figure(self, *args):
+        if self.x_axis_combobox.currentText() == X_AXIS_TIME and len(self.history) > 0:
+            x_values = self.history.time_s - self.history.time_s[0]
+        else:
+            x_values = self.history.index
+
+        self.line_position.set_data(x_values, self.history.position_eV)
+        self.line_fwhm.set_data(x_values, self.history.fwhm_eV)
+        self.axes_fwhm.set_xlabel(self.x_axis_combobox.currentText())
+
+        for axes in [self.axes_position, self.axes_fwhm]:
+            axes.relim()
+            axes.autoscale_view()
+
+        self.canvas.draw_idle()
+
+    def clear_history(self):
+        self.history.clear()
+        self.update_figure()
+
+    def export_csv(self):
+        file_path, _filter = QFileDialog.getSaveFileName(self, "Export zero loss peak drift", "",
+                                                         "CSV file (*.csv)")
+        if file_path:
+            self.history.export_csv(file_path)
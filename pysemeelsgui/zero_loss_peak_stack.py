@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeelsgui.zero_loss_peak_stack
+   :synopsis: Vectorized zero loss peak analysis of a stack of spectra.
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Vectorized zero loss peak analysis of a stack of spectra.
+
+All the spectra of the stack are analyzed at once with numpy broadcasting: the position of the peak is refined with a
+parabola through the three channels around the maximum and the FWHM is found by linear interpolation of the half
+maximum crossing on each side of the peak.
+"""
+
+###############################################################################
+# GUI for pySEM-EELS project.
+# Copyright (C) 2017  Hendrix Demers
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+###############################################################################
+
+# Standard library modules.
+import time
+import logging
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+
+
+class ZeroLossPeakStack(object):
+    """
+    Zero loss peak position, FWHM and asymmetry of every spectrum of a stack.
+
+    :param energies_eV: energy axis, either 1D (shared by all the spectra) or 2D with the same shape as *counts*.
+    :param counts: 2D array of counts, one spectrum per row. A 1D array is analyzed as a stack of one spectrum.
+    """
+
+    def __init__(self, energies_eV, counts):
+        counts = np.asarray(counts, dtype=np.float64)
+        if counts.ndim == 1:
+            counts = counts[np.newaxis, :]
+        if counts.ndim != 2:
+            raise ValueError("counts must be a 1D or 2D array, not {:d}D".format(counts.ndim))
+
+        energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        if energies_eV.shape[-1] != counts.shape[-1]:
+            raise ValueError("Energy axis has {:d} channels, counts have {:d}".format(energies_eV.shape[-1],
+                                                                                    counts.shape[-1]))
+
+        self.counts = counts
+        self.energies_eV = np.broadcast_to(energies_eV, counts.shape)
+
+        self.maximum_index = None
+        self.height = None
+        self.position_eV = None
+        self.left_eV = None
+        self.right_eV = None
+        self.fwhm_eV = None
+        self.asymmetry = None
+
+    @property
+    def number_spectra(self):
+        return self.counts.shape[0]
+
+    def compute_fwhm(self):
+        """
+        Compute the position, FWHM and asymmetry of all the spectra.
+
+        The asymmetry is the ratio of the right half width over the left half width, both measured from the refined
+        peak position; a symmetric peak gives 1. Values are NaN when a half maximum crossing is not inside the
+        spectrum.
+        """
+        counts = self.counts
+        number_spectra, number_channels = counts.shape
+        rows = np.arange(number_spectra)
+        channels = np.arange(number_channels)
+
+        maximum_index = np.argmax(counts, axis=1)
+        height = counts[rows, maximum_index]
+        half_maximum = height / 2.0
+
+        self.maximum_index = maximum_index
+        self.height = height
+        self.position_eV = self._refine_position(maximum_index)
+
+        below = counts < half_maximum[:, np.newaxis]
+
+        # Last channel below half maximum on the left of the peak and first one on the right.
+        left_index = np.where(below & (channels < maximum_index[:, np.newaxis]), channels, -1).max(axis=1)
+        right_index = np.where(below & (channels > maximum_index[:, np.newaxis]), channels, number_channels).min(axis=1)
+
+        has_left = left_index >= 0
+        has_right = right_index < number_channels
+
+        left_low = np.clip(left_index, 0, number_channels - 2)
+        self.left_eV = self._interpolate_crossing(left_low, left_low + 1, half_maximum)
+        self.left_eV[~has_left] = np.nan
+
+        right_high = np.clip(right_index, 1, number_channels - 1)
+        self.right_eV = self._interpolate_crossing(right_high - 1, right_high, half_maximum)
+        self.right_eV[~has_right] = np.nan
+
+        self.fwhm_eV = self.right_eV - self.left_eV
+
+        left_width_eV = self.position_eV - self.left_eV
+        right_width_eV = self.right_eV - self.position_eV
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.asymmetry = np.where(left_width_eV > 0.0, right_width_eV / left_width_eV, np.nan)
+
+    def _interpolate_crossing(self, index_1, index_2, half_maximum):
+        rows = np.arange(self.number_spectra)
+        counts_1 = self.counts[rows, index_1]
+        counts_2 = self.counts[rows, index_2]
+        energies_1_eV = self.energies_eV[rows, index_1]
+        energies_2_eV = self.energies_eV[rows, index_2]
+
+        delta_counts = counts_2 - counts_1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(delta_counts != 0.0, (half_maximum - counts_1) / delta_counts, 0.5)
+
+        return energies_1_eV + fraction * (energies_2_eV - energies_1_eV)
+
+    def _refine_position(self, maximum_index):
+        rows = np.arange(self.number_spectra)
+        number_channels = self.counts.shape[1]
+
+        center_index = np.clip(maximum_index, 1, number_channels - 2)
+        counts_left = self.counts[rows, center_index - 1]
+        counts_center = self.counts[rows, center_index]
+        counts_right = self.counts[rows, center_index + 1]
+
+        denominator = counts_left - 2.0 * counts_center + counts_right
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset = np.where(denominator != 0.0, 0.5 * (counts_left - counts_right) / denominator, 0.0)
+        offset = np.clip(offset, -0.5, 0.5)
+
+        on_edge = (maximum_index == 0) | (maximum_index == number_channels - 1)
+        offset[on_edge] = 0.0
+
+        channel_width_eV = (self.energies_eV[rows, center_index + 1] - self.energies_eV[rows, center_index - 1]) / 2.0
+        return self.energies_eV[rows, maximum_index] + offset * channel_width_eV
+
+
+def create_gaussian_stack(number_spectra, number_channels=1024, channel_width_eV=0.05, fwhm_eV=0.8,
+                          noise=True, seed=0):
+    """
+    Create a stack of gaussian zero loss peaks with random positions, used for tests and benchmarks.
+    """
+    random_state = np.random.RandomState(seed)
+    energies_eV = (np.arange(number_channels) - number_channels / 4.0) * channel_width_eV
+    positions_eV = random_state.uniform(-1.0, 1.0, number_spectra)
+    sigma_eV = fwhm_eV / (2.0 * np.sqrt(2.0 * np.log(2.0)))
+
+    counts = 10000.0 * np.exp(-0.5 * ((energies_eV[np.newaxis, :] - positions_eV[:, np.newaxis]) / sigma_eV) ** 2)
+    if noise:
+        counts = random_state.poisson(counts + 10.0).astype(np.float64)
+
+    return energies_eV, counts, positions_eV
+
+
+def benchmark(number_spectra=1000, number_channels=1024):
+    """
+    Compare the vectorized stack analysis with the per-spectrum :py:class:`ZeroLossPeak` analysis.
+
+    :return: dict with the elapsed time in second of each path and the speedup.
+    """
+    energies_eV, counts, _positions_eV = create_gaussian_stack(number_spectra, number_channels)
+
+    start_time = time.perf_counter()
+    zlp_stack = ZeroLossPeakStack(energies_eV, counts)
+    zlp_stack.compute_fwhm()
+    stack_time_s = time.perf_counter() - start_time
+    logging.info("Stack: {:d} spectra in {:.4f} s".format(number_spectra, stack_time_s))
+
+    results = {"number_spectra": number_spectra, "number_channels": number_channels, "stack_time_s": stack_time_s}
+
+    try:
+        from pysemeels.analysis.zero_loss_peak import ZeroLossPeak
+    except ImportError as message:
+        logging.warning("Per-spectrum path not available: {}".format(message))
+        return results
+
+    start_time = time.perf_counter()
+    for spectrum_counts in counts:
+        zlp = ZeroLossPeak(energies_eV, spectrum_counts)
+        zlp.compute_statistics()
+        zlp.compute_fwhm()
+    object_time_s = time.perf_counter() - start_time
+    logging.info("ZeroLossPeak: {:d} spectra in {:.4f} s".format(number_spectra, object_time_s))
+
+    results["object_time_s"] = object_time_s
+    results["speedup"] = object_time_s / stack_time_s
+    logging.info("Speedup: {:.1f}x".format(results["speedup"]))
+
+    return results
+
+
+if __name__ == '__main__':  # pragma: no cover
+    logging.getLogger().setLevel(logging.INFO)
+    benchmark()
@@ -32,17 +32,44 @@ Widget to analyze zero loss peak.
 
 # Third party modules.
 from qtpy.QtWidgets import QDockWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout, QWidget, QGroupBox
-from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QFileDialog
+from qtpy.QtCore import Qt, QThread, Signal
 import numpy as np
 
 # Local modules.
 from pysemeels.analysis.zero_loss_peak import ZeroLossPeak
 
 # Project modules.
+from pysemeelsgui.zero_loss_peak_batch_fit import ZeroLossPeakBatchFit
 
 # Globals and constants variables.
 
 
+class BatchFitThread(QThread):
+    """
+    Fit all the spectra of a :py:class:`ZeroLossPeakBatchFit` outside the GUI thread.
+
+    The results are given by the ``fit_finished`` signal, or the error message by ``fit_failed``, both received in the
+    GUI thread.
+    """
+    fit_finished = Signal(object)
+    fit_failed = Signal(str)
+
+    def __init__(self, batch_fit, parent=None):
+        super(BatchFitThread, self).__init__(parent)
+
+        self.batch_fit = batch_fit
+
+    def run(self):
+        try:
+            self.batch_fit.fit()
+        except Exception as message:
+            self.fit_failed.emit(str(message))
+            return
+
+        self.fit_finished.emit(self.batch_fit)
+
+
 class ZeroLossPeakWidget(QDockWidget):
     def __init__(self, parent, spectra):
         super(ZeroLossPeakWidget, self).__init__("Zero loss peak", parent)
@@ -122,6 +149,18 @@ class ZeroLossPeakWidget(QDockWidget):
         main_layout.addWidget(results_fit_groupbox)
         main_layout.addStretch(1)
 
+        self.fit_all_button = QPushButton("Fit all", self)
+        self.fit_all_button.setToolTip('Fit the zero loss peak of all opened spectra on all the CPU')
+        self.fit_all_button.resize(self.fit_all_button.sizeHint())
+        self.fit_all_button.clicked.connect(self.fit_all_zlp)
+        main_layout.addWidget(self.fit_all_button)
+
+        self.label_value_fit_all = QLabel("")
+        main_layout.addWidget(self.label_value_fit_all)
+
+        self.batch_fit_thread = None
+        self.batch_fit_file_paths = []
+
         self.setWidget(main_widget)
 
         self.setVisible(False)
@@ -165,3 +204,41 @@ class ZeroLossPeakWidget(QDockWidget):
             parent.main_widget.spectrum_canvas.fig.clear()
             zlp.fit_results.plot(fig=parent.main_widget.spectrum_canvas.fig)
             parent.main_widget.spectrum_canvas.draw()
+
+    def fit_all_zlp(self):
+        if self.batch_fit_thread is not None:
+            return
+
+        try:
+            file_paths, energies_eV, counts = self.spectra.get_stack()
+        except ValueError as message:
+            self.label_value_fit_all.setText(str(message))
+            return
+        if len(file_paths) == 0:
+            return
+
+        self.batch_fit_file_paths = file_paths
+        self.batch_fit_thread = BatchFitThread(ZeroLossPeakBatchFit(energies_eV, counts), self)
+        self.batch_fit_thread.fit_finished.connect(self.end_fit_all_zlp)
+        self.batch_fit_thread.fit_failed.connect(self.fail_fit_all_zlp)
+        self.batch_fit_thread.finished.connect(self.batch_fit_thread.deleteLater)
+
+        self.fit_all_button.setEnabled(False)
+        self.label_value_fit_all.setText("Fitting {:d} spectra ...".format(len(file_paths)))
+        self.batch_fit_thread.start()
+
+    def end_fit_all_zlp(self, batch_fit):
+        self.batch_fit_thread = None
+        self.fit_all_button.setEnabled(True)
+        self.label_value_fit_all.setText("{:d} spectra: {:.1f} spectra/s".format(len(batch_fit.results),
+                                                                               batch_fit.throughput_spectra_per_s))
+
+        file_path, _filter = QFileDialog.getSaveFileName(self, "Export zero loss peak fit results", "",
+                                                         "CSV file (*.csv)")
+        if file_path:
+            batch_fit.export_csv(file_path, labels=self.batch_fit_file_paths)
+
+    def fail_fit_all_zlp(self, message):
+        self.batch_fit_thread = None
+        self.fit_all_button.setEnabled(True)
+        self.label_value_fit_all.setText("Fit all failed: {}".format(message))
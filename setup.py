@@ -13,6 +13,7 @@ requirements = [
     "qtpy",
     "matplotlib",
     "numpy",
+    "h5py",
     "six",
     "pywinauto",
 ]
@@ -36,6 +37,15 @@ setup(
                  'pysemeelsgui'},
     include_package_data=True,
     install_requires=requirements,
+    entry_points={
+        'console_scripts': [
+            'pysemeelsgui-fit-zlp=pysemeelsgui.zero_loss_peak_batch_fit:main',
+            'pysemeelsgui-batch=pysemeelsgui.tools.batch_processing_cli:main',
+            'pysemeelsgui-batch-benchmark=pysemeelsgui.tools.batch_benchmark:main',
+            'pysemeelsgui-acquisition-plan=pysemeelsgui.tools.acquisition_plan:main',
+            'pysemeelsgui-acquisition-monitor=pysemeelsgui.tools.acquisition_monitor:main',
+        ],
+    },
     license="GNU General Public License v3",
     zip_safe=False,
     keywords='pysemeelsgui',